@@ -53,6 +53,10 @@ except ImportError:
     CACHE_AVAILABLE = False
     ImageCacheSystem = None
 
+# Analysis cache parameters (mode, prompt, model) for UNIMERNET results. Image descriptions are
+# cached by IMG2TEXT itself under its own mode/prompt/model key in the same store.
+UNIMERNET_CACHE_PARAMS = ("unimernet", "", "unimernet")
+
 class UnifiedImageProcessor:
     """Unified image processor that routes to IMG2TEXT or UNIMERNET based on content type"""
     
@@ -125,25 +129,15 @@ class UnifiedImageProcessor:
             mode: Processing mode (for IMG2TEXT)
             
         Returns:
-            Cache key or None if cache not available
+            Cache key or None if cache not available (or the result is cached by IMG2TEXT)
         """
-        if not self.cache_system:
+        if not self.cache_system or content_type not in ("formula", "table"):
             return None
         
         try:
             with open(image_path, 'rb') as f:
                 image_data = f.read()
-            
-            # Create composite key including processing parameters
-            import hashlib
-            param_hash = hashlib.md5(f"{content_type}:{mode}".encode()).hexdigest()[:8]
-            
-            # Use cache system's dual hash but append parameter hash
-            sha256_hash = hashlib.sha256(image_data).hexdigest()
-            md5_hash = hashlib.md5(image_data).hexdigest()
-            composite_hash = sha256_hash[:32] + md5_hash[:16] + sha256_hash[32:48]
-            
-            return f"{composite_hash}_{param_hash}"
+            return self.cache_system.get_analysis_key(image_data, *UNIMERNET_CACHE_PARAMS)
         except Exception as e:
             logger.warning(f"Failed to generate cache key: {e}")
             return None
@@ -158,9 +152,9 @@ class UnifiedImageProcessor:
             mode: Processing mode
             
         Returns:
-            Cached result or None if not found
+            Cached result or None if not found (image descriptions are looked up by IMG2TEXT)
         """
-        if not self.cache_system:
+        if not self.cache_system or content_type not in ("formula", "table"):
             return None
         
         try:
@@ -168,7 +162,8 @@ class UnifiedImageProcessor:
                 image_data = f.read()
             
             # Check if we have cached description
-            cached_description = self.cache_system.get_cached_description(image_data)
+            cached = self.cache_system.get_cached_analysis(image_data, *UNIMERNET_CACHE_PARAMS)
+            cached_description = cached[0] if cached else None
             if cached_description:
                 logger.info(f"📋 Found cached data for {Path(image_path).name}")
                 # Try to parse as JSON (for structured results)
@@ -211,7 +206,8 @@ class UnifiedImageProcessor:
             image_path: Path to the image file
             result: Processing result to cache
         """
-        if not self.cache_system or not result.get('success'):
+        # IMG2TEXT stores image descriptions in the shared cache itself
+        if not self.cache_system or not result.get('success') or result.get('content_type') not in ("formula", "table"):
             return
         
         try:
@@ -223,12 +219,13 @@ class UnifiedImageProcessor:
             result_copy.pop('from_cache', None)  # Remove cache flag
             
             description = json.dumps(result_copy, ensure_ascii=False, indent=2)
-            self.cache_system.store_image_and_description(image_data, description, image_path)
+            self.cache_system.store_analysis(image_data, *UNIMERNET_CACHE_PARAMS, description, image_path)
             logger.info(f"Stored result in cache for {Path(image_path).name}")
         except Exception as e:
             logger.warning(f"Failed to store result in cache: {e}")
     
-    def process_with_img2text(self, image_path: str, mode: str = "academic", custom_prompt: str = None) -> Dict[str, Any]:
+    def process_with_img2text(self, image_path: str, mode: str = "academic", custom_prompt: str = None,
+                              use_cache: bool = True) -> Dict[str, Any]:
         """
         Process image using IMG2TEXT tool.
         
@@ -236,6 +233,7 @@ class UnifiedImageProcessor:
             image_path: Path to the image file
             mode: Processing mode ("academic", "general", "code_snippet")
             custom_prompt: Custom prompt for image analysis
+            use_cache: Let IMG2TEXT serve the result from the shared analysis cache
             
         Returns:
             Processing result dictionary
@@ -253,6 +251,8 @@ class UnifiedImageProcessor:
                 cmd = [str(self.run_tool), "--show", "IMG2TEXT", image_path, "--mode", mode]
                 if custom_prompt:
                     cmd.extend(["--prompt", custom_prompt])
+                if not use_cache:
+                    cmd.append("--no-cache")
                 result = subprocess.run(cmd, capture_output=True, text=True, timeout=120)
                 
                 if result.returncode == 0:
@@ -306,6 +306,8 @@ class UnifiedImageProcessor:
                 cmd.extend([image_path, "--mode", mode])
                 if custom_prompt:
                     cmd.extend(["--prompt", custom_prompt])
+                if not use_cache:
+                    cmd.append("--no-cache")
                 result = subprocess.run(cmd, capture_output=True, text=True, timeout=120)
                 
                 if result.returncode == 0:
@@ -598,7 +600,7 @@ class UnifiedImageProcessor:
             result = self.process_with_unimernet(processing_image_path, detected_type)
         else:  # detected_type == "image"
             logger.info(f"🔄 Processing image with IMG2TEXT: {Path(image_path).name}")
-            result = self.process_with_img2text(image_path, mode, custom_prompt)
+            result = self.process_with_img2text(image_path, mode, custom_prompt, use_cache=use_cache and not force)
         
         process_elapsed = (datetime.now() - process_start).total_seconds()
         total_elapsed = (datetime.now() - start_time).total_seconds()
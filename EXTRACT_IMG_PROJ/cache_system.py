@@ -8,11 +8,18 @@ import os
 import json
 import hashlib
 import shutil
+import threading
+from contextlib import contextmanager
 from pathlib import Path
 from datetime import datetime
 from typing import Dict, Optional, Tuple, List
 import logging
 
+try:
+    import fcntl
+except ImportError:  # Windows: only the in-process lock is used
+    fcntl = None
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -41,12 +48,14 @@ class ImageCacheSystem:
         # Images and cache file are directly under EXTRACT_IMG_DATA
         self.images_dir = self.base_dir / "images"
         self.cache_file = self.base_dir / "image_cache.json"
+        self.stats_file = self.base_dir / "analysis_stats.json"
         
         # Create directories
         self.images_dir.mkdir(parents=True, exist_ok=True)
         
         # Load existing cache
         self.cache = self._load_cache()
+        self._lock = threading.Lock()
     
     def _load_cache(self) -> Dict:
         """Load cache from JSON file."""
@@ -59,13 +68,51 @@ class ImageCacheSystem:
                 return {}
         return {}
     
-    def _save_cache(self):
-        """Save cache to JSON file."""
+    @contextmanager
+    def _file_lock(self, path: Path):
+        """Exclusive lock shared by all processes (and threads) updating the given file."""
+        with self._lock:
+            if fcntl is None:
+                yield
+                return
+            with open(path.with_name(path.name + ".lock"), 'a') as lock_file:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+    
+    @staticmethod
+    def _entry_time(entry: Dict) -> datetime:
+        """Timestamp of a cache entry (datetime.min if missing or unparsable)."""
         try:
-            with open(self.cache_file, 'w', encoding='utf-8') as f:
-                json.dump(self.cache, f, indent=2, ensure_ascii=False)
-        except Exception as e:
-            logger.error(f"Failed to save cache: {e}")
+            return datetime.fromisoformat(entry['timestamp'])
+        except (KeyError, TypeError, ValueError):
+            return datetime.min
+    
+    def _save_cache(self, updates: Dict = None):
+        """
+        Merge entries into the cache file (atomic replace, safe for concurrent readers).
+        
+        The file is re-read under an exclusive lock and merged with the in-memory
+        cache plus ``updates``; for each key the entry with the newer timestamp wins,
+        so a process holding a stale copy never overwrites entries stored since.
+        """
+        with self._file_lock(self.cache_file):
+            merged = self._load_cache()
+            for key, entry in list(self.cache.items()) + list((updates or {}).items()):
+                if key not in merged or self._entry_time(entry) >= self._entry_time(merged[key]):
+                    merged[key] = entry
+            self.cache = merged
+            tmp_file = self.cache_file.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+            try:
+                with open(tmp_file, 'w', encoding='utf-8') as f:
+                    json.dump(merged, f, indent=2, ensure_ascii=False)
+                os.replace(tmp_file, self.cache_file)
+            except Exception as e:
+                logger.error(f"Failed to save cache: {e}")
+                if tmp_file.exists():
+                    tmp_file.unlink()
     
     def _calculate_dual_hash(self, data: bytes) -> Tuple[str, str]:
         """
@@ -144,7 +191,7 @@ class ImageCacheSystem:
                 return composite_hash
         
         # Store cache entry
-        self.cache[composite_hash] = {
+        self._save_cache({composite_hash: {
             'description': description,
             'timestamp': datetime.now().isoformat(),
             'sha256': sha256_hash,
@@ -152,16 +199,133 @@ class ImageCacheSystem:
             'image_path': str(image_path),
             'source_path': source_path,
             'file_size': len(image_data)
-        }
-        
-        self._save_cache()
+        }})
         logger.info(f"Cached description for image {composite_hash[:12]}...")
         return composite_hash
     
+    def get_analysis_key(self, image_data: bytes, mode: str, prompt: str, model: str) -> str:
+        """
+        Generate cache key for an analysis result.
+        
+        The key combines the composite image hash with a hash of the analysis
+        parameters, so the same image analysed with a different mode, prompt
+        or model gets its own entry.
+        
+        Format: <composite_hash>_<param_hash>
+        """
+        sha256_hash, md5_hash = self._calculate_dual_hash(image_data)
+        composite_hash = self._get_composite_hash(sha256_hash, md5_hash)
+        param_hash = hashlib.md5(f"{mode}:{model}:{prompt}".encode('utf-8')).hexdigest()[:8]
+        return f"{composite_hash}_{param_hash}"
+    
+    def get_cached_analysis(self, image_data: bytes, mode: str, prompt: str, model: str,
+                            max_age: Optional[float] = None) -> Optional[Tuple[str, bool]]:
+        """
+        Look up a cached analysis result and record a hit or miss.
+        
+        Args:
+            image_data: Image bytes data
+            mode: Analysis mode
+            prompt: Prompt instruction sent to the model
+            model: Model name
+            max_age: Seconds after which an entry is considered stale (None = never)
+            
+        Returns:
+            Tuple of (description, is_stale) if cached, None otherwise
+        """
+        key = self.get_analysis_key(image_data, mode, prompt, model)
+        entry = self.cache.get(key)
+        if entry is None:
+            # Another process may have stored it after we loaded the cache
+            entry = self._load_cache().get(key)
+            if entry is not None:
+                self.cache[key] = entry
+        
+        if entry is None:
+            self.record_lookup('miss')
+            return None
+        
+        is_stale = False
+        if max_age is not None:
+            is_stale = (datetime.now() - self._entry_time(entry)).total_seconds() > max_age
+            if is_stale:
+                # The entry may have been refreshed (e.g. by a revalidation process) since we loaded it
+                disk_entry = self._load_cache().get(key)
+                if disk_entry is not None and self._entry_time(disk_entry) > self._entry_time(entry):
+                    entry = self.cache[key] = disk_entry
+                    is_stale = (datetime.now() - self._entry_time(entry)).total_seconds() > max_age
+        
+        self.record_lookup('stale' if is_stale else 'hit')
+        logger.info(f"Found {'stale ' if is_stale else ''}cached analysis {key[:12]}...")
+        return entry['description'], is_stale
+    
+    def store_analysis(self, image_data: bytes, mode: str, prompt: str, model: str,
+                       description: str, source_path: str = None) -> str:
+        """
+        Store an analysis result keyed by image content and analysis parameters.
+        
+        Returns:
+            Cache key of the stored entry
+        """
+        key = self.get_analysis_key(image_data, mode, prompt, model)
+        sha256_hash, md5_hash = self._calculate_dual_hash(image_data)
+        image_path = self.images_dir / self._get_image_filename(self._get_composite_hash(sha256_hash, md5_hash))
+        
+        if not image_path.exists():
+            try:
+                tmp_image = image_path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+                with open(tmp_image, 'wb') as f:
+                    f.write(image_data)
+                os.replace(tmp_image, image_path)
+            except Exception as e:
+                logger.error(f"Failed to store image {image_path.name}: {e}")
+        
+        self._save_cache({key: {
+            'description': description,
+            'timestamp': datetime.now().isoformat(),
+            'sha256': sha256_hash,
+            'md5': md5_hash,
+            'image_path': str(image_path),
+            'source_path': source_path,
+            'file_size': len(image_data),
+            'mode': mode,
+            'model': model
+        }})
+        logger.info(f"Cached analysis {key[:12]}...")
+        return key
+    
+    def record_lookup(self, outcome: str):
+        """
+        Record a cache lookup outcome ('hit', 'stale' or 'miss') in the stats file.
+        """
+        with self._file_lock(self.stats_file):
+            stats = self.get_lookup_stats()
+            stats[outcome] = stats.get(outcome, 0) + 1
+            try:
+                tmp_file = self.stats_file.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+                with open(tmp_file, 'w', encoding='utf-8') as f:
+                    json.dump(stats, f, indent=2)
+                os.replace(tmp_file, self.stats_file)
+            except Exception as e:
+                logger.error(f"Failed to save lookup stats: {e}")
+    
+    def get_lookup_stats(self) -> Dict:
+        """Get accumulated hit/stale/miss counts."""
+        stats = {'hit': 0, 'stale': 0, 'miss': 0}
+        if self.stats_file.exists():
+            try:
+                with open(self.stats_file, 'r', encoding='utf-8') as f:
+                    stats.update(json.load(f))
+            except (json.JSONDecodeError, OSError):
+                pass
+        return stats
+    
     def get_cache_stats(self) -> Dict:
         """Get cache statistics."""
         total_images = len(self.cache)
         total_size = sum(entry.get('file_size', 0) for entry in self.cache.values())
+        lookups = self.get_lookup_stats()
+        total_lookups = sum(lookups.values())
         
         return {
             'cache_available': True,
@@ -169,7 +333,11 @@ class ImageCacheSystem:
             'total_size_bytes': total_size,
             'total_size_mb': round(total_size / (1024 * 1024), 2),
             'cache_dir': str(self.base_dir),
-            'images_dir': str(self.images_dir)
+            'images_dir': str(self.images_dir),
+            'hits': lookups['hit'],
+            'stale_hits': lookups['stale'],
+            'misses': lookups['miss'],
+            'hit_rate': round((lookups['hit'] + lookups['stale']) / total_lookups, 3) if total_lookups else 0.0
         }
     
     def cleanup_orphaned_images(self) -> int:
@@ -224,6 +392,7 @@ class ImageCacheSystem:
             return 0
         
         migrated_count = 0
+        migrated = {}
         
         for old_hash, old_entry in old_cache.items():
             if isinstance(old_entry, dict) and 'description' in old_entry:
@@ -231,7 +400,7 @@ class ImageCacheSystem:
                 # So we'll store them with their original hash as a fallback
                 fallback_hash = f"migrated_{old_hash}"
                 
-                self.cache[fallback_hash] = {
+                migrated[fallback_hash] = {
                     'description': old_entry['description'],
                     'timestamp': old_entry.get('timestamp', datetime.now().isoformat()),
                     'migrated_from': old_hash,
@@ -240,7 +409,7 @@ class ImageCacheSystem:
                 migrated_count += 1
         
         if migrated_count > 0:
-            self._save_cache()
+            self._save_cache(migrated)
             logger.info(f"Migrated {migrated_count} entries from old cache")
         
         return migrated_count
@@ -283,8 +452,9 @@ def main():
     if args.stats:
         stats = cache_system.get_cache_stats()
         print(f"Cache Statistics:")
-        print(f"  Total images: {stats['total_images']}")
+        print(f"  Total images: {stats['total_cached_images']}")
         print(f"  Total size: {stats['total_size_mb']} MB")
+        print(f"  Hits: {stats['hits']} (stale: {stats['stale_hits']}), misses: {stats['misses']}")
         print(f"  Cache directory: {stats['cache_dir']}")
         print(f"  Images directory: {stats['images_dir']}")
     
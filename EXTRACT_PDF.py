@@ -12,9 +12,17 @@ import hashlib
 import re
 import shutil
 import time
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 from typing import Dict, List, Optional, Tuple
 
+# basic模式的分页流水线：每个工作进程独立打开PDF，处理一段连续的页面，
+# 页面markdown和图片直接写入磁盘，主进程只按页序合并
+PAGE_WORKERS = int(os.environ.get("EXTRACT_PDF_WORKERS", 0)) or min(os.cpu_count() or 1, 8)
+PAGE_CHUNK_SIZE = 8  # 每个任务处理的页数
+PARALLEL_MIN_PAGES = 16  # 页数少于该值时在主进程中处理，避免进程启动开销
+
 
 def get_pdf_extractor_data_dir():
     """Get the PDF extractor data directory path."""
@@ -29,7 +37,19 @@ def get_pdf_extractor_data_dir():
     return data_dir
 
 
-def save_to_unified_data_directory(content: str, pdf_path: Path, page_spec: str = None, images_data: list = None, output_dir: Path = None) -> Tuple[str, str]:
+def iter_content_parts(content: str = None, content_files: list = None):
+    """依次返回markdown内容的各个部分：content本身，或按顺序读取的分段文件（分段之间用换行连接）"""
+    if content_files is None:
+        yield content
+        return
+    for index, part_file in enumerate(content_files):
+        if index:
+            yield '\n'
+        with open(part_file, 'r', encoding='utf-8') as f:
+            yield f.read()
+
+
+def save_to_unified_data_directory(content: str, pdf_path: Path, page_spec: str = None, images_data: list = None, output_dir: Path = None, content_files: list = None) -> Tuple[str, str]:
     """
     统一的数据存储接口，供basic和mineru模式共用
     
@@ -37,7 +57,9 @@ def save_to_unified_data_directory(content: str, pdf_path: Path, page_spec: str
         content: markdown内容
         pdf_path: 原PDF文件路径
         page_spec: 页码规格 (如 "1", "1-5", "1,3,5")
-        images_data: 图片数据列表 [{'bytes': bytes, 'hash': str, 'filename': str}, ...]
+        images_data: 图片数据列表 [{'bytes': bytes, 'hash': str, 'filename': str}, ...]，
+                     没有'bytes'的图片已经写入数据目录
+        content_files: 按页序排列的markdown分段文件，指定时代替content逐段写入，不在内存中拼接整个文档
     
     Returns:
         tuple: (data_directory_md_path, pdf_directory_md_path)
@@ -63,11 +85,14 @@ def save_to_unified_data_directory(content: str, pdf_path: Path, page_spec: str
     
     # 保存markdown到数据目录
     with open(target_file, 'w', encoding='utf-8') as f:
-        f.write(content)
+        for part in iter_content_parts(content, content_files):
+            f.write(part)
     
     # 保存图片到数据目录
     if images_data:
         for img_data in images_data:
+            if 'bytes' not in img_data:
+                continue
             img_file = images_dir / img_data['filename']
             with open(img_file, 'wb') as f:
                 f.write(img_data['bytes'])
@@ -83,12 +108,10 @@ def save_to_unified_data_directory(content: str, pdf_path: Path, page_spec: str
     output_parent = output_dir if output_dir else pdf_path.parent
     same_name_md_file = output_parent / f"{pdf_stem_with_pages}.md"
     
-    # 更新图片路径到绝对路径 (指向EXTRACT_PDF_DATA)
-    updated_content = update_image_paths_to_data_directory(content, str(data_dir))
-    
-    # 保存到PDF同层目录
+    # 保存到PDF同层目录，更新图片路径到绝对路径 (指向EXTRACT_PDF_DATA)
     with open(same_name_md_file, 'w', encoding='utf-8') as f:
-        f.write(updated_content)
+        for part in iter_content_parts(content, content_files):
+            f.write(update_image_paths_to_data_directory(part, str(data_dir)))
     
     # 复制图片到输出目录的images文件夹
     if images_data:
@@ -233,52 +256,19 @@ class PDFExtractor:
             else:
                 pages = list(range(doc.page_count))
             
-            content = []
-            images_data = []
-            
-            # 结束性标点符号列表（用于文本处理）
-            ending_punctuations = {'。', '.', '!', '?', '！', '？', ':', '：', ';', '；'}
-            
-            # 处理每一页
-            for page_num in pages:
-                page = doc[page_num]
-                
-                # 提取文本
-                text = page.get_text()
-                
-                # 提取图片 - 使用图片合并功能
-                image_list = page.get_images(full=True)
-                page_content = f"# Page {page_num + 1}\n\n"
-                
-                # 图片合并处理：将临近的图片合并成一张大图
-                if image_list:
-                    # 使用与basic模式相同的图片合并逻辑
-                    merged_images_info = self._merge_nearby_images_to_data(doc, page, image_list, page_num + 1)
-                    
-                    # 收集图片数据
-                    images_data.extend(merged_images_info)
-                    
-                    # 为每个合并后的图片添加placeholder（与basic模式一致）
-                    for img_info in merged_images_info:
-                        page_content += f"[placeholder: image]\n"
-                        page_content += f"![](images/{img_info['filename']})\n\n"
-                
-                # 处理正文换行符（与basic模式一致）
-                processed_text = self._process_text_linebreaks(text, ending_punctuations)
-                
-                # 添加页面文本
-                page_content += f"{processed_text}\n\n"
-                content.append(page_content)
-            
             doc.close()
             
-            # 合并所有内容
-            full_content = '\n'.join(content)
-            
-            # 使用统一数据存储接口保存数据
-            data_md_path, pdf_md_path = save_to_unified_data_directory(
-                full_content, pdf_path, page_spec, images_data, output_dir
-            )
+            # 分页流水线：页面markdown和图片由工作进程直接写入磁盘
+            work_dir = Path(tempfile.mkdtemp(prefix="extract_pdf_pages_"))
+            try:
+                part_files, images_data = self._extract_pages(pdf_path, pages, work_dir)
+                
+                # 使用统一数据存储接口保存数据
+                data_md_path, pdf_md_path = save_to_unified_data_directory(
+                    None, pdf_path, page_spec, images_data, output_dir, content_files=part_files
+                )
+            finally:
+                shutil.rmtree(work_dir, ignore_errors=True)
             
             # 创建extract_data文件夹（用户要求）
             if output_dir:
@@ -598,48 +588,19 @@ class PDFExtractor:
             else:
                 pages = list(range(doc.page_count))
             
-            content = []
-            images_data = []
-            
-            # 结束性标点符号列表
-            ending_punctuations = {'。', '.', '!', '?', '！', '？', ':', '：', ';', '；'}
-            
-            for page_num in pages:
-                page = doc[page_num]
-                text = page.get_text()
-                
-                # 提取页面中的图片
-                image_list = page.get_images(full=True)
-                page_content = f"# Page {page_num + 1}\n\n"
-                
-                # 图片合并处理：将临近的图片合并成一张大图
-                if image_list:
-                    merged_images_info = self._merge_nearby_images_to_data(doc, page, image_list, page_num + 1)
-                    
-                    # 收集图片数据
-                    images_data.extend(merged_images_info)
-                    
-                    # 为每个合并后的图片添加placeholder
-                    for img_info in merged_images_info:
-                        page_content += f"[placeholder: image]\n"
-                        page_content += f"![](images/{img_info['filename']})\n\n"
-                
-                # 处理正文换行符
-                processed_text = self._process_text_linebreaks(text, ending_punctuations)
-                
-                # 添加页面文本
-                page_content += f"{processed_text}\n\n"
-                content.append(page_content)
-            
             doc.close()
             
-            # 合并所有内容
-            full_content = '\n'.join(content)
-            
-            # 使用统一数据存储接口保存数据
-            data_md_path, pdf_md_path = save_to_unified_data_directory(
-                full_content, pdf_path, page_spec, images_data, output_dir
-            )
+            # 分页流水线：页面markdown和图片由工作进程直接写入磁盘
+            work_dir = Path(tempfile.mkdtemp(prefix="extract_pdf_pages_"))
+            try:
+                part_files, images_data = self._extract_pages(pdf_path, pages, work_dir)
+                
+                # 使用统一数据存储接口保存数据
+                data_md_path, pdf_md_path = save_to_unified_data_directory(
+                    None, pdf_path, page_spec, images_data, output_dir, content_files=part_files
+                )
+            finally:
+                shutil.rmtree(work_dir, ignore_errors=True)
             
             # 创建postprocess状态文件
             if images_data:
@@ -659,6 +620,33 @@ class PDFExtractor:
         except Exception as e:
             return False, f"Basic extraction with images failed: {str(e)}"
     
+    def _extract_pages(self, pdf_path: Path, pages: List[int], work_dir: Path, workers: int = None) -> Tuple[List[Path], list]:
+        """
+        分页提取文本和图片
+        
+        页面按PAGE_CHUNK_SIZE切分成连续的段，每段由一个工作进程处理（页数较少时在当前进程中处理），
+        段的markdown写入work_dir中的分段文件，图片直接写入数据目录
+        
+        Returns:
+            tuple: (按页序排列的分段文件列表, 图片信息列表（不含图片内容）)
+        """
+        workers = workers or PAGE_WORKERS
+        chunks = [pages[i:i + PAGE_CHUNK_SIZE] for i in range(0, len(pages), PAGE_CHUNK_SIZE)]
+        part_files = [work_dir / f"{index}.md" for index in range(len(chunks))]
+        images_dir = get_pdf_extractor_data_dir() / "images"
+        images_dir.mkdir(parents=True, exist_ok=True)
+        
+        tasks = [(str(pdf_path), chunk, str(part_file), str(images_dir)) for chunk, part_file in zip(chunks, part_files)]
+        if workers <= 1 or len(pages) < PARALLEL_MIN_PAGES:
+            results = [extract_page_chunk(*task) for task in tasks]
+        else:
+            print(f"Processing {len(pages)} pages with {min(workers, len(chunks))} worker processes...")
+            with ProcessPoolExecutor(max_workers=min(workers, len(chunks))) as executor:
+                results = list(executor.map(extract_page_chunk, *zip(*tasks)))
+        
+        images_data = [img_info for chunk_images in results for img_info in chunk_images]
+        return part_files, images_data
+    
     def _merge_nearby_images_to_data(self, doc, page, image_list, page_num):
         """通过PDF截屏合并临近的图片，返回图片数据"""
         import hashlib
@@ -839,6 +827,68 @@ class PDFExtractor:
 
 
 
+def write_image_file(images_dir: Path, img_data: dict):
+    """把图片写入数据目录（先写临时文件再替换，多个进程写入同一张图片时不会读到不完整的文件）"""
+    img_file = Path(images_dir) / img_data['filename']
+    if img_file.exists():
+        return
+    tmp_file = img_file.with_suffix(f".{os.getpid()}.tmp")
+    with open(tmp_file, 'wb') as f:
+        f.write(img_data['bytes'])
+    os.replace(tmp_file, img_file)
+
+
+def extract_page_chunk(pdf_path: str, page_numbers: List[int], part_file: str, images_dir: str) -> list:
+    """
+    分页流水线的工作函数：独立打开PDF，处理一段连续的页面
+    
+    每页的markdown追加写入part_file（页之间用换行连接），图片写入images_dir后立即释放，
+    内存占用只与单页有关
+    
+    Returns:
+        list: 图片信息 [{'hash', 'filename', 'bbox', 'page'}, ...]
+    """
+    import fitz  # PyMuPDF
+    
+    extractor = PDFExtractor()
+    ending_punctuations = {'。', '.', '!', '?', '！', '？', ':', '：', ';', '；'}
+    images_info = []
+    
+    doc = fitz.open(pdf_path)
+    try:
+        with open(part_file, 'w', encoding='utf-8') as out:
+            for index, page_num in enumerate(page_numbers):
+                page = doc[page_num]
+                text = page.get_text()
+                
+                # 提取图片 - 使用图片合并功能
+                image_list = page.get_images(full=True)
+                page_content = f"# Page {page_num + 1}\n\n"
+                
+                # 图片合并处理：将临近的图片合并成一张大图
+                if image_list:
+                    for img_data in extractor._merge_nearby_images_to_data(doc, page, image_list, page_num + 1):
+                        write_image_file(images_dir, img_data)
+                        images_info.append({k: v for k, v in img_data.items() if k != 'bytes'})
+                        
+                        # 为每个合并后的图片添加placeholder
+                        page_content += f"[placeholder: image]\n"
+                        page_content += f"![](images/{img_data['filename']})\n\n"
+                
+                # 处理正文换行符
+                processed_text = extractor._process_text_linebreaks(text, ending_punctuations)
+                
+                # 添加页面文本
+                page_content += f"{processed_text}\n\n"
+                if index:
+                    out.write('\n')
+                out.write(page_content)
+    finally:
+        doc.close()
+    
+    return images_info
+
+
 class PDFPostProcessor:
     """PDF后处理器，用于处理图片、公式、表格的标签替换"""
     
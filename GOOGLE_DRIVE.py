@@ -35,6 +35,13 @@ google_drive_data_dir.mkdir(exist_ok=True)
 if str(google_drive_proj_dir) not in sys.path:
     sys.path.insert(0, str(google_drive_proj_dir))
 
+# 常驻daemon快速路径：--shell 命令直接转发给已运行的GDS daemon，跳过模块导入和认证
+if __name__ == "__main__":
+    from gds_daemon import try_forward_shell_command
+    _daemon_exit_code = try_forward_shell_command(sys.argv[1:])
+    if _daemon_exit_code is not None:
+        sys.exit(_daemon_exit_code)
+
 # 导入重构后的管理器模块
 try:
     from modules import (
@@ -0,0 +1,413 @@
+#!/usr/bin/env python3
+"""
+GDS Daemon - 常驻的Google Drive Shell服务进程
+常驻进程持有已认证的Drive服务、路径缓存和shell状态，客户端通过Unix socket转发
+`GOOGLE_DRIVE --shell ...` 命令并流式接收输出，省去每条命令的解释器启动、导入和认证开销。
+
+本文件的客户端部分只依赖标准库，GOOGLE_DRIVE.py 可以在导入任何GDS模块之前调用它。
+
+协议（换行分隔的JSON）:
+    请求:  {"op": "run", "argv": [...], "cwd": "...", "env": {...}} | {"op": "ping"} | {"op": "stop"}
+    响应:  {"type": "stdout"|"stderr", "data": "..."}* 之后是 {"type": "exit", "code": N}
+"""
+
+import io
+import json
+import os
+import queue
+import socket
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+# RUN环境通过这些环境变量传递 command_identifier 和JSON输出文件
+FORWARDED_ENV_PREFIXES = ("RUN_IDENTIFIER_", "RUN_DATA_FILE")
+DEFAULT_IDLE_TIMEOUT = 3600
+
+
+def get_socket_path():
+    """daemon socket路径（可通过 GDS_DAEMON_SOCKET 覆盖）"""
+    path = os.environ.get("GDS_DAEMON_SOCKET")
+    if path:
+        return path
+    uid = os.getuid() if hasattr(os, "getuid") else 0
+    return os.path.join(tempfile.gettempdir(), f"gds_daemon_{uid}.sock")
+
+
+def split_command_identifier(argv):
+    """拆分RUN的 command_identifier（test_*/cmd_*）和其余参数"""
+    if argv and (argv[0].startswith('test_') or argv[0].startswith('cmd_')):
+        return argv[0], list(argv[1:])
+    return None, list(argv)
+
+
+def build_shell_command(shell_cmd_parts):
+    """把 --shell 之后的参数还原成 execute_shell_command 接受的命令字符串"""
+    # 如果只有一个参数且包含空格，可能是引号包围的完整命令（用于远端重定向等）
+    if len(shell_cmd_parts) == 1 and (' > ' in shell_cmd_parts[0] or ' && ' in shell_cmd_parts[0]
+                                      or ' || ' in shell_cmd_parts[0] or ' | ' in shell_cmd_parts[0]):
+        shell_cmd = shell_cmd_parts[0]
+        # 只有在没有标记的情况下才添加标记，避免重复添加
+        if not shell_cmd.startswith("__QUOTED_COMMAND__"):
+            shell_cmd = f"__QUOTED_COMMAND__{shell_cmd}"
+        return shell_cmd
+    # 正常的多参数命令，对包含空格的参数添加引号
+    return ' '.join(f'"{part}"' if ' ' in part else part for part in shell_cmd_parts)
+
+
+# ---------------------------------------------------------------- 客户端
+
+def _send(sock, message):
+    sock.sendall((json.dumps(message, ensure_ascii=False) + "\n").encode("utf-8"))
+
+
+def _messages(sock):
+    """逐条读取换行分隔的JSON消息"""
+    buffer = b""
+    while True:
+        chunk = sock.recv(65536)
+        if not chunk:
+            return
+        buffer += chunk
+        while b"\n" in buffer:
+            line, buffer = buffer.split(b"\n", 1)
+            if line.strip():
+                yield json.loads(line.decode("utf-8"))
+
+
+def _connect(socket_path=None, timeout=1.0):
+    """连接daemon，不可用时返回None"""
+    path = socket_path or get_socket_path()
+    if not hasattr(socket, "AF_UNIX") or not os.path.exists(path):
+        return None
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.settimeout(timeout)
+    try:
+        sock.connect(path)
+    except OSError:
+        sock.close()
+        return None
+    sock.settimeout(None)
+    return sock
+
+
+def request(message, socket_path=None, stdout=None, stderr=None):
+    """
+    发送一个请求并把流式输出写到 stdout/stderr
+
+    Returns:
+        int: daemon返回的退出码；daemon不可用时返回None
+    """
+    sock = _connect(socket_path)
+    if sock is None:
+        return None
+    stdout = stdout or sys.stdout
+    stderr = stderr or sys.stderr
+    try:
+        _send(sock, message)
+        for reply in _messages(sock):
+            if reply.get("type") == "stdout":
+                stdout.write(reply.get("data", ""))
+                stdout.flush()
+            elif reply.get("type") == "stderr":
+                stderr.write(reply.get("data", ""))
+                stderr.flush()
+            elif reply.get("type") == "exit":
+                return reply.get("code", 0)
+        # 连接在返回退出码之前断开
+        stderr.write("Error: GDS daemon closed the connection unexpectedly\n")
+        return 1
+    finally:
+        sock.close()
+
+
+def try_forward_shell_command(argv, socket_path=None):
+    """
+    如果有可用的daemon，把 `--shell <command>` 转发给它
+
+    Returns:
+        int: 命令退出码；不适合转发或daemon不可用时返回None（调用方走原有路径）
+    """
+    if os.environ.get("GDS_NO_DAEMON"):
+        return None
+    _, args = split_command_identifier(argv)
+    # 交互模式需要本地stdin，不转发
+    if len(args) < 2 or args[0] != '--shell':
+        return None
+    env = {key: value for key, value in os.environ.items() if key.startswith(FORWARDED_ENV_PREFIXES)}
+    return request({"op": "run", "argv": list(argv), "cwd": os.getcwd(), "env": env}, socket_path)
+
+
+def daemon_status(socket_path=None):
+    """返回daemon状态dict，未运行时返回None"""
+    sock = _connect(socket_path)
+    if sock is None:
+        return None
+    try:
+        _send(sock, {"op": "ping"})
+        for reply in _messages(sock):
+            return reply
+    finally:
+        sock.close()
+
+
+# ---------------------------------------------------------------- 服务端
+
+class _StreamWriter(io.TextIOBase):
+    """把 print 输出转成JSON消息发回客户端"""
+
+    def __init__(self, sock, stream_name):
+        self._sock = sock
+        self._stream_name = stream_name
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        if data:
+            try:
+                _send(self._sock, {"type": self._stream_name, "data": data})
+            except OSError:
+                # 客户端已断开（例如Ctrl+C），继续执行命令但丢弃输出
+                pass
+        return len(data)
+
+
+class GDSDaemon:
+    """
+    常驻GDS服务
+
+    命令在调用 serve_forever 的线程（主线程）上串行执行：GoogleDriveShell 的状态（当前shell、cwd、
+    sys.stdout）不是线程安全的，而且GDS命令会注册信号处理器（signal.signal 只能在主线程调用）。
+    后台线程只负责接受连接、读取请求和回复ping/stop。
+    """
+
+    def __init__(self, socket_path=None, idle_timeout=None, shell_factory=None):
+        self.socket_path = socket_path or get_socket_path()
+        if idle_timeout is None:
+            idle_timeout = float(os.environ.get("GDS_DAEMON_IDLE_TIMEOUT", DEFAULT_IDLE_TIMEOUT))
+        self.idle_timeout = idle_timeout
+        self._shell_factory = shell_factory
+        self._shell = None
+        self._shells_mtime = None
+        self._requests = queue.Queue()
+        self._stopping = threading.Event()
+        self.started_at = time.time()
+        self.last_activity = time.time()
+        self.commands_served = 0
+
+    def _create_shell(self):
+        if self._shell_factory:
+            return self._shell_factory()
+        sys.path.insert(0, str(Path(__file__).parent))
+        from google_drive_shell import GoogleDriveShell
+        return GoogleDriveShell()
+
+    def get_shell(self):
+        """返回常驻的 GoogleDriveShell；shells.json 被其他进程修改后重新加载shell状态"""
+        if self._shell is None:
+            self._shell = self._create_shell()
+        shells_file = getattr(self._shell, "shells_file", None)
+        if shells_file is not None:
+            try:
+                mtime = os.path.getmtime(shells_file)
+            except OSError:
+                mtime = None
+            if self._shells_mtime is not None and mtime != self._shells_mtime:
+                self._shell.shells_data = self._shell._load_shells_direct()
+            self._shells_mtime = mtime
+        return self._shell
+
+    def run_argv(self, argv):
+        """执行一条转发来的命令行，返回退出码"""
+        command_identifier, args = split_command_identifier(argv)
+        if len(args) < 2 or args[0] != '--shell':
+            print(f"Error: GDS daemon only serves '--shell <command>' (got: {' '.join(args)})")
+            return 1
+        shell = self.get_shell()
+        result = shell.execute_shell_command(build_shell_command(args[1:]), command_identifier)
+        if isinstance(result, dict):
+            return 0 if result.get("success", False) else 1
+        return result if isinstance(result, int) else 0
+
+    def _run_request(self, conn, message):
+        """在客户端的cwd和RUN环境变量下执行命令，输出流式发回"""
+        env = message.get("env") or {}
+        saved_env = {key: os.environ.get(key) for key in env}
+        saved_cwd = os.getcwd()
+        saved_streams = sys.stdout, sys.stderr, sys.stdin
+        sys.stdout = _StreamWriter(conn, "stdout")
+        sys.stderr = _StreamWriter(conn, "stderr")
+        # daemon没有终端，需要输入的命令读到EOF
+        sys.stdin = io.StringIO("")
+        try:
+            os.environ.update(env)
+            if message.get("cwd") and os.path.isdir(message["cwd"]):
+                os.chdir(message["cwd"])
+            return self.run_argv(message.get("argv") or [])
+        except SystemExit as e:
+            return e.code if isinstance(e.code, int) else 1
+        except Exception as e:
+            import traceback
+            print(f"Error: Execute shell command failed: {e}")
+            print(traceback.format_exc())
+            return 1
+        finally:
+            sys.stdout, sys.stderr, sys.stdin = saved_streams
+            os.chdir(saved_cwd)
+            for key, value in saved_env.items():
+                if value is None:
+                    os.environ.pop(key, None)
+                else:
+                    os.environ[key] = value
+
+    def handle_connection(self, conn):
+        """读取单个客户端连接的请求（在I/O线程中）：ping/stop直接回复，run请求交给主线程执行"""
+        try:
+            message = next(_messages(conn), None)
+            if message is None:
+                return
+            op = message.get("op")
+            if op == "run":
+                self._requests.put((conn, message))
+                conn = None  # 由主线程回复并关闭
+            elif op == "ping":
+                _send(conn, {"type": "status", "pid": os.getpid(), "uptime": round(time.time() - self.started_at, 1),
+                             "commands_served": self.commands_served, "shell_loaded": self._shell is not None,
+                             "queued": self._requests.qsize()})
+            elif op == "stop":
+                self._stopping.set()
+                _send(conn, {"type": "exit", "code": 0})
+            else:
+                _send(conn, {"type": "exit", "code": 1})
+        except (OSError, ValueError):
+            pass
+        finally:
+            self.last_activity = time.time()
+            if conn is not None:
+                conn.close()
+
+    def serve_request(self, conn, message):
+        """执行一个run请求并回复退出码（在主线程中）"""
+        try:
+            code = self._run_request(conn, message)
+            self.commands_served += 1
+            try:
+                _send(conn, {"type": "exit", "code": code})
+            except OSError:
+                pass
+        finally:
+            self.last_activity = time.time()
+            conn.close()
+
+    def _accept_loop(self, server):
+        while not self._stopping.is_set():
+            try:
+                conn, _ = server.accept()
+            except socket.timeout:
+                continue
+            except OSError:
+                return
+            conn.settimeout(None)
+            threading.Thread(target=self.handle_connection, args=(conn,), daemon=True).start()
+
+    def stop(self):
+        self._stopping.set()
+
+    def serve_forever(self, ready=None):
+        """
+        监听socket直到收到stop请求或空闲超时
+
+        应在主线程调用：转发来的命令在调用线程上执行
+        """
+        if _connect(self.socket_path) is not None:
+            raise RuntimeError(f"GDS daemon already running at {self.socket_path}")
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)  # 上次异常退出留下的socket文件
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        server.bind(self.socket_path)
+        os.chmod(self.socket_path, 0o600)
+        server.listen(16)
+        server.settimeout(0.5)
+        acceptor = threading.Thread(target=self._accept_loop, args=(server,), daemon=True)
+        acceptor.start()
+        if ready:
+            ready.set()
+        try:
+            while not self._stopping.is_set():
+                if self.idle_timeout and time.time() - self.last_activity > self.idle_timeout:
+                    break
+                try:
+                    conn, message = self._requests.get(timeout=0.5)
+                except queue.Empty:
+                    continue
+                self.serve_request(conn, message)
+        finally:
+            self._stopping.set()
+            acceptor.join(2)
+            server.close()
+            # 停止时还在排队的请求
+            while not self._requests.empty():
+                conn, _ = self._requests.get_nowait()
+                try:
+                    _send(conn, {"type": "exit", "code": 1})
+                except OSError:
+                    pass
+                conn.close()
+            try:
+                os.unlink(self.socket_path)
+            except OSError:
+                pass
+
+
+def handle_daemon_command(action, script_path=None):
+    """
+    处理 `GOOGLE_DRIVE --daemon <start|stop|status|serve>`
+
+    Args:
+        action: 子命令
+        script_path: 启动后台daemon时使用的 GOOGLE_DRIVE.py 路径
+    """
+    if action == "serve":
+        try:
+            GDSDaemon().serve_forever()
+        except RuntimeError as e:
+            print(f"Error: {e}")
+            return 1
+        return 0
+    if action == "status":
+        status = daemon_status()
+        if status is None:
+            print("GDS daemon is not running")
+            return 1
+        print(f"GDS daemon running (pid {status.get('pid')}, uptime {status.get('uptime')}s, "
+              f"{status.get('commands_served')} commands served)")
+        return 0
+    if action == "stop":
+        if request({"op": "stop"}) is None:
+            print("GDS daemon is not running")
+            return 1
+        print("GDS daemon stopped")
+        return 0
+    if action == "start":
+        if daemon_status() is not None:
+            print("GDS daemon is already running")
+            return 0
+        import subprocess
+        script_path = script_path or str(Path(__file__).parent.parent / "GOOGLE_DRIVE.py")
+        log_file = Path(__file__).parent.parent / "GOOGLE_DRIVE_DATA" / "gds_daemon.log"
+        log_file.parent.mkdir(exist_ok=True)
+        with open(log_file, "a") as log:
+            subprocess.Popen([sys.executable, script_path, "--daemon", "serve"],
+                             stdout=log, stderr=log, stdin=subprocess.DEVNULL, start_new_session=True)
+        for _ in range(50):
+            if daemon_status() is not None:
+                print(f"GDS daemon started ({get_socket_path()})")
+                return 0
+            time.sleep(0.1)
+        print(f"Error: GDS daemon did not start, see {log_file}")
+        return 1
+    print("Usage: GOOGLE_DRIVE --daemon <start|stop|status|serve>")
+    return 1
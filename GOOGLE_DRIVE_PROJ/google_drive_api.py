@@ -7,12 +7,11 @@ Google Drive API Service
 import os
 import json
 from pathlib import Path
-from google.auth.transport.requests import Request
-from google.oauth2 import service_account
-from googleapiclient.discovery import build
-from googleapiclient.http import MediaIoBaseDownload, MediaFileUpload
 import io
 
+# google.auth / googleapiclient 在首次认证或下载时才导入，
+# 这样仅引用GoogleDriveService类的模块不需要承担Google API客户端的导入开销
+
 class GoogleDriveService:
     """Google Drive API服务类"""
     
@@ -100,6 +99,9 @@ class GoogleDriveService:
     def _authenticate(self):
         """认证并创建服务对象"""
         try:
+            from google.oauth2 import service_account
+            from googleapiclient.discovery import build
+            
             # 定义需要的权限范围
             SCOPES = [
                 'https://www.googleapis.com/auth/drive',
@@ -126,6 +128,13 @@ class GoogleDriveService:
         except Exception as e:
             raise Exception(f"Google Drive API认证失败: {e}")
     
+    def get_access_token(self):
+        """返回有效的OAuth access token（过期时自动刷新），供直接调用REST接口的模块使用"""
+        from google.auth.transport.requests import Request
+        if not self.credentials.valid:
+            self.credentials.refresh(Request())
+        return self.credentials.token
+
     def test_connection(self):
         """测试API连接"""
         try:
@@ -164,10 +173,12 @@ class GoogleDriveService:
             results = self.service.files().list(
                 q=query,
                 pageSize=max_results,
-                fields="nextPageToken, files(id, name, mimeType, size, createdTime, modifiedTime)"
+                fields="nextPageToken, files(id, name, mimeType, size, createdTime, modifiedTime, md5Checksum)"
             ).execute()
             
             items = results.get('files', [])
+            if folder_id:
+                self._record_folder_listing(folder_id, items, complete=not results.get('nextPageToken'))
             
             return {
                 "success": True,
@@ -180,6 +191,17 @@ class GoogleDriveService:
                 "error": f"列出文件失败: {e}"
             }
     
+    def _record_folder_listing(self, folder_id, items, complete=False):
+        """把列出的子文件夹记录到本地文件夹树（供路径解析使用），失败时忽略"""
+        try:
+            try:
+                from .modules.folder_tree import get_folder_tree
+            except ImportError:
+                from modules.folder_tree import get_folder_tree
+            get_folder_tree().record_listing(folder_id, items, complete=complete)
+        except Exception:
+            pass
+    
     def _resolve_absolute_path_to_folder_id(self, absolute_path, remote_root_folder_id):
         """
         将绝对路径解析为Google Drive文件夹ID
@@ -319,6 +341,7 @@ class GoogleDriveService:
             dict: 下载结果
         """
         try:
+            from googleapiclient.http import MediaIoBaseDownload
             request = self.service.files().get_media(fileId=file_id)
             fh = io.BytesIO()
             downloader = MediaIoBaseDownload(fh, request)
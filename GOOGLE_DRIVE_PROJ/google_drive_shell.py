@@ -16,22 +16,11 @@ import zipfile
 import tempfile
 from pathlib import Path
 import platform
-import psutil
 from typing import Dict
+# 管理器类在首次使用时才导入（见 GoogleDriveShell._LAZY_MANAGERS），
+# 这里只导入轻量的命令注册系统
 try:
-    from .google_drive_api import GoogleDriveService
-    # 导入重构后的模块
-    from .modules import (
-        ShellManagement,
-        FileOperations,
-        CacheManager,
-        RemoteCommands,
-        PathResolver,
-        SyncManager,
-        FileUtils,
-        Validation,
-        Verification,
-    )
+    from .modules.lazy_loading import LazyDriveService, LazyManagerMixin
     # 导入命令系统
     from .modules.commands import CommandRegistry
     from .modules.commands.venv_command import VenvCommand
@@ -45,20 +34,11 @@ try:
     from .modules.commands.read_command import ReadCommand
     from .modules.commands.pwd_command import PwdCommand
     from .modules.commands.upload_command import UploadCommand
+    from .modules.commands.upload_folder_command import UploadFolderCommand
+    _MODULES_PACKAGE = f"{__package__}.modules"
 except ImportError:
     # 当作为独立模块导入时使用绝对导入
-    from GOOGLE_DRIVE_PROJ.google_drive_api import GoogleDriveService
-    from GOOGLE_DRIVE_PROJ.modules import (
-        ShellManagement,
-        FileOperations,
-        CacheManager,
-        RemoteCommands,
-        PathResolver,
-        SyncManager,
-        FileUtils,
-        Validation,
-        Verification,
-    )
+    from GOOGLE_DRIVE_PROJ.modules.lazy_loading import LazyDriveService, LazyManagerMixin
     # 导入命令系统
     from GOOGLE_DRIVE_PROJ.modules.commands import CommandRegistry
     from GOOGLE_DRIVE_PROJ.modules.commands.venv_command import VenvCommand
@@ -72,12 +52,34 @@ except ImportError:
     from GOOGLE_DRIVE_PROJ.modules.commands.read_command import ReadCommand
     from GOOGLE_DRIVE_PROJ.modules.commands.pwd_command import PwdCommand
     from GOOGLE_DRIVE_PROJ.modules.commands.upload_command import UploadCommand
+    from GOOGLE_DRIVE_PROJ.modules.commands.upload_folder_command import UploadFolderCommand
+    _MODULES_PACKAGE = "GOOGLE_DRIVE_PROJ.modules"
 
-class GoogleDriveShell:
+# 不依赖挂载点和Drive API的本地命令，执行前不做挂载点指纹验证
+LOCAL_ONLY_COMMANDS = {'pwd', 'help', '--help', '-h', 'cd', 'exit', 'quit'}
+
+class GoogleDriveShell(LazyManagerMixin):
     """Google Drive Shell管理类 (重构版本)"""
     
+    # 管理器按需构建：{属性名: (模块名, 类名)}
+    _LAZY_MANAGERS = {
+        "shell_management": ("shell_management", "ShellManagement"),
+        "file_operations": ("file_operations", "FileOperations"),
+        "cache_manager": ("cache_manager", "CacheManager"),
+        "remote_commands": ("remote_commands", "RemoteCommands"),
+        "path_resolver": ("path_resolver", "PathResolver"),
+        "sync_manager": ("sync_manager", "SyncManager"),
+        "file_utils": ("file_utils", "FileUtils"),
+        "validation": ("validation", "Validation"),
+        "verification": ("verification", "Verification"),
+    }
+    _LAZY_PACKAGE = _MODULES_PACKAGE
+    
     def __init__(self):
         """初始化Google Drive Shell"""
+        # 挂载点指纹验证推迟到第一次需要REMOTE_ROOT/REMOTE_ENV时
+        self._mount_checked = False
+        
         # 更新数据文件路径到GOOGLE_DRIVE_DATA
         data_dir = Path(__file__).parent.parent / "GOOGLE_DRIVE_DATA"
         self.shells_file = data_dir / "shells.json"
@@ -120,29 +122,55 @@ class GoogleDriveShell:
         self._load_paths_from_config()
         
         # 确保所有必要的属性都存在（回退值）
-        if not hasattr(self, 'REMOTE_ROOT'):
+        if not hasattr(self, '_remote_root'):
             self.REMOTE_ROOT = "/content/drive/MyDrive/REMOTE_ROOT"
         if not hasattr(self, 'REMOTE_ROOT_FOLDER_ID'):
             self.REMOTE_ROOT_FOLDER_ID = "1LSndouoVj8pkoyi-yTYnC4Uv03I77T8f"
         
         # 添加虚拟环境管理相关属性
-        if not hasattr(self, 'REMOTE_ENV'):
+        if not hasattr(self, '_remote_env'):
             self.REMOTE_ENV = "/content/drive/MyDrive/REMOTE_ENV"
         if not hasattr(self, 'REMOTE_ENV_FOLDER_ID'):
             self.REMOTE_ENV_FOLDER_ID = "1ZmgwWWIl7qYnGLE66P3kx02M0jxE8D0h"
         
         # 动态挂载点管理：检查是否需要使用动态挂载
-        self.current_mount_point = None
-        self.dynamic_mode = False
-        
-        # 先初始化Google Drive API服务
-        self.drive_service = self._load_drive_service_direct()
+        if not hasattr(self, 'current_mount_point'):
+            self.current_mount_point = None
+        if not hasattr(self, 'dynamic_mode'):
+            self.dynamic_mode = False
         
-        # 然后检查挂载点（需要drive_service进行指纹验证）
-        self._check_and_setup_mount_point()
+        # Google Drive API服务在第一次API调用时才构建
+        self.drive_service = LazyDriveService(self._load_drive_service_direct)
 
         # 初始化管理器
         self._initialize_managers()
+    
+    @property
+    def REMOTE_ROOT(self):
+        """远端根目录路径（首次读取时验证动态挂载点）"""
+        self._ensure_mount_point()
+        return self._remote_root
+    
+    @REMOTE_ROOT.setter
+    def REMOTE_ROOT(self, value):
+        self._remote_root = value
+    
+    @property
+    def REMOTE_ENV(self):
+        """远端环境目录路径（首次读取时验证动态挂载点）"""
+        self._ensure_mount_point()
+        return self._remote_env
+    
+    @REMOTE_ENV.setter
+    def REMOTE_ENV(self, value):
+        self._remote_env = value
+    
+    def _ensure_mount_point(self):
+        """只执行一次挂载点检查（需要drive_service进行指纹验证）"""
+        if self._mount_checked or '_remote_root' not in self.__dict__:
+            return
+        self._mount_checked = True
+        self._check_and_setup_mount_point()
 
     def _load_shells_direct(self):
         """直接加载远程shell配置（不通过委托）"""
@@ -203,17 +231,7 @@ class GoogleDriveShell:
             return None
 
     def _initialize_managers(self):
-        """初始化各个管理器"""
-        self.shell_management = ShellManagement(self.drive_service, self)
-        self.file_operations = FileOperations(self.drive_service, self)
-        self.cache_manager = CacheManager(self.drive_service, self)
-        self.remote_commands = RemoteCommands(self.drive_service, self)
-        self.path_resolver = PathResolver(self.drive_service, self)
-        self.sync_manager = SyncManager(self.drive_service, self)
-        self.file_utils = FileUtils(self.drive_service, self)
-        self.validation = Validation(self.drive_service, self)
-        self.verification = Verification(self.drive_service, self)
-        
+        """初始化命令注册系统；各个管理器在首次访问时由 LazyManagerMixin 构建"""
         # 初始化命令注册系统
         self.command_registry = CommandRegistry()
         
@@ -229,6 +247,7 @@ class GoogleDriveShell:
         self.command_registry.register(ReadCommand(self))
         self.command_registry.register(PwdCommand(self))
         self.command_registry.register(UploadCommand(self))
+        self.command_registry.register(UploadFolderCommand(self))
     
     def calculate_timeout_from_file_sizes(self, *args, **kwargs):
         """委托到sync_manager管理器"""
@@ -1133,6 +1152,11 @@ For more information, visit: https://github.com/your-repo/gds"""
                     return 0
             
             
+            # 需要远端路径的命令在这里完成挂载点验证，本地命令跳过
+            first_token = shell_cmd_clean.split()[0] if shell_cmd_clean.split() else ""
+            if first_token not in LOCAL_ONLY_COMMANDS:
+                self._ensure_mount_point()
+            
             # 首先检查独立的background管理命令
             if shell_cmd_clean.startswith('--status'):
                 # GDS --status [task_id]
@@ -13,20 +13,33 @@ from .drive_api_service import *
 from .shell_commands import *
 from .hf_credentials_manager import *
 
-# 导入原有的Google Drive Shell系统类
+# Google Drive Shell系统类较重（会拉入Drive API和大量子模块），改为首次访问时再导入
 try:
-    from .shell_management import ShellManagement
-    from .file_operations import FileOperations
-    from .cache_manager import CacheManager
-    from .remote_commands import RemoteCommands
-    from .path_resolver import PathResolver
-    from .sync_manager import SyncManager
-    from .file_utils import FileUtils
-    from .validation import Validation
-    from .verification import Verification
     from .constants import *
 except ImportError as e:
-    print(f"Warning: Import Google Drive Shell system class failed: {e}")
+    print(f"Warning: Import Google Drive Shell constants failed: {e}")
+
+_LAZY_CLASSES = {
+    "ShellManagement": "shell_management",
+    "FileOperations": "file_operations",
+    "CacheManager": "cache_manager",
+    "RemoteCommands": "remote_commands",
+    "PathResolver": "path_resolver",
+    "SyncManager": "sync_manager",
+    "FileUtils": "file_utils",
+    "Validation": "validation",
+    "Verification": "verification",
+}
+
+def __getattr__(name):
+    """按需导入Google Drive Shell系统类（PEP 562）"""
+    module_name = _LAZY_CLASSES.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    import importlib
+    cls = getattr(importlib.import_module(f".{module_name}", __name__), name)
+    globals()[name] = cls
+    return cls
 
 # 导入管理器类（委托模式）
 class CoreUtils:
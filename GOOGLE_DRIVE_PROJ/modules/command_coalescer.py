@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+Google Drive Shell - Command Coalescer Module
+远端命令窗口的合并队列
+
+每个远端命令都需要用户在窗口中复制、粘贴并执行一次。为减少人工往返：
+- 每个请求先写入共享的队列目录（跨进程可见），再竞争窗口锁
+- 拿到锁的进程（leader）等待一个很短的合并窗口，然后认领队列中所有待处理的请求，
+  合并为一个远端脚本，只弹出一个窗口
+- 每个子命令仍然写入自己的结果文件（tmp/<result_filename>），各调用方照常等待自己的结果；
+  窗口的用户操作结果由leader写回队列目录，分发给每个等待中的调用方
+
+协议文件（位于队列目录）:
+    <request_id>.json         待处理的请求
+    <request_id>.claimed      已被leader认领、正在窗口中执行的请求
+    <request_id>.result.json  窗口操作结果，等待对应调用方读取
+"""
+
+import json
+import os
+import time
+from pathlib import Path
+
+DEFAULT_COALESCE_WINDOW = 0.3  # 秒，leader拿到锁后等待其他命令加入的时间
+DEFAULT_MAX_BATCH = 20
+LOCK_POLL_SECONDS = 1
+RESULT_POLL_SECONDS = 0.2
+STALE_SECONDS = 24 * 3600
+
+
+def build_batch_script(requests):
+    """
+    把多个远端命令合并为一个脚本
+
+    每个子命令在独立的子shell中执行，cd/exit等不会影响后续子命令；
+    ( 和 ) 单独成行，子命令中的heredoc不受影响。
+    """
+    lines = [f"# GDS batch: {len(requests)} commands"]
+    for index, request in enumerate(requests, 1):
+        lines.append(f"# [{index}/{len(requests)}] {request.get('title', '')}")
+        lines.append("(")
+        lines.append(request["command_text"])
+        lines.append(")")
+    return "\n".join(lines) + "\n"
+
+
+class CommandCoalescer:
+    """跨进程的窗口请求合并器，窗口锁和窗口显示由调用方（WindowManager）提供"""
+
+    def __init__(self, queue_dir, coalesce_window=None, max_batch=None, lock_timeout=30):
+        self.queue_dir = Path(queue_dir)
+        if coalesce_window is None:
+            coalesce_window = float(os.environ.get("GDS_COALESCE_WINDOW", DEFAULT_COALESCE_WINDOW))
+        if max_batch is None:
+            max_batch = int(os.environ.get("GDS_COALESCE_MAX", DEFAULT_MAX_BATCH))
+        self.coalesce_window = coalesce_window
+        self.max_batch = max(1, max_batch)
+        self.lock_timeout = lock_timeout
+
+    def _path(self, request_id, suffix):
+        return self.queue_dir / f"{request_id}{suffix}"
+
+    def _write_json(self, path, data):
+        tmp_path = path.with_name(path.name + f".{os.getpid()}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    def _pop_result(self, request_id):
+        path = self._path(request_id, ".result.json")
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                result = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+        try:
+            path.unlink()
+        except OSError:
+            pass
+        return result
+
+    def _claim_pending(self, own_request_id):
+        """
+        认领待处理的请求（rename是原子操作，同一请求只会被一个leader认领）
+
+        Returns:
+            list: 按提交时间排序的请求，自己的请求总是包含在内（已被认领时为空列表）
+        """
+        requests = []
+        now = time.time()
+        for path in self.queue_dir.glob("*.json"):
+            if path.name.endswith(".result.json"):
+                # 调用方已退出、无人读取的结果
+                try:
+                    if now - path.stat().st_mtime > STALE_SECONDS:
+                        path.unlink()
+                except OSError:
+                    pass
+                continue
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    requests.append(json.load(f))
+            except (OSError, json.JSONDecodeError):
+                continue
+        requests.sort(key=lambda r: (r["request_id"] != own_request_id, r.get("created", 0)))
+        if not requests or requests[0]["request_id"] != own_request_id:
+            return []
+
+        claimed = []
+        for request in requests[:self.max_batch]:
+            request_id = request["request_id"]
+            try:
+                os.replace(self._path(request_id, ".json"), self._path(request_id, ".claimed"))
+            except OSError:
+                continue  # 调用方已撤回
+            claimed.append(request)
+        return claimed
+
+    def _run_batch(self, batch, show_window):
+        """显示一个窗口执行整批命令，返回 {request_id: 窗口结果}"""
+        if len(batch) == 1:
+            return {batch[0]["request_id"]: show_window(batch[0])}
+
+        combined = {
+            "request_id": batch[0]["request_id"],
+            "title": f"GDS Remote Commands ({len(batch)})",
+            "command_text": build_batch_script(batch),
+            "timeout_seconds": max(r.get("timeout_seconds", 3600) for r in batch),
+            "process_id": os.getpid(),
+        }
+        window_result = show_window(combined)
+        results = {}
+        for index, request in enumerate(batch):
+            if window_result.get("action") == "direct_feedback":
+                # 直接反馈只能提供一份输出，无法拆分给各个子命令
+                result = {"action": "error",
+                          "message": "合并执行的窗口不支持直接反馈，请重新执行该命令"}
+            else:
+                result = dict(window_result)
+            result.update({"batch_size": len(batch), "batch_index": index})
+            results[request["request_id"]] = result
+        return results
+
+    def submit(self, request, acquire_lock, release_lock, show_window):
+        """
+        提交一个窗口请求并等待用户操作结果
+
+        Args:
+            request (dict): 窗口请求，需包含 request_id、title、command_text、timeout_seconds
+            acquire_lock: acquire_lock(request_id, timeout_seconds) -> bool，跨进程窗口锁
+            release_lock: release_lock()
+            show_window: show_window(request) -> dict，显示窗口并返回用户操作结果
+
+        Returns:
+            dict: 用户操作结果
+        """
+        self.queue_dir.mkdir(parents=True, exist_ok=True)
+        request_id = request["request_id"]
+        request = dict(request, created=time.time())
+        pending_path = self._path(request_id, ".json")
+        self._write_json(pending_path, request)
+
+        start_time = time.time()
+        result_deadline = start_time + self.lock_timeout + request.get("timeout_seconds", 3600)
+        while True:
+            result = self._pop_result(request_id)
+            if result is not None:
+                return result
+
+            if not pending_path.exists():
+                # 已被其他进程认领，正在窗口中执行，等待结果
+                if time.time() > result_deadline:
+                    return {"action": "timeout", "message": "等待合并窗口结果超时"}
+                time.sleep(RESULT_POLL_SECONDS)
+                continue
+
+            if time.time() - start_time > self.lock_timeout:
+                try:
+                    pending_path.unlink()
+                except FileNotFoundError:
+                    continue  # 刚好被认领
+                return {"action": "error", "message": "无法获取窗口锁，可能有其他窗口正在显示"}
+
+            if not acquire_lock(request_id, timeout_seconds=LOCK_POLL_SECONDS):
+                continue
+            try:
+                result = self._pop_result(request_id)
+                if result is not None:
+                    return result
+                if self.coalesce_window > 0:
+                    time.sleep(self.coalesce_window)
+                batch = self._claim_pending(request_id)
+                if not batch:
+                    continue
+                try:
+                    results = self._run_batch(batch, show_window)
+                except Exception as e:
+                    # 保证其他等待中的调用方也能拿到结果
+                    error = {"action": "error", "message": f"窗口创建失败: {e}"}
+                    results = {claimed["request_id"]: error for claimed in batch}
+                finally:
+                    for claimed in batch:
+                        try:
+                            self._path(claimed["request_id"], ".claimed").unlink()
+                        except OSError:
+                            pass
+                for claimed in batch[1:]:
+                    claimed_id = claimed["request_id"]
+                    self._write_json(self._path(claimed_id, ".result.json"),
+                                     results.get(claimed_id, {"action": "error", "message": "合并窗口没有返回结果"}))
+                return results[request_id]
+            finally:
+                release_lock()
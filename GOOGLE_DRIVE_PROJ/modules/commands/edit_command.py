@@ -17,6 +17,7 @@ class EditCommand(BaseCommand):
         # 解析选项参数
         preview = False
         backup = False
+        patch = False
         remaining_args = []
         
         for arg in args:
@@ -24,6 +25,8 @@ class EditCommand(BaseCommand):
                 preview = True
             elif arg == '--backup':
                 backup = True
+            elif arg == '--patch':
+                patch = True
             else:
                 remaining_args.append(arg)
         
@@ -42,6 +45,8 @@ class EditCommand(BaseCommand):
             options_pattern += r"(?:--preview\s+)?"
         if backup:
             options_pattern += r"(?:--backup\s+)?"
+        if patch:
+            options_pattern += r"(?:--patch\s+)?"
         
         # 匹配命令：edit [options] filename JSON_spec
         pattern = rf'^edit\s+{options_pattern}(\S+)\s+(.+)$'
@@ -57,7 +62,7 @@ class EditCommand(BaseCommand):
                 edit_spec = ' '.join(remaining_args[1:])
         
         try:
-            result = self.shell.cmd_edit(filename, edit_spec, preview=preview, backup=backup)
+            result = self.shell.cmd_edit(filename, edit_spec, preview=preview, backup=backup, patch=patch)
         except KeyboardInterrupt:
             result = {"success": False, "error": "Operation interrupted by user"}
         
@@ -20,15 +20,45 @@ class GrepCommand(BaseCommand):
             return False
         return True
     
-    def execute(self, args: List[str], **kwargs) -> int:
+    def execute(self, cmd: str, args: List[str], **kwargs) -> int:
         """Execute grep command."""
         self.print_debug(f"✅ MATCHED GREP BRANCH! Processing grep with args: {args}")
         
+        # 解析选项：-r/-R 递归，-i 忽略大小写，--include=GLOB，--cached 使用仍有效的本地缓存
+        recursive = False
+        ignore_case = False
+        use_cache = False
+        include = []
+        remaining_args = []
+        for arg in args:
+            if arg in ('-r', '-R'):
+                recursive = True
+            elif arg == '-i':
+                ignore_case = True
+            elif arg in ('-ri', '-ir', '-Ri', '-iR'):
+                recursive = True
+                ignore_case = True
+            elif arg == '--cached':
+                use_cache = True
+            elif arg.startswith('--include='):
+                include.append(arg[len('--include='):])
+            else:
+                remaining_args.append(arg)
+        args = remaining_args
+        if not args:
+            self.print_error("grep command needs a pattern")
+            return 1
+        
         # 处理参数解析
         if len(args) == 1:
-            # 只有一个参数，视为文件名，模式为空（等效于read）
-            pattern = ""
-            filenames = args
+            if recursive:
+                # 递归模式下只有模式，搜索当前目录
+                pattern = args[0]
+                filenames = []
+            else:
+                # 只有一个参数，视为文件名，模式为空（等效于read）
+                pattern = ""
+                filenames = args
         elif '.' in args[-1] and not args[-1].startswith('.'):
             # 最后一个参数很可能是文件名，前面的是模式
             filenames = [args[-1]]
@@ -61,30 +91,29 @@ class GrepCommand(BaseCommand):
                     self.print_error(f"无法读取文件: {filename}")
             return 0
         
-        # 有模式的grep，只显示匹配行
-        result = self.shell.cmd_grep(pattern, *filenames)
+        # 有模式的grep，只显示匹配行（匹配行随结果一起返回，不再重新下载文件）
+        result = self.shell.cmd_grep(pattern, *filenames, recursive=recursive, ignore_case=ignore_case,
+                                     include=include, use_cache=use_cache)
         if result.get("success", False):
             result_data = result.get("result", {})
             has_matches = False
             has_file_errors = False
+            show_filename = recursive or len(filenames) > 1
             
             for filename, file_result in result_data.items():
                 if "error" in file_result:
                     self.print_error(f"{filename}: {file_result['error']}")
                     has_file_errors = True
                 else:
-                    occurrences = file_result.get("occurrences", {})
-                    if occurrences:
+                    lines = file_result.get("lines", {})
+                    if lines:
                         has_matches = True
-                        # 获取文件内容用于显示匹配行
-                        cat_result = self.shell.cmd_cat(filename)
-                        if cat_result.get("success"):
-                            lines = cat_result["output"].split('\n')
-                            for line_num in sorted(occurrences.keys()):
-                                if 1 <= line_num <= len(lines):
-                                    print(f"{line_num:3}: {lines[line_num-1]}")
-                        else:
-                            self.print_error(f"无法读取文件内容: {filename}")
+                        for line_num in sorted(lines):
+                            prefix = f"{filename}:" if show_filename else ""
+                            print(f"{prefix}{line_num:3}: {lines[line_num]}")
+            
+            if result.get("truncated"):
+                print("... (output truncated)")
             
             # 按照bash grep的标准行为返回退出码
             if has_file_errors:
@@ -14,13 +14,14 @@ class UploadCommand(BaseCommand):
             return 1
         
         # 参数解析规则：
-        # 格式: upload [--target-dir TARGET] [--force] [--remove-local] file1 file2 file3 ...
+        # 格式: upload [--target-dir TARGET] [--force] [--remove-local] [--direct] file1 file2 file3 ...
         # 或者: upload file1 file2 file3 ... [--force] [--remove-local]
         
         target_path = "."  # 默认上传到当前目录
         source_files = []
         force = False
         remove_local = False
+        direct = False
         
         i = 0
         while i < len(args):
@@ -37,6 +38,10 @@ class UploadCommand(BaseCommand):
             elif args[i] == '--remove-local':
                 remove_local = True
                 i += 1
+            elif args[i] == '--direct':
+                # 通过Drive API直接上传，不经过Desktop同步
+                direct = True
+                i += 1
             else:
                 source_files.append(args[i])
                 i += 1
@@ -46,7 +51,7 @@ class UploadCommand(BaseCommand):
             return 1
         
         # 调用upload命令
-        result = self.shell.cmd_upload(source_files, target_path=target_path, force=force, remove_local=remove_local)
+        result = self.shell.cmd_upload(source_files, target_path=target_path, force=force, remove_local=remove_local, direct=direct)
         
         if result.get("success"):
             # 统一在命令处理结束后打印输出
@@ -0,0 +1,41 @@
+from .base_command import BaseCommand
+
+class UploadFolderCommand(BaseCommand):
+    @property
+    def command_name(self):
+        return "upload-folder"
+    
+    def execute(self, cmd, args, command_identifier=None):
+        """执行upload-folder命令"""
+        # 格式: upload-folder [--keep-zip] [--force] [--full] <folder> [target]
+        keep_zip = False
+        force = False
+        full = False
+        positional = []
+        
+        for arg in args:
+            if arg == '--keep-zip':
+                keep_zip = True
+            elif arg == '--force':
+                force = True
+            elif arg == '--full':
+                # 忽略同步清单，重新上传整个文件夹
+                full = True
+            else:
+                positional.append(arg)
+        
+        if not positional:
+            print("Error: upload-folder command needs a folder path")
+            return 1
+        
+        folder_path = positional[0]
+        target_path = positional[1] if len(positional) > 1 else "."
+        
+        result = self.shell.cmd_upload_folder(folder_path, target_path=target_path, keep_zip=keep_zip, force=force, full=full)
+        
+        if result.get("success"):
+            print(result.get("message", ""))
+            return 0
+        else:
+            print(result.get("error", "Folder upload failed"))
+            return 1
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Google Drive Shell - Drive Reader Module
+read/cat 使用的文件查找和内容读取
+
+- 按 名称+父目录 一次查询定位文件，同时取回 size/modifiedTime/md5Checksum，不再列出整个目录
+- 内容按 Range 分块读取并直接写入文件，不在内存中保留整个文件
+- 只需要前N行时（read <file> start end）只读取到包含这些行的位置为止
+"""
+
+FILE_FIELDS = "id, name, mimeType, size, modifiedTime, md5Checksum"
+FOLDER_MIME_TYPE = "application/vnd.google-apps.folder"
+DOWNLOAD_CHUNK_SIZE = 8 * 1024 * 1024
+RANGE_CHUNK_SIZE = 256 * 1024
+RANGE_READ_MIN_SIZE = 1024 * 1024  # 小于该大小的文件直接完整下载并缓存
+
+
+def escape_query_value(value):
+    """转义Drive查询字符串中的 \\ 和 '"""
+    return value.replace("\\", "\\\\").replace("'", "\\'")
+
+
+def find_child(service, parent_id, name):
+    """
+    在父目录中按名称查找文件（一次查询）
+
+    Returns:
+        dict or None: 文件元数据（包含 FILE_FIELDS）
+    """
+    query = f"name='{escape_query_value(name)}' and '{parent_id}' in parents and trashed=false"
+    results = service.files().list(q=query, pageSize=10, fields=f"files({FILE_FIELDS})").execute()
+    files = results.get("files", [])
+    # 同名时优先返回文件而不是文件夹
+    files.sort(key=lambda f: f.get("mimeType") == FOLDER_MIME_TYPE)
+    return files[0] if files else None
+
+
+def fetch_range(service, file_id, start, end):
+    """读取 [start, end] 字节区间（包含end）"""
+    request = service.files().get_media(fileId=file_id)
+    request.headers["Range"] = f"bytes={start}-{end}"
+    return request.execute()
+
+
+def download_to_file(service, file_id, path, size=None, chunk_size=DOWNLOAD_CHUNK_SIZE):
+    """
+    分块下载文件内容到本地路径
+
+    Returns:
+        int: 写入的字节数
+    """
+    written = 0
+    with open(path, "wb") as f:
+        if not size:
+            data = service.files().get_media(fileId=file_id).execute()
+            f.write(data)
+            return len(data)
+        while written < size:
+            data = fetch_range(service, file_id, written, min(written + chunk_size, size) - 1)
+            if not data:
+                break
+            f.write(data)
+            written += len(data)
+    return written
+
+
+def fetch_line_prefix(service, file_id, size, max_lines, chunk_size=RANGE_CHUNK_SIZE):
+    """
+    读取文件开头至少包含 max_lines 行的内容
+
+    没有读到文件末尾时，结果截断到最后一个换行符（包含），不会在多字节字符中间结束
+
+    Returns:
+        tuple: (bytes, complete)，complete表示已经读到文件末尾
+    """
+    buffer = bytearray()
+    while len(buffer) < size:
+        data = fetch_range(service, file_id, len(buffer), min(len(buffer) + chunk_size, size) - 1)
+        if not data:
+            break
+        buffer.extend(data)
+        if buffer.count(b"\n") >= max_lines:
+            break
+    if len(buffer) >= size:
+        return bytes(buffer), True
+    return bytes(buffer[:buffer.rfind(b"\n") + 1]), False
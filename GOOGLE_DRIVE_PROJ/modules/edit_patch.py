@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Google Drive Shell - Edit Patch Module
+edit --patch 使用的行级补丁
+
+本地在已校验的缓存副本上完成编辑，只把变化的行作为补丁发送到远端：
+远端脚本先校验文件md5与本地缓存一致（前置条件），应用补丁后再校验结果md5，
+两者都通过才原子替换文件；否则不修改远端文件，由调用方回退到整文件上传。
+"""
+
+import base64
+import difflib
+import hashlib
+import json
+
+PATCH_OK = 0
+PATCH_PRECONDITION_FAILED = 3  # 远端文件已被修改
+PATCH_RESULT_MISMATCH = 4      # 应用补丁后的内容与本地结果不一致
+MAX_PATCH_CHARS = 64 * 1024    # 补丁需要在远端窗口中粘贴，超过该大小直接整文件上传
+
+# 远端执行的补丁脚本（只依赖标准库），补丁参数以base64 JSON的形式在argv[1]中传入
+_REMOTE_PATCH_SCRIPT = r'''
+import base64, hashlib, json, os, shutil, sys
+spec = json.loads(base64.b64decode(sys.argv[1]).decode("utf-8"))
+path = spec["path"]
+try:
+    with open(path, "rb") as f:
+        data = f.read()
+except OSError as e:
+    print("patch: cannot read %s: %s" % (path, e))
+    sys.exit(3)
+if hashlib.md5(data).hexdigest() != spec["base_md5"]:
+    print("patch: precondition failed, remote file changed")
+    sys.exit(3)
+with open(path, "r", encoding=spec["encoding"]) as f:
+    lines = f.readlines()
+for start, end, new_lines in reversed(spec["ops"]):
+    lines[start:end] = new_lines
+content = "".join(lines).encode("utf-8")
+if hashlib.md5(content).hexdigest() != spec["result_md5"]:
+    print("patch: result mismatch")
+    sys.exit(4)
+if spec.get("backup_path"):
+    shutil.copy2(path, spec["backup_path"])
+tmp_path = path + ".gds_patch.tmp"
+with open(tmp_path, "wb") as f:
+    f.write(content)
+os.replace(tmp_path, path)
+print("patch: applied %d hunks" % len(spec["ops"]))
+'''
+
+
+def content_md5(lines):
+    """按上传时的写入方式（utf-8）计算行列表的md5"""
+    return hashlib.md5("".join(lines).encode("utf-8")).hexdigest()
+
+
+def compute_line_patch(original_lines, modified_lines):
+    """
+    计算行级补丁
+
+    Returns:
+        list: [[start, end, new_lines], ...]，start/end为原文件中的行区间 [start, end)，按位置排序
+    """
+    matcher = difflib.SequenceMatcher(None, original_lines, modified_lines, autojunk=False)
+    return [[i1, i2, modified_lines[j1:j2]]
+            for tag, i1, i2, j1, j2 in matcher.get_opcodes() if tag != "equal"]
+
+
+def apply_line_patch(lines, ops):
+    """在本地应用补丁（倒序应用，前面的行号不受影响）"""
+    lines = list(lines)
+    for start, end, new_lines in reversed(ops):
+        lines[start:end] = new_lines
+    return lines
+
+
+def patch_size(ops):
+    """补丁携带的字符数，用于判断是否值得走补丁路径"""
+    return sum(len(line) for _, _, new_lines in ops for line in new_lines)
+
+
+def build_remote_patch_command(remote_path, ops, base_md5, result_md5, encoding="utf-8", backup_path=None):
+    """
+    生成在远端应用补丁的单条bash命令
+
+    Args:
+        remote_path: 远端文件绝对路径
+        ops: compute_line_patch 的结果
+        base_md5: 本地缓存（编辑前）内容的md5，作为前置条件
+        result_md5: 编辑后内容的md5
+        encoding: 读取原文件使用的编码
+        backup_path: 可选，应用前把原文件复制到该路径
+    """
+    spec = {
+        "path": remote_path,
+        "ops": ops,
+        "base_md5": base_md5,
+        "result_md5": result_md5,
+        "encoding": encoding,
+        "backup_path": backup_path,
+    }
+    spec_b64 = base64.b64encode(json.dumps(spec, ensure_ascii=False).encode("utf-8")).decode("ascii")
+    script_b64 = base64.b64encode(_REMOTE_PATCH_SCRIPT.encode("utf-8")).decode("ascii")
+    # 命令中只有base64字符，不受远端命令生成时引号转义的影响
+    return f"echo {script_b64} | base64 -d | python3 - {spec_b64}"
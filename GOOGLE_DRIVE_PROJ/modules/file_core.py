@@ -141,17 +141,75 @@ class FileCore:
             debug_print(f"Remote file conflict check failed: {e}")
             return {"success": True, "conflicts": []}
 
-    def cmd_upload_folder(self, folder_path, target_path=".", keep_zip=False, force=False):
+    def _folder_include_filter(self, folder_path):
+        """与打包一致的忽略规则（.gitignore、__pycache__ 等）"""
+        from .folder_packer import load_ignore_patterns, is_ignored
+        patterns = load_ignore_patterns(folder_path)
+        return lambda relpath: not is_ignored(relpath, patterns)
+
+    def _folder_delta(self, folder_path, target_path):
+        """
+        比较本地文件夹与远端同名文件夹
+        
+        Returns:
+            dict: compute_delta的结果加上 "manifest"/"entries"；远端文件夹不存在或没有API服务时返回None
+        """
+        if not self.drive_service or getattr(self.drive_service, "service", None) is None:
+            return None
+        try:
+            from .sync_manifest import SyncManifest, list_remote_tree, compute_delta
+            current_shell = self.main_instance.get_current_shell()
+            if not current_shell:
+                return None
+            folder_name = Path(folder_path).name
+            remote_path = folder_name if target_path in (".", "") else f"{target_path.rstrip('/')}/{folder_name}"
+            folder_id, _ = self.main_instance.resolve_path(remote_path, current_shell)
+            if not folder_id:
+                return None
+            manifest = SyncManifest(folder_id)
+            entries = manifest.scan_folder(folder_path, include=self._folder_include_filter(folder_path))
+            delta = compute_delta(entries, list_remote_tree(self.drive_service.service, folder_id))
+            delta.update(manifest=manifest, entries=entries)
+            return delta
+        except Exception as e:
+            debug_print(f"Folder delta check failed: {e}")
+            return None
+
+    def _save_folder_manifest(self, folder_path, target_path, delta):
+        """上传成功后记录文件夹清单（首次上传时远端文件夹刚创建，需要重新解析ID）"""
+        try:
+            from .sync_manifest import SyncManifest
+            if delta is None:
+                if not self.drive_service or getattr(self.drive_service, "service", None) is None:
+                    return
+                folder_name = Path(folder_path).name
+                remote_path = folder_name if target_path in (".", "") else f"{target_path.rstrip('/')}/{folder_name}"
+                folder_id, _ = self.main_instance.resolve_path(remote_path, self.main_instance.get_current_shell())
+                if not folder_id:
+                    return
+                manifest = SyncManifest(folder_id)
+                entries = manifest.scan_folder(folder_path, include=self._folder_include_filter(folder_path))
+            else:
+                manifest, entries = delta["manifest"], delta["entries"]
+            manifest.entries = dict(entries)
+            manifest.save()
+        except Exception as e:
+            debug_print(f"Failed to save folder manifest: {e}")
+
+    def cmd_upload_folder(self, folder_path, target_path=".", keep_zip=False, force=False, full=False):
         """
         上传文件夹到Google Drive
         
         流程：打包 -> 上传zip文件（作为普通文件）
+        远端已有同名文件夹时只打包md5与远端不同的文件（远端用 unzip -o 覆盖），
+        远端多出的文件不会被删除。
         
         Args:
             folder_path (str): 要上传的文件夹路径
             target_path (str): 目标路径（相对于当前shell路径）
             keep_zip (bool): 是否保留本地zip文件（远端总是保留zip文件）
             force (bool): 是否强制覆盖现有文件
+            full (bool): 忽略同步清单，重新上传整个文件夹
             
         Returns:
             dict: 上传结果
@@ -159,12 +217,26 @@ class FileCore:
         try:
             folder_name = Path(folder_path).name
             
+            # 增量上传：只传输内容有变化的文件
+            delta = None if full or not Path(folder_path).is_dir() else self._folder_delta(folder_path, target_path)
+            if delta is not None and not delta["changed"]:
+                return {
+                    "success": True,
+                    "message": f"Folder {folder_name} is up to date ({len(delta['unchanged'])} files unchanged)",
+                    "original_folder": folder_path,
+                    "target_path": target_path,
+                    "changed_files": [],
+                    "unchanged_files": len(delta["unchanged"]),
+                    "method": "delta",
+                }
+            
             # 使用统一的进度显示系统
             from .progress_manager import start_progress_buffering, add_success_mark, clear_progress
             start_progress_buffering(f"Packing {folder_name} ...")
             
-            # 步骤1: 打包文件夹
-            zip_result = self.main_instance.file_utils._zip_folder(folder_path)
+            # 步骤1: 打包文件夹（增量模式下只打包变化的文件）
+            zip_result = self.main_instance.file_utils._zip_folder(
+                folder_path, include=delta["changed"] if delta is not None else None)
             if not zip_result["success"]:
                 clear_progress()
                 return {"success": False, "error": f"打包失败: {zip_result['error']}"}
@@ -187,16 +259,22 @@ class FileCore:
                 if not upload_result["success"]:
                     return {"success": False, "error": f"上传失败: {upload_result['error']}"}
                 
+                self._save_folder_manifest(folder_path, target_path, delta)
+                
                 # 成功完成 - 不需要额外的输出，cmd_upload已经处理了进度显示
+                message = f"Uploaded folder: {folder_name}"
+                if delta is not None:
+                    message += f" ({len(delta['changed'])} changed, {len(delta['unchanged'])} unchanged)"
                 return {
                     "success": True,
-                    "message": f"Uploaded folder: {folder_name}",
+                    "message": message,
+                    "changed_files": delta["changed"] if delta is not None else None,
                     "original_folder": folder_path,
                     "zip_uploaded": zip_filename,
                     "zip_kept": keep_zip,
                     "target_path": target_path,
                     "zip_size": zip_result.get("zip_size", 0),
-                    "method": "zip_upload_and_extract",
+                    "method": "delta_zip_upload_and_extract" if delta is not None else "zip_upload_and_extract",
                     "upload_details": upload_result
                 }
                 
@@ -222,7 +300,140 @@ class FileCore:
                 pass
             return {"success": False, "error": f"Folder upload process failed: {e}"}
 
-    def cmd_upload(self, source_files, target_path=".", force=False, folder_upload_info=None, remove_local=False):
+    def _find_existing_files(self, folder_id, names):
+        """用一个查询找出目标文件夹中已存在的同名文件，返回 {name: {"id", "md5Checksum"}}"""
+        if not names:
+            return {}
+        name_clause = " or ".join("name='{}'".format(n.replace("\\", "\\\\").replace("'", "\\'")) for n in names)
+        query = f"'{folder_id}' in parents and trashed=false and ({name_clause})"
+        results = self.drive_service.service.files().list(
+            q=query, pageSize=max(10, len(names)), fields="files(id,name,md5Checksum)").execute()
+        return {item["name"]: item for item in results.get("files", [])}
+
+    def _filter_unchanged_files(self, source_files, target_path):
+        """
+        找出内容与远端一致（Drive md5Checksum相同）的文件
+        
+        本地md5通过目标目录的同步清单复用（size和mtime未变时不重新读取文件）。
+        
+        Returns:
+            dict: {"changed", "unchanged", "manifest", "entries"}；没有API服务或目标目录不存在时返回None
+        """
+        if not self.drive_service or getattr(self.drive_service, "service", None) is None:
+            return None
+        try:
+            from .sync_manifest import SyncManifest
+            current_shell = self.main_instance.get_current_shell()
+            if not current_shell:
+                return None
+            target_folder_id, _ = self.main_instance.path_resolver._resolve_target_path_for_upload(target_path, current_shell)
+            if not target_folder_id:
+                return None
+            files = [f for f in source_files if os.path.isfile(f)]
+            manifest = SyncManifest(target_folder_id)
+            entries = {Path(f).name: manifest.local_entry(f) for f in files}
+            remote = self._find_existing_files(target_folder_id, list(entries))
+            unchanged = [f for f in files
+                         if remote.get(Path(f).name, {}).get("md5Checksum") == entries[Path(f).name]["md5"]]
+            changed = [f for f in source_files if f not in unchanged]
+            return {"changed": changed, "unchanged": unchanged, "manifest": manifest, "entries": entries}
+        except Exception as e:
+            debug_print(f"Unchanged file check failed: {e}")
+            return None
+
+    def _record_uploaded_files(self, delta, uploaded_names):
+        """把成功上传的文件写入目标目录的同步清单"""
+        if not delta or not uploaded_names:
+            return
+        try:
+            delta["manifest"].update({name: delta["entries"][name] for name in uploaded_names if name in delta["entries"]})
+            delta["manifest"].save()
+        except Exception as e:
+            debug_print(f"Failed to update sync manifest: {e}")
+
+    def _get_resumable_uploader(self):
+        """创建直接上传使用的 ResumableUploader（会话URI持久化在GOOGLE_DRIVE_DATA中）"""
+        from .resumable_upload import ResumableUploader, UploadSessionStore
+        data_dir = Path(__file__).parent.parent.parent / "GOOGLE_DRIVE_DATA"
+        return ResumableUploader(
+            self.drive_service.get_access_token,
+            max_workers=int(os.environ.get("GDS_UPLOAD_WORKERS", 4)),
+            session_store=UploadSessionStore(data_dir / "upload_sessions.json"),
+        )
+
+    def cmd_upload_direct(self, source_files, target_path=".", force=False, remove_local=False):
+        """
+        通过Drive API resumable upload直接上传到目标文件夹ID
+        
+        不经过LOCAL_EQUIVALENT和Desktop同步，也不需要远端窗口执行mv；
+        大文件同样适用（分块上传，中断后可续传）。
+        
+        Returns:
+            dict: 上传结果
+        """
+        if isinstance(source_files, str):
+            source_files = [source_files]
+        if not self.drive_service or getattr(self.drive_service, "service", None) is None:
+            return {"success": False, "error": "Direct upload requires the Google Drive API service"}
+        for source_file in source_files:
+            if Path(source_file).is_dir():
+                return {"success": False, "error": f"'{source_file}' is a directory. To upload folders, use: GDS upload-folder {source_file}"}
+            if not os.path.isfile(source_file):
+                return {"success": False, "error": f"File not found: {source_file}"}
+        
+        current_shell = self.main_instance.get_current_shell()
+        if not current_shell:
+            return {"success": False, "error": "No active remote shell, please create or switch to a shell"}
+        target_folder_id, target_display_path = self.main_instance.path_resolver._resolve_target_path_for_upload(target_path, current_shell)
+        if not target_folder_id:
+            return {"success": False, "error": f"Target directory does not exist: {target_path}. Create it with mkdir first."}
+        
+        names = [Path(f).name for f in source_files]
+        existing = {name: meta["id"] for name, meta in self._find_existing_files(target_folder_id, names).items()}
+        if existing and not force:
+            return {"success": False, "error": f"\nFile exists: {', '.join(sorted(existing))}. Use --force to override."}
+        for name in existing:
+            print(f"Warning: Overriding remote file {name}")
+        
+        uploads = [{"path": f, "target_folder_id": target_folder_id, "name": Path(f).name,
+                    "file_id": existing.get(Path(f).name)} for f in source_files]
+        start_time = time.time()
+        results = self._get_resumable_uploader().upload_files(uploads)
+        uploaded = [r for r in results if r["success"]]
+        failed = [r for r in results if not r["success"]]
+        
+        removed_files = []
+        if remove_local:
+            for source_file, upload_result in zip(source_files, results):
+                if upload_result["success"]:
+                    try:
+                        os.unlink(source_file)
+                        removed_files.append(source_file)
+                    except OSError:
+                        pass
+        
+        result = {
+            "success": not failed,
+            "uploaded_files": [r["name"] for r in uploaded],
+            "failed_files": [r["name"] for r in failed],
+            "target_path": target_display_path,
+            "target_folder_id": target_folder_id,
+            "total_attempted": len(results),
+            "total_succeeded": len(uploaded),
+            "upload_results": results,
+            "sync_time": time.time() - start_time,
+            "direct_upload": True,
+            "message": f"Upload completed: {len(uploaded)}/{len(results)} files",
+            "api_available": True,
+        }
+        if removed_files:
+            result["removed_local_files"] = removed_files
+            result["message"] += f" (removed {len(removed_files)} local files)"
+        if failed:
+            result["error"] = "Upload failed: " + "; ".join(f"{r['name']}: {r.get('error')}" for r in failed)
+        return result
+
+    def cmd_upload(self, source_files, target_path=".", force=False, folder_upload_info=None, remove_local=False, direct=False):
         """
         GDS UPLOAD 命令实现
         
@@ -230,10 +441,36 @@ class FileCore:
             source_files (list): 要上传的源文件路径列表
             target_path (str): 目标路径（相对于当前 shell 路径）
             force (bool): 是否强制覆盖现有文件
+            direct (bool): 通过Drive API直接上传（也可用环境变量 GDS_DIRECT_UPLOAD=1 默认开启）
             
         Returns:
             dict: 上传结果
         """
+        if isinstance(source_files, str):
+            source_files = [source_files]
+        
+        # 内容与远端一致的文件不再重复传输
+        delta = None
+        if not folder_upload_info and source_files:
+            delta = self._filter_unchanged_files(source_files, target_path)
+            if delta and delta["unchanged"]:
+                source_files = delta["changed"]
+                if not source_files:
+                    return {
+                        "success": True,
+                        "message": f"All files are up to date ({len(delta['unchanged'])} unchanged)",
+                        "uploaded_files": [],
+                        "skipped_unchanged": delta["unchanged"],
+                    }
+        
+        # 直接上传不经过Desktop同步；文件夹上传依赖远端解压命令，仍走原有流程
+        if (direct or os.environ.get("GDS_DIRECT_UPLOAD") == "1") and not folder_upload_info:
+            result = self.cmd_upload_direct(source_files, target_path, force=force, remove_local=remove_local)
+            self._record_uploaded_files(delta, result.get("uploaded_files"))
+            if delta and delta["unchanged"]:
+                result["skipped_unchanged"] = delta["unchanged"]
+            return result
+        
         progress_started = False
         try:
             # 使用进度管理器显示上传进度
@@ -348,7 +585,9 @@ class FileCore:
             
             for source_file in source_files:
                 debug_print(f"Processing file: {source_file}")
-                move_result = self.main_instance.sync_manager.move_to_local_equivalent(source_file)
+                # 打包生成的临时zip不需要保留，直接移动以避免再复制一份
+                move_zip = bool(folder_upload_info and folder_upload_info.get("is_folder_upload") and not folder_upload_info.get("keep_zip"))
+                move_result = self.main_instance.sync_manager.move_to_local_equivalent(source_file, move=move_zip)
                 debug_print(f"Move result: {move_result}")
                 
                 if move_result["success"]:
@@ -484,6 +723,7 @@ class FileCore:
             # 9. 上传和远端命令执行完成后，清理LOCAL_EQUIVALENT中的文件
             if verify_result["success"]:
                 self._cleanup_local_equivalent_files(file_moves)
+                self._record_uploaded_files(delta, [fm.get("original_filename", fm["filename"]) for fm in file_moves])
                 
                 # 添加删除记录到缓存（记录原始文件名和临时文件名的使用）
                 for file_info in file_moves:
@@ -524,8 +764,10 @@ class FileCore:
                 "failed_moves": failed_moves,
                 "sync_time": sync_result.get("sync_time", 0),
                 "message": f"Upload completed: {len(verify_result.get('found_files', []))}/{len(file_moves)} files" if verify_result["success"] else f" ✗\n⚠️ Partially uploaded: {len(verify_result.get('found_files', []))}/{len(file_moves)} files",
-                "api_available": self.drive_service is not None
+                "api_available": bool(self.drive_service)
             }
+            if delta and delta["unchanged"]:
+                result["skipped_unchanged"] = delta["unchanged"]
             
             # Add debug information for all uploads to diagnose verification issues
             used_direct_feedback = verify_result.get("source") == "direct_feedback"
@@ -1,30 +1,29 @@
+from .lazy_loading import LazyManagerMixin
 
-from .venv_operations import VenvOperations
-from .pyenv_operations import PyenvOperations
-from .pip_operations import PipOperations
-from .dependency_analysis import DependencyAnalysis
-from .python_execution import PythonExecution
-from .file_core import FileCore
-from .text_operations import TextOperations
-
-class FileOperations:
+class FileOperations(LazyManagerMixin):
     """
     Main file operations coordinator - delegates to specialized modules
     """
     
+    # Specialized modules are imported and constructed on first use
+    _LAZY_MANAGERS = {
+        "venv_operations": ("venv_operations", "VenvOperations"),
+        "pyenv_operations": ("pyenv_operations", "PyenvOperations"),
+        "pip_operations": ("pip_operations", "PipOperations"),
+        "dependency_analysis": ("dependency_analysis", "DependencyAnalysis"),
+        "python_execution": ("python_execution", "PythonExecution"),
+        "file_core": ("file_core", "FileCore"),
+        "text_operations": ("text_operations", "TextOperations"),
+    }
+    _LAZY_PACKAGE = __package__
+    
     def __init__(self, drive_service, main_instance=None):
-        """Initialize all specialized modules"""
+        """Initialize the coordinator; specialized modules load lazily"""
         self.drive_service = drive_service
         self.main_instance = main_instance
     
-        # Initialize specialized modules
-        self.venv_operations = VenvOperations(drive_service, main_instance)
-        self.pyenv_operations = PyenvOperations(drive_service, main_instance)
-        self.pip_operations = PipOperations(drive_service, main_instance)
-        self.dependency_analysis = DependencyAnalysis(drive_service, main_instance)
-        self.python_execution = PythonExecution(drive_service, main_instance)
-        self.file_core = FileCore(drive_service, main_instance)
-        self.text_operations = TextOperations(drive_service, main_instance)
+    def _lazy_manager_args(self):
+        return self.drive_service, self.main_instance
 
     def get_venv_base_path(self, *args, **kwargs):
         """Delegate to venv_operations"""
@@ -151,9 +150,8 @@ class FileOperations:
         return self.text_operations.cmd_wc(*args, **kwargs)
     
     def cmd_read(self, filename, *args, **kwargs):
-        """Read file content - delegate to text_operations cat command for now"""
-        # For now, use cat command as a simple implementation of read
-        return self.text_operations.cmd_cat(filename)
+        """Delegate to text_operations"""
+        return self.text_operations.cmd_read(filename, *args, **kwargs)
     
     def cmd_linter(self, filename, *args, **kwargs):
         """Lint file - delegate to linter functionality"""
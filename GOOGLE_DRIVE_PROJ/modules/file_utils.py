@@ -95,74 +95,21 @@ class FileUtils:
     
   # 引用主实例以访问其他属性
 
-    def _zip_folder(self, folder_path, zip_path=None):
+    def _zip_folder(self, folder_path, zip_path=None, include=None, ignore=True):
         """
-        将文件夹打包成zip文件
+        将文件夹打包成zip文件（并行压缩，见 folder_packer）
         
         Args:
             folder_path (str): 要打包的文件夹路径
-            zip_path (str): zip文件保存路径，如果为None则自动生成
+            zip_path (str): zip文件保存路径，如果为None则在临时目录中生成唯一文件名
+            include (list): 只打包这些相对路径（增量上传），None表示整个文件夹
+            ignore (bool): 是否应用 .gitignore 和默认忽略规则（__pycache__、.git 等）
             
         Returns:
             dict: 打包结果 {"success": bool, "zip_path": str, "error": str}
         """
-        try:
-            folder_path = Path(folder_path)
-            if not folder_path.exists():
-                return {"success": False, "error": f"文件夹不存在: {folder_path}"}
-            
-            if not folder_path.is_dir():
-                return {"success": False, "error": f"路径不是文件夹: {folder_path}"}
-            
-            # 生成zip文件路径
-            if zip_path is None:
-                # 在临时目录中创建zip文件
-                temp_dir = Path(tempfile.gettempdir())
-                zip_filename = f"{folder_path.name}.zip"
-                zip_path = temp_dir / zip_filename
-            else:
-                zip_path = Path(zip_path)
-            
-            # 创建zip文件
-            with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
-                # 遍历文件夹中的所有文件和目录
-                files_added = 0
-                dirs_added = 0
-                
-                for file_path in folder_path.rglob('*'):
-                    if file_path.is_file():
-                        # 计算相对路径，使用文件夹名作为根目录
-                        arcname = file_path.relative_to(folder_path.parent)
-                        zipf.write(file_path, arcname)
-                        files_added += 1
-                    elif file_path.is_dir():
-                        # 添加空目录到zip文件
-                        arcname = file_path.relative_to(folder_path.parent)
-                        # 确保目录名以/结尾
-                        dir_arcname = str(arcname) + '/'
-                        zipf.writestr(dir_arcname, '')
-                        dirs_added += 1
-                
-                # 如果文件夹完全为空，至少添加根目录本身
-                if files_added == 0 and dirs_added == 0:
-                    root_dir_name = folder_path.name + '/'
-                    zipf.writestr(root_dir_name, '')
-                    dirs_added = 1
-                        
-            # 检查zip文件是否创建成功
-            if zip_path.exists():
-                file_size = zip_path.stat().st_size
-                return {
-                    "success": True,
-                    "zip_path": str(zip_path),
-                    "original_folder": str(folder_path),
-                    "zip_size": file_size
-                }
-            else:
-                return {"success": False, "error": "zip文件创建失败"}
-                
-        except Exception as e:
-            return {"success": False, "error": f"打包过程出错: {e}"}
+        from .folder_packer import pack_folder
+        return pack_folder(folder_path, zip_path=zip_path, include=include, ignore=ignore)
 
     def _unzip_remote_file(self, zip_filename, target_dir=".", delete_zip=True, remote_path=None):
         """
@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""
+Google Drive Shell - Folder Packer Module
+并行压缩的文件夹打包器
+
+- 小文件在线程池中用zlib并行压缩（zlib压缩时释放GIL），主线程按顺序写入zip；
+  在途（已提交、未写入）的数据量不超过 MAX_INFLIGHT_BYTES
+- 大文件在主线程流式写入，内存占用与文件大小无关
+- 已压缩格式（jpg/png/npz/zip/pt等）以STORED方式写入，不再重复压缩
+- 遵循 .gitignore 和默认忽略规则（__pycache__、.git 等）
+- 默认输出到唯一命名的临时文件，多个上传可以同时进行
+"""
+
+import fnmatch
+import os
+import tempfile
+import zipfile
+import zlib
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+# 已经压缩过的格式，再做DEFLATE只浪费CPU
+STORED_EXTENSIONS = {
+    ".jpg", ".jpeg", ".png", ".gif", ".webp", ".heic",
+    ".mp3", ".mp4", ".mov", ".avi", ".mkv", ".webm",
+    ".zip", ".gz", ".tgz", ".bz2", ".xz", ".7z", ".rar", ".zst",
+    ".npz", ".pt", ".pth", ".ckpt", ".safetensors", ".h5", ".pkl.gz",
+    ".whl", ".jar", ".pdf",
+}
+DEFAULT_IGNORE_PATTERNS = ["__pycache__/", "*.pyc", ".git/", ".DS_Store", ".ipynb_checkpoints/"]
+PARALLEL_MAX_SIZE = 32 * 1024 * 1024  # 超过该大小的文件在主线程流式压缩
+# 在途文件的原始大小之和上限；每个在途文件最多同时占用原始数据和压缩结果两份内存
+MAX_INFLIGHT_BYTES = int(float(os.environ.get("GDS_PACK_MAX_INFLIGHT_MB", 128)) * 1024 * 1024)
+COMPRESS_LEVEL = 6
+
+# _write_precompressed 按 ZipFile.write 自身的方式维护这些内部状态，CPython 3.6-3.13 的zipfile中一致
+# （test_folder_packer_* 在当前解释器上校验生成的zip）；缺少任何一个时退回 ZipFile.write 串行压缩
+ZIPFILE_INTERNALS = ("fp", "filelist", "NameToInfo", "start_dir", "_didModify")
+
+
+def load_ignore_patterns(folder_path):
+    """读取文件夹根目录的 .gitignore，并加上默认忽略规则（不支持 ! 取反）"""
+    patterns = list(DEFAULT_IGNORE_PATTERNS)
+    gitignore = Path(folder_path) / ".gitignore"
+    if gitignore.is_file():
+        for line in gitignore.read_text(encoding="utf-8", errors="ignore").splitlines():
+            line = line.strip()
+            if line and not line.startswith("#") and not line.startswith("!"):
+                patterns.append(line)
+    return patterns
+
+
+def is_ignored(relpath, patterns):
+    """
+    判断相对路径（posix）是否被忽略
+
+    以 / 开头的规则只匹配根目录下的路径；以 / 结尾的规则匹配目录（及其下所有文件）；
+    其他规则匹配任意一级路径名或完整相对路径。
+    """
+    parts = relpath.split("/")
+    for pattern in patterns:
+        dir_only = pattern.endswith("/")
+        pattern = pattern.strip("/") if pattern.startswith("/") else pattern.rstrip("/")
+        anchored = "/" in pattern
+        if anchored:
+            # 含 / 的规则相对于根目录匹配，包括目录前缀
+            for depth in range(1, len(parts) + 1):
+                if dir_only and depth == len(parts):
+                    break
+                if fnmatch.fnmatch("/".join(parts[:depth]), pattern):
+                    return True
+            continue
+        candidates = parts[:-1] if dir_only else parts
+        if any(fnmatch.fnmatch(part, pattern) for part in candidates):
+            return True
+    return False
+
+
+def iter_folder_files(folder_path, patterns=None):
+    """
+    遍历文件夹中未被忽略的文件和空目录（被忽略的目录不会进入）
+
+    Yields:
+        (relpath, is_dir)
+    """
+    folder_path = Path(folder_path)
+    patterns = load_ignore_patterns(folder_path) if patterns is None else patterns
+    for root, dirs, files in os.walk(folder_path):
+        rel_root = Path(root).relative_to(folder_path).as_posix()
+        rel_root = "" if rel_root == "." else rel_root
+        dirs[:] = sorted(d for d in dirs if not is_ignored(f"{rel_root}/{d}/x".lstrip("/"), patterns))
+        kept_files = []
+        for name in sorted(files):
+            relpath = f"{rel_root}/{name}" if rel_root else name
+            if not is_ignored(relpath, patterns):
+                kept_files.append(relpath)
+        if rel_root and not dirs and not kept_files:
+            yield rel_root, True
+        for relpath in kept_files:
+            yield relpath, False
+
+
+def _compress(path):
+    """在工作线程中读取并压缩一个文件，返回 (raw_deflate_data, crc, size)"""
+    with open(path, "rb") as f:
+        data = f.read()
+    compressor = zlib.compressobj(COMPRESS_LEVEL, zlib.DEFLATED, -15)
+    payload = compressor.compress(data) + compressor.flush()
+    return payload, zlib.crc32(data) & 0xffffffff, len(data)
+
+
+def supports_precompressed(zipf):
+    """当前Python的ZipFile是否有 _write_precompressed 需要的内部状态"""
+    return all(hasattr(zipf, name) for name in ZIPFILE_INTERNALS) and hasattr(zipfile.ZipInfo, "FileHeader")
+
+
+def _write_precompressed(zipf, zinfo, payload, crc, size):
+    """把已经压缩好的DEFLATE数据作为一个条目写入zip（需要 supports_precompressed）"""
+    zinfo.compress_type = zipfile.ZIP_DEFLATED
+    zinfo.file_size = size
+    zinfo.compress_size = len(payload)
+    zinfo.CRC = crc
+    zinfo.header_offset = zipf.fp.tell()
+    zipf.fp.write(zinfo.FileHeader(False))
+    zipf.fp.write(payload)
+    zipf.filelist.append(zinfo)
+    zipf.NameToInfo[zinfo.filename] = zinfo
+    zipf.start_dir = zipf.fp.tell()
+    zipf._didModify = True
+
+
+def make_temp_zip_path(folder_name, output_dir=None):
+    """生成唯一的zip路径，避免并发上传互相覆盖"""
+    fd, path = tempfile.mkstemp(prefix=f"{folder_name}_", suffix=".zip", dir=output_dir)
+    os.close(fd)
+    return Path(path)
+
+
+def pack_folder(folder_path, zip_path=None, include=None, ignore=True, workers=None, output_dir=None):
+    """
+    把文件夹打包为zip，条目以文件夹名为根目录
+
+    Args:
+        folder_path: 要打包的文件夹
+        zip_path: 输出路径；None时在output_dir（默认系统临时目录）中生成唯一文件名
+        include: 只打包这些相对路径（增量上传），None表示整个文件夹
+        ignore: 是否应用 .gitignore 和默认忽略规则
+        workers: 压缩线程数，默认CPU核数
+
+    Returns:
+        dict: {"success", "zip_path", "zip_size", "files_added", "stored_files", "error"}
+    """
+    folder_path = Path(folder_path)
+    if not folder_path.exists():
+        return {"success": False, "error": f"文件夹不存在: {folder_path}"}
+    if not folder_path.is_dir():
+        return {"success": False, "error": f"路径不是文件夹: {folder_path}"}
+
+    zip_path = Path(zip_path) if zip_path else make_temp_zip_path(folder_path.name, output_dir)
+    if include is not None:
+        entries = [(relpath, False) for relpath in include]
+    else:
+        entries = list(iter_folder_files(folder_path, None if ignore else []))
+    root = folder_path.name
+    workers = workers or min(8, os.cpu_count() or 1)
+
+    files_added = 0
+    stored_files = 0
+    try:
+        with zipfile.ZipFile(zip_path, "w", zipfile.ZIP_DEFLATED) as zipf, \
+                ThreadPoolExecutor(max_workers=workers) as executor:
+            parallel = supports_precompressed(zipf)
+            pending = deque()
+            inflight_bytes = 0
+
+            def flush(max_items, max_bytes=0):
+                # 按提交顺序写入已完成的压缩结果，保持zip条目顺序确定
+                nonlocal inflight_bytes
+                while pending and (len(pending) > max_items or inflight_bytes > max_bytes):
+                    zinfo, future, file_size = pending.popleft()
+                    _write_precompressed(zipf, zinfo, *future.result())
+                    inflight_bytes -= file_size
+
+            for relpath, is_dir in entries:
+                arcname = f"{root}/{relpath}"
+                if is_dir:
+                    flush(0)
+                    zipf.writestr(arcname + "/", "")
+                    continue
+                file_path = folder_path / relpath
+                size = file_path.stat().st_size
+                if Path(relpath).suffix.lower() in STORED_EXTENSIONS:
+                    flush(0)
+                    zipf.write(file_path, arcname, compress_type=zipfile.ZIP_STORED)
+                    stored_files += 1
+                elif size > PARALLEL_MAX_SIZE or not parallel:
+                    flush(0)
+                    zipf.write(file_path, arcname)
+                else:
+                    # 限制在途任务数和在途字节数，再提交这个文件
+                    flush(workers * 4 - 1, MAX_INFLIGHT_BYTES - size)
+                    zinfo = zipfile.ZipInfo.from_file(file_path, arcname)
+                    pending.append((zinfo, executor.submit(_compress, file_path), size))
+                    inflight_bytes += size
+                files_added += 1
+            flush(0)
+
+            if not entries:
+                zipf.writestr(root + "/", "")
+    except Exception as e:
+        try:
+            zip_path.unlink()
+        except OSError:
+            pass
+        return {"success": False, "error": f"打包过程出错: {e}"}
+
+    return {
+        "success": True,
+        "zip_path": str(zip_path),
+        "original_folder": str(folder_path),
+        "zip_size": zip_path.stat().st_size,
+        "files_added": files_added,
+        "stored_files": stored_files,
+    }
@@ -0,0 +1,365 @@
+#!/usr/bin/env python3
+"""
+Google Drive Shell - Folder Tree Module
+本地持久化的文件夹树（文件夹ID -> 名称、父目录），供路径解析使用
+
+- 每次列出目录（ls等调用 list_files）时记录其中的子文件夹，完整列出时同时删除已不存在的子文件夹
+- 树中没有（或已过期）的路径段按名称查询：只有一段时一次查询，多段时用Drive batch HTTP API
+  把每一段的名称查询放进同一个请求，在本地按父子关系串起来，cd a/b/c/d 最多一次往返
+- 远端执行 rm/rmdir/mv 之前删除涉及路径（及其子目录）的记录，其他进程的修改在下次使用时重新加载
+"""
+
+import atexit
+import json
+import os
+import re
+import shlex
+import sys
+import threading
+import time
+from pathlib import Path
+
+try:
+    from .drive_reader import FOLDER_MIME_TYPE, escape_query_value
+except ImportError:
+    # 不经过modules包单独加载时，从同目录导入
+    sys.path.insert(0, str(Path(__file__).parent))
+    from drive_reader import FOLDER_MIME_TYPE, escape_query_value
+
+FOLDER_TREE_FILE = Path(__file__).parent.parent.parent / "GOOGLE_DRIVE_DATA" / "folder_tree.json"
+# 记录的有效期（秒），远端的重命名/删除在过期后一定会被重新查询到
+FOLDER_TREE_TTL = int(os.environ.get("GDS_FOLDER_TREE_TTL", 3600))
+MAX_BATCH_SIZE = 100  # Drive batch请求最多包含100个子请求
+# 目录列出产生的记录最多攒这么久（秒）再写盘，进程退出时写入剩余的记录
+SAVE_INTERVAL = 5.0
+# 会让已记录的文件夹失效的远端命令
+INVALIDATING_COMMANDS = {"rm", "rmdir", "mv"}
+
+
+class FolderTree:
+    """
+    文件夹树
+
+    folders: {folder_id: {"name": str, "parent": str, "updated": float}}
+    """
+
+    def __init__(self, path=None, ttl=None):
+        self.path = Path(path or FOLDER_TREE_FILE)
+        self.ttl = FOLDER_TREE_TTL if ttl is None else ttl
+        self._lock = threading.RLock()
+        self._file_state = self._stat()
+        self.folders = self._load()
+        self._rebuild_children()
+        # 上次写盘之后在本进程中修改过的文件夹ID
+        self._dirty = set()
+        self._last_save = time.time()
+
+    def _rebuild_children(self):
+        self._children = {(info["parent"], info["name"]): folder_id
+                          for folder_id, info in self.folders.items()}
+
+    def _stat(self):
+        try:
+            stat = os.stat(self.path)
+            return stat.st_mtime_ns, stat.st_size
+        except OSError:
+            return None
+
+    def _load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f).get("folders", {})
+        except (OSError, json.JSONDecodeError, AttributeError):
+            return {}
+
+    def reload_if_changed(self):
+        """文件被其他进程修改后重新加载；本进程尚未写盘的修改（记录或删除）优先"""
+        state = self._stat()
+        if state == self._file_state:
+            return
+        with self._lock:
+            folders = self._load()
+            for folder_id in self._dirty:
+                if folder_id in self.folders:
+                    folders[folder_id] = self.folders[folder_id]
+                else:
+                    folders.pop(folder_id, None)
+            self.folders = folders
+            self._rebuild_children()
+            self._file_state = state
+
+    def save(self):
+        with self._lock:
+            self.reload_if_changed()
+            try:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                tmp_path = self.path.with_suffix(f".{os.getpid()}.tmp")
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump({"folders": self.folders}, f, ensure_ascii=False)
+                os.replace(tmp_path, self.path)
+                self._file_state = self._stat()
+                self._dirty.clear()
+                self._last_save = time.time()
+            except OSError as e:
+                print(f"Warning: Save folder tree failed: {e}")
+
+    def flush(self, force=False):
+        """有未写盘的修改时写盘；force为False时距上次写盘不足SAVE_INTERVAL秒则推迟"""
+        with self._lock:
+            if self._dirty and (force or time.time() - self._last_save >= SAVE_INTERVAL):
+                self.save()
+
+    def _fresh(self, info):
+        return info is not None and time.time() - info.get("updated", 0) <= self.ttl
+
+    def record(self, folder_id, name, parent_id):
+        """记录（或刷新）一个文件夹"""
+        with self._lock:
+            previous = self.folders.get(folder_id)
+            if previous and self._children.get((previous["parent"], previous["name"])) == folder_id:
+                del self._children[(previous["parent"], previous["name"])]
+            self.folders[folder_id] = {"name": name, "parent": parent_id, "updated": time.time()}
+            self._children[(parent_id, name)] = folder_id
+            self._dirty.add(folder_id)
+
+    def forget(self, folder_id):
+        """删除一个文件夹的记录"""
+        with self._lock:
+            info = self.folders.pop(folder_id, None)
+            if info is None:
+                return
+            if self._children.get((info["parent"], info["name"])) == folder_id:
+                del self._children[(info["parent"], info["name"])]
+            self._dirty.add(folder_id)
+
+    def forget_subtree(self, folder_id):
+        """删除一个文件夹及其所有已记录的子文件夹"""
+        with self._lock:
+            pending = [folder_id]
+            while pending:
+                current = pending.pop()
+                pending.extend(child_id for child_id, info in self.folders.items() if info["parent"] == current)
+                self.forget(current)
+
+    def forget_path(self, base_folder_id, names):
+        """沿树删除 base_folder_id/names 对应的文件夹及其子文件夹（只用本地记录，不查询）"""
+        with self._lock:
+            current_id = base_folder_id
+            for name in names:
+                current_id = self._children.get((current_id, name))
+                if not current_id:
+                    return
+            if current_id != base_folder_id:
+                self.forget_subtree(current_id)
+
+    def clear(self):
+        """删除所有记录"""
+        with self._lock:
+            self._dirty.update(self.folders)
+            self.folders = {}
+            self._children = {}
+
+    def record_listing(self, parent_id, files, complete=False):
+        """
+        记录一次目录列出的结果
+
+        Args:
+            parent_id: 被列出的目录ID
+            files: list_files返回的文件列表
+            complete: 是否是完整的列表（完整时删除列表中已经不存在的子文件夹）
+        """
+        with self._lock:
+            seen = set()
+            for f in files:
+                if f.get("mimeType") == FOLDER_MIME_TYPE:
+                    self.record(f["id"], f["name"], parent_id)
+                    seen.add(f["id"])
+            if complete:
+                for folder_id, info in list(self.folders.items()):
+                    if info["parent"] == parent_id and folder_id not in seen:
+                        self.forget_subtree(folder_id)
+        self.flush()
+
+    def child(self, parent_id, name):
+        """返回父目录中名为name的子文件夹ID，没有记录或已过期时返回None"""
+        folder_id = self._children.get((parent_id, name))
+        return folder_id if folder_id and self._fresh(self.folders.get(folder_id)) else None
+
+    def parent(self, folder_id):
+        """返回文件夹的父目录ID，没有记录或已过期时返回None"""
+        info = self.folders.get(folder_id)
+        return info["parent"] if self._fresh(info) else None
+
+    def has_child_named(self, parent_name, name):
+        """树中是否记录了某个名为parent_name的文件夹下名为name的子文件夹（即该路径段很可能可以在本地接上）"""
+        with self._lock:
+            for info in self.folders.values():
+                if info["name"] == name and self._fresh(info):
+                    parent_info = self.folders.get(info["parent"])
+                    if parent_info and parent_info["name"] == parent_name:
+                        return True
+        return False
+
+
+_folder_tree = None
+_folder_tree_lock = threading.Lock()
+
+
+def get_folder_tree():
+    """进程内共享的文件夹树"""
+    global _folder_tree
+    with _folder_tree_lock:
+        if _folder_tree is None:
+            _folder_tree = FolderTree()
+            atexit.register(_folder_tree.flush, True)
+        else:
+            _folder_tree.reload_if_changed()
+        return _folder_tree
+
+
+def _folder_query(name, parent_id=None):
+    query = f"name='{escape_query_value(name)}' and mimeType='{FOLDER_MIME_TYPE}' and trashed=false"
+    if parent_id:
+        query += f" and '{parent_id}' in parents"
+    return query
+
+
+def find_folder(service, parent_id, name):
+    """在父目录中按名称查找子文件夹（一次查询），返回文件夹ID或None"""
+    results = service.files().list(
+        q=_folder_query(name, parent_id), pageSize=10, fields="files(id, name, parents)"
+    ).execute()
+    files = results.get("files", [])
+    return files[0]["id"] if files else None
+
+
+def batch_find_folders(service, parent_id, names):
+    """
+    用一个batch请求查询多段路径中每一段同名的文件夹
+
+    第一段的父目录已知，按 名称+父目录 查询；后面各段的父目录还不知道，只按名称查询，返回结果带parents
+
+    Returns:
+        list: 与names对应的候选文件夹列表 [[{"id", "name", "parents"}, ...], ...]
+    """
+    candidates = [[] for _ in names]
+
+    def callback(request_id, response, exception):
+        if exception is None and response:
+            candidates[int(request_id)] = response.get("files", [])
+
+    for start in range(0, len(names), MAX_BATCH_SIZE):
+        batch = service.new_batch_http_request(callback=callback)
+        for i in range(start, min(start + MAX_BATCH_SIZE, len(names))):
+            request = service.files().list(
+                q=_folder_query(names[i], parent_id if i == 0 else None),
+                pageSize=1000,
+                fields="nextPageToken, files(id, name, parents)"
+            )
+            batch.add(request, request_id=str(i))
+        batch.execute()
+    return candidates
+
+
+def resolve_folder_chain(service, tree, base_folder_id, names):
+    """
+    从base_folder_id开始依次解析names中的每一段文件夹
+
+    先用本地文件夹树解析，剩余的路径段一次（batch）查询。只按名称的查询结果很多时会被截断，所以只查询
+    树中无法接上的路径段（前一段确定后树中已有记录的段不查询）；某一段在树和批量结果中都接不上时
+    （结果被截断、同名歧义）只对这一段按 名称+父目录 查询，后面的段继续使用树和批量结果
+
+    Returns:
+        list or None: 每一段对应的文件夹ID，任何一段不存在时返回None
+    """
+    ids = []
+    current_id = base_folder_id
+    for name in names:
+        folder_id = tree.child(current_id, name)
+        if not folder_id:
+            break
+        ids.append(folder_id)
+        current_id = folder_id
+
+    cold = names[len(ids):]
+    if not cold:
+        return ids
+
+    candidates = {}
+    query_indexes = [0] + [i for i in range(1, len(cold)) if not tree.has_child_named(cold[i - 1], cold[i])]
+    if len(query_indexes) > 1:
+        results = batch_find_folders(service, current_id, [cold[i] for i in query_indexes])
+        candidates = dict(zip(query_indexes, results))
+
+    for i, name in enumerate(cold):
+        folder_id = tree.child(current_id, name)
+        if not folder_id:
+            match = next((f for f in candidates.get(i, []) if current_id in f.get("parents", [])), None)
+            folder_id = match["id"] if match else find_folder(service, current_id, name)
+            if not folder_id:
+                tree.flush(force=True)
+                return None
+            tree.record(folder_id, name, current_id)
+        ids.append(folder_id)
+        current_id = folder_id
+
+    tree.flush(force=True)
+    return ids
+
+
+def _command_operands(command):
+    """从shell命令中取出 rm/rmdir/mv 的路径参数；无法解析时返回None"""
+    try:
+        lexer = shlex.shlex(command, posix=True, punctuation_chars=True)
+        lexer.whitespace_split = True
+        tokens = list(lexer)
+    except ValueError:
+        return None
+    operands = []
+    current = None
+    for token in tokens:
+        if token and all(c in "();<>|&" for c in token):
+            current = None
+        elif current is None:
+            current = os.path.basename(token) if token not in ("sudo", "command") else None
+            if current not in INVALIDATING_COMMANDS:
+                current = "" if current is not None else None
+        elif current and not token.startswith("-"):
+            operands.append(token)
+    return operands
+
+
+def invalidate_for_command(tree, command, root_path, root_folder_id, cwd_folder_id=None):
+    """
+    远端命令会删除或移动文件夹时，删除树中涉及路径（及其子文件夹）的记录
+
+    能确定位置的路径（root_path/~ 开头的绝对路径、相对于cwd_folder_id的相对路径）只删除对应的子树，
+    其余情况（通配符、..、变量、其他绝对路径）删除全部记录
+
+    Returns:
+        bool: 是否修改了树
+    """
+    if not re.search(r"(^|[\s;&|(])(?:\S*/)?(%s)\s" % "|".join(INVALIDATING_COMMANDS), command):
+        return False
+    operands = _command_operands(command)
+    if re.search(r"(^|[\s;&|(])cd\s", command):
+        cwd_folder_id = None  # 命令中切换了目录，相对路径无法确定
+    root_path = root_path.rstrip("/")
+    for operand in (operands if operands is not None else [None]):
+        base_id = None
+        relative = None
+        if operand is None:
+            pass
+        elif operand == "~" or operand.startswith("~/"):
+            base_id, relative = root_folder_id, operand[1:]
+        elif operand == root_path or operand.startswith(root_path + "/"):
+            base_id, relative = root_folder_id, operand[len(root_path):]
+        elif not operand.startswith("/") and cwd_folder_id:
+            base_id, relative = cwd_folder_id, operand
+        names = [part for part in (relative or "").split("/") if part and part != "."]
+        if base_id is None or not names or any(part == ".." or re.search(r"[*?\[$`]", part) for part in names):
+            tree.clear()
+            break
+        tree.forget_path(base_id, names)
+    tree.flush(force=True)
+    return True
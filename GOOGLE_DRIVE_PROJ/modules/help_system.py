@@ -57,15 +57,18 @@ def get_unified_help_data():
             "upload_download": {
                 "upload [--target-dir TARGET] <files...>": "upload files to Google Drive (default: current directory)",
                 "upload [--remove-local] <files...>": "upload files and optionally remove local copies",
+                "upload --direct <files...>": "upload via the Drive API (resumable, no Desktop sync or remote window)",
                 "upload-folder [--keep-zip] <folder> [target]": "upload folder (zip->upload->unzip->cleanup)",
+                "upload-folder --full <folder> [target]": "re-upload the whole folder instead of only files changed since the last upload",
                 "download [--force] <file> [path]": "download file with caching"
             },
             "text_operations": {
                 "echo <text>": "display text",
                 "echo <text> > <file>": "create file with text",
                 "grep <pattern> <file>": "search for pattern in file",
+                "grep -r [-i] [--include=GLOB] <pattern> [dir]": "search a directory remotely, only matched lines are returned",
                 "grep <file>": "display file content with line numbers (no pattern)",
-                "edit [--preview] [--backup] <file> '<spec>'": "edit file with multi-segment replacement"
+                "edit [--preview] [--backup] [--patch] <file> '<spec>'": "edit file with multi-segment replacement"
             },
             "remote_execution": {
                 "python <file>": "execute python file remotely",
@@ -83,6 +86,8 @@ def get_unified_help_data():
                 "venv --create <env_name...>": "create virtual environment(s) (supports multiple names)",
                 "venv --delete <env_name...>": "delete virtual environment(s) (supports multiple names, protects GaussianObject)",
                 "venv --activate <env_name>": "activate virtual environment (set PYTHONPATH)",
+                "venv --activate <env_name> --snapshot": "activate from a compressed snapshot unpacked once per runtime to local disk",
+                "venv --snapshot <env_name>": "rebuild the snapshot of a virtual environment",
                 "venv --deactivate": "deactivate virtual environment (clear PYTHONPATH)",
                 "venv --list": "list all virtual environments"
             },
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Google Drive Shell - Lazy Loading Module
+按需加载管理器和Drive API服务，让 pwd/help/cd 等本地命令不必承担完整的启动开销
+"""
+
+import importlib
+import threading
+
+
+class LazyDriveService:
+    """
+    GoogleDriveService 的延迟代理
+
+    在第一次访问属性（或做真值判断）时才构建真实的服务对象。
+    构建失败时与原来的行为一致：代理的真值为False，属性访问抛出AttributeError。
+    """
+
+    def __init__(self, factory, on_load=None):
+        self._factory = factory
+        self._on_load = on_load
+        self._service = None
+        self._loaded = False
+        self._lock = threading.RLock()
+
+    @property
+    def is_loaded(self):
+        """真实服务是否已经构建"""
+        return self._loaded
+
+    def get(self):
+        """返回真实的服务对象（构建失败时为None）"""
+        if not self._loaded:
+            with self._lock:
+                if not self._loaded:
+                    self._service = self._factory()
+                    self._loaded = True
+                    if self._on_load:
+                        self._on_load(self._service)
+        return self._service
+
+    def __bool__(self):
+        return self.get() is not None
+
+    def __getattr__(self, name):
+        # 只有实例上找不到的属性才会进入这里
+        if name.startswith('_'):
+            raise AttributeError(name)
+        service = self.get()
+        if service is None:
+            raise AttributeError(f"Google Drive API service is not available (accessing '{name}')")
+        return getattr(service, name)
+
+    def __repr__(self):
+        state = "loaded" if self._loaded else "not loaded"
+        return f"<LazyDriveService {state}>"
+
+
+class LazyManagerMixin:
+    """
+    按需构建管理器的Mixin
+
+    子类在 _LAZY_MANAGERS 中声明 {属性名: (模块名, 类名)}，
+    第一次访问该属性时导入模块并以 (drive_service, main_instance) 构造管理器。
+    """
+
+    _LAZY_MANAGERS = {}
+    _LAZY_PACKAGE = None
+
+    def _lazy_manager_args(self):
+        """构造管理器时使用的参数，子类可覆盖"""
+        return self.drive_service, self
+
+    def _on_manager_loaded(self, name, manager):
+        """管理器构建完成后的钩子，子类可覆盖"""
+        pass
+
+    def __getattr__(self, name):
+        spec = type(self)._LAZY_MANAGERS.get(name)
+        if spec is None:
+            raise AttributeError(f"'{type(self).__name__}' object has no attribute '{name}'")
+        module_name, class_name = spec
+        module = importlib.import_module(f"{type(self)._LAZY_PACKAGE}.{module_name}")
+        manager = getattr(module, class_name)(*self._lazy_manager_args())
+        # 写入实例字典，之后的访问不再经过 __getattr__
+        self.__dict__[name] = manager
+        self._on_manager_loaded(name, manager)
+        return manager
+
+    def loaded_managers(self):
+        """已经构建的管理器名称列表"""
+        return [name for name in type(self)._LAZY_MANAGERS if name in self.__dict__]
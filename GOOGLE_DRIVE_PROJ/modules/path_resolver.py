@@ -260,28 +260,20 @@ class PathResolver:
             return base_folder_id, base_path
         
         try:
-            path_parts = relative_path.split("/")
-            current_id = base_folder_id
-            current_logical_path = base_path
+            from .folder_tree import get_folder_tree, resolve_folder_chain
+            
+            path_parts = [part for part in relative_path.split("/") if part]
+            if not path_parts:
+                return base_folder_id, base_path
             
+            # 本地文件夹树中已有的路径段不需要查询，其余路径段一次batch查询
+            folder_ids = resolve_folder_chain(self.drive_service.service, get_folder_tree(), base_folder_id, path_parts)
+            if not folder_ids:
+                return None, None
+            
+            current_id = folder_ids[-1]
+            current_logical_path = base_path
             for part in path_parts:
-                if not part:
-                    continue
-                
-                files_result = self.drive_service.list_files(folder_id=current_id, max_results=100)
-                if not files_result['success']:
-                    return None, None
-                
-                found_folder = None
-                for file in files_result['files']:
-                    if file['name'] == part and file['mimeType'] == 'application/vnd.google-apps.folder':
-                        found_folder = file
-                        break
-                
-                if not found_folder:
-                    return None, None
-                
-                current_id = found_folder['id']
                 if current_logical_path == "~":
                     current_logical_path = f"~/{part}"
                 else:
@@ -299,16 +291,24 @@ class PathResolver:
             return None, None
         
         try:
-            folder_info = self.drive_service.service.files().get(
-                fileId=folder_id,
-                fields="parents"
-            ).execute()
-            
-            parents = folder_info.get('parents', [])
-            if not parents:
-                return None, None
-            
-            parent_id = parents[0]
+            from .folder_tree import get_folder_tree
+            
+            # 优先使用本地文件夹树中记录的父目录
+            folder_tree = get_folder_tree()
+            parent_id = folder_tree.parent(folder_id)
+            if not parent_id:
+                folder_info = self.drive_service.service.files().get(
+                    fileId=folder_id,
+                    fields="id, name, parents"
+                ).execute()
+                
+                parents = folder_info.get('parents', [])
+                if not parents:
+                    return None, None
+                
+                parent_id = parents[0]
+                folder_tree.record(folder_id, folder_info.get('name', ''), parent_id)
+                folder_tree.save()
             
             if current_path.count('/') == 1:
                 parent_path = "~"
@@ -1,3 +1,6 @@
+from .venv_package_index import VenvPackageIndex, build_remote_scan_command, parse_scan_output, requirement_name, canonical_name
+
+
 class PipOperations:
     """
     Pip package management and scanning
@@ -6,6 +9,14 @@ class PipOperations:
     def __init__(self, drive_service, main_instance):
         self.drive_service = drive_service
         self.main_instance = main_instance
+        self._package_index = None
+
+    @property
+    def package_index(self):
+        """本地包索引（按环境名缓存已安装包，避免每次pip查询都访问远端）"""
+        if self._package_index is None:
+            self._package_index = VenvPackageIndex()
+        return self._package_index
 
     def cmd_pip(self, *args, **kwargs):
         """执行pip命令（增强版 - 自动处理虚拟环境、包状态显示）"""
@@ -38,7 +49,7 @@ class PipOperations:
                 return dep_analysis._show_dependency_tree(pip_args, current_packages)
             
             # 检测当前环境中的包（用于显示[√]标记）
-            current_packages = self._detect_current_environment_packages(current_venv)
+            current_packages = self._detect_current_environment_packages(current_venv, all_states)
             
             if pip_args[0] == "install":
                 return self._handle_pip_install(pip_args[1:], current_venv, env_path, current_packages)
@@ -76,8 +87,7 @@ class PipOperations:
             if not force_install:
                 all_installed = True
                 for package in packages_to_install:
-                    pkg_name = package.split('==')[0].split('>=')[0].split('<=')[0].split('>')[0].split('<')[0].split('!=')[0]
-                    if pkg_name not in current_packages:
+                    if canonical_name(requirement_name(package)) not in current_packages:
                         all_installed = False
                         break
                 
@@ -88,6 +98,11 @@ class PipOperations:
                         "installed_packages": packages_to_install
                     }
             
+            # 没有其他pip选项时，使用远端wheel缓存和按依赖层并行构建的安装计划
+            extra_options = [arg for arg in packages_args if arg.startswith('-') and arg not in ('--force', '--no-wheel-cache')]
+            if '--no-wheel-cache' not in packages_args and not extra_options:
+                return self._install_with_wheel_cache(packages_to_install, current_venv, current_packages)
+            
             # 标准安装流程
             install_command = f"install {' '.join(packages_to_install)}"
             target_info = f"in {current_venv}" if current_venv else "in system environment"
@@ -98,6 +113,61 @@ class PipOperations:
 
 
 
+    def _install_with_wheel_cache(self, packages, current_env, current_packages):
+        """通过远端内容寻址wheel缓存安装（缓存命中时离线安装，否则按依赖层并行构建后存入缓存）"""
+        from .wheel_cache import build_install_plan, build_remote_install_command, get_wheelhouse_path
+        try:
+            # 依赖层用于并行预构建；分析失败时只构建请求的包，其余依赖由远端 pip wheel 补全
+            try:
+                from .dependency_analysis import DependencyAnalysis
+                dep_analysis = DependencyAnalysis(self.drive_service, self.main_instance)
+                analysis = dep_analysis._depth_based_dependency_analysis(
+                    packages, max_depth=2, interface_mode=True, installed_packages=current_packages)
+                download_layers = analysis.get('download_layers', {})
+            except Exception:
+                download_layers = {}
+            layers = build_install_plan(packages, download_layers, current_packages)
+            
+            venv_base_path = f"{self.main_instance.REMOTE_ENV}/venv"
+            target = f"{venv_base_path}/{current_env}" if current_env else None
+            command = build_remote_install_command(
+                packages, layers, get_wheelhouse_path(self.main_instance.REMOTE_ENV), target,
+                venv_states=f"{venv_base_path}/venv_states.json" if current_env else None, env_name=current_env)
+            if current_env:
+                command = f"{command}; GDS_RC=$?; if [ $GDS_RC -eq 0 ]; then {self._snapshot_refresh_command(current_env)}; fi; exit $GDS_RC"
+            print(f"Installing {', '.join(packages)} {'in ' + current_env if current_env else 'in system environment'} "
+                  f"({sum(len(names) for names in layers.values())} packages planned in {len(layers)} layers)")
+            result = self.main_instance.execute_command_interface("bash", ["-c", command])
+            
+            data = result.get("data", {})
+            stdout = data.get("stdout", result.get("stdout", ""))
+            stderr = data.get("stderr", result.get("stderr", ""))
+            exit_code = data.get("exit_code", result.get("exit_code", 0 if result.get("success") else -1))
+            if stdout:
+                print(stdout)
+            if not result.get("success") or exit_code != 0:
+                if stderr:
+                    print(f"Remote pip error:")
+                    print(stderr)
+                return {"success": False, "error": result.get("error", f"Pip install {' '.join(packages)} failed"), "stderr": stderr}
+            
+            if current_env:
+                self.package_index.apply_install_output(current_env, stdout)
+            return {
+                "success": True,
+                "output": stdout,
+                "environment": current_env or "system",
+                "layers": layers
+            }
+        except Exception as e:
+            return {"success": False, "error": f"通过wheel缓存安装失败: {str(e)}"}
+
+    def _snapshot_refresh_command(self, env_name):
+        """虚拟环境已有快照（venv --activate --snapshot）时重新打包的远端命令"""
+        from .venv_snapshot import build_refresh_command, get_snapshot_path
+        venv_base_path = f"{self.main_instance.REMOTE_ENV}/venv"
+        return build_refresh_command(f"{venv_base_path}/{env_name}", get_snapshot_path(venv_base_path, env_name))
+
     def _handle_pip_list(self, list_args, current_venv, env_path, current_packages):
         """处理pip list命令 - 显示增强的包列表信息"""
         try:
@@ -154,12 +224,27 @@ class PipOperations:
             if not show_args:
                 return {"success": False, "error": "pip show需要指定包名"}
             
+            # 只查询名称和版本时直接用本地索引回答
+            if current_venv and all(not arg.startswith('-') for arg in show_args) and \
+                    all(canonical_name(arg) in current_packages for arg in show_args):
+                env_path = env_path or f"{self._get_venv_base_path()}/{current_venv}"
+                packages = {}
+                for index, arg in enumerate(show_args):
+                    name = canonical_name(arg)
+                    packages[name] = current_packages[name]
+                    if index:
+                        print("---")
+                    print(f"Name: {name}")
+                    print(f"Version: {current_packages[name]}")
+                    print(f"Location: {env_path}")
+                return {"success": True, "packages": packages, "environment": current_venv, "source": "index"}
+            
             show_command = f"show {' '.join(show_args)}"
             target_info = f"in {current_venv}" if current_venv else "in system environment"
             return self._execute_pip_command(show_command, current_venv, target_info)
             
         except Exception as e:
-                        return {"success": False, "error": f"处理pip show时出错: {str(e)}"}
+            return {"success": False, "error": f"处理pip show时出错: {str(e)}"}
 
     # Placeholder methods that need to be implemented or imported from other modules
     def _load_all_venv_states(self):
@@ -187,88 +272,34 @@ class PipOperations:
             return "/content/drive/MyDrive/REMOTE_ENV/venv"
 
     def _get_packages_from_json(self, venv_name, force_refresh=False):
-        """Get packages from JSON with directory scanning fallback"""
+        """Get packages from the local package index, rescanning the environment when forced or stale"""
         try:
-            # 如果强制刷新或JSON中没有数据，进行目录扫描
             if force_refresh:
-                print(f"Refreshing package list from directory scan...")
+                print(f"Refreshing package list from environment scan...")
                 scanned_packages = self._scan_environment_directory(venv_name)
-                if scanned_packages:
-                    # 更新JSON文件
-                    self._remote_update_json_packages(venv_name, scanned_packages, action="replace")
-                    return scanned_packages
-            
-            # 获取JSON中的包信息
-            all_states = self._load_all_venv_states()
-            packages_from_json = {}
+                if scanned_packages is not None:
+                    self.package_index.replace(venv_name, scanned_packages)
+                    return self.package_index.get(venv_name)
             
-            if all_states and 'environments' in all_states and venv_name in all_states['environments']:
-                env_data = all_states['environments'][venv_name]
-                packages_from_json = env_data.get('packages', {})
-            
-            # 如果JSON中没有包信息，进行目录扫描
-            if not packages_from_json:
-                scanned_packages = self._scan_environment_directory(venv_name)
-                if scanned_packages:
-                    # 更新JSON文件
-                    self._remote_update_json_packages(venv_name, scanned_packages, action="replace")
-                    return scanned_packages
-            
-            return packages_from_json
+            return self._detect_current_environment_packages(venv_name)
         except Exception as e:
             return {}
 
     def _scan_environment_directory(self, env_name):
-        """Scan virtual environment directory for installed packages"""
+        """
+        Scan virtual environment directory for installed packages
+        
+        远端用 importlib.metadata 一次列出全部发行包（不截断），失败时返回None
+        """
         try:
             env_path = f"{self._get_venv_base_path()}/{env_name}"
-            
-            # 构建扫描命令，类似备份文件中的实现
-            scan_command = f"""
-find '{env_path}' -maxdepth 1 -name '*.dist-info' -type d 2>/dev/null | sed 's|.*/||' | head -50 && \\
-find '{env_path}' -maxdepth 1 -name '*.egg-info' -type d 2>/dev/null | sed 's|.*/||' | head -50
-""".strip()
-            
-            # 执行远程命令
-            result = self.main_instance.execute_command_interface("bash", ["-c", scan_command])
-            
-            if result.get("success"):
-                output = result.get("stdout", "")
-                # 解析输出获取包信息
-                packages = self._parse_package_scan_output(output)
-                return packages
-            else:
-                return {}
-                
-        except Exception as e:
-            return {}
-
-    def _parse_package_scan_output(self, output):
-        """Parse package scan output to extract package names and versions"""
-        packages = {}
-        try:
-            lines = output.strip().split('\n')
-            for line in lines:
-                line = line.strip()
-                # 查找 .dist-info 目录
-                if line.endswith('.dist-info'):
-                    # 格式通常是 package_name-version.dist-info
-                    parts = line.replace('.dist-info', '').split('-')
-                    if len(parts) >= 2:
-                        package_name = '-'.join(parts[:-1])  # 包名可能包含连字符
-                        version = parts[-1]
-                        packages[package_name] = version
-                # 查找 .egg-info 目录
-                elif line.endswith('.egg-info'):
-                    parts = line.replace('.egg-info', '').split('-')
-                    if len(parts) >= 2:
-                        package_name = '-'.join(parts[:-1])
-                        version = parts[-1]
-                        packages[package_name] = version
+            result = self.main_instance.execute_command_interface("bash", ["-c", build_remote_scan_command(env_path)])
+            if not result.get("success"):
+                return None
+            data = result.get("data", {})
+            return parse_scan_output(data.get("stdout", result.get("stdout", "")))
         except Exception as e:
-            pass
-        
-        return packages
+            return None
 
     def _update_environment_packages_in_json(self, env_name, packages):
         """Update environment packages in JSON file"""
@@ -387,18 +418,26 @@ print(f"JSON file updated successfully")
         except Exception as e:
             print(f"Error updating JSON remotely: {e}")
 
-    def _detect_current_environment_packages(self, venv_name):
-        """Detect current environment packages with JSON and directory scanning"""
+    def _detect_current_environment_packages(self, venv_name, all_states=None):
+        """
+        Detect current environment packages
+        
+        优先使用本地包索引；索引缺失时先用venv_states.json中的记录初始化，
+        过期时用一次远端扫描完整对齐（扫描失败则继续使用已有记录）
+        """
         try:
             if venv_name:
-                # 直接从JSON读取，不进行扫描（避免弹窗）
-                all_states = self._load_all_venv_states()
-                if all_states and 'environments' in all_states and venv_name in all_states['environments']:
-                    env_data = all_states['environments'][venv_name]
-                    return env_data.get('packages', {})
-                else:
-                    # 如果JSON中没有数据，返回空字典（用户可以手动--refresh-list）
-                    return {}
+                index = self.package_index
+                if index.get(venv_name) is None:
+                    if all_states is None:
+                        all_states = self._load_all_venv_states()
+                    env_data = (all_states or {}).get('environments', {}).get(venv_name, {})
+                    index.seed(venv_name, env_data.get('packages', {}))
+                if index.is_stale(venv_name):
+                    scanned_packages = self._scan_environment_directory(venv_name)
+                    if scanned_packages is not None:
+                        index.replace(venv_name, scanned_packages)
+                return index.get(venv_name) or {}
             else:
                 # 对于系统环境，返回基础包
                 return {
@@ -408,8 +447,6 @@ print(f"JSON file updated successfully")
         except Exception as e:
             return {}
 
-
-
     def _execute_pip_command(self, pip_command, current_env, target_info):
         """强化的pip命令执行，支持错误处理和结果验证"""
         try:
@@ -623,6 +660,10 @@ except Exception as e:
                 f'python3 -c "{python_script.replace(chr(92), chr(92)+chr(92)).replace(chr(34), chr(92)+chr(34))}"'
             ]
             
+            # 环境有快照时，install/uninstall之后重新打包，保持快照与环境一致
+            if current_env and (pip_command.startswith("install") or pip_command.startswith("uninstall")):
+                commands.append(self._snapshot_refresh_command(current_env))
+
             # 过滤空命令（env_setup现在总是空的）
             commands = [cmd for cmd in commands if cmd.strip()]
             full_command = " && ".join(commands)
@@ -639,7 +680,11 @@ except Exception as e:
                     print(f"Remote pip output:")
                     print(remote_output)
                 
-                # JSON更新已合并到pip命令中，无需额外处理
+                # JSON更新已合并到pip命令中；本地包索引根据pip输出增量更新
+                if current_env and pip_command.startswith("install"):
+                    self.package_index.apply_install_output(current_env, remote_output)
+                elif current_env and pip_command.startswith("uninstall"):
+                    self.package_index.apply_uninstall_output(current_env, remote_output)
                 
                 return {
                     "success": True,
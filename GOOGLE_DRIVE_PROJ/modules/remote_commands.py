@@ -454,7 +454,28 @@ else:
             old_handler = signal.signal(signal.SIGINT, signal_handler)
             
             try:
-                for i in range(max_wait_time):
+                from .progress_manager import progress_print, clear_progress
+                retriever = self._get_result_retriever()
+                if retriever is not None:
+                    # 按文件名单查询 + 自适应退避，文件出现后直接按ID读取内容
+                    try:
+                        content = retriever.wait_for_result(
+                            result_filename, max_wait_time,
+                            should_stop=lambda: interrupted,
+                            on_poll=lambda: progress_print(f".")
+                        )
+                    except Exception as e:
+                        debug_print(f"Result retriever failed, falling back to ls polling: {e}")
+                        retriever = None
+                    else:
+                        if interrupted:
+                            raise KeyboardInterrupt()
+                        if content is not None:
+                            clear_progress()
+                            signal.signal(signal.SIGINT, old_handler)
+                            return self._parse_result_content(content)
+                
+                for i in range(max_wait_time if retriever is None else 0):
                     # 在每次循环开始时检查中断标志
                     if interrupted:
                         raise KeyboardInterrupt()
@@ -467,7 +488,6 @@ else:
                         file_result = self._read_result_file_via_gds(result_filename)
                         
                         # 直接清除进度显示，不添加√标记（与upload validation保持一致）
-                        from .progress_manager import clear_progress
                         clear_progress()
                         
                         # 恢复原来的信号处理器
@@ -481,7 +501,6 @@ else:
                             raise KeyboardInterrupt()
                         time.sleep(0.1)
                     
-                    from .progress_manager import progress_print
                     progress_print(f".")
                 
             except KeyboardInterrupt:
@@ -667,30 +686,7 @@ else:
                 }
             
             # 获取文件内容
-            content = cat_result.get("output", "")
-            
-            # 尝试解析JSON
-            try:
-                import json
-                # 预处理JSON内容以修复格式问题
-                cleaned_content = self._preprocess_json_content(content)
-                result_data = json.loads(cleaned_content)
-                
-                return {
-                    "success": True,
-                    "data": result_data
-                }
-            except json.JSONDecodeError as e:
-                # 如果JSON解析失败，返回原始内容
-                return {
-                    "success": True,
-                    "data": {
-                        "exit_code": -1,
-                        "stdout": content,
-                        "stderr": f"JSON parse failed: {str(e)}",
-                        "raw_content": content
-                    }
-                }
+            return self._parse_result_content(cat_result.get("output", ""))
                 
         except Exception as e:
             return {
@@ -698,6 +694,51 @@ else:
                 "error": f"Read result file failed: {str(e)}"
             }
 
+    def _parse_result_content(self, content):
+        """
+        解析远端结果文件内容
+        
+        Args:
+            content (str): 结果文件原始内容
+            
+        Returns:
+            dict: 读取结果
+        """
+        try:
+            # 预处理JSON内容以修复格式问题
+            cleaned_content = self._preprocess_json_content(content)
+            result_data = json.loads(cleaned_content)
+            
+            return {
+                "success": True,
+                "data": result_data
+            }
+        except json.JSONDecodeError as e:
+            # 如果JSON解析失败，返回原始内容
+            return {
+                "success": True,
+                "data": {
+                    "exit_code": -1,
+                    "stdout": content,
+                    "stderr": f"JSON parse failed: {str(e)}",
+                    "raw_content": content
+                }
+            }
+
+    def _get_result_retriever(self):
+        """
+        获取结果文件检索器（需要可用的Drive API服务），不可用时返回None以回退到ls轮询
+        """
+        if getattr(self, "_result_retriever", None) is not None:
+            return self._result_retriever
+        if self.drive_service is None or getattr(self.drive_service, "service", None) is None:
+            return None
+        if not getattr(self.main_instance, "REMOTE_ROOT_FOLDER_ID", None):
+            return None
+        from .result_retriever import ResultRetriever
+        self._result_retriever = ResultRetriever(self.drive_service, self.main_instance)
+        return self._result_retriever
+
     def _check_remote_file_exists(self, file_path):
         """
         检查远端文件是否存在（绝对路径）
@@ -1376,6 +1417,20 @@ fi
             cleaned_args.append(remove_emoji(arg))
         return cleaned_args
 
+    def _invalidate_folder_tree(self, cmd, args, current_shell):
+        """删除本地文件夹树中将被远端命令删除或移动的文件夹记录"""
+        try:
+            import shlex
+            from .folder_tree import get_folder_tree, invalidate_for_command
+            if cmd in ("bash", "sh") and len(args) >= 2 and args[0] == "-c":
+                command = args[1]
+            else:
+                command = " ".join(shlex.quote(str(part)) for part in [cmd] + list(args))
+            invalidate_for_command(get_folder_tree(), command, self.main_instance.REMOTE_ROOT,
+                                   self.main_instance.REMOTE_ROOT_FOLDER_ID, current_shell.get("current_folder_id"))
+        except Exception as e:
+            print(f"Warning: Update folder tree failed: {e}")
+
     def execute_command_interface(self, cmd, args, _skip_queue_management=False, _original_user_command=None):
         """
         统一远端命令执行接口 - 处理除特殊命令外的所有命令
@@ -1470,6 +1525,9 @@ fi
             if not current_shell:
                 return {"success": False, "error": "没有活跃的shell会话"}
             
+            # rm/rmdir/mv 会让本地文件夹树中的记录失效
+            self._invalidate_folder_tree(cmd, cleaned_args, current_shell)
+            
             # 生成远端命令（包含语法检查）
             try:
                 remote_command_info = self._generate_command_interface(cmd, cleaned_args, current_shell)
@@ -3641,6 +3699,12 @@ def main():
             return 1
         shell_id = args[1]
         return terminate_shell(shell_id, command_identifier) if terminate_shell else 1
+    elif args[0] == '--daemon':
+        # 常驻GDS daemon管理：start/stop/status/serve
+        import os
+        sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+        from gds_daemon import handle_daemon_command
+        return handle_daemon_command(args[1] if len(args) > 1 else "status")
     elif args[0] == '--remount':
         # 处理重新挂载命令
         return handle_remount_command(command_identifier)
@@ -3650,29 +3714,11 @@ def main():
             return enter_shell_mode(command_identifier) if enter_shell_mode else 1
         else:
             # 执行指定的shell命令 - 使用GoogleDriveShell
-            # 检测引号包围的完整命令（用于远端重定向等）
-            shell_cmd_parts = args[1:]
-            
-            # 如果只有一个参数且包含空格，可能是引号包围的完整命令
-            if len(shell_cmd_parts) == 1 and (' > ' in shell_cmd_parts[0] or ' && ' in shell_cmd_parts[0] or ' || ' in shell_cmd_parts[0] or ' | ' in shell_cmd_parts[0]):
-                # 这是一个引号包围的完整命令，直接使用
-                shell_cmd = shell_cmd_parts[0]
-                quoted_parts = shell_cmd_parts  # 为调试信息设置
-                # 只有在没有标记的情况下才添加标记，避免重复添加
-                if not shell_cmd.startswith("__QUOTED_COMMAND__"):
-                    shell_cmd = f"__QUOTED_COMMAND__{shell_cmd}"
-
-            else:
-                # 正常的多参数命令，需要正确处理带空格的参数
-                # 对包含空格的参数添加引号
-                shell_cmd_parts_quoted = []
-                for part in shell_cmd_parts:
-                    if ' ' in part:
-                        shell_cmd_parts_quoted.append(f'"{part}"')
-                    else:
-                        shell_cmd_parts_quoted.append(part)
-                shell_cmd = ' '.join(shell_cmd_parts_quoted)
-                quoted_parts = shell_cmd_parts  # 为调试信息设置
+            # 命令字符串的还原规则与GDS daemon共用（引号包围的完整命令、带空格的参数）
+            import os
+            sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+            from gds_daemon import build_shell_command
+            shell_cmd = build_shell_command(args[1:])
             debug_capture.start_capture()
             debug_capture.stop_capture()
             
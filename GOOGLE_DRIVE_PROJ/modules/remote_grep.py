@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Google Drive Shell - Remote Grep Module
+在远端执行grep，只传回匹配的行
+
+所有待搜索的路径（文件或目录）合并为一条远端命令，远端使用GNU grep（-P，与Python正则语义接近）
+输出紧凑的 `path\0line:text` 格式（路径后用NUL分隔，路径中含 `:数字:` 也能正确解析）；
+单行长度和总行数都有上限，避免大量输出拖慢结果回传。
+"""
+
+import base64
+import re
+import shlex
+
+MAX_LINE_CHARS = 1000
+MAX_OUTPUT_LINES = 5000
+
+GREP_MATCH = 0
+GREP_NO_MATCH = 1
+GREP_ERROR = 2
+GREP_SIGPIPE = 128 + 13
+
+_ERROR_LINE_RE = re.compile(r"^grep: (.*): ([^:]+)$")
+
+
+def build_remote_grep_command(pattern, paths, recursive=False, ignore_case=False, include=None,
+                              max_line_chars=MAX_LINE_CHARS, max_lines=MAX_OUTPUT_LINES):
+    """
+    生成远端grep命令
+
+    Args:
+        pattern: 正则表达式（Perl语法）
+        paths: 远端绝对路径列表
+        recursive: 是否递归搜索目录
+        ignore_case: 是否忽略大小写
+        include: 递归时只搜索匹配这些glob的文件
+
+    Returns:
+        str: 只包含base64字符的bash命令，不受远端命令生成时引号转义的影响
+    """
+    options = ["-nHIZ", "--color=never", "-P"]
+    if recursive:
+        options.append("-r")
+    if ignore_case:
+        options.append("-i")
+    for glob in include or []:
+        options.append(f"--include={shlex.quote(glob)}")
+    quoted_paths = " ".join(shlex.quote(path) for path in paths)
+    script = (
+        f"grep {' '.join(options)} -e {shlex.quote(pattern)} -- {quoted_paths}"
+        f" | cut -c1-{max_line_chars} | head -n {max_lines}\n"
+        "status=${PIPESTATUS[0]}\n"
+        # head读够行数后关闭管道，grep随之被SIGPIPE终止（141）：输出已截断，不是失败
+        f"if [ $status -eq {GREP_SIGPIPE} ]; then status={GREP_MATCH}; fi\n"
+        "exit $status\n"
+    )
+    script_b64 = base64.b64encode(script.encode("utf-8")).decode("ascii")
+    return f"echo {script_b64} | base64 -d | bash"
+
+
+def parse_grep_output(stdout, stderr="", max_lines=MAX_OUTPUT_LINES):
+    """
+    解析远端grep输出
+
+    Returns:
+        dict: {"matches": {path: {line_num: text}}, "errors": {path: message},
+               "fatal": [不属于具体路径的错误行], "truncated": bool}
+    """
+    matches = {}
+    line_count = 0
+    for line in (stdout or "").split("\n"):
+        path, sep, rest = line.partition("\0")
+        line_num, colon, text = rest.partition(":")
+        if not sep or not colon or not line_num.isdigit():
+            continue
+        matches.setdefault(path, {})[int(line_num)] = text
+        line_count += 1
+    errors = {}
+    fatal = []
+    for line in (stderr or "").splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        match = _ERROR_LINE_RE.match(line)
+        if match:
+            errors[match.group(1)] = match.group(2)
+        else:
+            fatal.append(line)
+    return {"matches": matches, "errors": errors, "fatal": fatal, "truncated": line_count >= max_lines}
+
+
+def grep_failure(exit_code, parsed, stderr=""):
+    """
+    远端grep整体失败时返回错误信息，否则返回None
+
+    退出码2且所有错误都属于具体路径（文件不存在、无权限）时，错误已按路径报告，匹配结果仍然有效；
+    其他错误（无效的正则、grep/bash本身失败）不能当作"没有匹配"
+    """
+    if exit_code in (GREP_MATCH, GREP_NO_MATCH):
+        return None
+    if exit_code == GREP_ERROR and parsed["errors"] and not parsed["fatal"]:
+        return None
+    message = "\n".join(parsed["fatal"]) or (stderr or "").strip()
+    return f"Remote grep failed (exit code {exit_code}): {message}" if message else f"Remote grep failed (exit code {exit_code})"
+
+
+def match_positions(regex, text):
+    """匹配在行内的起始位置列表（regex为None时返回空列表）"""
+    if regex is None:
+        return []
+    return [match.start() for match in regex.finditer(text)]
+
+
+def grep_lines(regex, lines):
+    """在本地内容中搜索，返回 {line_num: text}"""
+    return {line_num: line for line_num, line in enumerate(lines, 1) if regex.search(line)}
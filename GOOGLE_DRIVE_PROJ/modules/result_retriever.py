@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Google Drive Shell - Result Retriever Module
+按文件名直接查询远端结果文件，替代逐秒 ls ~/tmp 轮询
+"""
+
+import time
+import threading
+from typing import Dict, List, Optional
+
+
+class ResultRetriever:
+    """
+    远端结果文件检索器
+
+    - 每次轮询只发出一个按名称过滤的 files().list 查询（可同时查询多个待完成的结果文件）
+    - 文件出现后直接按ID下载内容，无需再次 ls 确认
+    - 自适应退避：起始间隔短，未命中时逐步拉长，降低空轮询的API调用数
+    """
+
+    def __init__(self, drive_service, main_instance=None,
+                 initial_delay: float = 0.5, max_delay: float = 5.0, backoff: float = 1.5):
+        """初始化检索器"""
+        self.drive_service = drive_service
+        self.main_instance = main_instance
+        self.initial_delay = initial_delay
+        self.max_delay = max_delay
+        self.backoff = backoff
+        self._tmp_folder_id = None
+        self._lock = threading.Lock()
+        # API调用计数，便于比较轮询开销
+        self.api_calls = 0
+
+    def _service(self):
+        """返回底层 Drive API client（GoogleDriveService.service）"""
+        service = getattr(self.drive_service, "service", None)
+        return service if service is not None else self.drive_service
+
+    def get_tmp_folder_id(self) -> Optional[str]:
+        """解析并缓存 REMOTE_ROOT/tmp 的文件夹ID"""
+        if self._tmp_folder_id:
+            return self._tmp_folder_id
+        with self._lock:
+            if self._tmp_folder_id:
+                return self._tmp_folder_id
+            root_id = getattr(self.main_instance, "REMOTE_ROOT_FOLDER_ID", None)
+            if not root_id:
+                return None
+            query = (f"'{root_id}' in parents and name='tmp' and "
+                     f"mimeType='application/vnd.google-apps.folder' and trashed=false")
+            self.api_calls += 1
+            results = self._service().files().list(q=query, pageSize=1, fields="files(id)").execute()
+            items = results.get("files", [])
+            self._tmp_folder_id = items[0]["id"] if items else None
+            return self._tmp_folder_id
+
+    @staticmethod
+    def _escape_name(name: str) -> str:
+        """转义 Drive 查询字符串中的特殊字符"""
+        return name.replace("\\", "\\\\").replace("'", "\\'")
+
+    def find_result_files(self, filenames: List[str]) -> Dict[str, Dict]:
+        """
+        用一个查询查找多个结果文件
+
+        Returns:
+            dict: {filename: file_metadata}，只包含已出现的文件
+        """
+        if not filenames:
+            return {}
+        folder_id = self.get_tmp_folder_id()
+        if not folder_id:
+            raise FileNotFoundError("Cannot resolve REMOTE_ROOT/tmp folder ID")
+        name_clause = " or ".join(f"name='{self._escape_name(n)}'" for n in filenames)
+        query = f"'{folder_id}' in parents and trashed=false and ({name_clause})"
+        self.api_calls += 1
+        results = self._service().files().list(
+            q=query,
+            pageSize=max(10, len(filenames)),
+            fields="files(id,name,size,modifiedTime)"
+        ).execute()
+        found = {}
+        for item in results.get("files", []):
+            # 同名文件保留最新的一个
+            existing = found.get(item["name"])
+            if existing is None or item.get("modifiedTime", "") > existing.get("modifiedTime", ""):
+                found[item["name"]] = item
+        return found
+
+    def fetch_content(self, file_id: str) -> str:
+        """按文件ID下载内容"""
+        self.api_calls += 1
+        content = self._service().files().get_media(fileId=file_id).execute()
+        if isinstance(content, bytes):
+            content = content.decode("utf-8", errors="replace")
+        return content
+
+    def try_read(self, filenames: List[str]) -> Dict[str, str]:
+        """
+        单次检查：查找结果文件并读取已出现的内容
+
+        Returns:
+            dict: {filename: content}
+        """
+        contents = {}
+        for name, metadata in self.find_result_files(filenames).items():
+            # Colab 可能先创建空文件再写入，空文件视为尚未完成
+            if str(metadata.get("size", "1")) == "0":
+                continue
+            contents[name] = self.fetch_content(metadata["id"])
+        return contents
+
+    def delays(self):
+        """生成自适应退避的等待间隔"""
+        delay = self.initial_delay
+        while True:
+            yield delay
+            delay = min(self.max_delay, delay * self.backoff)
+
+    def watch(self, filenames: List[str], max_wait_time: float = 120,
+              should_stop=None, on_poll=None):
+        """
+        同时等待多个结果文件，每出现一个就产出 (filename, content)
+
+        Args:
+            filenames: 待等待的结果文件名列表
+            max_wait_time: 最长等待秒数
+            should_stop: 可选回调，返回True时提前结束（例如Ctrl+C）
+            on_poll: 可选回调，每次未命中后调用（用于输出进度点）
+        """
+        pending = list(dict.fromkeys(filenames))
+        deadline = time.time() + max_wait_time
+        delays = self.delays()
+        while pending and time.time() < deadline:
+            if should_stop and should_stop():
+                return
+            for name, content in self.try_read(pending).items():
+                pending.remove(name)
+                delays = self.delays()  # 有新结果说明远端活跃，重置退避
+                yield name, content
+            if not pending:
+                return
+            sleep_until = min(deadline, time.time() + next(delays))
+            while time.time() < sleep_until:
+                if should_stop and should_stop():
+                    return
+                time.sleep(min(0.1, max(0, sleep_until - time.time())))
+            if on_poll:
+                on_poll()
+
+    def wait_for_result(self, filename: str, max_wait_time: float = 120,
+                        should_stop=None, on_poll=None) -> Optional[str]:
+        """等待单个结果文件，返回内容；超时或中断返回None"""
+        for _, content in self.watch([filename], max_wait_time, should_stop, on_poll):
+            return content
+        return None
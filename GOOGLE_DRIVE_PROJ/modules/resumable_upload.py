@@ -0,0 +1,286 @@
+#!/usr/bin/env python3
+"""
+Google Drive Shell - Resumable Upload Module
+通过Drive API的resumable upload协议直接上传到目标文件夹ID，不经过Google Drive Desktop同步和远端mv
+
+- 每个文件一个上传会话，按块（256KiB的整数倍）顺序发送；多个文件并行上传
+- 会话URI持久化到 GOOGLE_DRIVE_DATA/upload_sessions.json，中断后从服务端确认的偏移继续
+- 上传完成后用服务端返回的 md5Checksum 校验本地内容
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+DEFAULT_ENDPOINT = "https://www.googleapis.com"
+CHUNK_GRANULARITY = 256 * 1024  # Drive要求除最后一块外，块大小为256KiB的整数倍
+DEFAULT_CHUNK_SIZE = 8 * 1024 * 1024
+SESSION_MAX_AGE = 6 * 24 * 3600  # Drive的上传会话一周后失效，提前一天丢弃
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+
+class UploadError(Exception):
+    """上传失败（包含HTTP状态码时可据此判断是否可重试）"""
+
+    def __init__(self, message, status=None):
+        super().__init__(message)
+        self.status = status
+
+
+def file_md5(path, block_size=1024 * 1024):
+    """流式计算文件md5"""
+    digest = hashlib.md5()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class UploadSessionStore:
+    """持久化的上传会话表：{会话键: {"session_uri", "created"}}"""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def session_key(local_path, target_folder_id, name, file_id=None):
+        """同一文件内容（路径+大小+mtime）上传到同一目标时复用会话"""
+        stat = os.stat(local_path)
+        target = file_id or target_folder_id
+        return f"{os.path.abspath(local_path)}|{stat.st_size}|{int(stat.st_mtime)}|{target}|{name}"
+
+    def _load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return {}
+
+    def _save(self, sessions):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(sessions, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._load().get(key)
+        if entry and time.time() - entry.get("created", 0) < SESSION_MAX_AGE:
+            return entry["session_uri"]
+        return None
+
+    def put(self, key, session_uri):
+        with self._lock:
+            sessions = self._load()
+            # 顺便清理过期会话
+            now = time.time()
+            sessions = {k: v for k, v in sessions.items() if now - v.get("created", 0) < SESSION_MAX_AGE}
+            sessions[key] = {"session_uri": session_uri, "created": now}
+            self._save(sessions)
+
+    def remove(self, key):
+        with self._lock:
+            sessions = self._load()
+            if sessions.pop(key, None) is not None:
+                self._save(sessions)
+
+
+class ResumableUploader:
+    """
+    Drive API resumable upload 客户端
+
+    Args:
+        token_provider: 返回OAuth access token的回调（GoogleDriveService.get_access_token）
+        endpoint: API根地址，测试时可指向本地的假Drive服务
+        chunk_size: 块大小，会向上取整到256KiB的整数倍
+        max_workers: 并行上传的文件数
+        max_retries: 单个请求的最大重试次数（5xx/429/网络错误）
+        session_store: UploadSessionStore，None时不持久化会话
+    """
+
+    def __init__(self, token_provider, endpoint=None, chunk_size=DEFAULT_CHUNK_SIZE,
+                 max_workers=4, max_retries=3, session_store=None, timeout=60, retry_delay=1.0):
+        self.token_provider = token_provider
+        self.endpoint = (endpoint or os.environ.get("GDS_DRIVE_API_ENDPOINT") or DEFAULT_ENDPOINT).rstrip("/")
+        chunk_size = max(CHUNK_GRANULARITY, int(chunk_size))
+        self.chunk_size = -(-chunk_size // CHUNK_GRANULARITY) * CHUNK_GRANULARITY
+        self.max_workers = max(1, int(max_workers))
+        self.max_retries = max_retries
+        self.session_store = session_store
+        self.timeout = timeout
+        self.retry_delay = retry_delay
+
+    # ------------------------------------------------------------ HTTP
+
+    def _request(self, method, url, body=None, headers=None):
+        """发送请求，返回 (status, headers, body_bytes)；308等非2xx状态不抛异常"""
+        headers = dict(headers or {})
+        headers["Authorization"] = f"Bearer {self.token_provider()}"
+        request = urllib.request.Request(url, data=body, method=method, headers=headers)
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                return response.status, response.headers, response.read()
+        except urllib.error.HTTPError as e:
+            return e.code, e.headers, e.read()
+
+    def _request_with_retry(self, method, url, body=None, headers=None):
+        """只用于幂等的控制请求（创建会话、查询偏移）；数据块的重试见 _send_chunks"""
+        delay = self.retry_delay
+        for attempt in range(self.max_retries + 1):
+            try:
+                status, response_headers, content = self._request(method, url, body, headers)
+            except (urllib.error.URLError, OSError) as e:
+                if attempt >= self.max_retries:
+                    raise UploadError(f"Network error: {e}")
+            else:
+                if status not in RETRYABLE_STATUS or attempt >= self.max_retries:
+                    return status, response_headers, content
+            time.sleep(delay)
+            delay = min(delay * 2, 16)
+        raise UploadError("Retries exhausted")
+
+    # ------------------------------------------------------------ protocol
+
+    def start_session(self, name, size, target_folder_id=None, file_id=None, mime_type=None):
+        """创建上传会话，返回会话URI；file_id 非空时覆盖已有文件的内容"""
+        fields = urllib.parse.quote("id,name,size,md5Checksum")
+        mime_type = mime_type or "application/octet-stream"
+        if file_id:
+            url = f"{self.endpoint}/upload/drive/v3/files/{file_id}?uploadType=resumable&fields={fields}"
+            method, metadata = "PATCH", {}
+        else:
+            url = f"{self.endpoint}/upload/drive/v3/files?uploadType=resumable&fields={fields}"
+            method, metadata = "POST", {"name": name, "parents": [target_folder_id]}
+        status, headers, content = self._request_with_retry(method, url, json.dumps(metadata).encode("utf-8"), {
+            "Content-Type": "application/json; charset=UTF-8",
+            "X-Upload-Content-Type": mime_type,
+            "X-Upload-Content-Length": str(size),
+        })
+        location = headers.get("Location") if headers else None
+        if status != 200 or not location:
+            raise UploadError(f"Failed to start upload session ({status}): {content[:200]!r}", status)
+        return location
+
+    @staticmethod
+    def _parse_range(headers):
+        """从308响应的Range头（bytes=0-N）得到下一个待发送的偏移"""
+        value = headers.get("Range") if headers else None
+        if not value:
+            return 0
+        return int(value.split("-")[-1]) + 1
+
+    def query_offset(self, session_uri, size):
+        """
+        查询会话进度
+
+        Returns:
+            (offset, file_metadata): 已完成时 file_metadata 非空
+        """
+        status, headers, content = self._request_with_retry(
+            "PUT", session_uri, b"", {"Content-Range": f"bytes */{size}", "Content-Length": "0"})
+        if status in (200, 201):
+            return size, json.loads(content or b"{}")
+        if status == 308:
+            return self._parse_range(headers), None
+        raise UploadError(f"Upload session is no longer valid ({status})", status)
+
+    def _send_chunks(self, session_uri, path, size, offset):
+        """从offset开始顺序发送剩余块，返回完成后的文件元数据"""
+        retries = 0
+        delay = self.retry_delay
+        with open(path, "rb") as f:
+            while True:
+                f.seek(offset)
+                chunk = f.read(self.chunk_size)
+                end = offset + len(chunk) - 1
+                content_range = f"bytes {offset}-{end}/{size}" if chunk else f"bytes */{size}"
+                try:
+                    status, headers, content = self._request(
+                        "PUT", session_uri, chunk, {"Content-Range": content_range, "Content-Length": str(len(chunk))})
+                except (urllib.error.URLError, OSError) as e:
+                    status, headers, content = None, None, str(e).encode("utf-8")
+                if status in (200, 201):
+                    return json.loads(content or b"{}")
+                if status == 308:
+                    # 以服务端确认的偏移为准（可能只收到了块的一部分）
+                    offset = self._parse_range(headers)
+                    retries, delay = 0, self.retry_delay
+                    continue
+                if status is None or status in RETRYABLE_STATUS:
+                    if retries >= self.max_retries:
+                        raise UploadError(f"Chunk upload interrupted at byte {offset} ({status or content[:200]!r})", status)
+                    retries += 1
+                    time.sleep(delay)
+                    delay = min(delay * 2, 16)
+                    # 协议要求中断后先向服务端确认已收到的偏移
+                    offset, metadata = self.query_offset(session_uri, size)
+                    if metadata is not None:
+                        return metadata
+                    continue
+                raise UploadError(f"Chunk upload failed ({status}): {content[:200]!r}", status)
+
+    def upload_file(self, path, target_folder_id=None, name=None, file_id=None, mime_type=None):
+        """
+        上传单个文件（可从持久化的会话继续）
+
+        Returns:
+            dict: {"success", "file_id", "name", "size", "md5", "resumed_from", "error"}
+        """
+        name = name or Path(path).name
+        try:
+            size = os.path.getsize(path)
+            local_md5 = file_md5(path)
+            key = UploadSessionStore.session_key(path, target_folder_id, name, file_id) if self.session_store else None
+            session_uri = self.session_store.get(key) if key else None
+            offset = 0
+            metadata = None
+            if session_uri:
+                try:
+                    offset, metadata = self.query_offset(session_uri, size)
+                except UploadError:
+                    session_uri = None  # 会话失效，重新开始
+                    offset = 0
+            resumed_from = offset if session_uri else 0
+            if not session_uri:
+                session_uri = self.start_session(name, size, target_folder_id, file_id, mime_type)
+                if key:
+                    self.session_store.put(key, session_uri)
+            if metadata is None:
+                metadata = self._send_chunks(session_uri, path, size, offset)
+            if key:
+                self.session_store.remove(key)
+            remote_md5 = metadata.get("md5Checksum")
+            if remote_md5 and remote_md5 != local_md5:
+                return {"success": False, "name": name, "file_id": metadata.get("id"),
+                        "error": f"md5 mismatch for {name}: local {local_md5}, remote {remote_md5}"}
+            return {"success": True, "name": name, "file_id": metadata.get("id"), "size": size,
+                    "md5": local_md5, "md5_verified": bool(remote_md5), "resumed_from": resumed_from}
+        except (UploadError, OSError, ValueError) as e:
+            return {"success": False, "name": name, "error": str(e)}
+
+    def upload_files(self, uploads):
+        """
+        并行上传多个文件
+
+        Args:
+            uploads: [{"path", "target_folder_id", "name"?, "file_id"?}]
+
+        Returns:
+            list: 与输入顺序一致的 upload_file 结果
+        """
+        if not uploads:
+            return []
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(uploads))) as executor:
+            futures = [executor.submit(self.upload_file, item["path"], item.get("target_folder_id"),
+                                       item.get("name"), item.get("file_id"), item.get("mime_type"))
+                       for item in uploads]
+            return [future.result() for future in futures]
@@ -34,12 +34,13 @@ class SyncManager:
         self.drive_service = drive_service
         self.main_instance = main_instance  # 引用主实例以访问其他属性
 
-    def move_to_local_equivalent(self, file_path):
+    def move_to_local_equivalent(self, file_path, move=False):
         """
         将文件移动到 LOCAL_EQUIVALENT 目录，如果有同名文件则重命名
         
         Args:
             file_path (str): 要移动的文件路径
+            move (bool): 真正移动而不是复制（用于打包生成的临时zip，同一文件系统上只是一次rename）
             
         Returns:
             dict: 包含成功状态和移动后文件路径的字典
@@ -123,8 +124,11 @@ class SyncManager:
                         "error": f"Failed to delete old file: {e}"
                     }
             
-            # 复制文件而不是移动（保留原文件）
-            shutil.copy2(str(source_path), str(target_path))
+            if move:
+                shutil.move(str(source_path), str(target_path))
+            else:
+                # 复制文件而不是移动（保留原文件）
+                shutil.copy2(str(source_path), str(target_path))
             
             return {
                 "success": True,
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Google Drive Shell - Sync Manifest Module
+为每个远端目标目录记录已上传文件的 (相对路径, size, mtime, md5)，
+上传时与Drive返回的md5Checksum比对，只传输有变化的文件
+"""
+
+import json
+import os
+import sys
+import threading
+from pathlib import Path
+
+try:
+    from .resumable_upload import file_md5
+except ImportError:
+    # 不经过modules包单独加载时，从同目录导入
+    sys.path.insert(0, str(Path(__file__).parent))
+    from resumable_upload import file_md5
+
+MANIFEST_DIR = Path(__file__).parent.parent.parent / "GOOGLE_DRIVE_DATA" / "sync_manifests"
+FOLDER_MIME_TYPE = "application/vnd.google-apps.folder"
+
+
+class SyncManifest:
+    """
+    单个远端目标目录（按文件夹ID区分）的上传清单
+
+    entries: {相对路径(posix): {"size": int, "mtime": float, "md5": str}}
+    """
+
+    def __init__(self, target_folder_id, manifest_dir=None):
+        self.target_folder_id = target_folder_id
+        self.path = Path(manifest_dir or MANIFEST_DIR) / f"{target_folder_id}.json"
+        self._lock = threading.Lock()
+        self.entries = self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f).get("entries", {})
+        except (OSError, json.JSONDecodeError, AttributeError):
+            return {}
+
+    def save(self):
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_suffix(f".{os.getpid()}.tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"target_folder_id": self.target_folder_id, "entries": self.entries},
+                          f, indent=2, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+
+    def local_entry(self, path, relpath=None):
+        """
+        计算本地文件的清单条目；size和mtime与清单一致时直接复用记录的md5，避免重新读取文件
+        """
+        relpath = relpath or Path(path).name
+        stat = os.stat(path)
+        recorded = self.entries.get(relpath)
+        if recorded and recorded.get("size") == stat.st_size and recorded.get("mtime") == stat.st_mtime:
+            md5 = recorded["md5"]
+        else:
+            md5 = file_md5(path)
+        return {"size": stat.st_size, "mtime": stat.st_mtime, "md5": md5}
+
+    def scan_folder(self, folder_path, include=None):
+        """
+        扫描本地文件夹
+
+        Args:
+            folder_path: 本地文件夹
+            include: 可选的过滤回调 include(relpath) -> bool
+
+        Returns:
+            dict: {相对路径: 清单条目}
+        """
+        folder_path = Path(folder_path)
+        entries = {}
+        for file_path in folder_path.rglob('*'):
+            if not file_path.is_file():
+                continue
+            relpath = file_path.relative_to(folder_path).as_posix()
+            if include is not None and not include(relpath):
+                continue
+            entries[relpath] = self.local_entry(file_path, relpath)
+        return entries
+
+    def update(self, entries):
+        """记录成功上传的条目"""
+        self.entries.update(entries)
+
+    def remove(self, relpaths):
+        for relpath in relpaths:
+            self.entries.pop(relpath, None)
+
+
+def list_remote_tree(service, folder_id, max_parents_per_query=40):
+    """
+    列出远端文件夹下的所有文件（递归）
+
+    按层广度优先：同一层的多个文件夹合并进一个 `'a' in parents or 'b' in parents` 查询，
+    查询次数与目录深度（而不是目录数量）成正比。
+
+    Returns:
+        dict: {相对路径: {"id", "md5Checksum", "size"}}
+    """
+    files = {}
+    level = {folder_id: ""}
+    while level:
+        next_level = {}
+        parent_ids = list(level)
+        for start in range(0, len(parent_ids), max_parents_per_query):
+            batch = parent_ids[start:start + max_parents_per_query]
+            parents_clause = " or ".join(f"'{pid}' in parents" for pid in batch)
+            query = f"({parents_clause}) and trashed=false"
+            page_token = None
+            while True:
+                results = service.files().list(
+                    q=query, pageSize=1000, pageToken=page_token,
+                    fields="nextPageToken, files(id,name,mimeType,parents,md5Checksum,size)"
+                ).execute()
+                for item in results.get("files", []):
+                    parent = next((p for p in item.get("parents", []) if p in level), None)
+                    if parent is None:
+                        continue
+                    relpath = f"{level[parent]}/{item['name']}" if level[parent] else item["name"]
+                    if item.get("mimeType") == FOLDER_MIME_TYPE:
+                        next_level[item["id"]] = relpath
+                    else:
+                        files[relpath] = {"id": item["id"], "md5Checksum": item.get("md5Checksum"),
+                                          "size": item.get("size")}
+                page_token = results.get("nextPageToken")
+                if not page_token:
+                    break
+        level = next_level
+    return files
+
+
+def compute_delta(local_entries, remote_files=None, manifest_entries=None):
+    """
+    比较本地文件与远端状态
+
+    远端状态优先使用Drive的md5Checksum（remote_files）；没有API服务时退回到清单记录（manifest_entries）。
+
+    Returns:
+        dict: {"changed": [...], "unchanged": [...], "remote_only": [...]}
+    """
+    reference = {}
+    if remote_files is not None:
+        reference = {rel: meta.get("md5Checksum") for rel, meta in remote_files.items()}
+    elif manifest_entries is not None:
+        reference = {rel: entry.get("md5") for rel, entry in manifest_entries.items()}
+    changed, unchanged = [], []
+    for relpath, entry in sorted(local_entries.items()):
+        if reference.get(relpath) and reference[relpath] == entry["md5"]:
+            unchanged.append(relpath)
+        else:
+            changed.append(relpath)
+    remote_only = sorted(set(reference) - set(local_entries))
+    return {"changed": changed, "unchanged": unchanged, "remote_only": remote_only}
@@ -4,6 +4,10 @@ class TextOperations:
     Text file editing and content operations
     """
     
+    # 进程内共享的GDSCacheManager及其加载时cache_config.json的修改时间
+    _file_cache_manager = None
+    _file_cache_config_mtime = None
+    
     def __init__(self, drive_service, main_instance):
         self.drive_service = drive_service
         self.main_instance = main_instance
@@ -89,121 +93,157 @@ class TextOperations:
             return {"success": False, "error": f"Create file failed: {e}"}
 
     def cmd_cat(self, filename):
-        """cat命令 - 显示文件内容"""
+        """cat命令 - 显示文件内容（缓存仍然有效时不重新下载）"""
         try:
-            # print(f"🔍 DEBUG: cmd_cat called for filename: {filename}")
             if not self.drive_service:
-                # print(f"🔍 DEBUG: Drive service not initialized")
                 return {"success": False, "error": "Google Drive API service not initialized"}
                 
             current_shell = self.main_instance.get_current_shell()
             if not current_shell:
-                # print(f"🔍 DEBUG: No active shell")
                 return {"success": False, "error": "No active remote shell, please create or switch to a shell"}
             
             if not filename:
-                # print(f"🔍 DEBUG: No filename provided")
                 return {"success": False, "error": "Please specify the file to view"}
             
-            # 查找文件
-            # print(f"🔍 DEBUG: Looking for file: {filename}")
-            file_info = self._find_file(filename, current_shell)
-            # print(f"🔍 DEBUG: File info: {file_info}")
-            if not file_info:
+            remote_absolute_path = self.main_instance.resolve_remote_absolute_path(filename, current_shell)
+            content_result = self._download_and_get_content(filename, remote_absolute_path)
+            if content_result.get("not_found"):
                 # 将本地路径转换为远程路径格式以便在错误消息中正确显示
                 converted_filename = self.main_instance.path_resolver._convert_local_path_to_remote(filename)
-                # print(f"🔍 DEBUG: File not found, converted path: {converted_filename}")
                 return {"success": False, "error": f"File or directory does not exist: {converted_filename}"}
-            
-            # 检查是否为文件
-            if file_info['mimeType'] == 'application/vnd.google-apps.folder':
-                # print(f"🔍 DEBUG: Target is a directory")
+            if content_result.get("is_directory"):
                 return {"success": False, "error": f"cat: {filename}: Is a directory"}
+            if not content_result["success"]:
+                return {"success": False, "error": f"无法读取文件内容: {content_result.get('error')}"}
             
-            # 下载并读取文件内容
-            try:
-                # print(f"🔍 DEBUG: Downloading file content...")
-                import io
-                from googleapiclient.http import MediaIoBaseDownload
-                
-                request = self.drive_service.service.files().get_media(fileId=file_info['id'])
-                fh = io.BytesIO()
-                downloader = MediaIoBaseDownload(fh, request)
-                
-                done = False
-                while done is False:
-                    status, done = downloader.next_chunk()
-                
-                content = fh.getvalue().decode('utf-8', errors='replace')
-                # print(f"🔍 DEBUG: File content downloaded, length: {len(content)} chars")
-                return {"success": True, "output": content, "filename": filename}
-                
-            except Exception as e:
-                # print(f"🔍 DEBUG: Error downloading file: {e}")
-                return {"success": False, "error": f"无法读取文件内容: {e}"}
+            return {"success": True, "output": content_result["content"], "filename": filename,
+                    "source": content_result.get("source")}
                 
         except Exception as e:
-            # print(f"🔍 DEBUG: Exception in cmd_cat: {e}")
             return {"success": False, "error": f"执行cat命令时出错: {e}"}
 
-    def cmd_grep(self, pattern, *filenames):
-        """grep命令 - 在文件中搜索模式，支持多文件和regex"""
+    def cmd_grep(self, pattern, *filenames, recursive=False, ignore_case=False, include=None, use_cache=False):
+        """
+        grep命令 - 在文件中搜索模式，支持多文件、目录递归和regex
+        
+        不再逐个下载文件：所有路径合并为一条远端grep命令，只传回匹配的行。
+        use_cache=True 时，本地缓存仍为最新版本（is_cached_file_up_to_date）的文件直接在本地搜索。
+        
+        Args:
+            pattern (str): 正则表达式
+            filenames: 文件或目录（recursive时），为空且recursive时搜索当前目录
+            recursive (bool): 递归搜索目录
+            ignore_case (bool): 忽略大小写
+            include (list): 递归时只搜索匹配这些glob的文件
+            use_cache (bool): 使用仍然有效的本地缓存副本
+            
+        Returns:
+            dict: {"success", "result": {路径: {"local_file", "occurrences": {行号: [位置]}, "lines": {行号: 行内容}, "source"}}}
+        """
         import re
+        from .remote_grep import (
+            build_remote_grep_command, parse_grep_output, grep_failure, match_positions, grep_lines,
+            GREP_MATCH, GREP_NO_MATCH
+        )
         
         try:
             if not pattern:
                 return {"success": False, "error": "请指定搜索模式"}
             
             if not filenames:
-                return {"success": False, "error": "请指定要搜索的文件"}
+                if not recursive:
+                    return {"success": False, "error": "请指定要搜索的文件"}
+                filenames = (".",)
             
-            # 编译正则表达式
+            # 编译正则表达式（用于本地缓存搜索和计算匹配位置）
             try:
-                regex = re.compile(pattern)
+                regex = re.compile(pattern, re.IGNORECASE if ignore_case else 0)
             except re.error as e:
                 return {"success": False, "error": f"无效的正则表达式: {e}"}
             
+            current_shell = self.main_instance.get_current_shell()
+            if not current_shell:
+                return {"success": False, "error": "No active remote shell, please create or switch to a shell"}
+            
             result = {}
+            remote_targets = {}  # 远端绝对路径 -> 用户输入的路径
             
             for filename in filenames:
-                # 获取文件内容
-                cat_result = self.cmd_cat(filename)
-                if not cat_result["success"]:
-                    result[filename] = {
-                        "local_file": None,
-                        "occurrences": [],
-                        "error": cat_result["error"]
-                    }
+                remote_path = self.main_instance.resolve_remote_absolute_path(filename, current_shell)
+                cached_lines = self._read_up_to_date_cache(remote_path) if use_cache and not recursive else None
+                if cached_lines is None:
+                    remote_targets[remote_path] = filename
                     continue
-                
-                content = cat_result["output"]
-                lines = content.split('\n')
-                
-                # 搜索匹配的位置
-                occurrences = {}
-                for line_num, line in enumerate(lines, 1):
-                    line_matches = []
-                    for match in regex.finditer(line):
-                        line_matches.append(match.start())
-                    if line_matches:
-                        occurrences[line_num] = line_matches
-                
-                # 转换为所需格式: {line_num: [positions]}
-                formatted_occurrences = occurrences
-                
-                # 获取本地缓存文件路径
-                local_file = self.main_instance.cache_manager._get_local_cache_path(filename)
-                
+                lines = grep_lines(regex, cached_lines)
                 result[filename] = {
-                    "local_file": local_file,
-                    "occurrences": formatted_occurrences
+                    "local_file": self.main_instance.cache_manager._get_local_cache_path(filename),
+                    "occurrences": {num: match_positions(regex, text) for num, text in lines.items()},
+                    "lines": lines,
+                    "source": "cache"
                 }
             
+            if remote_targets:
+                command = build_remote_grep_command(
+                    pattern, list(remote_targets), recursive=recursive, ignore_case=ignore_case, include=include
+                )
+                exec_result = self.main_instance.execute_command_interface("bash", ["-c", command])
+                data = exec_result.get("data", {})
+                exit_code = data.get("exit_code", exec_result.get("exit_code", -1))
+                stdout = data.get("stdout", exec_result.get("stdout", ""))
+                stderr = data.get("stderr", exec_result.get("stderr", ""))
+                if not exec_result.get("success") and exit_code not in (GREP_MATCH, GREP_NO_MATCH):
+                    if not stderr:
+                        return {"success": False, "error": exec_result.get("error_info") or exec_result.get("error") or f"Remote grep failed (exit code {exit_code})"}
+                
+                parsed = parse_grep_output(stdout, stderr)
+                failure = grep_failure(exit_code, parsed, stderr)
+                if failure:
+                    return {"success": False, "error": failure}
+                for remote_path, lines in parsed["matches"].items():
+                    display_path = self._grep_display_path(remote_path, remote_targets)
+                    result[display_path] = {
+                        "local_file": None,
+                        "occurrences": {num: match_positions(regex, text) for num, text in lines.items()},
+                        "lines": lines,
+                        "source": "remote"
+                    }
+                for remote_path, message in parsed["errors"].items():
+                    display_path = self._grep_display_path(remote_path, remote_targets)
+                    result[display_path] = {"local_file": None, "occurrences": {}, "error": message}
+                # 没有匹配的显式文件也出现在结果中，保持与逐文件搜索相同的结构
+                if not recursive:
+                    for remote_path, filename in remote_targets.items():
+                        result.setdefault(filename, {"local_file": None, "occurrences": {}, "lines": {}, "source": "remote"})
+                if parsed["truncated"]:
+                    return {"success": True, "result": result, "truncated": True}
+            
             return {"success": True, "result": result}
                 
         except Exception as e:
             return {"success": False, "error": f"Grep command failed: {str(e)}"}
 
+    def _read_up_to_date_cache(self, remote_path):
+        """缓存仍是最新版本时返回缓存内容的行列表，否则返回None"""
+        try:
+            status = self.main_instance.is_cached_file_up_to_date(remote_path)
+            if not (status.get("success") and status.get("is_up_to_date")):
+                return None
+            cache_status = self.main_instance.cache_manager.is_remote_file_cached(remote_path)
+            with open(cache_status["cache_file_path"], "r", encoding="utf-8", errors="replace") as f:
+                return f.read().split('\n')
+        except Exception:
+            return None
+
+    def _grep_display_path(self, remote_path, remote_targets):
+        """把远端grep输出的绝对路径还原成用户输入的形式"""
+        if remote_path in remote_targets:
+            return remote_targets[remote_path]
+        for target, filename in remote_targets.items():
+            if remote_path.startswith(target.rstrip('/') + '/'):
+                relative = remote_path[len(target.rstrip('/')) + 1:]
+                return relative if filename in (".", "./") else f"{filename.rstrip('/')}/{relative}"
+        return remote_path
+
     def _find_file(self, filepath, current_shell):
         """查找文件，支持路径解析"""
         try:
@@ -236,15 +276,26 @@ class TextOperations:
         except Exception:
             return None
 
-    def _download_and_get_content(self, filename, remote_absolute_path, force=False):
+    def _download_and_get_content(self, filename, remote_absolute_path, force=False, max_lines=None):
         """
-        下载文件并获取内容（用于read命令）
+        下载文件并获取内容（用于read/cat命令）
+        
+        文件按 名称+父目录 一次查询定位；缓存记录的md5/modifiedTime与Drive一致时直接读取本地缓存。
+        只需要前max_lines行且文件较大时，只按Range读取需要的部分（不写入缓存）。
         
         Args:
             filename (str): 文件名
             remote_absolute_path (str): 远程绝对路径
             force (bool): 是否强制下载并更新缓存
+            max_lines (int): 只需要前max_lines行，None表示需要完整内容
+            
+        Returns:
+            dict: {"success", "content", "file_info", "source": "cache"|"download"|"range", "complete"}
         """
+        from .drive_reader import (
+            find_child, download_to_file, fetch_line_prefix, FOLDER_MIME_TYPE, RANGE_READ_MIN_SIZE
+        )
+        
         try:
             current_shell = self.main_instance.get_current_shell()
             if not current_shell:
@@ -269,7 +320,7 @@ class TextOperations:
                     if isinstance(resolve_result, tuple) and len(resolve_result) >= 2:
                         target_folder_id, _ = resolve_result
                         if not target_folder_id:
-                            return {"success": False, "error": f"无法解析目标路径: {parent_logical_path}"}
+                            return {"success": False, "not_found": True, "error": f"无法解析目标路径: {parent_logical_path}"}
                     else:
                         return {"success": False, "error": f"路径解析返回格式错误: {parent_logical_path}"}
                 else:
@@ -279,50 +330,59 @@ class TextOperations:
                 # 使用当前shell的文件夹ID
                 target_folder_id = current_shell.get("current_folder_id", self.main_instance.REMOTE_ROOT_FOLDER_ID)
             
-            # 在目标文件夹中查找文件
-            result = self.drive_service.list_files(folder_id=target_folder_id, max_results=100)
-            if not result['success']:
-                return {"success": False, "error": f"无法列出文件夹内容: {result.get('error', '未知错误')}"}
-            
-            file_info = None
-            files = result['files']
-            for file in files:
-                if file['name'] == actual_filename:
-                    file_info = file
-                    break
-            
+            # 按名称和父目录查询，元数据（size/modifiedTime/md5）随查询一起返回
+            service = self.drive_service.service
+            file_info = find_child(service, target_folder_id, actual_filename)
             if not file_info:
-                return {"success": False, "error": f"File does not exist: {actual_filename}"}
+                return {"success": False, "not_found": True, "error": f"File does not exist: {actual_filename}"}
             
             # 检查是否为文件（不是文件夹）
-            if file_info['mimeType'] == 'application/vnd.google-apps.folder':
-                return {"success": False, "error": f"{actual_filename} 是一个目录，无法读取"}
-            
-            # 使用Google Drive API下载文件内容
+            if file_info['mimeType'] == FOLDER_MIME_TYPE:
+                return {"success": False, "is_directory": True, "error": f"{actual_filename} 是一个目录，无法读取"}
+            
+            cache_manager = self._get_file_cache_manager()
+            cached_info = cache_manager.get_cached_file(remote_absolute_path) if cache_manager else None
+            cached_path = cache_manager.get_cached_file_path(remote_absolute_path) if cached_info else None
+            
+            # 缓存与远端一致时直接读取缓存
+            if not force and cached_path and (
+                (file_info.get("md5Checksum") and cached_info.get("content_hash") == file_info["md5Checksum"])
+                or (file_info.get("modifiedTime") and cached_info.get("remote_modified_time") == file_info["modifiedTime"])
+            ):
+                with open(cached_path, 'rb') as f:
+                    content = f.read()
+                return {"success": True, "content": self._decode_content(content), "file_info": file_info,
+                        "source": "cache", "complete": True}
+            
+            size = int(file_info.get("size") or 0)
             try:
-                file_id = file_info['id']
-                request = self.drive_service.service.files().get_media(fileId=file_id)
-                content = request.execute()
+                # 大文件只需要开头若干行时，只读取需要的字节
+                if max_lines is not None and size > RANGE_READ_MIN_SIZE:
+                    content, complete = fetch_line_prefix(service, file_info['id'], size, max_lines)
+                    return {"success": True, "content": self._decode_content(content), "file_info": file_info,
+                            "source": "range", "complete": complete}
                 
-                # 将字节内容转换为字符串
-                if isinstance(content, bytes):
-                    try:
-                        content_str = content.decode('utf-8')
-                    except UnicodeDecodeError:
-                        try:
-                            content_str = content.decode('gbk')
-                        except UnicodeDecodeError:
-                            content_str = content.decode('utf-8', errors='replace')
-                else:
-                    content_str = str(content)
-                
-
+                # 分块下载到临时文件，然后写入缓存
+                import os
+                import tempfile
+                with tempfile.NamedTemporaryFile(delete=False, suffix=f"_{actual_filename}") as temp_file:
+                    temp_path = temp_file.name
+                try:
+                    download_to_file(service, file_info['id'], temp_path, size=size)
+                    with open(temp_path, 'rb') as f:
+                        content = f.read()
+                    if cache_manager:
+                        if cached_info:
+                            cache_manager.cleanup_cache(remote_absolute_path)
+                        cache_result = cache_manager.cache_file(remote_absolute_path, temp_path)
+                        if cache_result.get("success") and file_info.get("modifiedTime"):
+                            cache_manager._update_cached_file_modified_time(remote_absolute_path, file_info["modifiedTime"])
+                finally:
+                    if os.path.exists(temp_path):
+                        os.unlink(temp_path)
                 
-                return {
-                    "success": True,
-                    "content": content_str,
-                    "file_info": file_info
-                }
+                return {"success": True, "content": self._decode_content(content), "file_info": file_info,
+                        "source": "download", "complete": True}
                 
             except Exception as e:
                 return {"success": False, "error": f"下载文件内容失败: {e}"}
@@ -330,6 +390,119 @@ class TextOperations:
         except Exception as e:
             return {"success": False, "error": f"下载和获取内容时出错: {e}"}
 
+    def _get_file_cache_manager(self):
+        """
+        获取远端文件缓存管理器（GDSCacheManager），不可用时返回None
+        
+        进程内只创建一次；cache_config.json 被其他管理器实例改写后才重新加载配置
+        """
+        manager = TextOperations._file_cache_manager
+        if manager is None:
+            try:
+                import sys
+                from pathlib import Path
+                project_dir = str(Path(__file__).parent.parent)
+                if project_dir not in sys.path:
+                    sys.path.insert(0, project_dir)
+                from cache_manager import GDSCacheManager
+                manager = GDSCacheManager()
+            except Exception:
+                return None
+            TextOperations._file_cache_manager = manager
+            TextOperations._file_cache_config_mtime = self._cache_config_mtime(manager)
+            return manager
+        mtime = self._cache_config_mtime(manager)
+        if mtime != TextOperations._file_cache_config_mtime:
+            manager.cache_config = manager._load_cache_config()
+            TextOperations._file_cache_config_mtime = mtime
+        return manager
+
+    @staticmethod
+    def _cache_config_mtime(manager):
+        try:
+            return manager.cache_config_file.stat().st_mtime_ns
+        except OSError:
+            return None
+
+    def _decode_content(self, content):
+        """将字节内容转换为字符串（UTF-8，其次GBK）"""
+        if not isinstance(content, bytes):
+            return str(content)
+        try:
+            return content.decode('utf-8')
+        except UnicodeDecodeError:
+            try:
+                return content.decode('gbk')
+            except UnicodeDecodeError:
+                return content.decode('utf-8', errors='replace')
+
+    def _parse_read_ranges(self, args):
+        """
+        解析read命令的行范围参数（0-based，[a, b]包含语法）
+        
+        Returns:
+            list: [(start, end_or_None), ...]，空列表表示整个文件
+        """
+        import json
+        if not args:
+            return []
+        if len(args) == 1 and args[0].strip().startswith('['):
+            ranges = json.loads(args[0])
+            return [(int(start), int(end)) for start, end in ranges]
+        if len(args) == 1:
+            return [(int(args[0]), None)]
+        return [(int(args[0]), int(args[1]))]
+
+    def cmd_read(self, filename, *args, force=False):
+        """
+        read命令 - 带行号读取文件内容
+        
+        Args:
+            filename (str): 文件名
+            args: 可选的行范围：start / start end / "[[a, b], [c, d]]"
+            force (bool): 强制重新下载，忽略缓存
+        """
+        try:
+            current_shell = self.main_instance.get_current_shell()
+            if not current_shell:
+                return {"success": False, "error": "No active remote shell, please create or switch to a shell"}
+            
+            try:
+                ranges = self._parse_read_ranges(list(args))
+            except (ValueError, TypeError) as e:
+                return {"success": False, "error": f"Invalid line range: {' '.join(args)} ({e})"}
+            
+            # 所有范围都有结束行时，只需要读取到最大的结束行
+            max_lines = None
+            if ranges and all(end is not None for _, end in ranges):
+                max_lines = max(end for _, end in ranges) + 1
+            
+            remote_absolute_path = self.main_instance.resolve_remote_absolute_path(filename, current_shell)
+            content_result = self._download_and_get_content(filename, remote_absolute_path, force=force, max_lines=max_lines)
+            if not content_result["success"]:
+                return content_result
+            
+            lines = content_result["content"].split('\n')
+            if not content_result.get("complete", True):
+                # 部分读取时最后一行可能不完整
+                lines = lines[:-1]
+            if ranges:
+                selected_lines = []
+                for start, end in ranges:
+                    end = len(lines) - 1 if end is None else min(end, len(lines) - 1)
+                    selected_lines.extend((num, lines[num]) for num in range(max(start, 0), end + 1))
+            else:
+                selected_lines = list(enumerate(lines))
+            
+            return {
+                "success": True,
+                "filename": filename,
+                "output": self._format_read_output(selected_lines),
+                "source": content_result.get("source")
+            }
+        except Exception as e:
+            return {"success": False, "error": f"执行read命令时出错: {e}"}
+
     def _format_read_output(self, selected_lines):
         """
         格式化读取输出
@@ -687,7 +860,7 @@ class TextOperations:
                 "temp_files_created": []
             }
 
-    def cmd_edit(self, filename, replacement_spec, preview=False, backup=False):
+    def cmd_edit(self, filename, replacement_spec, preview=False, backup=False, patch=False):
         """
         GDS edit命令 - 支持多段文本同步替换的文件编辑功能
         
@@ -696,6 +869,8 @@ class TextOperations:
             replacement_spec (str): 替换规范，支持多种格式
             preview (bool): 预览模式，只显示修改结果不实际保存
             backup (bool): 是否创建备份文件
+            patch (bool): 补丁模式，基于md5校验过的本地缓存编辑，只把变化的行发送到远端应用；
+                远端文件已变化时回退为重新下载+整文件上传
             
         Returns:
             dict: 编辑结果
@@ -758,8 +933,11 @@ class TextOperations:
                 error_msg += "  Mixed: '[[[1, 2], \"line\"], [\"old\", \"new\"]]'"
                 return {"success": False, "error": error_msg}
             
-            # 2. 下载文件到缓存
-            download_result = self.cmd_download(filename, force=True)  # 强制重新下载确保最新内容
+            # 2. 下载文件到缓存（补丁模式下缓存与远端md5一致时直接使用缓存）
+            if patch:
+                download_result = self._get_validated_cached_copy(filename, current_shell, cache_manager)
+            else:
+                download_result = self.cmd_download(filename, force=True)  # 强制重新下载确保最新内容
             if not download_result["success"]:
                 return {"success": False, "error": f"{download_result.get('error')}"}  #TODO
             
@@ -768,12 +946,14 @@ class TextOperations:
                 return {"success": False, "error": "Failed to get cache file path"}
             
             # 3. 读取文件内容
+            file_encoding = 'utf-8'
             try:
                 with open(cache_file_path, 'r', encoding='utf-8') as f:
                     original_lines = f.readlines()
             except UnicodeDecodeError:
                 # 尝试其他编码
                 try:
+                    file_encoding = 'gbk'
                     with open(cache_file_path, 'r', encoding='gbk') as f:
                         original_lines = f.readlines()
                 except:
@@ -943,7 +1123,27 @@ class TextOperations:
                     "message": f"📝 预览模式 - 文件: {filename}\n原始行数: {len(original_lines)}, 修改后行数: {len(modified_lines)}\n应用替换: {len(parsed_replacements)} 个"
                 }
             
-            # 7. 准备临时目录和文件上传列表
+            # 7. 补丁模式：只把变化的行发送到远端，远端校验md5后原子替换
+            if patch:
+                patch_result = self._apply_edit_patch(
+                    filename, current_shell, cache_manager, cache_file_path, file_encoding,
+                    original_lines, modified_lines, backup
+                )
+                if patch_result["success"]:
+                    return self._build_edit_result(
+                        filename, original_lines, modified_lines, parsed_replacements, diff_info,
+                        patch_result.get("backup_info", {}), applied_via="patch"
+                    )
+                if patch_result.get("stale"):
+                    # 远端文件在缓存之后被修改：重新下载最新内容，重新应用替换并整文件上传
+                    result = self.cmd_edit(filename, replacement_spec, preview=False, backup=backup, patch=False)
+                    result["patch_fallback"] = patch_result.get("error")
+                    return result
+                if not patch_result.get("fallback"):
+                    return patch_result
+                debug_log(f"Patch mode fell back to full upload: {patch_result.get('error')}")
+            
+            # 8. 准备临时目录和文件上传列表
             import tempfile
             import os
             temp_dir = tempfile.gettempdir()
@@ -995,21 +1195,21 @@ class TextOperations:
             files_to_upload.append(temp_file_path)
             debug_log(f"Files to upload: {files_to_upload}")
             
-            # 8. 保存修改后的文件到临时位置，使用原始文件名
+            # 9. 保存修改后的文件到临时位置，使用原始文件名
             debug_log(f"Using temp_file_path='{temp_file_path}' for original filename='{actual_filename}'")
             
             with open(temp_file_path, 'w', encoding='utf-8') as temp_file:
                 temp_file.writelines(modified_lines)
             
             try:
-                # 9. 更新缓存
+                # 10. 更新缓存
                 remote_absolute_path = self.main_instance.resolve_remote_absolute_path(filename, current_shell)
                 cache_result = cache_manager.cache_file(remote_absolute_path, temp_file_path)
                 
                 if not cache_result["success"]:
                     return {"success": False, "error": f"Failed to update cache: {cache_result.get('error')}"}
                 
-                # 10. 上传修改后的文件，确保缓存状态正确更新
+                # 11. 上传修改后的文件，确保缓存状态正确更新
                 debug_log(f"About to upload edited file - temp_file_path='{temp_file_path}', filename='{filename}'")
                 debug_log(f"temp_file exists: {os.path.exists(temp_file_path)}")
                 if os.path.exists(temp_file_path):
@@ -1023,40 +1223,9 @@ class TextOperations:
                 debug_log(f"Batch upload result: {upload_result}")
                 
                 if upload_result["success"]:
-                    # 生成diff预览用于显示
-                    diff_result = self._generate_local_diff_preview(filename, original_lines, modified_lines, parsed_replacements)
-                    
-                    result = {
-                        "success": True,
-                        "filename": filename,
-                        "original_lines": len(original_lines),
-                        "modified_lines": len(modified_lines),
-                        "replacements_applied": len(parsed_replacements),
-                        "diff": diff_info,
-                        "diff_output": diff_result.get("diff_output", ""),
-                        "cache_updated": True,
-                        "uploaded": True,
-                        "message": f"File {filename} edited successfully, applied {len(parsed_replacements)} replacements"
-                    }
-                    result.update(backup_info)
-                    
-                    # 如果有备份文件，添加成功信息
-                    if backup_info.get("backup_created"):
-                        result["message"] += f"\n📋 Backup created: {backup_info['backup_filename']}"
-                    
-                    # 在编辑完成后运行linter检查
-                    try:
-                        linter_result = self._run_linter_on_content(''.join(modified_lines), filename)
-                        if linter_result.get("has_issues"):
-                            result["linter_output"] = linter_result.get("formatted_output", "")
-                            result["has_linter_issues"] = True
-                        else:
-                            result["has_linter_issues"] = False
-                    except Exception as e:
-                        # Linter failure shouldn't break the edit operation
-                        result["linter_error"] = f"Linter check failed: {str(e)}"
-                    
-                    return result
+                    return self._build_edit_result(
+                        filename, original_lines, modified_lines, parsed_replacements, diff_info, backup_info
+                    )
                 else:
                     return {
                         "success": False,
@@ -1090,6 +1259,122 @@ class TextOperations:
                     print(f"  {i}. {info}")
             return {"success": False, "error": f"Edit operation failed: {str(e)}"}
 
+    def _build_edit_result(self, filename, original_lines, modified_lines, parsed_replacements, diff_info,
+                           backup_info, applied_via="upload"):
+        """生成编辑成功的结果（diff预览 + linter检查）"""
+        # 生成diff预览用于显示
+        diff_result = self._generate_local_diff_preview(filename, original_lines, modified_lines, parsed_replacements)
+        
+        result = {
+            "success": True,
+            "filename": filename,
+            "original_lines": len(original_lines),
+            "modified_lines": len(modified_lines),
+            "replacements_applied": len(parsed_replacements),
+            "diff": diff_info,
+            "diff_output": diff_result.get("diff_output", ""),
+            "cache_updated": True,
+            "uploaded": True,
+            "applied_via": applied_via,
+            "message": f"File {filename} edited successfully, applied {len(parsed_replacements)} replacements"
+        }
+        result.update(backup_info)
+        
+        # 如果有备份文件，添加成功信息
+        if backup_info.get("backup_created"):
+            result["message"] += f"\n📋 Backup created: {backup_info['backup_filename']}"
+        
+        # 在编辑完成后运行linter检查
+        try:
+            linter_result = self._run_linter_on_content(''.join(modified_lines), filename)
+            if linter_result.get("has_issues"):
+                result["linter_output"] = linter_result.get("formatted_output", "")
+                result["has_linter_issues"] = True
+            else:
+                result["has_linter_issues"] = False
+        except Exception as e:
+            # Linter failure shouldn't break the edit operation
+            result["linter_error"] = f"Linter check failed: {str(e)}"
+        
+        return result
+
+    def _get_validated_cached_copy(self, filename, current_shell, cache_manager):
+        """
+        获取与远端一致的本地缓存副本
+        
+        缓存记录的content_hash（md5）与Drive返回的md5Checksum一致时直接使用缓存，否则强制重新下载。
+        """
+        remote_absolute_path = self.main_instance.resolve_remote_absolute_path(filename, current_shell)
+        cached_info = cache_manager.get_cached_file(remote_absolute_path)
+        cached_path = cache_manager.get_cached_file_path(remote_absolute_path)
+        if cached_info and cached_path:
+            file_info = self._find_file(filename, current_shell)
+            remote_md5 = file_info.get("md5Checksum") if file_info else None
+            if remote_md5 and cached_info.get("content_hash") == remote_md5:
+                return {"success": True, "source": "cache", "cached_path": cached_path,
+                        "remote_path": remote_absolute_path}
+        return self.cmd_download(filename, force=True)
+
+    def _apply_edit_patch(self, filename, current_shell, cache_manager, cache_file_path, file_encoding,
+                          original_lines, modified_lines, backup=False):
+        """
+        把编辑结果作为行级补丁在远端应用
+        
+        Returns:
+            dict: 成功时 {"success": True, "backup_info": {...}}；
+                失败时 stale=True 表示远端文件已变化，fallback=True 表示可以直接整文件上传
+        """
+        from .edit_patch import (
+            compute_line_patch, content_md5, patch_size, build_remote_patch_command,
+            MAX_PATCH_CHARS, PATCH_OK, PATCH_PRECONDITION_FAILED, PATCH_RESULT_MISMATCH
+        )
+        import os
+        import tempfile
+        import time
+        from datetime import datetime
+        
+        ops = compute_line_patch(original_lines, modified_lines)
+        if not ops:
+            return {"success": True, "backup_info": {}, "hunks": 0}
+        if patch_size(ops) > MAX_PATCH_CHARS:
+            return {"success": False, "fallback": True, "error": "Patch is too large, using full upload"}
+        
+        remote_absolute_path = self.main_instance.resolve_remote_absolute_path(filename, current_shell)
+        base_md5 = cache_manager._get_file_content_hash(cache_file_path)
+        backup_info = {}
+        backup_path = None
+        if backup:
+            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S') + f"_{int(time.time() * 1000) % 10000:04d}"
+            backup_filename = f"{filename}.backup.{timestamp}"
+            backup_path = f"{remote_absolute_path}.backup.{timestamp}"
+            backup_info = {"backup_created": True, "backup_filename": backup_filename}
+        
+        command = build_remote_patch_command(
+            remote_absolute_path, ops, base_md5, content_md5(modified_lines),
+            encoding=file_encoding, backup_path=backup_path
+        )
+        result = self.main_instance.execute_command_interface("bash", ["-c", command])
+        data = result.get("data", {})
+        exit_code = data.get("exit_code", result.get("exit_code", -1))
+        stdout = (data.get("stdout", result.get("stdout", "")) or "").strip()
+        if exit_code in (PATCH_PRECONDITION_FAILED, PATCH_RESULT_MISMATCH):
+            return {"success": False, "stale": True, "error": stdout or "Remote file changed"}
+        if not result.get("success") or exit_code != PATCH_OK:
+            error = result.get("error_info") or result.get("error") or stdout or f"exit code {exit_code}"
+            return {"success": False, "error": f"Failed to apply patch remotely: {error}"}
+        
+        # 远端已应用补丁，更新本地缓存为编辑后的内容
+        with tempfile.NamedTemporaryFile('w', encoding='utf-8', delete=False,
+                                         suffix=f"_{os.path.basename(filename)}") as temp_file:
+            temp_file.writelines(modified_lines)
+            temp_path = temp_file.name
+        try:
+            cache_manager.cleanup_cache(remote_absolute_path)
+            cache_manager.cache_file(remote_absolute_path, temp_path)
+        finally:
+            os.unlink(temp_path)
+        return {"success": True, "backup_info": backup_info, "hunks": len(ops)}
+
     def _create_backup(self, filename, backup_filename):
         """
         创建文件的备份副本
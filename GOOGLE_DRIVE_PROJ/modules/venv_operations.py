@@ -17,7 +17,9 @@ class VenvOperations:
         支持的子命令：
         - --create <env_name>: 创建虚拟环境
         - --delete <env_name>: 删除虚拟环境
-        - --activate <env_name>: 激活虚拟环境（设置PYTHONPATH）
+        - --activate <env_name> [--snapshot]: 激活虚拟环境（设置PYTHONPATH）；--snapshot 使用压缩快照，
+          每个运行时解压到本地磁盘一次
+        - --snapshot <env_name>: 重新生成虚拟环境的快照
         - --deactivate: 取消激活虚拟环境（清除PYTHONPATH）
         - --list: 列出所有虚拟环境
         - --current: 显示当前激活的虚拟环境
@@ -32,7 +34,7 @@ class VenvOperations:
             if not args:
                 return {
                     "success": False,
-                    "error": "Usage: venv --create|--delete|--activate|--deactivate|--list|--current [env_name...]"
+                    "error": "Usage: venv --create|--delete|--activate|--deactivate|--snapshot|--list|--current [env_name...]"
                 }
             
             action = args[0]
@@ -47,9 +49,15 @@ class VenvOperations:
                     return {"success": False, "error": "Please specify at least one environment name"}
                 return self._venv_delete_batch(env_names)
             elif action == "--activate":
+                snapshot = "--snapshot" in env_names
+                env_names = [name for name in env_names if name != "--snapshot"]
                 if len(env_names) != 1:
                     return {"success": False, "error": "Please specify exactly one environment name for activation"}
-                return self._venv_activate(env_names[0])
+                return self._venv_activate(env_names[0], snapshot=snapshot)
+            elif action == "--snapshot":
+                if len(env_names) != 1:
+                    return {"success": False, "error": "Please specify exactly one environment name for snapshot"}
+                return self._venv_snapshot(env_names[0])
             elif action == "--deactivate":
                 return self._venv_deactivate()
             elif action == "--list":
@@ -59,7 +67,7 @@ class VenvOperations:
             else:
                 return {
                     "success": False,
-                    "error": f"Unknown venv command: {action}. Supported commands: --create, --delete, --activate, --deactivate, --list, --current"
+                    "error": f"Unknown venv command: {action}. Supported commands: --create, --delete, --activate, --deactivate, --snapshot, --list, --current"
                 }
                 
         except Exception as e:
@@ -159,6 +167,9 @@ class VenvOperations:
                     # print(f"🔍 VENV_CREATE DEBUG: Success! Virtual environment '{env_name}' created successfully")
                     print(f"Virtual environment '{env_name}' created successfully")
                     print(f"Environment path: {env_path}")
+                    # 新环境没有任何包，直接记为已完整扫描，首次pip查询无需远端扫描
+                    from .venv_package_index import VenvPackageIndex
+                    VenvPackageIndex().replace(env_name, {})
                     return {"success": True, "message": f"Virtual environment '{env_name}' created successfully"}
                 else:
                     # 获取完整的结果数据用于调试
@@ -318,13 +329,15 @@ class VenvOperations:
             f'CURRENT_ENV=$(cat "{current_venv_file}" 2>/dev/null || echo "none")'
         ]
         
-        # 为每个候选环境添加检查和删除逻辑
+        # 为每个候选环境添加检查和删除逻辑（连同快照一起删除）
+        from .venv_snapshot import get_snapshot_path
         for env_name in candidate_envs:
             env_path = f"{self._get_venv_base_path()}/{env_name}"
             # 构建单个环境的处理脚本
+            snapshot_path = get_snapshot_path(self._get_venv_base_path(), env_name)
             env_script = f'''
 if [ "$CURRENT_ENV" != "{env_name}" ] && [ -d "{env_path}" ]; then
-  rm -rf "{env_path}"
+  rm -rf "{env_path}" "{snapshot_path}"
 fi
 '''
             delete_script_parts.append(env_script.strip())
@@ -395,8 +408,30 @@ fi
                 "error": f"Failed to execute delete operation: {result.get('error', 'Unknown error')}"
             }
     
-    def _venv_activate(self, env_name):
-        """激活虚拟环境（设置PYTHONPATH）"""
+    def _venv_snapshot(self, env_name):
+        """把虚拟环境打包为Drive上的压缩快照（供 --activate --snapshot 使用）"""
+        from .venv_snapshot import build_snapshot_command, get_snapshot_path
+        env_path = f"{self._get_venv_base_path()}/{env_name}"
+        snapshot_path = get_snapshot_path(self._get_venv_base_path(), env_name)
+        try:
+            result = self.main_instance.execute_command_interface("bash", ["-c", build_snapshot_command(env_path, snapshot_path)])
+            data = result.get("data", {})
+            exit_code = data.get("exit_code", result.get("exit_code", -1))
+            output = data.get("stdout", result.get("stdout", "")).strip()
+            if result.get("success") and exit_code == 0:
+                print(f"Snapshot of '{env_name}' created ({output.replace('snapshot: ', '')})")
+                return {"success": True, "message": f"Snapshot of '{env_name}' created", "snapshot_path": snapshot_path}
+            return {"success": False, "error": f"Failed to create snapshot of '{env_name}': {output or result.get('error', 'Unknown error')}"}
+        except Exception as e:
+            return {"success": False, "error": f"Error creating snapshot of '{env_name}': {str(e)}"}
+
+    def _venv_activate(self, env_name, snapshot=False):
+        """
+        激活虚拟环境（设置PYTHONPATH）
+
+        snapshot=True 时缺少快照则先生成，激活脚本在每个运行时把快照解压到本地磁盘一次，
+        之后的远端Python命令直接从本地磁盘import
+        """
         if not env_name:
             return {"success": False, "error": "Please specify the environment name"}
         
@@ -411,6 +446,22 @@ fi
 
             
             remote_env_path = self.main_instance.REMOTE_ENV
+            activation_file = f"{remote_env_path}/venv/venv_pythonpath.sh"
+            if snapshot:
+                from .venv_snapshot import (
+                    build_activation_script, build_snapshot_command, build_write_file_command, get_snapshot_path
+                )
+                snapshot_path = get_snapshot_path(self._get_venv_base_path(), env_name)
+                activation_commands = (
+                    f'if [ ! -f "{snapshot_path}" ]; then {build_snapshot_command(env_path, snapshot_path)} || exit 1; fi\n'
+                    f'{build_write_file_command(build_activation_script(env_name, env_path, snapshot_path), activation_file)}'
+                )
+            else:
+                activation_commands = f'''cat > "{activation_file}" << 'EOF'
+# Virtual environment activation script for {env_name}
+export PYTHONPATH="{env_path}:$PYTHONPATH"
+EOF'''
+            activation_mode = "snapshot" if snapshot else "directory"
             remote_command = f'''
 # 获取当前shell ID
 SHELL_ID="${{GDS_SHELL_ID:-default_shell}}"
@@ -440,7 +491,7 @@ else
     CURRENT_VENV="not_active"
 fi
 
-if [ "$CURRENT_VENV" = "already_active" ]; then
+if [ "$CURRENT_VENV" = "already_active" ] && [ "{activation_mode}" = "directory" ]; then
     echo "Virtual environment '{env_name}' is already active"
     exit 0
 fi
@@ -465,6 +516,7 @@ if os.path.exists('$VENV_STATES_FILE'):
 states['$SHELL_ID'] = {{
     'current_venv': '{env_name}',
     'env_path': '$ENV_PATH',
+    'mode': '{activation_mode}',
     'activated_at': datetime.now().isoformat(),
     'shell_id': '$SHELL_ID'
 }}
@@ -478,10 +530,7 @@ print('Virtual environment \\'{env_name}\\' activated successfully')
 
 # 创建虚拟环境的shell文件
 mkdir -p "{remote_env_path}/venv"
-cat > "{remote_env_path}/venv/venv_pythonpath.sh" << 'EOF'
-# Virtual environment activation script for {env_name}
-export PYTHONPATH="{env_path}:$PYTHONPATH"
-EOF
+{activation_commands}
 
 # 验证保存是否成功
 sleep 1
@@ -550,6 +599,7 @@ fi
                             "message": f"Virtual environment '{env_name}' activated successfully",
                             "env_path": env_path,
                             "pythonpath": env_path,
+                            "mode": activation_mode,
                             "action": "activate"
                         }
                     else:
@@ -560,6 +610,7 @@ fi
                             "message": f"Virtual environment '{env_name}' activated successfully",
                             "env_path": env_path,
                             "pythonpath": env_path,
+                            "mode": activation_mode,
                             "action": "activate"
                         }
                 else:
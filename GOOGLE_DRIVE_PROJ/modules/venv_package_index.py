@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+Google Drive Shell - Venv Package Index Module
+本地缓存的虚拟环境包索引（按环境名区分，带版本号）
+
+- pip list/show/install 的已安装判断直接读取本地索引，不需要远端往返
+- pip install/uninstall 成功后根据pip输出（Successfully installed/uninstalled）增量更新
+- 索引过期（GDS_PIP_INDEX_TTL，默认24小时）或缺失时，用一次远端 importlib.metadata 扫描完整对齐，
+  不再使用 `find ... | head -50` 导致包多于50个时被截断
+"""
+
+import base64
+import json
+import os
+import re
+import threading
+import time
+from pathlib import Path
+
+INDEX_VERSION = 1
+INDEX_PATH = Path(__file__).parent.parent.parent / "GOOGLE_DRIVE_DATA" / "venv_package_index.json"
+DEFAULT_TTL = 24 * 3600
+SCAN_MARKER = "GDS_PACKAGE_SCAN:"
+
+# 远端扫描脚本：列出目标目录中的所有发行包，输出一行 标记+JSON
+_REMOTE_SCAN_SCRIPT = r'''
+import base64, json, sys
+try:
+    from importlib import metadata
+except ImportError:
+    import importlib_metadata as metadata
+packages = {}
+env_path = base64.b64decode(sys.argv[1]).decode("utf-8")
+for dist in metadata.distributions(path=[env_path]):
+    name = dist.metadata["Name"]
+    if name:
+        packages[name] = dist.version
+print("%s%s" % (MARKER, json.dumps(packages)))
+'''
+
+
+def canonical_name(name):
+    """PEP 503 规范化包名（大小写、-/_/. 视为相同）"""
+    return re.sub(r"[-_.]+", "-", name).lower()
+
+
+def requirement_name(requirement):
+    """从 pkg==1.0 / pkg[extra]>=2 等需求字符串中取出包名"""
+    return re.split(r"[\[<>=!~;@ ]", requirement.strip(), maxsplit=1)[0]
+
+
+def parse_pip_output(output, keyword):
+    """
+    解析pip输出中的 `Successfully installed a-1.0 b-2.0` / `Successfully uninstalled a-1.0`
+
+    Returns:
+        dict: {规范化包名: 版本}
+    """
+    packages = {}
+    for line in (output or "").splitlines():
+        if keyword not in line:
+            continue
+        for part in line.split(keyword, 1)[1].split():
+            name, sep, version = part.rpartition("-")
+            if sep and name:
+                packages[canonical_name(name)] = version
+    return packages
+
+
+def build_remote_python_command(script, *args):
+    """
+    生成用远端python3运行脚本的命令
+
+    脚本和字符串参数都以base64传递（脚本中用 base64.b64decode(sys.argv[i]) 取回参数），
+    命令中只有base64字符，不受远端命令生成时引号转义的影响
+    """
+    script_b64 = base64.b64encode(script.encode("utf-8")).decode("ascii")
+    args_b64 = [base64.b64encode(arg.encode("utf-8")).decode("ascii") for arg in args]
+    return " ".join([f"echo {script_b64} | base64 -d | python3 -"] + args_b64)
+
+
+def build_remote_scan_command(env_path):
+    """生成远端扫描命令"""
+    return build_remote_python_command(_REMOTE_SCAN_SCRIPT.replace("MARKER", repr(SCAN_MARKER)), env_path)
+
+
+def parse_scan_output(output):
+    """
+    从远端输出中取出扫描结果
+
+    Returns:
+        dict or None: {规范化包名: 版本}，输出中没有扫描结果时返回None
+    """
+    for line in reversed((output or "").splitlines()):
+        line = line.strip()
+        if line.startswith(SCAN_MARKER):
+            try:
+                packages = json.loads(line[len(SCAN_MARKER):])
+            except json.JSONDecodeError:
+                return None
+            return {canonical_name(name): version for name, version in packages.items()}
+    return None
+
+
+class VenvPackageIndex:
+    """
+    本地包索引
+
+    文件格式: {"version": INDEX_VERSION, "environments": {env_name: {
+        "packages": {规范化包名: 版本}, "generation": int, "scanned_at": float, "updated_at": float}}}
+    generation 每次变更递增；scanned_at 为最后一次完整扫描的时间（0表示从未完整扫描）
+    """
+
+    def __init__(self, path=None, ttl=None):
+        self.path = Path(path or INDEX_PATH)
+        self.ttl = ttl if ttl is not None else float(os.environ.get("GDS_PIP_INDEX_TTL", DEFAULT_TTL))
+        self._lock = threading.Lock()
+        self.environments = self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return {}
+        # 格式版本不一致时丢弃，下一次查询重新扫描
+        if not isinstance(data, dict) or data.get("version") != INDEX_VERSION:
+            return {}
+        return data.get("environments", {})
+
+    def save(self):
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_suffix(f".{os.getpid()}.tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"version": INDEX_VERSION, "environments": self.environments}, f, indent=2, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+
+    def get(self, env_name):
+        """返回环境的包字典，没有记录时返回None"""
+        entry = self.environments.get(env_name)
+        return dict(entry["packages"]) if entry else None
+
+    def generation(self, env_name):
+        entry = self.environments.get(env_name)
+        return entry["generation"] if entry else 0
+
+    def is_stale(self, env_name):
+        """没有记录、从未完整扫描或超过TTL时需要重新扫描"""
+        entry = self.environments.get(env_name)
+        if not entry or not entry.get("scanned_at"):
+            return True
+        return time.time() - entry["scanned_at"] > self.ttl
+
+    def has_package(self, env_name, requirement):
+        entry = self.environments.get(env_name)
+        return bool(entry) and canonical_name(requirement_name(requirement)) in entry["packages"]
+
+    def _update(self, env_name, packages, scanned):
+        entry = self.environments.setdefault(env_name, {"packages": {}, "generation": 0, "scanned_at": 0})
+        entry["packages"] = packages
+        entry["generation"] += 1
+        entry["updated_at"] = time.time()
+        if scanned:
+            entry["scanned_at"] = entry["updated_at"]
+        self.save()
+
+    def replace(self, env_name, packages, scanned=True):
+        """用完整扫描结果替换环境的包列表"""
+        self._update(env_name, {canonical_name(name): version for name, version in packages.items()}, scanned)
+
+    def seed(self, env_name, packages):
+        """用远端状态文件中的记录初始化（不算完整扫描，仍然视为过期）"""
+        if env_name not in self.environments and packages:
+            self.replace(env_name, packages, scanned=False)
+
+    def apply_install_output(self, env_name, output):
+        """根据pip install输出增量更新，返回新增/更新的包"""
+        installed = parse_pip_output(output, "Successfully installed")
+        if installed:
+            packages = self.get(env_name) or {}
+            packages.update(installed)
+            self._update(env_name, packages, scanned=False)
+        return installed
+
+    def apply_uninstall_output(self, env_name, output):
+        """根据pip uninstall输出增量更新，返回移除的包"""
+        removed = parse_pip_output(output, "Successfully uninstalled")
+        if removed:
+            packages = self.get(env_name) or {}
+            for name in removed:
+                packages.pop(name, None)
+            self._update(env_name, packages, scanned=False)
+        return removed
+
+    def drop(self, env_name):
+        """删除环境记录（环境被删除时）"""
+        if self.environments.pop(env_name, None) is not None:
+            self.save()
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Google Drive Shell - Venv Snapshot Module
+基于快照的虚拟环境激活
+
+虚拟环境目录被打包为Drive上的单个压缩快照（<venv_base>/.snapshots/<env>.zip）。
+激活后写入的 venv_pythonpath.sh 在每个运行时中只把快照解压到本地磁盘一次，
+并用快照的 size+mtime 作为标记；之后的远端Python命令只比较标记，
+import 从本地磁盘而不是Drive FUSE挂载的site-packages读取。
+"""
+
+import base64
+import json
+import sys
+from pathlib import Path
+
+try:
+    from .venv_package_index import build_remote_python_command
+except ImportError:
+    # 不经过modules包单独加载时，从同目录导入
+    sys.path.insert(0, str(Path(__file__).parent))
+    from venv_package_index import build_remote_python_command
+
+SNAPSHOT_DIRNAME = ".snapshots"
+LOCAL_VENV_ROOT = "/tmp/gds_venv"
+STAMP_FILENAME = ".gds_snapshot_stamp"
+
+# 远端打包脚本：先在本地磁盘生成zip，再一次性复制到Drive并原子替换
+_REMOTE_SNAPSHOT_SCRIPT = r'''
+import base64, json, os, shutil, sys, tempfile, zipfile
+spec = json.loads(base64.b64decode(sys.argv[1]).decode("utf-8"))
+env_path, snapshot_path = spec["env_path"], spec["snapshot_path"]
+if not os.path.isdir(env_path):
+    print("snapshot: environment does not exist: %s" % env_path)
+    sys.exit(1)
+fd, local_zip = tempfile.mkstemp(suffix=".zip")
+os.close(fd)
+count = 0
+with zipfile.ZipFile(local_zip, "w", zipfile.ZIP_DEFLATED, compresslevel=1) as archive:
+    for root, dirs, files in os.walk(env_path):
+        dirs[:] = [d for d in dirs if d != "__pycache__"]
+        for name in files:
+            path = os.path.join(root, name)
+            archive.write(path, os.path.relpath(path, env_path))
+            count += 1
+os.makedirs(os.path.dirname(snapshot_path), exist_ok=True)
+shutil.copyfile(local_zip, snapshot_path + ".tmp")
+os.replace(snapshot_path + ".tmp", snapshot_path)
+os.unlink(local_zip)
+print("snapshot: %d files, %d bytes" % (count, os.path.getsize(snapshot_path)))
+'''
+
+_ACTIVATION_SCRIPT = '''# Virtual environment activation script for {env_name} (snapshot mode)
+GDS_VENV_SNAPSHOT="{snapshot_path}"
+GDS_VENV_LOCAL="{local_path}"
+if [ -f "$GDS_VENV_SNAPSHOT" ]; then
+    GDS_VENV_STAMP=$(stat -c '%s-%Y' "$GDS_VENV_SNAPSHOT")
+    if [ "$(cat "$GDS_VENV_LOCAL/{stamp}" 2>/dev/null)" != "$GDS_VENV_STAMP" ]; then
+        GDS_VENV_TMP="$GDS_VENV_LOCAL.tmp.$$"
+        rm -rf "$GDS_VENV_TMP" && mkdir -p "$GDS_VENV_TMP" && \\
+        {{ unzip -qo "$GDS_VENV_SNAPSHOT" -d "$GDS_VENV_TMP" 2>/dev/null || python3 -m zipfile -e "$GDS_VENV_SNAPSHOT" "$GDS_VENV_TMP"; }} && \\
+        echo "$GDS_VENV_STAMP" > "$GDS_VENV_TMP/{stamp}" && \\
+        rm -rf "$GDS_VENV_LOCAL" && mv "$GDS_VENV_TMP" "$GDS_VENV_LOCAL"
+        rm -rf "$GDS_VENV_TMP"
+    fi
+fi
+if [ -f "$GDS_VENV_LOCAL/{stamp}" ]; then
+    export PYTHONPATH="$GDS_VENV_LOCAL:$PYTHONPATH"
+else
+    export PYTHONPATH="{env_path}:$PYTHONPATH"
+fi
+'''
+
+
+def get_snapshot_path(venv_base_path, env_name):
+    """快照在Drive上的路径"""
+    return f"{venv_base_path.rstrip('/')}/{SNAPSHOT_DIRNAME}/{env_name}.zip"
+
+
+def get_local_path(env_name, local_root=LOCAL_VENV_ROOT):
+    """快照在运行时本地磁盘上的解压目录"""
+    return f"{local_root.rstrip('/')}/{env_name}"
+
+
+def build_snapshot_command(env_path, snapshot_path):
+    """生成打包快照的远端命令（只包含base64字符）"""
+    spec = {"env_path": env_path, "snapshot_path": snapshot_path}
+    return build_remote_python_command(_REMOTE_SNAPSHOT_SCRIPT, json.dumps(spec, ensure_ascii=False))
+
+
+def build_refresh_command(env_path, snapshot_path):
+    """已有快照时重新打包（pip install/uninstall 修改环境后使用）"""
+    return f'if [ -f "{snapshot_path}" ]; then {build_snapshot_command(env_path, snapshot_path)}; fi'
+
+
+def build_activation_script(env_name, env_path, snapshot_path, local_root=LOCAL_VENV_ROOT):
+    """
+    生成快照模式的 venv_pythonpath.sh 内容
+
+    快照不存在或解压失败时回退到直接使用Drive上的环境目录
+    """
+    return _ACTIVATION_SCRIPT.format(
+        env_name=env_name,
+        env_path=env_path,
+        snapshot_path=snapshot_path,
+        local_path=get_local_path(env_name, local_root),
+        stamp=STAMP_FILENAME,
+    )
+
+
+def build_write_file_command(content, path):
+    """把内容写入远端文件（base64传输，不受heredoc和引号影响）"""
+    content_b64 = base64.b64encode(content.encode("utf-8")).decode("ascii")
+    return f'echo {content_b64} | base64 -d > "{path}"'
@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+Google Drive Shell - Wheel Cache Module
+pip install 使用的远端wheel缓存和并行安装计划
+
+构建好的wheel按内容寻址保存在 REMOTE_ENV/wheelhouse/objects/<sha256>/<wheel文件名>，
+并生成带 #sha256= 校验的 index.html 供 `pip install --no-index --find-links` 使用：
+- 缓存能满足所有依赖时，直接从缓存离线安装（新的Colab运行时不再重新下载和构建）
+- 否则按 DependencyAnalysis 给出的依赖层，在本地磁盘上并行构建缺失的wheel，
+  再用一次完整的 `pip wheel` 补全计划之外的依赖，存入缓存后离线安装
+"""
+
+import json
+import os
+import sys
+from pathlib import Path
+
+try:
+    from .venv_package_index import build_remote_python_command, canonical_name, requirement_name
+except ImportError:
+    # 不经过modules包单独加载时，从同目录导入
+    sys.path.insert(0, str(Path(__file__).parent))
+    from venv_package_index import build_remote_python_command, canonical_name, requirement_name
+
+WHEELHOUSE_DIRNAME = "wheelhouse"
+DEFAULT_JOBS = 8
+
+# 远端执行的安装脚本（只依赖标准库），参数以base64 JSON的形式在argv[1]中传入
+_REMOTE_INSTALL_SCRIPT = r'''
+import base64, concurrent.futures, hashlib, json, os, re, shutil, subprocess, sys, tempfile
+spec = json.loads(base64.b64decode(sys.argv[1]).decode("utf-8"))
+store = spec["wheelhouse"]
+objects_dir = os.path.join(store, "objects")
+index_html = os.path.join(store, "index.html")
+index_json = os.path.join(store, "index.json")
+target = ["--target", spec["target"]] if spec.get("target") else []
+staging = tempfile.mkdtemp(prefix="gds_wheels_")
+
+def canonical(name):
+    return re.sub(r"[-_.]+", "-", name).lower()
+
+def pip(args):
+    return subprocess.run([sys.executable, "-m", "pip"] + args, capture_output=True, text=True)
+
+def load_index():
+    try:
+        with open(index_json) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def install_from_cache():
+    if not os.path.exists(index_html):
+        return None
+    return pip(["install", "--no-index", "--find-links", index_html] + target + spec["packages"])
+
+def store_wheels():
+    index = load_index()
+    added = 0
+    for filename in sorted(os.listdir(staging)):
+        if not filename.endswith(".whl"):
+            continue
+        path = os.path.join(staging, filename)
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(block)
+        sha256 = digest.hexdigest()
+        dest_dir = os.path.join(objects_dir, sha256)
+        dest = os.path.join(dest_dir, filename)
+        if not os.path.exists(dest):
+            os.makedirs(dest_dir, exist_ok=True)
+            shutil.copyfile(path, dest + ".tmp")
+            os.replace(dest + ".tmp", dest)
+            added += 1
+        entries = index.setdefault(canonical(filename.split("-")[0]), [])
+        if not any(entry["sha256"] == sha256 for entry in entries):
+            entries.append({"filename": filename, "sha256": sha256})
+    links = ['<a href="objects/%s/%s#sha256=%s">%s</a><br>' % (entry["sha256"], entry["filename"], entry["sha256"], entry["filename"])
+             for name in sorted(index) for entry in index[name]]
+    for path, content in ((index_json, json.dumps(index, indent=2)),
+                          (index_html, "<html><body>\n%s\n</body></html>\n" % "\n".join(links))):
+        with open(path + ".tmp", "w") as f:
+            f.write(content)
+        os.replace(path + ".tmp", path)
+    return added
+
+def update_venv_states(output):
+    # 与 pip_operations 的标准安装流程一样，把新安装的包记录到 venv_states.json
+    if not spec.get("venv_states") or not spec.get("env_name"):
+        return
+    installed = {}
+    for line in output.splitlines():
+        if "Successfully installed" in line:
+            for part in line.split("Successfully installed", 1)[1].split():
+                name, sep, version = part.rpartition("-")
+                if sep and name:
+                    installed[name] = version
+    if not installed:
+        return
+    try:
+        with open(spec["venv_states"]) as f:
+            states = json.load(f)
+    except (OSError, ValueError):
+        states = {}
+    environments = states.setdefault("environments", {})
+    environments.setdefault(spec["env_name"], {}).setdefault("packages", {}).update(installed)
+    with open(spec["venv_states"] + ".tmp", "w") as f:
+        json.dump(states, f, indent=2)
+    os.replace(spec["venv_states"] + ".tmp", spec["venv_states"])
+    print("Updated venv states with %d newly installed packages" % len(installed))
+
+os.makedirs(objects_dir, exist_ok=True)
+result = install_from_cache()
+if result is not None and result.returncode == 0:
+    print("Installed from wheel cache")
+else:
+    cached = set(load_index())
+    find_links = ["--find-links", index_html] if os.path.exists(index_html) else []
+    # 按依赖层并行构建缓存中没有的wheel（构建在本地磁盘上进行）
+    for layer in sorted(spec["layers"], key=int):
+        todo = [pkg for pkg in spec["layers"][layer] if canonical(re.split(r"[\[<>=!~; ]", pkg)[0]) not in cached]
+        if not todo:
+            continue
+        print("Building layer %s: %s" % (layer, ", ".join(todo)))
+        with concurrent.futures.ThreadPoolExecutor(max_workers=spec["jobs"]) as executor:
+            list(executor.map(lambda pkg: pip(["wheel", "--no-deps", "-w", staging] + find_links + [pkg]), todo))
+    # 补全计划之外（或版本不同）的依赖
+    wheel_result = pip(["wheel", "-w", staging, "--find-links", staging] + find_links + spec["packages"])
+    if wheel_result.returncode != 0:
+        print(wheel_result.stdout)
+        print(wheel_result.stderr, file=sys.stderr)
+        shutil.rmtree(staging, ignore_errors=True)
+        sys.exit(wheel_result.returncode)
+    print("Stored %d new wheels in cache" % store_wheels())
+    result = install_from_cache()
+shutil.rmtree(staging, ignore_errors=True)
+print(result.stdout)
+if result.stderr:
+    print(result.stderr, file=sys.stderr)
+if result.returncode == 0:
+    try:
+        update_venv_states(result.stdout)
+    except Exception as e:
+        print("Warning: Failed to update venv states: %s" % e, file=sys.stderr)
+sys.exit(result.returncode)
+'''
+
+
+def get_wheelhouse_path(remote_env):
+    """远端wheel缓存目录"""
+    return f"{remote_env.rstrip('/')}/{WHEELHOUSE_DIRNAME}"
+
+
+def build_install_plan(packages, download_layers=None, installed_packages=None):
+    """
+    由依赖分析的层生成构建计划
+
+    Args:
+        packages: 用户请求的包（保留版本约束）
+        download_layers: DependencyAnalysis 返回的 {layer: [包名]}
+        installed_packages: 已安装的包（规范化名称），不再构建
+
+    Returns:
+        dict: {"0": [请求的包], "1": [...], ...}，每个包只出现在最浅的一层
+    """
+    installed = set(installed_packages or {})
+    seen = {canonical_name(requirement_name(pkg)) for pkg in packages}
+    layers = {"0": list(packages)}
+    for layer in sorted(download_layers or {}, key=int):
+        if int(layer) == 0:
+            continue
+        names = []
+        for name in download_layers[layer]:
+            key = canonical_name(name)
+            if key not in seen and key not in installed:
+                seen.add(key)
+                names.append(name)
+        if names:
+            layers[str(layer)] = names
+    return layers
+
+
+def build_remote_install_command(packages, layers, wheelhouse, target=None, jobs=None,
+                                 venv_states=None, env_name=None):
+    """
+    生成远端安装命令
+
+    Args:
+        packages: pip install 的包参数
+        layers: build_install_plan 的结果
+        wheelhouse: 远端wheel缓存目录
+        target: 虚拟环境目录（pip --target），None表示系统环境
+        jobs: 每层并行构建的数量（默认 GDS_WHEEL_JOBS 或8）
+        venv_states: 远端 venv_states.json 路径，安装成功后记录 env_name 新安装的包
+        env_name: 虚拟环境名称
+    """
+    spec = {
+        "packages": list(packages),
+        "layers": layers,
+        "wheelhouse": wheelhouse,
+        "target": target,
+        "jobs": int(jobs or os.environ.get("GDS_WHEEL_JOBS", DEFAULT_JOBS)),
+        "venv_states": venv_states,
+        "env_name": env_name,
+    }
+    return build_remote_python_command(_REMOTE_INSTALL_SCRIPT, json.dumps(spec, ensure_ascii=False))
@@ -16,6 +16,8 @@ import subprocess
 import psutil
 from pathlib import Path
 
+from .command_coalescer import CommandCoalescer
+
 class WindowManager:
     """
     统一窗口管理器
@@ -49,7 +51,9 @@ class WindowManager:
         self.lock_file_path = Path("/Users/wukunhuan/.local/bin/GOOGLE_DRIVE_DATA/window_lock.lock")
         self.pid_file_path = Path("/Users/wukunhuan/.local/bin/GOOGLE_DRIVE_DATA/window_lock.pid")
         self.current_lock_fd = None  # 当前持有的锁文件描述符
-        
+        # 跨进程的命令合并队列：短时间内（或排队等待锁期间）提交的命令合并为一个窗口
+        self.coalescer = CommandCoalescer(self.lock_file_path.parent / "window_queue")
+
         # 设置进程清理处理器
         self._setup_cleanup_handlers()
         
@@ -335,34 +339,41 @@ class WindowManager:
         """
         请求显示窗口 - 改进的跨进程锁管理
         
+        请求先进入跨进程合并队列，拿到窗口锁的进程会把队列中等待的命令合并为一个窗口，
+        用户只需粘贴执行一次；每个调用方拿到同一个窗口操作结果，并照常等待自己的结果文件。
+        
         Args:
             title (str): 窗口标题
             command_text (str): 命令文本
             timeout_seconds (int): 超时时间
             
         Returns:
-            dict: 用户操作结果
+            dict: 用户操作结果（合并执行时额外包含 batch_size、batch_index）
         """
         request_id = f"req_{int(time.time() * 1000)}_{os.getpid()}_{threading.get_ident()}"
         
-        # 尝试获取改进的跨进程锁
-        if not self._acquire_lock(request_id):
-            return {
-                "action": "error", 
-                "message": "无法获取窗口锁，可能有其他窗口正在显示"
-            }
+        # 创建窗口请求
+        window_request = {
+            'request_id': request_id,
+            'title': title,
+            'command_text': command_text,
+            'timeout_seconds': timeout_seconds,
+            'process_id': os.getpid(),
+            'thread_id': threading.get_ident()
+        }
         
         try:
-            # 创建窗口请求
-            window_request = {
-                'request_id': request_id,
-                'title': title,
-                'command_text': command_text,
-                'timeout_seconds': timeout_seconds,
-                'process_id': os.getpid(),
-                'thread_id': threading.get_ident()
-            }
-            
+            return self.coalescer.submit(
+                window_request, self._acquire_lock, self._release_lock, self._show_window_request
+            )
+        except Exception as e:
+            self._debug_log(f"Error: DEBUG: [WINDOW_QUEUE_ERROR] 进程 {os.getpid()} 合并队列错误: {request_id}, error: {str(e)}")
+            return {"action": "error", "message": f"窗口创建失败: {str(e)}"}
+    
+    def _show_window_request(self, window_request):
+        """在持有窗口锁时显示一个（可能是合并后的）窗口请求"""
+        request_id = window_request['request_id']
+        try:
             # 创建和显示窗口
             result = self._create_and_show_window(window_request)
             self._debug_log(f"DEBUG: [WINDOW_COMPLETED] 进程 {os.getpid()} 窗口完成: {request_id}, action: {result.get('action')}")
@@ -373,9 +384,6 @@ class WindowManager:
             error_msg = f"窗口创建失败: {str(e)}"
             self._debug_log(f"Error: DEBUG: [WINDOW_ERROR] 进程 {os.getpid()} 窗口错误: {request_id}, error: {str(e)}")
             return {"action": "error", "message": error_msg}
-        finally:
-            # 确保释放锁
-            self._release_lock()
     
     def _create_and_show_window(self, request):
         """创建和显示tkinter窗口"""
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+GDS 冷启动基准测试
+在独立子进程中多次测量启动耗时，取中位数，并把结果追加到 GOOGLE_DRIVE_DATA/startup_benchmark.json，
+便于比较不同版本的启动开销。
+
+用法:
+    python GOOGLE_DRIVE_PROJ/startup_benchmark.py [--runs N] [--no-save]
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+PROJ_DIR = Path(__file__).parent
+ROOT_DIR = PROJ_DIR.parent
+HISTORY_FILE = ROOT_DIR / "GOOGLE_DRIVE_DATA" / "startup_benchmark.json"
+
+# 每个场景都在新的解释器中执行，测到的是真正的冷启动
+SCENARIOS = {
+    "import_shell": (
+        "import sys; sys.path.insert(0, {proj!r}); import google_drive_shell"
+    ),
+    "construct_shell": (
+        "import sys; sys.path.insert(0, {proj!r}); "
+        "from google_drive_shell import GoogleDriveShell; GoogleDriveShell()"
+    ),
+    "shell_pwd": None,  # 完整的命令行调用：GOOGLE_DRIVE --shell pwd
+}
+
+
+def _scenario_command(name):
+    if name == "shell_pwd":
+        return [sys.executable, str(ROOT_DIR / "GOOGLE_DRIVE.py"), "--shell", "pwd"]
+    return [sys.executable, "-c", SCENARIOS[name].format(proj=str(PROJ_DIR))]
+
+
+def measure(name, runs):
+    """运行场景 runs 次，返回 {median, min, max, failures}（秒）"""
+    timings = []
+    failures = 0
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = subprocess.run(_scenario_command(name), cwd=str(ROOT_DIR),
+                                capture_output=True, text=True)
+        elapsed = time.perf_counter() - start
+        if result.returncode != 0:
+            failures += 1
+            continue
+        timings.append(elapsed)
+    if not timings:
+        return {"median": None, "min": None, "max": None, "failures": failures}
+    return {
+        "median": round(statistics.median(timings), 4),
+        "min": round(min(timings), 4),
+        "max": round(max(timings), 4),
+        "failures": failures,
+    }
+
+
+def save_history(entry):
+    """把一次基准结果追加到历史文件"""
+    HISTORY_FILE.parent.mkdir(exist_ok=True)
+    history = []
+    if HISTORY_FILE.exists():
+        try:
+            history = json.loads(HISTORY_FILE.read_text(encoding="utf-8"))
+        except (json.JSONDecodeError, OSError):
+            history = []
+    history.append(entry)
+    HISTORY_FILE.write_text(json.dumps(history, indent=2, ensure_ascii=False), encoding="utf-8")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure GDS cold start time")
+    parser.add_argument("--runs", type=int, default=5, help="Runs per scenario (default: 5)")
+    parser.add_argument("--scenario", choices=list(SCENARIOS), action="append",
+                        help="Scenario to run (default: all)")
+    parser.add_argument("--no-save", action="store_true", help="Do not append results to history")
+    args = parser.parse_args()
+
+    results = {}
+    for name in args.scenario or list(SCENARIOS):
+        results[name] = measure(name, args.runs)
+        stats = results[name]
+        if stats["median"] is None:
+            print(f"{name:<16} failed ({stats['failures']}/{args.runs} runs)")
+        else:
+            print(f"{name:<16} median {stats['median'] * 1000:7.1f} ms  "
+                  f"(min {stats['min'] * 1000:.1f}, max {stats['max'] * 1000:.1f}, "
+                  f"failures {stats['failures']})")
+
+    if not args.no_save:
+        try:
+            commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=str(ROOT_DIR),
+                                    capture_output=True, text=True).stdout.strip()
+        except OSError:
+            commit = ""
+        save_history({
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "commit": commit,
+            "runs": args.runs,
+            "results": results,
+        })
+        print(f"Results appended to {HISTORY_FILE}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,20 +4,47 @@ IMG2TEXT - Python Entrypoint
 图片转文字描述工具的Python入口脚本
 """
 
+import io
 import os
 import sys
 import argparse
+import subprocess
 from pathlib import Path
 import google.generativeai as genai
 from google.api_core import exceptions
 from PIL import Image
 import json
 import datetime
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 # 加载环境变量
 from dotenv import load_dotenv
 load_dotenv()
 
+# Share the analysis cache with EXTRACT_IMG (EXTRACT_IMG_DATA/image_cache.json)
+current_dir = Path(__file__).parent
+if str(current_dir) not in sys.path:
+    sys.path.insert(0, str(current_dir))
+
+try:
+    from EXTRACT_IMG_PROJ.cache_system import ImageCacheSystem
+    CACHE_AVAILABLE = True
+except ImportError:
+    CACHE_AVAILABLE = False
+    ImageCacheSystem = None
+
+DEFAULT_MODEL = 'gemini-1.5-flash-latest'
+# Cached results older than this are served immediately but refreshed in the background
+CACHE_FRESH_SECONDS = int(os.getenv("IMG2TEXT_CACHE_TTL", str(7 * 24 * 3600)))
+
+# Key pool defaults for batch mode (Gemini free tier allows ~15 requests/minute per key)
+KEY_REQUESTS_PER_MINUTE = float(os.getenv("IMG2TEXT_KEY_RPM", "15"))
+KEY_COOLDOWN_SECONDS = float(os.getenv("IMG2TEXT_KEY_COOLDOWN", "60"))
+
+_cache_system = None
+
 def is_run_environment(command_identifier=None):
     """Check if running in RUN environment by checking environment variables"""
     if command_identifier:
@@ -90,7 +117,311 @@ def test_connection(api: str = "google", key: str = None) -> str:
         
     return "\n".join(report)
 
-def get_image_analysis(image_path: str, mode: str = "general", api: str = "google", key: str = None, custom_prompt: str = None, command_identifier: str = None) -> str:
+def get_cache_system():
+    """Return the shared image cache, or None if it is unavailable."""
+    global _cache_system
+    if _cache_system is None and CACHE_AVAILABLE:
+        try:
+            _cache_system = ImageCacheSystem(current_dir / "EXTRACT_IMG_DATA")
+        except Exception as e:
+            print(f"Warning: Failed to initialize cache system: {e}", file=sys.stderr)
+    return _cache_system
+
+def get_prompt_instruction(mode: str, custom_prompt: str = None) -> str:
+    """Return the prompt sent to the model for the given mode."""
+    if custom_prompt:
+        return custom_prompt
+    if mode == "academic":
+        return (
+            "You are an expert academic researcher. Analyze the following scientific image. "
+            "Focus on extracting quantitative and qualitative information. Specifically:\n"
+            "- **Identify the type of plot/figure.**\n"
+            "- **Summarize the main finding or conclusion**.\n"
+            "- **Extract key data points or significant numbers.**\n"
+            "- **Describe the trend or relationship** shown.\n"
+            "Present your analysis in a concise, structured list."
+        )
+    elif mode == "general":
+        return "Provide a detailed description of the image, including subjects, setting, and mood."
+    elif mode == "code_snippet":
+        return "Accurately transcribe the code in the image into a raw code block. No explanations."
+    return "Please describe the following image:"
+
+def call_vision_api(img, prompt_instruction: str, api_keys: dict, model_name: str = DEFAULT_MODEL):
+    """
+    依次尝试各API密钥生成图片描述。
+    Returns:
+        (response_text, key_type, failed_reasons)；全部失败时response_text为None
+    """
+    failed_reasons = []
+    for key_type, api_key in api_keys.items():
+        if not api_key:
+            continue
+        try:
+            genai.configure(api_key=api_key)
+            model = genai.GenerativeModel(model_name)
+            response = model.generate_content([prompt_instruction, img], stream=False)
+            response.resolve()
+            return response.text, key_type, failed_reasons
+        except (exceptions.ResourceExhausted, exceptions.PermissionDenied, Exception) as e:
+            error_detail = f"Using {key_type} key failed: {str(e)}"
+            failed_reasons.append(error_detail)
+            print(f"Warning: {error_detail[:100]}... Trying next...", file=sys.stderr)
+            continue
+    return None, None, failed_reasons
+
+def _revalidate_cache_entry(cache, image_data, image_path, mode, prompt_instruction, api_keys, model_name):
+    """Refresh a stale cache entry; failures keep the stale entry in place."""
+    try:
+        img = Image.open(image_path)
+        text, _, _ = call_vision_api(img, prompt_instruction, api_keys, model_name)
+        if text:
+            cache.store_analysis(image_data, mode, prompt_instruction, model_name, text, image_path)
+    except Exception as e:
+        print(f"Warning: Background cache revalidation failed: {e}", file=sys.stderr)
+
+def start_background_revalidation(image_path: str, mode: str, custom_prompt: str = None, key: str = None,
+                                  model_name: str = DEFAULT_MODEL):
+    """
+    在分离的子进程中刷新过期的缓存条目：当前进程立即返回旧结果并退出，不等待API调用。
+    """
+    cmd = [sys.executable, str(Path(__file__).resolve()), os.path.abspath(image_path),
+           "--mode", mode, "--revalidate-cache", model_name]
+    if custom_prompt:
+        cmd += ["--prompt", custom_prompt]
+    # 子进程不属于RUN调用，不能写RUN的输出文件；--key 通过环境变量传递，不出现在进程列表中
+    env = {k: v for k, v in os.environ.items() if not k.startswith(("RUN_IDENTIFIER_", "RUN_DATA_FILE"))}
+    if key:
+        env["IMG2TEXT_REVALIDATE_KEY"] = key
+    try:
+        subprocess.Popen(cmd, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                         env=env, start_new_session=True)
+    except OSError as e:
+        print(f"Warning: Failed to start background cache revalidation: {e}", file=sys.stderr)
+
+def revalidate_cached_analysis(image_path: str, mode: str, custom_prompt: str = None, key: str = None,
+                               model_name: str = DEFAULT_MODEL):
+    """--revalidate-cache：重新调用API并更新缓存条目（由 start_background_revalidation 启动）"""
+    cache = get_cache_system()
+    if not cache or not os.path.exists(image_path):
+        return
+    with open(image_path, 'rb') as f:
+        image_data = f.read()
+    _revalidate_cache_entry(cache, image_data, image_path, mode, get_prompt_instruction(mode, custom_prompt),
+                            load_api_keys(key), model_name)
+
+class KeyPool:
+    """
+    API密钥池：每个密钥一个令牌桶限速，配额耗尽（ResourceExhausted）的密钥进入冷却期而不是立即重试。
+    """
+    
+    def __init__(self, api_keys: dict, requests_per_minute: float = KEY_REQUESTS_PER_MINUTE,
+                 cooldown_seconds: float = KEY_COOLDOWN_SECONDS):
+        self.capacity = max(1.0, requests_per_minute)
+        self.refill_rate = requests_per_minute / 60.0
+        self.cooldown_seconds = cooldown_seconds
+        self._lock = threading.Condition()
+        now = time.monotonic()
+        self._keys = {
+            key_type: {"api_key": api_key, "tokens": self.capacity, "updated": now, "cooldown_until": 0.0}
+            for key_type, api_key in api_keys.items() if api_key
+        }
+    
+    def __len__(self):
+        return len(self._keys)
+    
+    def _refill(self, state, now):
+        state["tokens"] = min(self.capacity, state["tokens"] + (now - state["updated"]) * self.refill_rate)
+        state["updated"] = now
+    
+    def acquire(self, exclude=(), timeout: float = None):
+        """
+        取出一个可用密钥（令牌最多者优先）；没有可用令牌时阻塞等待。
+        Returns:
+            (key_type, api_key)；exclude之外没有密钥或超时返回(None, None)
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._lock:
+            while True:
+                now = time.monotonic()
+                candidates = [k for k in self._keys if k not in exclude]
+                if not candidates:
+                    return None, None
+                wait = None
+                best = None
+                for key_type in candidates:
+                    state = self._keys[key_type]
+                    self._refill(state, now)
+                    if state["cooldown_until"] > now:
+                        key_wait = state["cooldown_until"] - now
+                    elif state["tokens"] >= 1:
+                        if best is None or state["tokens"] > self._keys[best]["tokens"]:
+                            best = key_type
+                        continue
+                    else:
+                        key_wait = (1 - state["tokens"]) / self.refill_rate if self.refill_rate > 0 else 1.0
+                    wait = key_wait if wait is None else min(wait, key_wait)
+                if best is not None:
+                    self._keys[best]["tokens"] -= 1
+                    return best, self._keys[best]["api_key"]
+                if deadline is not None:
+                    remaining = deadline - now
+                    if remaining <= 0:
+                        return None, None
+                    wait = min(wait, remaining)
+                self._lock.wait(wait)
+    
+    def cooldown(self, key_type: str):
+        """配额耗尽时让密钥进入冷却期"""
+        with self._lock:
+            state = self._keys[key_type]
+            state["cooldown_until"] = time.monotonic() + self.cooldown_seconds
+            state["tokens"] = 0.0
+            self._lock.notify_all()
+
+def load_api_keys(key: str = None) -> dict:
+    """
+    加载API密钥：--key 优先；否则使用 GOOGLE_API_KEY_FREE/PAID 以及
+    GOOGLE_API_KEY_POOL（逗号分隔的额外密钥，供批量模式分摊负载）。
+    """
+    if key:
+        return {"USER": key}
+    api_keys = {
+        "FREE": os.getenv("GOOGLE_API_KEY_FREE"),
+        "PAID": os.getenv("GOOGLE_API_KEY_PAID")
+    }
+    for i, pool_key in enumerate(k.strip() for k in os.getenv("GOOGLE_API_KEY_POOL", "").split(",")):
+        if pool_key and pool_key not in api_keys.values():
+            api_keys[f"POOL{i + 1}"] = pool_key
+    return api_keys
+
+_thread_local_clients = threading.local()
+
+def _get_client_for_key(api_key: str):
+    """
+    为指定密钥创建 google.ai.generativelanguage 的生成服务客户端。genai.configure() 是进程级
+    全局配置，并发线程使用不同密钥时会互相覆盖，所以批量模式每个线程/密钥使用单独配置的客户端。
+    """
+    clients = getattr(_thread_local_clients, "clients", None)
+    if clients is None:
+        clients = _thread_local_clients.clients = {}
+    if api_key not in clients:
+        from google.ai import generativelanguage as glm
+        clients[api_key] = glm.GenerativeServiceClient(client_options={"api_key": api_key})
+    return clients[api_key]
+
+def generate_content_with_key(api_key: str, model_name: str, prompt_instruction: str, img, image_data: bytes = None) -> str:
+    """用指定密钥的客户端生成图片描述（不修改genai的全局配置）"""
+    from google.ai import generativelanguage as glm
+    mime_type = Image.MIME.get(img.format or "")
+    if not image_data or not mime_type:
+        buffer = io.BytesIO()
+        img.save(buffer, format="PNG")
+        image_data, mime_type = buffer.getvalue(), "image/png"
+    request = glm.GenerateContentRequest(
+        model=model_name if model_name.startswith("models/") else f"models/{model_name}",
+        contents=[glm.Content(role="user", parts=[
+            glm.Part(text=prompt_instruction),
+            glm.Part(inline_data=glm.Blob(mime_type=mime_type, data=image_data)),
+        ])],
+    )
+    response = _get_client_for_key(api_key).generate_content(request)
+    text = "".join(part.text for candidate in response.candidates[:1] for part in candidate.content.parts)
+    if not text:
+        raise ValueError("Empty response from model")
+    return text
+
+def analyze_image_with_pool(image_path: str, pool: KeyPool, mode: str = "general", custom_prompt: str = None,
+                            use_cache: bool = True, model_name: str = DEFAULT_MODEL, api: str = "google",
+                            key: str = None) -> dict:
+    """
+    批量模式下分析单张图片：先查缓存（与单张模式相同，过期条目先返回旧结果再在后台刷新），
+    再从密钥池取密钥调用API。
+    Returns:
+        create_json_output 格式的结果字典（附加 cached 字段）
+    """
+    if not os.path.exists(image_path):
+        return create_json_output(False, "Image path does not exist", None, image_path, api,
+                                  f"Image path does not exist: {image_path}")
+    try:
+        with open(image_path, 'rb') as f:
+            image_data = f.read()
+        img = Image.open(image_path)
+    except Exception as e:
+        return create_json_output(False, "Failed to open image", None, image_path, api,
+                                  f"Cannot open image file {image_path}: {e}")
+    
+    prompt_instruction = get_prompt_instruction(mode, custom_prompt)
+    cache = get_cache_system() if use_cache else None
+    if cache:
+        try:
+            cached = cache.get_cached_analysis(image_data, mode, prompt_instruction, model_name, CACHE_FRESH_SECONDS)
+        except Exception as e:
+            print(f"Warning: Cache lookup failed: {e}", file=sys.stderr)
+            cached = None
+        if cached:
+            text, is_stale = cached
+            if is_stale:
+                start_background_revalidation(image_path, mode, custom_prompt, key, model_name)
+            output = create_json_output(True, "Success", text, image_path, api)
+            output["cached"] = True
+            output["stale"] = is_stale
+            return output
+    
+    failed_reasons = []
+    tried = set()
+    while True:
+        key_type, api_key = pool.acquire(exclude=tried)
+        if key_type is None:
+            break
+        try:
+            text = generate_content_with_key(api_key, model_name, prompt_instruction, img, image_data)
+        except exceptions.ResourceExhausted as e:
+            # 配额耗尽：冷却该密钥，换下一个密钥
+            pool.cooldown(key_type)
+            tried.add(key_type)
+            failed_reasons.append(f"Using {key_type} key failed (quota exhausted, cooling down): {str(e)[:200]}")
+            continue
+        except Exception as e:
+            tried.add(key_type)
+            failed_reasons.append(f"Using {key_type} key failed: {str(e)[:200]}")
+            continue
+        if cache:
+            try:
+                cache.store_analysis(image_data, mode, prompt_instruction, model_name, text, image_path)
+            except Exception as e:
+                print(f"Warning: Failed to store result in cache: {e}", file=sys.stderr)
+        output = create_json_output(True, "Success", text, image_path, api)
+        output["cached"] = False
+        output["key"] = key_type
+        return output
+    
+    detailed_reason = "All configured API keys failed to get a response. Detailed information:\n" + "\n".join(f"- {r}" for r in failed_reasons)
+    return create_json_output(False, "All API keys failed", None, image_path, api, detailed_reason)
+
+def analyze_images_batch(image_paths, mode: str = "general", key: str = None, custom_prompt: str = None,
+                         max_workers: int = 4, use_cache: bool = True, model_name: str = DEFAULT_MODEL):
+    """
+    并发分析多张图片，按完成顺序逐个产出结果字典。
+    并发数由 max_workers 限制，请求通过 KeyPool 分摊到所有已配置的密钥。
+    """
+    pool = KeyPool(load_api_keys(key))
+    if not len(pool):
+        reason = "API call error: Environment variable GOOGLE_API_KEY_FREE or GOOGLE_API_KEY_PAID is not set, and not specified through --key."
+        for image_path in image_paths:
+            yield create_json_output(False, "No valid API key", None, image_path, "google", reason)
+        return
+    
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        futures = [
+            executor.submit(analyze_image_with_pool, image_path, pool, mode, custom_prompt, use_cache, model_name,
+                            key=key)
+            for image_path in image_paths
+        ]
+        for future in as_completed(futures):
+            yield future.result()
+
+def get_image_analysis(image_path: str, mode: str = "general", api: str = "google", key: str = None, custom_prompt: str = None, command_identifier: str = None, use_cache: bool = True, model_name: str = DEFAULT_MODEL) -> str:
     """
     调用指定API分析图片，支持Google Gemini Vision。
     Args:
@@ -98,17 +429,13 @@ def get_image_analysis(image_path: str, mode: str = "general", api: str = "googl
         mode: 分析模式 ("academic", "general", "code_snippet")
         api: API接口 (目前仅支持google)
         key: 用户手动指定的API key，优先级最高
+        use_cache: 是否使用按图片内容+模式+提示+模型索引的结果缓存（与EXTRACT_IMG共享）
+        model_name: 使用的模型名称
     Returns:
         分析结果文本或JSON（RUN --show模式）
     """
     # 检查和加载密钥
-    if key:
-        api_keys = {"USER": key}
-    else:
-        api_keys = {
-            "FREE": os.getenv("GOOGLE_API_KEY_FREE"),
-            "PAID": os.getenv("GOOGLE_API_KEY_PAID")
-        }
+    api_keys = load_api_keys(key)
     if not any(api_keys.values()):
         reason = "API call error: Environment variable GOOGLE_API_KEY_FREE or GOOGLE_API_KEY_PAID is not set, and not specified through --key."
         if is_run_environment():
@@ -135,49 +462,43 @@ def get_image_analysis(image_path: str, mode: str = "general", api: str = "googl
                 json.dump(output, f, ensure_ascii=False, indent=2)
             return json.dumps(output, ensure_ascii=False)
         return f"*[Error: {reason}]*"
-    # Use custom prompt if provided, otherwise use mode-based prompts
-    if custom_prompt:
-        prompt_instruction = custom_prompt
-    else:
-        prompt_instruction = ""
-        if mode == "academic":
-            prompt_instruction = (
-                "You are an expert academic researcher. Analyze the following scientific image. "
-                "Focus on extracting quantitative and qualitative information. Specifically:\n"
-                "- **Identify the type of plot/figure.**\n"
-                "- **Summarize the main finding or conclusion**.\n"
-                "- **Extract key data points or significant numbers.**\n"
-                "- **Describe the trend or relationship** shown.\n"
-                "Present your analysis in a concise, structured list."
-            )
-        elif mode == "general":
-            prompt_instruction = "Provide a detailed description of the image, including subjects, setting, and mood."
-        elif mode == "code_snippet":
-            prompt_instruction = "Accurately transcribe the code in the image into a raw code block. No explanations."
-        else:
-            prompt_instruction = "Please describe the following image:"
-    # 收集失败原因
-    failed_reasons = []
-    for key_type, api_key in api_keys.items():
-        if not api_key:
-            continue
+    prompt_instruction = get_prompt_instruction(mode, custom_prompt)
+    
+    def success_output(text):
+        if is_run_environment(command_identifier):
+            output = create_json_output(True, "Success", text, image_path, api)
+            with open(os.environ['RUN_DATA_FILE'], 'w', encoding='utf-8') as f:
+                json.dump(output, f, ensure_ascii=False, indent=2)
+            return json.dumps(output, ensure_ascii=False)
+        return text
+    
+    # 查询结果缓存（命中过期条目时先返回旧结果，再在后台刷新）
+    cache = get_cache_system() if use_cache else None
+    image_data = None
+    if cache:
         try:
-            genai.configure(api_key=api_key)
-            model = genai.GenerativeModel('gemini-1.5-flash-latest')
-            response = model.generate_content([prompt_instruction, img], stream=False)
-            response.resolve()
-            print(f"Success! Using {key_type} key to get response.", file=sys.stderr)
-            if is_run_environment(command_identifier):
-                output = create_json_output(True, "Success", response.text, image_path, api)
-                with open(os.environ['RUN_DATA_FILE'], 'w', encoding='utf-8') as f:
-                    json.dump(output, f, ensure_ascii=False, indent=2)
-                return json.dumps(output, ensure_ascii=False)
-            return response.text
-        except (exceptions.ResourceExhausted, exceptions.PermissionDenied, Exception) as e:
-            error_detail = f"Using {key_type} key failed: {str(e)}"
-            failed_reasons.append(error_detail)
-            print(f"Warning: {error_detail[:100]}... Trying next...", file=sys.stderr)
-            continue
+            with open(image_path, 'rb') as f:
+                image_data = f.read()
+            cached = cache.get_cached_analysis(image_data, mode, prompt_instruction, model_name, CACHE_FRESH_SECONDS)
+        except Exception as e:
+            print(f"Warning: Cache lookup failed: {e}", file=sys.stderr)
+            cached = None
+        if cached:
+            text, is_stale = cached
+            if is_stale:
+                start_background_revalidation(image_path, mode, custom_prompt, key, model_name)
+            print(f"Success! Using cached result{' (stale, revalidating)' if is_stale else ''}.", file=sys.stderr)
+            return success_output(text)
+    
+    text, key_type, failed_reasons = call_vision_api(img, prompt_instruction, api_keys, model_name)
+    if text is not None:
+        print(f"Success! Using {key_type} key to get response.", file=sys.stderr)
+        if cache and image_data is not None:
+            try:
+                cache.store_analysis(image_data, mode, prompt_instruction, model_name, text, image_path)
+            except Exception as e:
+                print(f"Warning: Failed to store result in cache: {e}", file=sys.stderr)
+        return success_output(text)
     
     # 构建详细的失败原因
     detailed_reason = "All configured API keys failed to get a response. Detailed information:\n" + "\n".join([f"- {reason}" for reason in failed_reasons])
@@ -202,6 +523,11 @@ def main():
     parser.add_argument("--output", help="输出结果到文件")
     parser.add_argument("--output-dir", help="输出结果到指定目录（自动生成文件名）")
     parser.add_argument("--test-connection", action="store_true", help="测试API连接状态，不处理任何图片")
+    parser.add_argument("--no-cache", action="store_true", help="不使用结果缓存，强制重新调用API")
+    parser.add_argument("--cache-stats", action="store_true", help="显示结果缓存统计（命中/未命中次数）")
+    parser.add_argument("--batch", action="store_true", help="批量模式：所有位置参数均为图片路径，并发处理并以JSONL逐行输出结果")
+    parser.add_argument("--workers", type=int, default=4, help="批量模式的最大并发数（默认4）")
+    parser.add_argument("--revalidate-cache", metavar="MODEL", default=None, help=argparse.SUPPRESS)
     args = parser.parse_args()
     
     # Handle positional arguments (command_identifier and/or image_path)
@@ -213,6 +539,57 @@ def main():
         print(test_connection(args.api, args.key))
         return
     
+    if args.cache_stats:
+        cache = get_cache_system()
+        if not cache:
+            print("Cache system not available")
+            return
+        stats = cache.get_cache_stats()
+        print(f"Cache directory: {stats['cache_dir']}")
+        print(f"Cached entries: {stats['total_cached_images']} ({stats['total_size_mb']} MB)")
+        print(f"Hits: {stats['hits']} (stale: {stats['stale_hits']}), misses: {stats['misses']}, hit rate: {stats['hit_rate']:.1%}")
+        return
+    
+    if args.revalidate_cache:
+        if args.positional_args:
+            revalidate_cached_analysis(args.positional_args[-1], args.mode, args.prompt,
+                                       args.key or os.environ.get("IMG2TEXT_REVALIDATE_KEY"), args.revalidate_cache)
+        return
+    
+    if args.batch:
+        image_paths = list(args.positional_args)
+        # RUN环境下第一个位置参数是command_identifier
+        if image_paths and is_run_environment(image_paths[0]):
+            command_identifier = image_paths.pop(0)
+        if not image_paths:
+            parser.error("Image path is required")
+        results = []
+        out = open(args.output, 'w', encoding='utf-8') if args.output else (None if command_identifier else sys.stdout)
+        try:
+            for item in analyze_images_batch(image_paths, args.mode, args.key, args.prompt,
+                                             args.workers, use_cache=not args.no_cache):
+                results.append(item)
+                if out:
+                    out.write(json.dumps(item, ensure_ascii=False) + "\n")
+                    out.flush()
+        finally:
+            if out and out is not sys.stdout:
+                out.close()
+                if not command_identifier:
+                    print(f"Analysis results saved to: {args.output}")
+        if command_identifier:
+            output = {
+                "success": all(item["success"] for item in results),
+                "message": f"{sum(item['success'] for item in results)}/{len(results)} images analyzed",
+                "results": results,
+                "timestamp": datetime.datetime.now().isoformat()
+            }
+            if os.environ.get('RUN_DATA_FILE'):
+                with open(os.environ['RUN_DATA_FILE'], 'w', encoding='utf-8') as f:
+                    json.dump(output, f, ensure_ascii=False, indent=2)
+            print(json.dumps(output, ensure_ascii=False, indent=2))
+        return
+    
     if len(args.positional_args) == 0:
         parser.error("Image path is required")
     elif len(args.positional_args) == 1:
@@ -235,7 +612,8 @@ def main():
     
     args.image_path = image_path
     
-    result = get_image_analysis(args.image_path, args.mode, args.api, args.key, args.prompt, command_identifier)
+    result = get_image_analysis(args.image_path, args.mode, args.api, args.key, args.prompt, command_identifier,
+                                use_cache=not args.no_cache)
         
     # 如果在RUN环境下，直接输出JSON格式
     if is_run_environment(command_identifier):
@@ -11,6 +11,11 @@ import subprocess
 import json
 import time
 import datetime
+import functools
+import hashlib
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Dict, Any, Optional
 
@@ -64,6 +69,25 @@ STYLE_MAPPING = {
     'TheoryOriented': 'theoretical'
 }
 
+# 每个生成步骤的响应按输入哈希保存在这里，重新运行时从中断的步骤继续
+CHECKPOINT_DIR = Path(__file__).parent / "LEARN_DATA" / "checkpoints"
+
+# 教程生成时附带的精简论文上下文长度（字符）
+PAPER_CONTEXT_CHARS = 12000
+
+# 同时进行的子生成（按教程小节生成题目、分块摘要）数量
+MAX_CONCURRENT_GENERATIONS = int(os.environ.get("LEARN_MAX_CONCURRENT", 4))
+
+# tiktoken词表缓存目录（首次下载后离线可用）；可以用 TIKTOKEN_CACHE_DIR 覆盖
+TOKENIZER_CACHE_DIR = Path(__file__).parent / "LEARN_DATA" / "tiktoken_cache"
+TOKENIZER_ENCODING = "cl100k_base"
+
+# auto模式下的上下文长度（deepseek模型）
+AUTO_MODEL_CONTEXT_LENGTH = 163840
+
+# 并发的子生成同时失败时，模型切换（交互模式下会询问用户）一次只进行一个
+MODEL_SWITCH_LOCK = threading.Lock()
+
 # 全局时间跟踪器
 LEARN_START_TIME = None
 
@@ -513,7 +537,8 @@ def parse_direct_command(args):
     parser.add_argument('--gen-command', help='Generate LEARN command based on description')
     parser.add_argument('--paper-based', action='store_true', help='Force use of paper-based learning mode, even if only a description is provided, it will search and download papers')
     parser.add_argument('--sources', help='Specify paper search engines, separated by commas (arxiv,google_scholar), default is automatic recommendation')
-    
+    parser.add_argument('--local', action='store_true', help='Search only the local index of previously saved papers (SEARCH_PAPER --local)')
+
     # Model options
     parser.add_argument('--model', help='Specify OpenRouter model')
     parser.add_argument('--max-tokens', type=int, help='Maximum token number')
@@ -523,7 +548,8 @@ def parse_direct_command(args):
     parser.add_argument('--no-override-material', action='store_true', help='Do not overwrite existing files, automatically rename')
     parser.add_argument('--brainstorm-only', action='store_true', help='Do not automatically create files, only generate content')
     parser.add_argument('--context', action='store_true', help='Treat description as direct context for brainstorming, skip paper search')
-    
+    parser.add_argument('--no-resume', action='store_true', help='Ignore checkpoints of previous runs and regenerate every step')
+
     try:
         parsed_args = parser.parse_args(args)
     except SystemExit:
@@ -555,7 +581,9 @@ def parse_direct_command(args):
         'not_default': parsed_args.not_default,
         'no_override_material': parsed_args.no_override_material,
         'brainstorm_only': parsed_args.brainstorm_only,
-        'context_mode': parsed_args.context
+        'context_mode': parsed_args.context,
+        'local_search': parsed_args.local,
+        'no_resume': parsed_args.no_resume
     }
     
     if parsed_args.model:
@@ -855,74 +883,41 @@ def generate_content_structure_prompt(params):
         params['token_count'] = token_count
         
         # Check if content is too long and needs summarization
-        # 获取动态max_tokens设置
-        dynamic_max_tokens = params.get("max_tokens", 40960)  # 默认值
-        
-        # 如果是自动模式，使用更合理的阈值（基于deepseek模型的context length）
-        if params.get("selected_model") == "auto" or not params.get("selected_model"):
-            # 自动模式：使用deepseek模型的实际context length计算阈值
-            deepseek_context_length = 163840
-            dynamic_max_tokens = deepseek_context_length // 4  # 40960
-            content_threshold = dynamic_max_tokens  # 直接使用max_tokens作为阈值
-        else:
-            # 直接使用max_tokens作为阈值
-            content_threshold = dynamic_max_tokens
-        
+        content_threshold = get_paper_token_budget(params)
+
         if token_count > content_threshold:
             print(f"Warning:  Paper content is too long ({token_count:,} tokens), exceeds recommended processing length ({content_threshold:,} tokens)")
-            
+
             # 检查是否为默认模式
             if params.get("not_default", False):
                 # 非默认模式：询问用户选择
                 approach_choice = interactive_select(
                     "Content processing method:",
-                    ["Direct use (may exceed model limit)", "Smart summary (recommended)", "Manual truncate"]
+                    ["Chunked summary (recommended)", "Direct use (may exceed model limit)", "Manual truncate"]
                 )
             else:
                 # 默认模式：自动选择第一个选项
                 print(f"Content processing method:")
-                print(f"  1. Direct use (may exceed model limit)")
-                print(f"  2. Smart summary (recommended)")
+                print(f"  1. Chunked summary (recommended)")
+                print(f"  2. Direct use (may exceed model limit)")
                 print(f"  3. Manual truncate")
                 print(f"Choose (1-3, default: 1): 1")
-                print(f"Selected: Direct use (may exceed model limit)")
+                print(f"Selected: Chunked summary (recommended)")
                 approach_choice = 0  # 对应第一个选项
-            
-            if approach_choice == 1:  # Smart summary
-                print(f"Generating paper summary...")
-                # Generate summary prompt
-                summary_prompt = f"""Please generate a detailed summary of the following academic paper, preserving key technical details:
-
-{paper_content[:20000]}
 
-Please include:
-1. Research background and problem
-2. Main methods and techniques
-3. Key innovations
-4. Experimental results
-5. Conclusion and significance
-
-The summary should be detailed but concise, suitable for subsequent tutorial creation."""
-                
-                # Call API for summary
-                summary_response, summary_token_info, _ = call_openrouter_with_retry(
-                    summary_prompt, 
-                    params.get("selected_model", "deepseek/deepseek-r1:free"), 
-                    params.get("max_tokens", 4000), 
-                    "论文摘要生成",
-                    params=params
-                )
-                
-                if summary_response:
-                    paper_content = summary_response
-                    print(f"Summary generated ({count_tokens(paper_content)} tokens)")
+            if approach_choice == 0:  # Chunked summary (map-reduce)
+                print(f"Generating chunked paper summary...")
+                summary = summarize_paper_map_reduce(paper_content, params, content_threshold)
+                if summary:
+                    paper_content = summary
+                    print(f"Summary generated ({count_tokens(paper_content):,} tokens)")
                 else:
                     print(f"Error:  Summary generation failed, using original content")
-                    
+
             elif approach_choice == 2:  # Manual truncate
-                paper_content = paper_content[:60000]  # Keep first 60k characters
-                print(f"Truncated first part of content ({count_tokens(paper_content)} tokens)")
-        
+                paper_content = truncate_to_tokens(paper_content, content_threshold)
+                print(f"Truncated first part of content ({count_tokens(paper_content):,} tokens)")
+
         # Update params with processed content
         params['paper_content'] = paper_content
         
@@ -977,7 +972,9 @@ def call_openrouter_for_structure(prompt, model=None, max_tokens=None, retry_cou
                     'total_tokens': result['usage']['total_tokens'],
                     'cost': result['cost'],
                     'model': result['model'],
-                    'api_duration': 0  # call_openrouter_with_auto_model doesn't return duration
+                    'api_duration': 0,  # call_openrouter_with_auto_model doesn't return duration
+                    'cache_hit': result['usage'].get('cache_hit', False),
+                    'saved_cost': result['usage'].get('saved_cost', 0)
                 }
                 return content, usage_info
             else:
@@ -1045,7 +1042,9 @@ def call_openrouter_for_structure(prompt, model=None, max_tokens=None, retry_cou
                                 'total_tokens': usage.get('total_tokens', 0),
                                 'cost': cost,
                                 'model': model_used,
-                                'api_duration': api_duration
+                                'api_duration': api_duration,
+                                'cache_hit': usage.get('cache_hit', False),
+                                'saved_cost': usage.get('saved_cost', 0)
                             }
                             
                             print(f"OpenRouter API call successful (duration: {api_duration:.2f} seconds)", file=sys.stderr)
@@ -1193,8 +1192,8 @@ Please provide markdown format content, do not use any separators."""
             content_base = f"""Brainstorming analysis result:
 {brainstorming_response}
 
-Original paper content (reference):
-{paper_content[:5000]}{'...' if len(paper_content) > 5000 else ''}"""
+Original paper content (condensed reference: section outline with the beginning of each section):
+{get_condensed_paper_context(params)}"""
         else:
             content_base = f"""Paper content:
 {paper_content}"""
@@ -1327,6 +1326,179 @@ Please ensure the questions are suitable for {mode} level learners, and use {sty
     return prompt
 
 
+def build_condensed_paper_context(paper_content, max_chars=PAPER_CONTEXT_CHARS):
+    """
+    生成精简的论文上下文：按markdown标题拆分小节，保留完整的小节大纲和每节开头部分
+
+    没有标题时按固定长度分块。内容本身不超过max_chars时原样返回。
+    """
+    if len(paper_content) <= max_chars:
+        return paper_content
+
+    sections = []
+    current_title, current_lines = "", []
+    for line in paper_content.splitlines():
+        if re.match(r'^#{1,4}\s+\S', line):
+            if current_title or "".join(current_lines).strip():
+                sections.append((current_title, "\n".join(current_lines).strip()))
+            current_title, current_lines = line.strip(), []
+        else:
+            current_lines.append(line)
+    sections.append((current_title, "\n".join(current_lines).strip()))
+
+    if len(sections) < 2:
+        chunk_size = 4000
+        sections = [("", paper_content[i:i + chunk_size]) for i in range(0, len(paper_content), chunk_size)]
+
+    outline_chars = sum(len(title) + 1 for title, _ in sections)
+    budget = max(200, (max_chars - outline_chars) // len(sections))
+    parts = []
+    for title, body in sections:
+        excerpt = body[:budget]
+        if len(body) > budget:
+            # 尽量在句子结尾截断
+            cut = max(excerpt.rfind('. '), excerpt.rfind('。'))
+            excerpt = (excerpt[:cut + 1] if cut > budget // 2 else excerpt) + " ..."
+        parts.append(f"{title}\n{excerpt}".strip())
+    return "\n\n".join(part for part in parts if part)
+
+
+def get_condensed_paper_context(params):
+    """返回（并缓存在params中）当前论文内容的精简上下文"""
+    paper_content = params.get('paper_content', '') or ''
+    content_hash = hashlib.sha256(paper_content.encode('utf-8')).hexdigest()
+    if params.get('paper_context_hash') != content_hash:
+        params['paper_context'] = build_condensed_paper_context(paper_content)
+        params['paper_context_hash'] = content_hash
+    return params['paper_context']
+
+
+def split_tutorial_sections(tutorial_content, max_groups=None):
+    """
+    按二级标题拆分教程，用于并行生成每部分的题目
+
+    Returns:
+        list: [(标题, 内容)]，小节过多时相邻小节合并，最多max_groups组；少于2节时返回空列表
+    """
+    max_groups = max_groups or MAX_CONCURRENT_GENERATIONS * 2
+    sections = []
+    for block in re.split(r'(?m)^(?=## (?!#))', tutorial_content):
+        match = re.match(r'## (.+)', block)
+        if match and len(block.strip()) > 200:
+            sections.append((match.group(1).strip(), block.strip()))
+    if len(sections) < 2:
+        return []
+    group_size = -(-len(sections) // max_groups)
+    grouped = []
+    for i in range(0, len(sections), group_size):
+        group = sections[i:i + group_size]
+        grouped.append((" / ".join(title for title, _ in group), "\n\n".join(body for _, body in group)))
+    return grouped
+
+
+def generate_section_question_prompt(params, section_title, section_content, question_count):
+    """Generate prompt for the questions of one tutorial section."""
+    topic = params.get('topic') or params.get('paper_path', 'Paper')
+    return f"""Please create {question_count} questions for the "{section_title}" part of a tutorial about "{topic}".
+
+Learning mode: {params['mode']}
+Explanation style: {params['style']}
+
+Tutorial part:
+{section_content}
+
+Requirements:
+- Mix understanding, application and critical thinking questions based on the specific content above
+- Each question must have a detailed and accurate answer
+- Use HTML's <details> and <summary> tags to implement answer folding
+
+Format example:
+### Question: What problem does this part solve?
+<details>
+<summary>Click to view answer</summary>
+
+[Detailed answer content...]
+
+</details>
+
+Please only output the questions in markdown format, do not use any separators."""
+
+
+def generate_questions_concurrently(params, tutorial_response, model, max_tokens, prompts_and_responses):
+    """
+    按教程小节并行生成题目并合并为question.md
+
+    每个小节的生成独立检查点；任何一节失败时返回None，由调用方回退到单次生成
+    """
+    sections = split_tutorial_sections(tutorial_response)
+    if not sections:
+        return None
+    question_count = max(2, -(-12 // len(sections)))
+    prompts = [generate_section_question_prompt(params, title, content, question_count) for title, content in sections]
+    print(f"Generating questions for {len(sections)} tutorial sections concurrently...")
+
+    with ThreadPoolExecutor(max_workers=max(1, min(MAX_CONCURRENT_GENERATIONS, len(prompts)))) as executor:
+        results = list(executor.map(
+            lambda item: call_openrouter_checkpointed(item[1], model, max_tokens, f"question.md生成 ({item[0] + 1}/{len(prompts)})", params=params),
+            enumerate(prompts)
+        ))
+    if any(response is None for response, _, _ in results):
+        return None
+
+    parts = ["# Questions"]
+    question_number = 0
+    for (title, _), prompt, (response, token_info, _) in zip(sections, prompts, results):
+        prompts_and_responses.append((prompt, response, token_info))
+
+        def renumber(match):
+            nonlocal question_number
+            question_number += 1
+            return f"### Question {question_number}:"
+        body = re.sub(r'(?m)^#{2,4}\s*(?:Question|问题)\s*\d*\s*[:：]', renumber, clean_markdown_wrapper(response).strip())
+        parts.append(f"## {title}\n\n{body}")
+    return "\n\n".join(parts) + "\n"
+
+
+def checkpoint_path(step_name, prompt, model=None, max_tokens=None, temperature=None):
+    """检查点文件路径：由步骤名、完整prompt和生成参数（模型、max_tokens、temperature）的哈希决定"""
+    payload = json.dumps([step_name, prompt, model, max_tokens, temperature], ensure_ascii=False)
+    key = hashlib.sha256(payload.encode('utf-8')).hexdigest()
+    return CHECKPOINT_DIR / f"{key}.json"
+
+
+def call_openrouter_checkpointed(prompt, model, max_tokens, step_name, params=None):
+    """
+    带检查点的 call_openrouter_with_retry
+
+    输入相同的步骤直接返回上次保存的响应（--no-resume 时忽略检查点），成功的响应写入检查点
+    """
+    temperature = params.get('temperature') if params else None
+    path = checkpoint_path(step_name, prompt, model, max_tokens, temperature)
+    if not (params and params.get('no_resume')):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                checkpoint = json.load(f)
+            log_progress(f"{step_name} restored from checkpoint", "API")
+            print(f"{step_name}: using checkpoint from a previous run")
+            token_info = dict(checkpoint.get('token_info') or {}, from_checkpoint=True)
+            return checkpoint['response'], token_info, checkpoint.get('model', model)
+        except (OSError, ValueError, KeyError):
+            pass
+
+    response, token_info, current_model = call_openrouter_with_retry(prompt, model, max_tokens, step_name, params=params)
+    if response is not None:
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({"step": step_name, "model": current_model, "response": response,
+                           "token_info": token_info, "saved_at": time.time()}, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except (OSError, TypeError) as e:
+            print(f"Warning: Failed to save checkpoint for {step_name}: {e}")
+    return response, token_info, current_model
+
+
 def create_learning_files_from_responses(params, tutorial_response, question_response, prompts_and_responses=None):
     """Create learning files from separate tutorial and question responses."""
     log_progress("Start creating files", "FILE")
@@ -1370,6 +1542,8 @@ def create_learning_files_from_responses(params, tutorial_response, question_res
                     f.write(f"total_tokens: {token_info.get('total_tokens', 0)}\n")
                     f.write(f"cost: ${token_info.get('cost', 0):.6f}\n")
                     f.write(f"api_duration: {token_info.get('api_duration', 0):.2f} seconds\n")
+                    if token_info.get('cache_hit'):
+                        f.write(f"cache_hit: true (saved ${token_info.get('saved_cost', 0):.6f})\n")
                 
                 # 保存response
                 response_path = prompts_dir / f"response_{i}.txt"
@@ -1382,6 +1556,8 @@ def create_learning_files_from_responses(params, tutorial_response, question_res
                     f.write(f"total_tokens: {token_info.get('total_tokens', 0)}\n")
                     f.write(f"cost: ${token_info.get('cost', 0):.6f}\n")
                     f.write(f"api_duration: {token_info.get('api_duration', 0):.2f} seconds\n")
+                    if token_info.get('cache_hit'):
+                        f.write(f"cache_hit: true (saved ${token_info.get('saved_cost', 0):.6f})\n")
                 
                 print(f"Save prompt and response: {prompt_path.name}, {response_path.name}")
                 model_used = token_info.get('model', 'unknown')
@@ -1450,7 +1626,25 @@ def should_switch_model(response, attempt, max_retries):
 
 
 def handle_model_switching(current_model, params, step_name):
-    """Handle model switching logic."""
+    """
+    Handle model switching logic.
+
+    并发的子生成共享切换结果：同一个模型失败后只切换（或询问用户）一次，其他线程直接使用切换后的模型
+    """
+    with MODEL_SWITCH_LOCK:
+        switched_models = params.setdefault('switched_models', {}) if params is not None else {}
+        if current_model in switched_models:
+            new_model = switched_models[current_model]
+            if new_model:
+                print(f"Reuse switched model for {step_name}: {new_model}", file=sys.stderr)
+            return new_model
+        new_model = select_switch_model(current_model, params, step_name)
+        switched_models[current_model] = new_model
+        return new_model
+
+
+def select_switch_model(current_model, params, step_name):
+    """Select the model to switch to after current_model failed."""
     # 获取所有可用模型
     all_models, model_details = get_openrouter_models()
     if not all_models:
@@ -1463,7 +1657,12 @@ def handle_model_switching(current_model, params, step_name):
         print(f"Error:  No other available models", file=sys.stderr)
         return None
     
-    # 分类模型
+    # 分类模型（按健康探测结果排序，最快的健康模型在前）
+    try:
+        from OPENROUTER import rank_models_by_health
+        available_models = rank_models_by_health(available_models, model_details)
+    except Exception:
+        pass
     free_models = [m for m in available_models if ":free" in m]
     paid_models = [m for m in available_models if ":free" not in m]
     
@@ -1575,7 +1774,7 @@ def generate_learning_content(params):
         print(f"-" * 40)
         
         # Call OpenRouter API for brainstorming with retry
-        brainstorming_response, brainstorming_token_info, current_model = call_openrouter_with_retry(
+        brainstorming_response, brainstorming_token_info, current_model = call_openrouter_checkpointed(
             structure_prompt, selected_model, max_tokens, "头脑风暴", params=params
         )
         
@@ -1619,7 +1818,7 @@ def generate_learning_content(params):
     print(tutorial_prompt[:500] + "..." if len(tutorial_prompt) > 500 else tutorial_prompt)
     print(f"-" * 40)
     
-    tutorial_response, tutorial_token_info, current_model = call_openrouter_with_retry(
+    tutorial_response, tutorial_token_info, current_model = call_openrouter_checkpointed(
         tutorial_prompt, selected_model, max_tokens, "tutorial.md生成", params=params
     )
     
@@ -1635,25 +1834,35 @@ def generate_learning_content(params):
     # Step 3: Generate question.md
     log_progress("Start generating question.md", "STEP")
     print(f"\nStep 3: Generate question.md based on tutorial.md...")
-    question_prompt = generate_question_prompt(params, tutorial_response)
-    
-    print(f"Query content:")
-    print(f"-" * 40)
-    print(question_prompt[:500] + "..." if len(question_prompt) > 500 else question_prompt)
-    print(f"-" * 40)
-    
-    question_response, question_token_info, current_model = call_openrouter_with_retry(
-        question_prompt, selected_model, max_tokens, "question.md生成", params=params
+
+    # 教程有多个小节时，各小节的题目并行生成
+    section_prompts_and_responses = []
+    question_response = generate_questions_concurrently(
+        params, tutorial_response, selected_model, max_tokens, section_prompts_and_responses
     )
-    
-    if question_response is None:
-        log_progress("question.md generation failed", "ERROR")
-        print(f"Error:  question.md generation failed")
-        return None
-    
+    if question_response is not None:
+        prompts_and_responses.extend(section_prompts_and_responses)
+    else:
+        question_prompt = generate_question_prompt(params, tutorial_response)
+
+        print(f"Query content:")
+        print(f"-" * 40)
+        print(question_prompt[:500] + "..." if len(question_prompt) > 500 else question_prompt)
+        print(f"-" * 40)
+
+        question_response, question_token_info, current_model = call_openrouter_checkpointed(
+            question_prompt, selected_model, max_tokens, "question.md生成", params=params
+        )
+
+        if question_response is None:
+            log_progress("question.md generation failed", "ERROR")
+            print(f"Error:  question.md generation failed")
+            return None
+
+        # 保存第三组prompt和response
+        prompts_and_responses.append((question_prompt, question_response, question_token_info))
+
     log_progress("question.md generation completed", "STEP")
-    # 保存第三组prompt和response
-    prompts_and_responses.append((question_prompt, question_response, question_token_info))
     
     log_progress("All content generation completed", "COMPLETE")
     # 返回所有生成的内容
@@ -1692,10 +1901,136 @@ def determine_creation_mode(params, selected_model):
     return "manual" if creation_choice == 1 else "auto"
 
 
+@functools.lru_cache(maxsize=1)
+def get_token_encoder():
+    """
+    返回tiktoken编码器（可选依赖），不可用时返回None
+
+    词表缓存在 LEARN_DATA/tiktoken_cache，下载一次之后离线可用；
+    没有安装tiktoken或无法获取词表时使用 estimate_tokens 估算
+    """
+    try:
+        import tiktoken
+    except ImportError:
+        return None
+    os.environ.setdefault("TIKTOKEN_CACHE_DIR", str(TOKENIZER_CACHE_DIR))
+    try:
+        Path(os.environ["TIKTOKEN_CACHE_DIR"]).mkdir(parents=True, exist_ok=True)
+        return tiktoken.get_encoding(TOKENIZER_ENCODING)
+    except Exception as e:
+        print(f"Warning: Tokenizer unavailable ({e}), using estimated token counts")
+        return None
+
+
+def estimate_tokens(text):
+    """没有tokenizer时的估算：CJK字符和标点各算1个token，英文单词按长度每6个字符算1个token"""
+    count = 0
+    for piece in re.findall(r'[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af]|[^\W\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af]+|[^\w\s]', text):
+        count += 1 + len(piece) // 6 if piece[0].isalnum() and len(piece) > 1 else 1
+    return count
+
+
 def count_tokens(text):
-    """Simple token counting approximation."""
-    # Rough approximation: 1 token ≈ 4 characters for Chinese/English mixed text
-    return len(text) // 4
+    """Count tokens with the tiktoken encoder when available, otherwise estimate."""
+    if not text:
+        return 0
+    encoder = get_token_encoder()
+    if encoder is not None:
+        return len(encoder.encode(text, disallowed_special=()))
+    return estimate_tokens(text)
+
+
+def truncate_to_tokens(text, max_tokens):
+    """截取不超过max_tokens个token的开头部分"""
+    encoder = get_token_encoder()
+    if encoder is not None:
+        tokens = encoder.encode(text, disallowed_special=())
+        return text if len(tokens) <= max_tokens else encoder.decode(tokens[:max_tokens])
+    if count_tokens(text) <= max_tokens:
+        return text
+    # 按估算的比例截取，再逐步收缩
+    end = int(len(text) * max_tokens / count_tokens(text))
+    while end > 0 and count_tokens(text[:end]) > max_tokens:
+        end = int(end * 0.95)
+    return text[:end]
+
+
+def get_paper_token_budget(params):
+    """论文内容可用的token数量：所选模型的 get_suggested_max_tokens（上下文长度的1/4）"""
+    selected_model = params.get("selected_model")
+    if selected_model and selected_model != "auto":
+        try:
+            from OPENROUTER import get_suggested_max_tokens
+            return get_suggested_max_tokens(selected_model)
+        except Exception:
+            pass
+        return params.get("max_tokens", 40960)
+    # 自动模式：使用deepseek模型的实际context length计算阈值
+    return AUTO_MODEL_CONTEXT_LENGTH // 4
+
+
+def chunk_paper_content(paper_content, chunk_tokens):
+    """按段落把论文切成不超过chunk_tokens的块（过长的段落按token截断）"""
+    chunks, current, current_tokens = [], [], 0
+    for paragraph in re.split(r'\n\s*\n', paper_content):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        paragraph_tokens = count_tokens(paragraph)
+        while paragraph_tokens > chunk_tokens:
+            head = truncate_to_tokens(paragraph, chunk_tokens)
+            if current:
+                chunks.append("\n\n".join(current))
+                current, current_tokens = [], 0
+            chunks.append(head)
+            paragraph = paragraph[len(head):].strip()
+            paragraph_tokens = count_tokens(paragraph)
+        if current and current_tokens + paragraph_tokens > chunk_tokens:
+            chunks.append("\n\n".join(current))
+            current, current_tokens = [], 0
+        if paragraph:
+            current.append(paragraph)
+            current_tokens += paragraph_tokens
+    if current:
+        chunks.append("\n\n".join(current))
+    return chunks
+
+
+def summarize_paper_map_reduce(paper_content, params, budget_tokens, depth=0):
+    """
+    长论文的分块map-reduce摘要
+
+    论文按段落切块后并行生成每块的摘要（每块的结果通过检查点按内容哈希缓存），
+    合并后的摘要仍超过budget_tokens时对摘要再做一轮，最多3轮。失败时返回None
+    """
+    chunk_tokens = max(1000, budget_tokens // 2)
+    chunks = chunk_paper_content(paper_content, chunk_tokens)
+    print(f"Summarizing {len(chunks)} chunks (about {chunk_tokens:,} tokens each) concurrently...")
+    model = params.get("selected_model", "deepseek/deepseek-r1:free")
+    max_tokens = params.get("max_tokens", 4000)
+
+    def summarize(item):
+        index, chunk = item
+        prompt = f"""Please summarize part {index + 1} of {len(chunks)} of an academic paper, preserving key technical details.
+
+{chunk}
+
+Please include the problem, methods, formulas, experimental settings and results that appear in this part.
+Only summarize this part; do not add information that is not in it."""
+        response, _, _ = call_openrouter_checkpointed(
+            prompt, model, max_tokens, f"论文分块摘要 ({index + 1}/{len(chunks)})", params=params
+        )
+        return response
+
+    with ThreadPoolExecutor(max_workers=max(1, min(MAX_CONCURRENT_GENERATIONS, len(chunks)))) as executor:
+        summaries = list(executor.map(summarize, enumerate(chunks)))
+    if any(summary is None for summary in summaries):
+        return None
+
+    combined = "\n\n".join(f"## Part {i + 1}\n\n{summary.strip()}" for i, summary in enumerate(summaries))
+    if count_tokens(combined) > budget_tokens and len(chunks) > 1 and depth < 2:
+        return summarize_paper_map_reduce(combined, params, budget_tokens, depth + 1)
+    return combined
 
 
 def prepare_paper_content(params):
@@ -1767,29 +2102,30 @@ def prepare_paper_content(params):
     token_count = count_tokens(paper_content)
     print(f"\nPaper content statistics:")
     print(f"   Character count: {len(paper_content):,}")
-    print(f"   Estimated token count: {token_count:,}")
+    print(f"   {'Token' if get_token_encoder() else 'Estimated token'} count: {token_count:,}")
     
     return paper_content, paper_path, token_count
 
 
-def call_openrouter_with_auto_model(prompt, model="auto", max_retries=3):
+def call_openrouter_with_auto_model(prompt, model="auto", max_retries=3, cache=None):
     """
     调用OPENROUTER API，支持自动模型选择
-    
+
     Args:
         prompt: 提示词
         model: 模型ID，"auto"表示自动选择
         max_retries: 最大重试次数
+        cache: 是否使用OPENROUTER的响应缓存（结果确定的辅助prompt传入True）
         
     Returns:
         API调用结果
     """
     try:
-        from OPENROUTER import call_openrouter_api, get_useable_models
-        
+        from OPENROUTER import call_openrouter_api, get_ranked_models
+
         if model == "auto":
-            # 获取可用模型列表，按优先级排序
-            useable_models = get_useable_models()
+            # 获取可用模型列表，过期的健康统计先并发探测，最快的健康模型排在最前
+            useable_models = get_ranked_models(refresh=True)
             if not useable_models:
                 print(f"Error:  No useable models")
                 return {"success": False, "error": "No useable models available"}
@@ -1799,7 +2135,7 @@ def call_openrouter_with_auto_model(prompt, model="auto", max_retries=3):
                 print(f"Try model {i+1}/{len(useable_models)}: {model_id}")
                 
                 try:
-                    result = call_openrouter_api(prompt, model=model_id)
+                    result = call_openrouter_api(prompt, model=model_id, cache=cache)
                     if result['success']:
                         print(f"Model {model_id} call successful")
                         return result
@@ -1821,7 +2157,7 @@ def call_openrouter_with_auto_model(prompt, model="auto", max_retries=3):
         else:
             # 使用指定模型
             print(f"Use specified model: {model}")
-            return call_openrouter_api(prompt, model=model)
+            return call_openrouter_api(prompt, model=model, cache=cache)
             
     except Exception as e:
         return {"success": False, "error": f"API调用异常: {e}"}
@@ -1855,7 +2191,7 @@ For example:
 Search keywords: """
 
         print(f"Calling OpenRouter to optimize search query...")
-        result = call_openrouter_with_auto_model(prompt, model="auto")
+        result = call_openrouter_with_auto_model(prompt, model="auto", cache=True)
         
         if result['success']:
             optimized_query = result['content'].strip()
@@ -1895,7 +2231,7 @@ For example: arxiv,google_scholar or google_scholar
 Recommended search engines: """
 
         print(f"Calling OpenRouter to recommend the most suitable search engines...")
-        result = call_openrouter_with_auto_model(prompt, model="auto")
+        result = call_openrouter_with_auto_model(prompt, model="auto", cache=True)
         
         if result['success']:
             recommended_sources = result['content'].strip()
@@ -1967,7 +2303,7 @@ For example: if you select the 1st, 3rd, and 5th papers, return: 1,3,5
 Only return the numbers, no other explanation: """
 
         print(f"Calling OpenRouter to smartly select the best papers...")
-        result = call_openrouter_with_auto_model(prompt, model="auto")
+        result = call_openrouter_with_auto_model(prompt, model="auto", cache=True)
         
         if result['success']:
             selected_indices = result['content'].strip()
@@ -2097,18 +2433,24 @@ def search_and_download_paper(paper_description, params=None):
     print(f"\nSearching for papers: {paper_description}")
     
     try:
-        # 步骤1: 使用AI优化搜索查询
-        print(f"Step 1: Using AI to optimize search query...")
-        optimized_query = optimize_search_query_with_ai(paper_description)
-        
-        # 步骤2: 推荐搜索引擎（如果用户没有指定）
-        print(f"Step 2: Recommend search engines...")
+        local_search = bool(params and params.get('local_search'))
         sources = params.get('sources') if params else None
-        if not sources:
-            sources = recommend_search_engines_with_ai(paper_description, optimized_query)
+        if local_search:
+            # --local: 直接用描述查询本地索引，不需要AI优化查询和推荐搜索引擎
+            print(f"Step 1-2: Local mode, searching the local paper index directly")
+            optimized_query = paper_description
         else:
-            print(f"Using user-specified search engines: {sources}")
-        
+            # 步骤1: 使用AI优化搜索查询
+            print(f"Step 1: Using AI to optimize search query...")
+            optimized_query = optimize_search_query_with_ai(paper_description)
+
+            # 步骤2: 推荐搜索引擎（如果用户没有指定）
+            print(f"Step 2: Recommend search engines...")
+            if not sources:
+                sources = recommend_search_engines_with_ai(paper_description, optimized_query)
+            else:
+                print(f"Using user-specified search engines: {sources}")
+
         script_dir = Path(__file__).parent
         search_paper_path = script_dir / "SEARCH_PAPER"
         
@@ -2120,9 +2462,11 @@ def search_and_download_paper(paper_description, params=None):
                                for keyword in ['algorithm', 'optimization', 'machine learning', 'deep learning', 'neural']) else 10
         
         cmd = [str(search_paper_path), optimized_query, "--max-results", str(max_results)]
-        if sources:
+        if local_search:
+            cmd.append("--local")
+        elif sources:
             cmd.extend(["--sources", sources])
-        
+
         result = subprocess.run(cmd, capture_output=True, text=True)
         
         if result.returncode != 0:
@@ -2176,6 +2520,15 @@ def search_and_download_paper(paper_description, params=None):
             selected_paper = selected_papers[0]
             print(f"Automatically select the best paper recommended by AI: {selected_paper.get('title', 'Unknown')}")
 
+        # 本地索引中已有提取好的markdown时，直接使用，跳过下载和提取
+        existing_markdown = selected_paper.get('markdown_path')
+        if existing_markdown and Path(existing_markdown).exists():
+            print(f"Using previously extracted content: {existing_markdown}")
+            with open(existing_markdown, 'r', encoding='utf-8') as f:
+                paper_content = f.read()
+            # 只返回索引中记录的、仍然存在的PDF路径
+            return paper_content, selected_paper.get('pdf_path'), len(paper_content.split())
+
         # 步骤8: 尝试下载论文
         print(f"Step 8: Download papers...")
         pdf_url = selected_paper.get('pdf_url')
@@ -2226,7 +2579,8 @@ def search_and_download_paper(paper_description, params=None):
         if not markdown_path:
             print(f"Error:  PDF content extraction failed")
             return None, None, 0
-        
+        index_paper_markdown(selected_paper.get('title', ''), markdown_path, downloaded_path)
+
         # 步骤11: 读取提取的markdown内容
         print(f"Step 11: Read extracted markdown content...")
         try:
@@ -2281,7 +2635,7 @@ Examples:
 
 Please only return the filename (without the .pdf extension), no other explanation: """
 
-        result = call_openrouter_with_auto_model(prompt, model="auto")
+        result = call_openrouter_with_auto_model(prompt, model="auto", cache=True)
         
         if result['success']:
             filename = result['content'].strip()
@@ -2308,6 +2662,16 @@ Please only return the filename (without the .pdf extension), no other explanati
         return "paper"
 
 
+def index_paper_markdown(title, markdown_path, pdf_path=None):
+    """把提取的markdown加入SEARCH_PAPER的本地全文索引（之后 --local 搜索可以直接使用）"""
+    try:
+        from SEARCH_PAPER import LocalPaperIndex
+        index = LocalPaperIndex(Path(__file__).parent / "SEARCH_PAPER_DATA" / "paper_index.db")
+        index.add_markdown(title, markdown_path, pdf_path)
+    except Exception as e:
+        print(f"Warning: Failed to index extracted content: {e}")
+
+
 def extract_pdf_content(pdf_path, params=None):
     """使用EXTRACT_PDF提取PDF内容"""
     try:
@@ -2759,6 +3123,7 @@ def main():
             parser.add_argument('--gen-command', help='Generate LEARN command based on description')
             parser.add_argument('--paper-based', action='store_true', help='Force use of paper-based learning mode, even if only a description is provided')
             parser.add_argument('--sources', help='Specify paper search engines, separated by commas (arxiv,google_scholar), default is automatic recommendation')
+            parser.add_argument('--local', action='store_true', help='Search only the local index of previously saved papers (SEARCH_PAPER --local)')
             parser.add_argument('--model', help='指定OpenRouter模型')
             parser.add_argument('--max-tokens', type=int, help='最大token数')
             parser.add_argument('--temperature', type=float, help='温度参数 (0.0-2.0，控制回复的创造性)')
@@ -2767,6 +3132,7 @@ def main():
             parser.add_argument('--no-override-material', action='store_true', help='不覆盖已存在的文件，自动重命名')
             parser.add_argument('--brainstorm-only', action='store_true', help='不自动创建文件，仅生成内容')
             parser.add_argument('--context', action='store_true', help='将description视作直接context进入brainstorming，跳过论文搜索')
+            parser.add_argument('--no-resume', action='store_true', help='忽略之前运行的检查点，重新生成每一步')
             
             # 捕获help输出而不是让它exit
             import io
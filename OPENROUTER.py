@@ -8,9 +8,12 @@ OPENROUTER.py - OpenRouter API 调用工具
 import os
 import sys
 import json
+import time
+import hashlib
 import argparse
 import requests
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, Any, Optional, List, Union
 
 # 加载环境变量
@@ -27,6 +30,84 @@ def is_run_environment(command_identifier=None):
 # 模型配置文件路径
 MODELS_CONFIG_FILE = Path(__file__).parent / "OPENROUTER_PROJ" / "openrouter_models.json"
 
+# 响应缓存目录和大小上限（OPENROUTER_CACHE_MAX_MB，默认100MB）；OPENROUTER_CACHE=0 完全关闭缓存
+RESPONSE_CACHE_DIR = Path(__file__).parent / "OPENROUTER_PROJ" / "response_cache"
+RESPONSE_CACHE_MAX_BYTES = int(float(os.environ.get("OPENROUTER_CACHE_MAX_MB", 100)) * 1024 * 1024)
+
+# 模型健康探测：并发数、探测结果的有效期（秒，OPENROUTER_PROBE_MAX_AGE）、统计的平滑系数
+PROBE_MAX_WORKERS = 8
+PROBE_MAX_AGE = int(os.environ.get("OPENROUTER_PROBE_MAX_AGE", 3600))
+PROBE_EWMA_ALPHA = 0.3
+
+
+class ResponseCache:
+    """
+    OpenRouter响应的磁盘缓存
+
+    键为 (model, messages, temperature, max_tokens) 的哈希，每个响应一个JSON文件；
+    命中时更新文件的mtime，总大小超过上限时按最久未使用的顺序淘汰
+    """
+
+    def __init__(self, cache_dir: Path = None, max_bytes: int = None):
+        self.cache_dir = Path(cache_dir or RESPONSE_CACHE_DIR)
+        self.max_bytes = RESPONSE_CACHE_MAX_BYTES if max_bytes is None else max_bytes
+
+    @staticmethod
+    def make_key(model: str, messages: List[Dict[str, Any]], temperature: float, max_tokens: int) -> str:
+        payload = json.dumps([model, messages, temperature, max_tokens], ensure_ascii=False, sort_keys=True)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        path = self.cache_dir / f"{key}.json"
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+            os.utime(path)
+            return entry
+        except (OSError, ValueError):
+            return None
+
+    def put(self, key: str, result: Dict[str, Any]):
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            path = self.cache_dir / f"{key}.json"
+            tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({"content": result["content"], "model": result["model"], "usage": result["usage"],
+                           "cost": result["cost"], "created_at": time.time()}, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+            self.evict()
+        except OSError as e:
+            print(f"Warning: Failed to write response cache: {e}", file=sys.stderr)
+
+    def evict(self):
+        """删除最久未使用的条目，直到总大小不超过上限"""
+        entries = []
+        for path in self.cache_dir.glob("*.json"):
+            try:
+                stat = path.stat()
+                entries.append((stat.st_mtime, stat.st_size, path))
+            except OSError:
+                continue
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                path.unlink()
+                total -= size
+            except OSError:
+                pass
+
+
+def use_response_cache(temperature: Optional[float], cache: Optional[bool] = None) -> bool:
+    """是否使用响应缓存：显式指定时按指定，否则只缓存temperature=0的调用"""
+    if os.environ.get("OPENROUTER_CACHE", "1").lower() in ("0", "false", "no", "off"):
+        return False
+    if cache is not None:
+        return cache
+    return temperature == 0
+
 
 def get_default_models() -> Dict[str, Dict[str, Any]]:
     """获取默认模型列表（从配置文件或硬编码）"""
@@ -416,9 +497,11 @@ def add_model(model_id: str, api_key: str = None) -> bool:
         return False
     
     print(f"Testing the availability of model {model_id}...")
-    
+
     # 测试模型
+    test_start = time.time()
     test_result = test_model_availability(model_id, api_key)
+    test_latency = time.time() - test_start
     
     if not test_result["success"]:
         print(test_result["message"])
@@ -461,7 +544,8 @@ def add_model(model_id: str, api_key: str = None) -> bool:
     except Exception as e:
         print(f"Warning: Unable to get model details, using default values: {e}")
     
-    # 添加到模型列表
+    # 添加到模型列表（可用性测试作为第一次健康探测）
+    update_model_health(model_info, {"success": True, "latency": test_latency})
     models[model_id] = model_info
     
     if save_models(models):
@@ -499,6 +583,140 @@ def get_useable_models() -> List[str]:
     return [model_id for model_id, info in models.items() if info.get('useable', False)]
 
 
+def probe_model(model_id: str, api_key: str) -> Dict[str, Any]:
+    """
+    用最小的请求（max_tokens=1）探测模型，返回是否成功和延迟
+
+    只生成1个token的请求测不出生成吞吐量，因此探测结果不包含 tokens_per_second
+    """
+    headers = {
+        "Authorization": f"Bearer {api_key}",
+        "HTTP-Referer": "https://github.com/openrouter-test",
+        "X-Title": "OPENROUTER Model Probe"
+    }
+    payload = {
+        "model": model_id,
+        "messages": [{"role": "user", "content": "Hi"}],
+        "max_tokens": 1
+    }
+    start = time.time()
+    try:
+        response = requests.post(
+            "https://openrouter.ai/api/v1/chat/completions",
+            headers=headers,
+            json=payload,
+            timeout=30
+        )
+        latency = time.time() - start
+        result = response.json() if response.status_code == 200 else {}
+        if result.get('choices'):
+            return {"success": True, "latency": latency}
+        return {"success": False, "latency": latency, "error": f"HTTP {response.status_code}"}
+    except requests.exceptions.Timeout:
+        return {"success": False, "latency": time.time() - start, "error": "timeout"}
+    except Exception as e:
+        return {"success": False, "latency": time.time() - start, "error": str(e)}
+
+
+def update_model_health(info: Dict[str, Any], probe_result: Dict[str, Any]) -> Dict[str, Any]:
+    """把一次探测结果合并到模型的 health 统计中（错误率和探测结果中包含的延迟、吞吐量取指数滑动平均）"""
+    health = dict(info.get('health', {}))
+    alpha = PROBE_EWMA_ALPHA if health.get('probes') else 1.0
+    failed = 0.0 if probe_result["success"] else 1.0
+
+    health['probes'] = health.get('probes', 0) + 1
+    health['failures'] = health.get('failures', 0) + int(failed)
+    health['error_rate'] = round(alpha * failed + (1 - alpha) * health.get('error_rate', 0.0), 4)
+    if probe_result["success"]:
+        for key in ('latency', 'tokens_per_second'):
+            if probe_result.get(key) is None:
+                continue
+            previous = health.get(key)
+            value = probe_result[key] if previous is None else alpha * probe_result[key] + (1 - alpha) * previous
+            health[key] = round(value, 4)
+        health.pop('last_error', None)
+    else:
+        health['last_error'] = probe_result.get("error", "unknown_error")
+    health['healthy'] = bool(probe_result["success"]) and health['error_rate'] < 0.5
+    health['last_checked'] = time.time()
+    info['health'] = health
+    return info
+
+
+def probe_models(model_ids: Optional[List[str]] = None, api_key: str = None, max_workers: int = None) -> Dict[str, Any]:
+    """
+    并发探测模型的健康状态，并把统计写入 openrouter_models.json
+
+    Args:
+        model_ids: 要探测的模型（None时探测所有已配置的模型）
+        api_key: API密钥
+        max_workers: 并发数
+
+    Returns:
+        {"success": ..., "results": {model_id: probe_result}}
+    """
+    probe_api_key = api_key or os.getenv("OPENROUTER_API_KEY")
+    if not probe_api_key:
+        return {"success": False, "error": "missing_api_key", "results": {}}
+
+    models = load_models()
+    model_ids = [model_id for model_id in (model_ids or list(models)) if model_id in models]
+    if not model_ids:
+        return {"success": False, "error": "no_models", "results": {}}
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers or PROBE_MAX_WORKERS, len(model_ids)))) as executor:
+        probe_results = list(executor.map(lambda model_id: probe_model(model_id, probe_api_key), model_ids))
+
+    # 探测期间配置文件可能被修改，重新加载后只合并 health 统计
+    models = load_models()
+    results = {}
+    for model_id, probe_result in zip(model_ids, probe_results):
+        results[model_id] = probe_result
+        if model_id in models:
+            update_model_health(models[model_id], probe_result)
+    save_models(models)
+
+    return {
+        "success": any(result["success"] for result in results.values()),
+        "results": results
+    }
+
+
+def rank_models_by_health(model_ids: List[str], models: Dict[str, Dict[str, Any]] = None) -> List[str]:
+    """
+    按健康状态排序模型：最近探测健康的模型按延迟从低到高排在最前，
+    没有有效探测结果的模型保持原有顺序排在其后，不健康的模型排在最后
+    """
+    models = load_models() if models is None else models
+    now = time.time()
+    healthy, unknown, unhealthy = [], [], []
+    for model_id in model_ids:
+        health = models.get(model_id, {}).get('health', {})
+        if not health or now - health.get('last_checked', 0) > PROBE_MAX_AGE:
+            unknown.append(model_id)
+        elif health.get('healthy') and health.get('latency') is not None:
+            healthy.append(model_id)
+        else:
+            unhealthy.append(model_id)
+    healthy.sort(key=lambda model_id: models[model_id]['health']['latency'])
+    return healthy + unknown + unhealthy
+
+
+def get_ranked_models(refresh: bool = False, api_key: str = None) -> List[str]:
+    """获取按健康状态排序的可用模型列表；refresh为True时先并发探测结果已过期的模型"""
+    models = load_models()
+    useable_models = [model_id for model_id, info in models.items() if info.get('useable', False)]
+    if refresh and (api_key or os.getenv("OPENROUTER_API_KEY")):
+        now = time.time()
+        stale = [model_id for model_id in useable_models
+                 if now - models[model_id].get('health', {}).get('last_checked', 0) > PROBE_MAX_AGE]
+        if stale:
+            print(f"Probing {len(stale)} models concurrently...", file=sys.stderr)
+            probe_models(stale, api_key)
+            models = load_models()
+    return rank_models_by_health(useable_models, models)
+
+
 def get_model_info(model_id: str) -> Optional[Dict[str, Any]]:
     """获取模型信息"""
     models = load_models()
@@ -594,6 +812,11 @@ def list_models():
             print(f"{i:2d}. {model_id}")
             print(f"    Rate: input ${input_cost:.2f}/1M, output ${output_cost:.2f}/1M")
             print(f"    Context length: {context_length:,} tokens")
+            health = info.get('health')
+            if health:
+                status = "healthy" if health.get('healthy') else "unhealthy"
+                latency = f", latency {health['latency']:.2f}s" if health.get('latency') is not None else ""
+                print(f"    Health: {status}{latency}, error rate {health.get('error_rate', 0):.0%}")
             print()
         
         print(f"Total: {len(useable_models)} available models")
@@ -612,19 +835,20 @@ def calculate_cost(input_tokens: int, output_tokens: int, model_id: str) -> floa
     return input_cost + output_cost
 
 
-def call_openrouter_api(query: str, model: str = None, api_key: str = None, max_tokens: int = None, temperature: float = 0.7, output_dir: str = None, command_identifier: str = None) -> Union[str, Dict[str, Any]]:
+def call_openrouter_api(query: str, model: str = None, api_key: str = None, max_tokens: int = None, temperature: float = 0.7, output_dir: str = None, command_identifier: str = None, cache: Optional[bool] = None) -> Union[str, Dict[str, Any]]:
     """
     调用OpenRouter API获取回复
-    
+
     Args:
         query: 查询内容
         model: 模型名称
         api_key: API密钥
         max_tokens: 最大token数（None时自动根据模型context length调整）
         temperature: 温度参数
-        
+        cache: 是否使用响应缓存（None时只缓存temperature=0的调用）
+
     Returns:
-        包含回复内容和元数据的字典
+        包含回复内容和元数据的字典；缓存命中时 usage 中 cache_hit 为True，saved_cost 为节省的费用
     """
     # 获取API密钥
     if not api_key:
@@ -674,7 +898,23 @@ def call_openrouter_api(query: str, model: str = None, api_key: str = None, max_
         "max_tokens": max_tokens,
         "temperature": temperature
     }
-    
+
+    response_cache = ResponseCache() if use_response_cache(temperature, cache) else None
+    cache_key = ResponseCache.make_key(model, data["messages"], temperature, max_tokens) if response_cache else None
+    if response_cache:
+        cached = response_cache.get(cache_key)
+        if cached:
+            usage = dict(cached.get("usage", {}), cache_hit=True, saved_cost=cached.get("cost", 0))
+            print(f"Response cache hit (model: {cached.get('model', model)}), saved ${usage['saved_cost']:.6f}", file=sys.stderr)
+            return {
+                "success": True,
+                "content": cached["content"],
+                "model": cached.get("model", model),
+                "usage": usage,
+                "cost": 0.0,
+                "model_info": model_info
+            }
+
     try:
         print(f"Calling OpenRouter API...", file=sys.stderr)
         print(f"Model: {model}, max tokens: {max_tokens}, temperature: {temperature}", file=sys.stderr)
@@ -699,19 +939,24 @@ def call_openrouter_api(query: str, model: str = None, api_key: str = None, max_
             print(f"API call successful", file=sys.stderr)
             print(f"Token usage: input {input_tokens}, output {output_tokens}, total {total_tokens}", file=sys.stderr)
             print(f"Cost: ${cost:.6f}", file=sys.stderr)
-            
-            return {
+
+            api_result = {
                 "success": True,
                 "content": content,
                 "model": model,
                 "usage": {
                     "input_tokens": input_tokens,
                     "output_tokens": output_tokens,
-                    "total_tokens": total_tokens
+                    "total_tokens": total_tokens,
+                    "cache_hit": False,
+                    "saved_cost": 0.0
                 },
                 "cost": cost,
                 "model_info": model_info
             }
+            if response_cache:
+                response_cache.put(cache_key, api_result)
+            return api_result
         else:
             return {
                 "success": False,
@@ -740,6 +985,7 @@ Usage: OPENROUTER <query> [options]
        OPENROUTER --add <model> [--temp-key <api_key>]
        OPENROUTER --remove <model>
        OPENROUTER --test-connection
+       OPENROUTER --probe [--key <api_key>]
 
 Options:
   <query>                查询内容
@@ -747,6 +993,7 @@ Options:
   --key <api_key>        指定API密钥 (临时使用)
   --max-tokens <num>     最大token数 (默认: 根据模型自动调整为上下文长度的1/4)
   --temperature <float>  温度参数 (默认: 0.7)
+  --cache / --no-cache   是否使用响应缓存 (默认: 只缓存 temperature=0 的调用)
   --output-dir <dir>     输出目录，保存模型回复到指定目录
   --list                 列出所有可用模型
   --default <models>     设置默认模型优先级（支持多个模型，用逗号或空格分隔）
@@ -754,6 +1001,7 @@ Options:
   --remove <model>       从列表中移除模型
   --temp-key <api_key>   临时API密钥（用于测试新模型）
   --test-connection      测试API连接状态，不发送查询
+  --probe                并发探测所有已配置模型的延迟、吞吐量和错误率
   --help                 显示帮助信息
 
 Examples:
@@ -770,9 +1018,13 @@ Examples:
   OPENROUTER --add "moonshotai/kimi-k2:free" --temp-key "sk-or-v1-..."
   OPENROUTER --remove "old-model"
   OPENROUTER --test-connection
+  OPENROUTER --probe
 
 Environment Variables:
   OPENROUTER_API_KEY    默认API密钥
+  OPENROUTER_CACHE      设为0时关闭响应缓存
+  OPENROUTER_CACHE_MAX_MB  响应缓存大小上限 (默认: 100)
+  OPENROUTER_PROBE_MAX_AGE  健康探测结果的有效期，秒 (默认: 3600)
 
 Note: 只有标记为可用(useable=true)的模型才会显示在列表中。
       运行 fetch_openrouter_models.py 来更新模型信息和费率。
@@ -784,6 +1036,8 @@ Note: 只有标记为可用(useable=true)的模型才会显示在列表中。
     parser.add_argument('--key', help='指定API密钥')
     parser.add_argument('--max-tokens', type=int, default=None, help='最大token数（默认根据模型自动调整）')
     parser.add_argument('--temperature', type=float, default=0.7, help='温度参数')
+    parser.add_argument('--cache', dest='cache', action='store_true', default=None, help='使用响应缓存')
+    parser.add_argument('--no-cache', dest='cache', action='store_false', help='不使用响应缓存')
     parser.add_argument('--list', action='store_true', help='列出所有可用模型')
     parser.add_argument('--default', help='设置默认模型')
     parser.add_argument('--add', help='添加新模型到列表（先测试连接）')
@@ -791,12 +1045,13 @@ Note: 只有标记为可用(useable=true)的模型才会显示在列表中。
     parser.add_argument('--temp-key', help='临时API密钥（用于测试新模型）')
     parser.add_argument('--output-dir', help='输出目录，保存模型回复到指定目录')
     parser.add_argument('--test-connection', action='store_true', help='测试API连接状态，不发送查询')
+    parser.add_argument('--probe', action='store_true', help='并发探测所有已配置模型的健康状态')
     parser.add_argument('--help', action='store_true', help='显示帮助信息')
     
     args = parser.parse_args()
     
     # 显示帮助信息
-    if args.help or (not args.query and not args.list and not args.default and not args.add and not args.remove and not args.test_connection):
+    if args.help or (not args.query and not args.list and not args.default and not args.add and not args.remove and not args.test_connection and not args.probe):
         print(help_text)
         return
     
@@ -820,6 +1075,23 @@ Note: 只有标记为可用(useable=true)的模型才会显示在列表中。
         success = remove_model(args.remove)
         sys.exit(0 if success else 1)
     
+    # 并发探测模型健康状态
+    if args.probe:
+        result = probe_models(api_key=args.key)
+        if is_run_environment():
+            print(json.dumps(result, ensure_ascii=False, indent=2))
+        elif not result["results"]:
+            print(f"Error: Model probe failed: {result['error']}", file=sys.stderr)
+        else:
+            for model_id, probe_result in result["results"].items():
+                if probe_result["success"]:
+                    print(f"{model_id}: OK ({probe_result['latency']:.2f}s)")
+                else:
+                    print(f"{model_id}: Error: {probe_result['error']}")
+            ranked = rank_models_by_health(list(result["results"]))
+            print(f"Fastest healthy model: {ranked[0] if result['success'] else 'None'}")
+        sys.exit(0 if result["success"] else 1)
+
     # 测试连接
     if args.test_connection:
         result = test_connection(args.key, args.model)
@@ -880,7 +1152,8 @@ Note: 只有标记为可用(useable=true)的模型才会显示在列表中。
         args.model,
         args.key,
         args.max_tokens,
-        args.temperature
+        args.temperature,
+        cache=args.cache
     )
     
     # 处理--output-dir功能
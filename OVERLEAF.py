@@ -7,6 +7,9 @@ OVERLEAF.py - LaTeX文件编译工具
 import os
 import sys
 import json
+import re
+import time
+import hashlib
 import subprocess
 import tempfile
 import shutil
@@ -16,6 +19,13 @@ from pathlib import Path
 from dotenv import load_dotenv
 load_dotenv()
 
+# 持久化构建目录（每个项目一个，保留latexmk的增量编译状态）和导言区格式文件缓存
+BUILD_CACHE_DIR = Path(__file__).parent / "OVERLEAF_PROJ" / "build_cache"
+FORMAT_CACHE_DIR = Path(__file__).parent / "OVERLEAF_PROJ" / "format_cache"
+
+# watch模式下需要监视的文件类型
+WATCH_SUFFIXES = {'.tex', '.bib', '.bst', '.sty', '.cls', '.png', '.jpg', '.jpeg', '.pdf', '.eps'}
+
 def is_run_environment(command_identifier=None):
     """Check if running in RUN environment by checking environment variables"""
     if command_identifier:
@@ -231,8 +241,125 @@ def copy_template(template_name, target_dir, command_identifier=None):
             print(f"Error: {error_msg}")
         return 1
 
-def compile_latex(tex_file, command_identifier=None, output_dir=None, latex_options=None, no_shell_escape=False):
-    """编译LaTeX文件"""
+def get_build_dir(tex_path):
+    """获取项目的持久化构建目录（按tex文件的绝对路径区分），保留aux/fdb_latexmk状态以便增量编译"""
+    tex_path = Path(tex_path).resolve()
+    project_hash = hashlib.md5(str(tex_path).encode('utf-8')).hexdigest()[:12]
+    return BUILD_CACHE_DIR / f"overleaf_{tex_path.stem}_{project_hash}"
+
+def mirror_source_dirs(source_dir, build_dir):
+    """
+    在构建目录中创建与源目录相同的子目录结构
+
+    使用-outdir时，pdflatex把\\include{chapters/intro}的aux写到 <build_dir>/chapters/intro.aux，
+    子目录不存在就会报 "I can't write on file"；只镜像含有.tex文件的目录（跳过隐藏目录）
+    """
+    source_dir = Path(source_dir)
+    build_dir = Path(build_dir)
+    for root, dirs, files in os.walk(source_dir):
+        dirs[:] = [d for d in dirs if not d.startswith('.')]
+        relative = Path(root).relative_to(source_dir)
+        if relative != Path('.') and any(f.endswith('.tex') for f in files):
+            (build_dir / relative).mkdir(parents=True, exist_ok=True)
+
+def clean_build_dir(tex_file):
+    """删除项目的构建目录，下次编译为完整编译"""
+    build_dir = get_build_dir(tex_file)
+    if build_dir.exists():
+        shutil.rmtree(build_dir, ignore_errors=True)
+        return True
+    return False
+
+def get_preamble_fingerprint(tex_path):
+    """
+    计算导言区的指纹：\\begin{document}之前的内容，加上导言区中\\input/\\include的文件内容
+
+    只依赖文件内容而不依赖路径，所以从模板复制出来、导言区没有修改的项目可以复用模板的格式文件
+    """
+    tex_path = Path(tex_path)
+    try:
+        content = tex_path.read_text(encoding='utf-8', errors='ignore')
+    except OSError:
+        return None
+    end = content.find('\\begin{document}')
+    if end < 0:
+        return None
+    preamble = content[:end]
+
+    digest = hashlib.sha256(preamble.encode('utf-8'))
+    for name in re.findall(r'^[^%\n]*\\(?:input|include)\{([^}]+)\}', preamble, re.MULTILINE):
+        input_path = tex_path.parent / name
+        if not input_path.suffix:
+            input_path = input_path.with_suffix('.tex')
+        try:
+            digest.update(input_path.read_bytes())
+        except OSError:
+            digest.update(name.encode('utf-8'))
+    return digest.hexdigest()[:16]
+
+def get_format_name(tex_path):
+    """获取导言区对应的格式文件名（不含.fmt），导言区无法识别时返回None"""
+    fingerprint = get_preamble_fingerprint(tex_path)
+    return f"preamble_{fingerprint}" if fingerprint else None
+
+def find_cached_format(tex_path):
+    """返回与导言区匹配的已缓存格式名，不存在时返回None"""
+    format_name = get_format_name(tex_path)
+    if format_name and (FORMAT_CACHE_DIR / f"{format_name}.fmt").exists():
+        return format_name
+    return None
+
+def build_preamble_format(tex_file):
+    """
+    用mylatexformat把导言区预编译为格式文件（.fmt），缓存在 OVERLEAF_PROJ/format_cache
+
+    Returns:
+        {"success": ..., "format": 格式名, "cached": 是否已存在} 或 {"success": False, "error": ...}
+    """
+    tex_path = Path(tex_file).resolve()
+    format_name = get_format_name(tex_path)
+    if not format_name:
+        return {"success": False, "error": f"No preamble found in {tex_path}", "file": str(tex_path)}
+    if find_cached_format(tex_path):
+        return {"success": True, "format": format_name, "cached": True, "file": str(tex_path)}
+
+    FORMAT_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    cmd = [
+        'pdflatex', '-ini', '-interaction=nonstopmode',
+        f'-jobname={format_name}', f'-output-directory={FORMAT_CACHE_DIR}',
+        '&pdflatex', 'mylatexformat.ltx', tex_path.name
+    ]
+    try:
+        result = subprocess.run(cmd, cwd=tex_path.parent, capture_output=True, text=True)
+    except FileNotFoundError:
+        return {"success": False, "error": "pdflatex not found", "file": str(tex_path)}
+
+    if result.returncode != 0 or not (FORMAT_CACHE_DIR / f"{format_name}.fmt").exists():
+        errors = extract_latex_errors(result.stdout or "")
+        return {
+            "success": False,
+            "error": f"Preamble precompilation failed: {errors[0] if errors else result.returncode}",
+            "file": str(tex_path)
+        }
+    return {"success": True, "format": format_name, "cached": False, "file": str(tex_path)}
+
+def precompile_template_formats():
+    """为 OVERLEAF_PROJ/templates 中所有模板的导言区预编译格式文件"""
+    results = {}
+    for template in list_available_templates():
+        main_tex = get_templates_dir() / template / "main.tex"
+        if main_tex.exists():
+            results[template] = build_preamble_format(main_tex)
+    return results
+
+def compile_latex(tex_file, command_identifier=None, output_dir=None, latex_options=None, no_shell_escape=False, clean_build=False):
+    """
+    编译LaTeX文件
+    
+    latexmk在持久化的构建目录（OVERLEAF_PROJ/build_cache）中运行，保留aux、bbl、fdb_latexmk等状态，
+    内容没有变化的部分不会重新运行pdflatex/bibtex；导言区有预编译的格式文件时自动使用。
+    clean_build为True时先删除构建目录，做一次完整编译
+    """
     # 简化路径处理：使用绝对路径
     tex_path = Path(tex_file).resolve()
     
@@ -256,16 +383,14 @@ def compile_latex(tex_file, command_identifier=None, output_dir=None, latex_opti
         print(f"Starting LaTeX compilation for: {tex_path.name}")
         print(f"Compiling...")
     
-    # 在RUN环境下，使用/tmp目录作为工作目录
-    if is_run_environment(command_identifier):
-        # 创建临时工作目录
-        work_dir = Path(tempfile.mkdtemp(prefix=f"overleaf_{filename}_"))
-        # 复制tex文件到临时目录
-        temp_tex = work_dir / f"{filename}.tex"
-        shutil.copy2(tex_path, temp_tex)
-        directory = work_dir
-    else:
-        directory = tex_path.parent
+    # 构建产物都写入项目的构建目录，源文件目录不会产生临时文件
+    if clean_build:
+        clean_build_dir(tex_path)
+    build_dir = get_build_dir(tex_path)
+    build_dir.mkdir(parents=True, exist_ok=True)
+    incremental = (build_dir / f"{filename}.fdb_latexmk").exists()
+    directory = tex_path.parent
+    mirror_source_dirs(directory, build_dir)
     
     # 创建临时日志文件
     log_file = tempfile.NamedTemporaryFile(mode='w+', suffix='.log', delete=False)
@@ -273,15 +398,20 @@ def compile_latex(tex_file, command_identifier=None, output_dir=None, latex_opti
     log_file.close()
     
     try:
-        # 切换到文件目录
-        original_cwd = os.getcwd()
-        os.chdir(directory)
+        start_time = time.time()
         
         # 构建编译命令，默认添加-shell-escape选项
         default_options = ['-interaction=nonstopmode']
         if not no_shell_escape:
             default_options.append('-shell-escape')
         
+        # 使用预编译的导言区格式文件
+        env = os.environ.copy()
+        format_name = find_cached_format(tex_path)
+        if format_name:
+            default_options.append(f'-fmt={format_name}')
+            env['TEXFORMATS'] = f"{FORMAT_CACHE_DIR}{os.pathsep}{env.get('TEXFORMATS', '')}"
+        
         if latex_options:
             # 合并用户提供的选项和默认选项
             all_options = default_options + latex_options
@@ -293,6 +423,7 @@ def compile_latex(tex_file, command_identifier=None, output_dir=None, latex_opti
         # 执行编译
         cmd = [
             'latexmk', '-pdf', 
+            f'-outdir={build_dir}',
             f'-pdflatex={pdflatex_cmd}',
             f'{filename}.tex'
         ]
@@ -300,6 +431,8 @@ def compile_latex(tex_file, command_identifier=None, output_dir=None, latex_opti
         with open(log_file_path, 'w') as log_f:
             result = subprocess.run(
                 cmd,
+                cwd=directory,
+                env=env,
                 stdout=log_f,
                 stderr=subprocess.STDOUT,
                 text=True
@@ -309,41 +442,23 @@ def compile_latex(tex_file, command_identifier=None, output_dir=None, latex_opti
         with open(log_file_path, 'r') as log_f:
             log_content = log_f.read()
         
-        # 恢复原工作目录
-        os.chdir(original_cwd)
+        elapsed = time.time() - start_time
         
         if result.returncode == 0:
-            # 编译成功，清理临时文件
-            cleanup_cmd = ['latexmk', '-c', '-quiet', f'{filename}.tex']
-            subprocess.run(cleanup_cmd, cwd=directory, capture_output=True)
-            
-            # 手动删除额外的临时文件
-            temp_files = [
-                f"{filename}.fdb_latexmk",
-                f"{filename}.bbl",
-                f"{filename}.blg",
-                f"{filename}.run.xml",
-                f"{filename}.bcf"
-            ]
-            
-            for temp_file in temp_files:
-                temp_path = directory / temp_file
-                if temp_path.exists():
-                    temp_path.unlink()
-            
             # 检查PDF是否生成
-            pdf_file = directory / f"{filename}.pdf"
+            pdf_file = build_dir / f"{filename}.pdf"
             if pdf_file.exists():
                 final_pdf_path = pdf_file
                 
-                # 如果指定了output_dir，移动PDF文件
-                if output_dir:
-                    output_path = Path(output_dir)
+                # 复制PDF到output_dir（普通环境下默认复制到tex文件所在目录），
+                # 构建目录中保留一份，latexmk据此判断是否需要重新编译
+                if output_dir or not is_run_environment(command_identifier):
+                    output_path = Path(output_dir) if output_dir else directory
                     output_path.mkdir(parents=True, exist_ok=True)
                     final_pdf_path = output_path / f"{filename}.pdf"
                     
                     try:
-                        shutil.move(str(pdf_file), str(final_pdf_path))
+                        shutil.copy2(str(pdf_file), str(final_pdf_path))
                     except Exception as e:
                         error_data = {
                             "success": False, 
@@ -361,13 +476,17 @@ def compile_latex(tex_file, command_identifier=None, output_dir=None, latex_opti
                     "success": True, 
                     "message": "Compilation successful", 
                     "file": str(tex_path), 
-                    "output": str(final_pdf_path)
+                    "output": str(final_pdf_path),
+                    "build_dir": str(build_dir),
+                    "incremental": incremental,
+                    "format": format_name,
+                    "elapsed": round(elapsed, 2)
                 }
                 
                 if is_run_environment(command_identifier):
                     write_to_json_output(success_data, command_identifier)
                 else:
-                    print(f"✓ LaTeX compilation successful!")
+                    print(f"✓ LaTeX compilation successful! ({elapsed:.1f}s, {'incremental' if incremental else 'full'} build)")
                     print(f"✓ Generated PDF: {final_pdf_path}")
                 return 0
             else:
@@ -395,7 +514,7 @@ def compile_latex(tex_file, command_identifier=None, output_dir=None, latex_opti
                 error_data = {
                     "success": False, 
                     "error": f"Compilation failed: {error_summary}", 
-                    "file": str(tex_path),
+                    "file": str(tex_path), 
                     "exit_code": result.returncode
                 }
                 write_to_json_output(error_data, command_identifier)
@@ -441,13 +560,48 @@ def compile_latex(tex_file, command_identifier=None, output_dir=None, latex_opti
             os.unlink(log_file_path)
         except:
             pass
-        
-        # 在RUN环境下，清理临时工作目录
-        if is_run_environment(command_identifier) and 'work_dir' in locals():
-            try:
-                shutil.rmtree(work_dir)
-            except:
-                pass
+
+def snapshot_project_files(project_dir, exclude=()):
+    """记录项目目录中源文件的修改时间（跳过隐藏目录和编译输出的PDF）"""
+    snapshot = {}
+    for root, dirs, files in os.walk(project_dir):
+        dirs[:] = [d for d in dirs if not d.startswith('.')]
+        for name in files:
+            path = Path(root) / name
+            if path.suffix.lower() in WATCH_SUFFIXES and path not in exclude:
+                try:
+                    snapshot[str(path)] = path.stat().st_mtime
+                except OSError:
+                    pass
+    return snapshot
+
+def watch_latex(tex_file, command_identifier=None, output_dir=None, latex_options=None, no_shell_escape=False, clean_build=False, interval=1.0, max_builds=None):
+    """watch模式：先编译一次，之后项目中的源文件有变化时增量重新编译，Ctrl+C退出"""
+    tex_path = Path(tex_file).resolve()
+    output_pdf = (Path(output_dir).resolve() if output_dir else tex_path.parent) / f"{tex_path.stem}.pdf"
+    exclude = {output_pdf}
+
+    return_code = compile_latex(tex_path, command_identifier, output_dir, latex_options, no_shell_escape, clean_build)
+    builds = 1
+    snapshot = snapshot_project_files(tex_path.parent, exclude)
+    if not is_run_environment(command_identifier):
+        print(f"Watching {tex_path.parent} for changes (Ctrl+C to stop)...")
+
+    try:
+        while max_builds is None or builds < max_builds:
+            time.sleep(interval)
+            current = snapshot_project_files(tex_path.parent, exclude)
+            if current != snapshot:
+                snapshot = current
+                return_code = compile_latex(tex_path, command_identifier, output_dir, latex_options, no_shell_escape)
+                builds += 1
+                # 编译过程中产生的文件变化不触发下一次编译
+                snapshot = snapshot_project_files(tex_path.parent, exclude)
+    except KeyboardInterrupt:
+        if not is_run_environment(command_identifier):
+            print(f"\nStopped watching")
+        return 0
+    return return_code
 
 def resolve_tex_path(tex_file):
     """Resolve LaTeX file path (for test compatibility)"""
@@ -488,6 +642,12 @@ def main():
                        help='传递给pdflatex的额外选项 (默认已包含-shell-escape)，可多次使用：--latex-options=-synctex=1 --latex-options=-file-line-error')
     parser.add_argument('--no-shell-escape', action='store_true',
                        help='禁用默认的-shell-escape选项')
+    parser.add_argument('--watch', action='store_true',
+                       help='监视项目目录，源文件变化时自动增量重新编译')
+    parser.add_argument('--clean-build', action='store_true',
+                       help='删除项目的构建目录，做一次完整编译')
+    parser.add_argument('--precompile-preamble', action='store_true',
+                       help='预编译导言区为格式文件（指定tex文件时预编译该文件，否则预编译所有模板）')
     
     try:
         parsed_args = parser.parse_args(args)
@@ -524,17 +684,37 @@ def main():
                 print(f"No templates found")
         return 0
     
+    # 处理导言区预编译选项
+    if parsed_args.precompile_preamble:
+        if parsed_args.tex_file:
+            results = {parsed_args.tex_file: build_preamble_format(parsed_args.tex_file)}
+        else:
+            results = precompile_template_formats()
+        success = bool(results) and all(result["success"] for result in results.values())
+        if is_run_environment(command_identifier):
+            write_to_json_output({"success": success, "formats": results}, command_identifier)
+        else:
+            for name, result in results.items():
+                if result["success"]:
+                    print(f"{name}: {result['format']}{' (cached)' if result['cached'] else ''}")
+                else:
+                    print(f"Error: {name}: {result['error']}")
+        return 0 if success else 1
+
     # 处理模板复制选项
     if parsed_args.template:
         template_name, target_dir = parsed_args.template
         return copy_template(template_name, target_dir, command_identifier)
     
+    # watch模式下先编译一次，之后在文件变化时重新编译
+    build_latex = watch_latex if parsed_args.watch else compile_latex
+    
     if not parsed_args.tex_file:
         # 没有文件参数时，打开文件选择器
         selected_file = select_tex_file()
         if selected_file:
-            return compile_latex(selected_file, command_identifier, parsed_args.output_dir, 
-                               parsed_args.latex_options, parsed_args.no_shell_escape)
+            return build_latex(selected_file, command_identifier, parsed_args.output_dir, 
+                               parsed_args.latex_options, parsed_args.no_shell_escape, clean_build=parsed_args.clean_build)
         else:
             error_data = {
                 "success": False, 
@@ -549,8 +729,8 @@ def main():
             return 1
     else:
         # 有参数时，直接编译指定文件
-        return compile_latex(parsed_args.tex_file, command_identifier, parsed_args.output_dir,
-                           parsed_args.latex_options, parsed_args.no_shell_escape)
+        return build_latex(parsed_args.tex_file, command_identifier, parsed_args.output_dir,
+                           parsed_args.latex_options, parsed_args.no_shell_escape, clean_build=parsed_args.clean_build)
 
 if __name__ == "__main__":
     sys.exit(main()) 
\ No newline at end of file
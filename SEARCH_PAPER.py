@@ -11,12 +11,17 @@ import json
 import argparse
 import hashlib
 import time
+import random
 import re
+import sqlite3
+import threading
+import unicodedata
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import List, Dict, Any, Optional
 import requests
 from bs4 import BeautifulSoup
-from urllib.parse import urljoin
+from urllib.parse import urljoin, urlparse
 from datetime import datetime
 
 # 加载环境变量
@@ -83,10 +88,430 @@ def get_interactive_query(command_identifier=None):
         print(f"\nSearch cancelled.", file=sys.stderr)
         return None
 
+def normalize_query(query: str) -> str:
+    """规范化查询（大小写、多余空白），作为缓存键的一部分"""
+    return " ".join(query.lower().split())
+
+
+class QueryResultCache:
+    """
+    带TTL的查询结果缓存
+
+    键为 (规范化查询, 搜索源, 结果数量参数)，重复搜索直接返回缓存的论文列表
+    """
+
+    def __init__(self, cache_file: Path, ttl: float = None):
+        self.cache_file = Path(cache_file)
+        self.ttl = ttl if ttl is not None else float(os.environ.get("SEARCH_PAPER_CACHE_TTL", 6 * 3600))
+        self._lock = threading.Lock()
+        try:
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                self.entries = json.load(f)
+        except (OSError, ValueError):
+            self.entries = {}
+
+    @staticmethod
+    def make_key(query: str, source: str, *limits) -> str:
+        return json.dumps([normalize_query(query), source] + list(limits))
+
+    def get(self, key: str) -> Optional[List[Dict[str, Any]]]:
+        entry = self.entries.get(key)
+        if entry and time.time() - entry["time"] <= self.ttl:
+            return entry["papers"]
+        return None
+
+    def put(self, key: str, papers: List[Dict[str, Any]]):
+        with self._lock:
+            now = time.time()
+            self.entries = {k: v for k, v in self.entries.items() if now - v["time"] <= self.ttl}
+            self.entries[key] = {"time": now, "papers": papers}
+            self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp_file = self.cache_file.with_suffix(f".{os.getpid()}.tmp")
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump(self.entries, f, ensure_ascii=False)
+            os.replace(tmp_file, self.cache_file)
+
+
+class UrlValidityCache:
+    """
+    按域名组织的PDF URL有效性缓存
+
+    每个URL的检查结果保留TTL时间；同一域名的检查通过信号量限制并发，
+    连续多次检查都有效的域名在最后一次有效检查后的 TRUSTED_TTL 内视为可信，不再发送HEAD请求；
+    过期后下一个URL重新检查，结果有效则继续信任，无效则清零
+    """
+
+    TRUSTED_AFTER = 3
+    TRUSTED_TTL = 24 * 3600
+
+    def __init__(self, cache_file: Path, ttl: float = 7 * 24 * 3600, per_domain_limit: int = 2):
+        self.cache_file = Path(cache_file)
+        self.ttl = ttl
+        self.per_domain_limit = per_domain_limit
+        self._lock = threading.Lock()
+        self._domain_semaphores = {}
+        try:
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                self.domains = json.load(f)
+        except (OSError, ValueError):
+            self.domains = {}
+
+    @staticmethod
+    def domain_of(url: str) -> str:
+        return urlparse(url).netloc.lower()
+
+    def semaphore(self, url: str) -> threading.Semaphore:
+        with self._lock:
+            return self._domain_semaphores.setdefault(self.domain_of(url), threading.Semaphore(self.per_domain_limit))
+
+    def get(self, url: str) -> Optional[bool]:
+        domain = self.domains.get(self.domain_of(url))
+        if not domain:
+            return None
+        entry = domain["urls"].get(url)
+        if entry and time.time() - entry[1] <= self.ttl:
+            return entry[0]
+        if (domain.get("valid_streak", 0) >= self.TRUSTED_AFTER
+                and time.time() - domain.get("last_valid", 0) <= self.TRUSTED_TTL):
+            return True
+        return None
+
+    def put(self, url: str, valid: bool):
+        with self._lock:
+            domain = self.domains.setdefault(self.domain_of(url), {"urls": {}, "valid_streak": 0})
+            now = time.time()
+            domain["urls"][url] = [valid, now]
+            domain["valid_streak"] = domain.get("valid_streak", 0) + 1 if valid else 0
+            if valid:
+                domain["last_valid"] = now
+
+    def save(self):
+        with self._lock:
+            self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp_file = self.cache_file.with_suffix(f".{os.getpid()}.tmp")
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump(self.domains, f, ensure_ascii=False)
+            os.replace(tmp_file, self.cache_file)
+
+
+def normalize_arxiv_id(text: str) -> Optional[str]:
+    """从URL或文本中提取arXiv ID（去掉版本号），如 https://arxiv.org/pdf/2308.04079v2.pdf -> 2308.04079"""
+    if not text:
+        return None
+    match = re.search(r'arxiv[.:/a-z]*?(?:abs/|pdf/|arxiv:)?\s*(\d{4}\.\d{4,5})(?:v\d+)?', text, re.IGNORECASE)
+    if match:
+        return match.group(1)
+    match = re.search(r'arxiv\.org/(?:abs|pdf)/([a-z\-]+(?:\.[a-z]{2})?/\d{7})', text, re.IGNORECASE)
+    return match.group(1).lower() if match else None
+
+
+def normalize_doi(text: str) -> Optional[str]:
+    """从URL或文本中提取DOI（小写，去掉结尾的标点和.pdf）"""
+    if not text:
+        return None
+    match = re.search(r'10\.\d{4,9}/[^\s"<>?#&]+', text)
+    if not match:
+        return None
+    doi = re.sub(r'(\.pdf|/full|/abstract)$', '', match.group(0).rstrip('.,;)'), flags=re.IGNORECASE)
+    return doi.lower()
+
+
+class PaperDeduplicator:
+    """
+    跨搜索源的近似重复论文合并
+
+    - arXiv ID 或 DOI 相同的论文直接合并（两者都有且不同的不合并）
+    - 标题字符shingle的MinHash签名分段放入LSH桶，只对同桶的候选对计算Jaccard相似度，
+      总开销随结果数量线性增长；标题中的数字（版本、卷号）不同的不合并
+    - 一个标题等于另一个去掉副标题（冒号之后）的主标题时也合并
+    - 合并后的论文保留第一个来源的字段，缺失的字段从其他来源补全，并记录所有来源
+    """
+
+    MAX_BUCKET_COMPARISONS = 8
+
+    def __init__(self, num_perm: int = 64, bands: int = 16, threshold: float = 0.8, shingle_size: int = 4):
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.threshold = threshold
+        self.shingle_size = shingle_size
+        rng = random.Random(1)
+        self._prime = (1 << 61) - 1
+        self._perms = [(rng.randrange(1, self._prime), rng.randrange(0, self._prime)) for _ in range(num_perm)]
+
+    @staticmethod
+    def normalize_title(title: str) -> str:
+        title = unicodedata.normalize('NFKD', title or "")
+        title = "".join(ch for ch in title if not unicodedata.combining(ch)).lower()
+        return " ".join(re.sub(r'[^\w]+', ' ', title).split())
+
+    def shingles(self, normalized_title: str) -> set:
+        if len(normalized_title) <= self.shingle_size:
+            return {normalized_title}
+        return {normalized_title[i:i + self.shingle_size] for i in range(len(normalized_title) - self.shingle_size + 1)}
+
+    def signature(self, shingles: set) -> List[int]:
+        hashes = [int.from_bytes(hashlib.blake2b(sh.encode(), digest_size=8).digest(), 'big') for sh in shingles]
+        return [min((a * h + b) % self._prime for h in hashes) for a, b in self._perms]
+
+    def identifiers(self, paper: Dict[str, Any]):
+        text = " ".join(str(paper.get(field) or "") for field in ("arxiv_id", "url", "pdf_url", "doi"))
+        return normalize_arxiv_id(text), normalize_doi(text)
+
+    def deduplicate(self, papers: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """返回去重并合并元数据后的论文列表（保持第一次出现的顺序）"""
+        parent = list(range(len(papers)))
+
+        def find(i):
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+
+        infos = []
+        buckets = {}
+        for i, paper in enumerate(papers):
+            title = self.normalize_title(paper.get('title', ''))
+            arxiv_id, doi = self.identifiers(paper)
+            shingles = self.shingles(title)
+            main_title = self.normalize_title(re.split(r'[:?]', paper.get('title', ''), maxsplit=1)[0])
+            infos.append((title, main_title, shingles, arxiv_id, doi))
+            keys = [("arxiv", arxiv_id), ("doi", doi)]
+            if len(main_title.split()) >= 3:
+                keys.append(("main", main_title))
+            signature = self.signature(shingles)
+            keys += [("band", band, tuple(signature[band * self.rows:(band + 1) * self.rows])) for band in range(self.bands)]
+            for key in keys:
+                if key[-1]:
+                    buckets.setdefault(key, []).append(i)
+
+        # 每个桶内只和最近的若干个不同分组比较，避免大量相似标题落入同一个桶时退化为平方复杂度
+        for key, members in buckets.items():
+            for position, j in enumerate(members):
+                compared = set()
+                for i in reversed(members[:position]):
+                    root = find(i)
+                    if root in compared:
+                        continue
+                    compared.add(root)
+                    if root != find(j) and self._same_paper(infos[root], infos[j], key[0]):
+                        parent[find(j)] = root
+                        break
+                    if len(compared) >= self.MAX_BUCKET_COMPARISONS:
+                        break
+
+        groups = {}
+        for i in range(len(papers)):
+            groups.setdefault(find(i), []).append(papers[i])
+        return [self.merge(group) for group in groups.values()]
+
+    def _same_paper(self, a, b, reason: str) -> bool:
+        title_a, main_a, shingles_a, arxiv_a, doi_a = a
+        title_b, main_b, shingles_b, arxiv_b, doi_b = b
+        if (arxiv_a and arxiv_b and arxiv_a != arxiv_b) or (doi_a and doi_b and doi_a != doi_b):
+            return False
+        if reason in ("arxiv", "doi") or title_a == title_b:
+            return True
+        if re.findall(r'\d+', title_a) != re.findall(r'\d+', title_b):
+            return False
+        if reason == "main":
+            return title_a == main_b or title_b == main_a
+        return len(shingles_a & shingles_b) / max(1, len(shingles_a | shingles_b)) >= self.threshold
+
+    def merge(self, group: List[Dict[str, Any]]) -> Dict[str, Any]:
+        merged = dict(group[0])
+        for other in group[1:]:
+            for field, value in other.items():
+                if value and not merged.get(field):
+                    merged[field] = value
+            if len(other.get('abstract') or "") > len(merged.get('abstract') or ""):
+                merged['abstract'] = other['abstract']
+            if len(other.get('authors') or []) > len(merged.get('authors') or []):
+                merged['authors'] = other['authors']
+            if (other.get('citation_count') or 0) > (merged.get('citation_count') or 0):
+                merged['citation_count'] = other['citation_count']
+        arxiv_id, doi = None, None
+        for paper in group:
+            paper_arxiv, paper_doi = self.identifiers(paper)
+            arxiv_id, doi = arxiv_id or paper_arxiv, doi or paper_doi
+        if arxiv_id:
+            merged['arxiv_id'] = arxiv_id
+        if doi:
+            merged['doi'] = doi
+        if len(group) > 1:
+            merged['sources'] = list(dict.fromkeys(paper.get('source') for paper in group if paper.get('source')))
+        return merged
+
+
+class LocalPaperIndex:
+    """
+    已保存论文的本地全文索引（SQLite FTS5）
+
+    索引标题、作者、摘要以及EXTRACT_PDF提取的markdown内容，按BM25排序；
+    每次保存搜索结果时增量更新，--local 模式直接从索引回答查询，不访问网络
+    """
+
+    # bm25列权重：key(不索引), title, authors, abstract, content
+    COLUMN_WEIGHTS = (0.0, 10.0, 3.0, 4.0, 1.0)
+    # search() 附加的字段，只属于本次查询结果，不写回论文元数据
+    TRANSIENT_FIELDS = ("local_score", "markdown_path", "pdf_path")
+
+    def __init__(self, db_file: Path):
+        self.db_file = Path(db_file)
+        self.db_file.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(self.db_file), timeout=30)
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS papers (
+                id INTEGER PRIMARY KEY,
+                key TEXT UNIQUE NOT NULL,
+                data TEXT NOT NULL,
+                markdown_path TEXT,
+                pdf_path TEXT,
+                updated REAL
+            );
+            CREATE VIRTUAL TABLE IF NOT EXISTS paper_fts USING fts5(
+                key UNINDEXED, title, authors, abstract, content,
+                tokenize = 'porter unicode61 remove_diacritics 2'
+            );
+            CREATE TABLE IF NOT EXISTS indexed_files (
+                path TEXT PRIMARY KEY,
+                mtime REAL NOT NULL
+            );
+        """)
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(papers)")}
+        if "pdf_path" not in columns:
+            # 旧版本创建的索引没有pdf_path列
+            self.conn.execute("ALTER TABLE papers ADD COLUMN pdf_path TEXT")
+            self.conn.commit()
+
+    @staticmethod
+    def paper_key(title: str) -> str:
+        return hashlib.md5(normalize_query(title or "untitled").encode()).hexdigest()
+
+    @classmethod
+    def strip_transient(cls, paper: Dict[str, Any]) -> Dict[str, Any]:
+        """去掉 search() 附加的临时字段，得到可以保存的论文元数据"""
+        return {k: v for k, v in paper.items() if k not in cls.TRANSIENT_FIELDS}
+
+    @staticmethod
+    def match_expression(query: str) -> str:
+        """把自由文本查询转为FTS5表达式（各词OR连接，避免用户输入中的FTS语法字符报错）"""
+        return " OR ".join(f'"{token}"' for token in re.findall(r"\w+", query.lower()))
+
+    def add_papers(self, papers: List[Dict[str, Any]], commit: bool = True) -> int:
+        """添加或更新论文元数据（保留已索引的markdown内容），返回处理的论文数量"""
+        count = 0
+        for paper in papers:
+            if not isinstance(paper, dict) or not paper.get("title"):
+                continue
+            paper = self.strip_transient(paper)
+            key = self.paper_key(paper["title"])
+            row = self.conn.execute("SELECT id, markdown_path FROM papers WHERE key = ?", (key,)).fetchone()
+            content = ""
+            if row:
+                paper_id, markdown_path = row
+                fts_row = self.conn.execute("SELECT content FROM paper_fts WHERE rowid = ?", (paper_id,)).fetchone()
+                content = fts_row[0] if fts_row else ""
+                self.conn.execute("UPDATE papers SET data = ?, updated = ? WHERE id = ?",
+                                  (json.dumps(paper, ensure_ascii=False), time.time(), paper_id))
+                self.conn.execute("DELETE FROM paper_fts WHERE rowid = ?", (paper_id,))
+            else:
+                paper_id = self.conn.execute(
+                    "INSERT INTO papers (key, data, updated) VALUES (?, ?, ?)",
+                    (key, json.dumps(paper, ensure_ascii=False), time.time())).lastrowid
+            self._insert_fts(paper_id, key, paper, content)
+            count += 1
+        if commit:
+            self.conn.commit()
+        return count
+
+    def add_markdown(self, title: str, markdown_path: str, pdf_path: Optional[str] = None) -> bool:
+        """索引EXTRACT_PDF提取的markdown全文（及其来源PDF路径），论文尚未索引时以标题创建条目"""
+        try:
+            with open(markdown_path, 'r', encoding='utf-8') as f:
+                content = f.read()
+        except OSError:
+            return False
+        key = self.paper_key(title)
+        row = self.conn.execute("SELECT id, data FROM papers WHERE key = ?", (key,)).fetchone()
+        if row:
+            paper_id, paper = row[0], json.loads(row[1])
+            self.conn.execute("DELETE FROM paper_fts WHERE rowid = ?", (paper_id,))
+        else:
+            paper = {"title": title}
+            paper_id = self.conn.execute(
+                "INSERT INTO papers (key, data, updated) VALUES (?, ?, ?)",
+                (key, json.dumps(paper, ensure_ascii=False), time.time())).lastrowid
+        self.conn.execute("UPDATE papers SET markdown_path = ?, pdf_path = ?, updated = ? WHERE id = ?",
+                          (str(markdown_path), str(pdf_path) if pdf_path else None, time.time(), paper_id))
+        self._insert_fts(paper_id, key, paper, content)
+        self.conn.commit()
+        return True
+
+    def mark_files(self, paths: List[Path]):
+        """记录已经索引过的结果文件，sync_files 不再重复读取"""
+        self.conn.executemany("INSERT OR REPLACE INTO indexed_files (path, mtime) VALUES (?, ?)",
+                              [(str(path), path.stat().st_mtime) for path in paths if path.exists()])
+        self.conn.commit()
+
+    def sync_files(self, *directories: Path) -> int:
+        """增量索引目录中新增或修改过的结果文件（search_results_*.json 和单篇论文JSON）"""
+        indexed = dict(self.conn.execute("SELECT path, mtime FROM indexed_files"))
+        changed = []
+        count = 0
+        for directory in directories:
+            for path in sorted(Path(directory).glob("*.json")):
+                if indexed.get(str(path)) == path.stat().st_mtime:
+                    continue
+                try:
+                    with open(path, 'r', encoding='utf-8') as f:
+                        data = json.load(f)
+                except (OSError, ValueError):
+                    continue
+                papers = data.get("papers", []) if isinstance(data, dict) and "papers" in data else [data]
+                count += self.add_papers(papers, commit=False)
+                changed.append(path)
+        self.conn.commit()
+        self.mark_files(changed)
+        return count
+
+    def search(self, query: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """按BM25相关度返回论文（附带 local_score，以及已提取时的 markdown_path/pdf_path）"""
+        expression = self.match_expression(query)
+        if not expression:
+            return []
+        rows = self.conn.execute(
+            f"SELECT papers.data, papers.markdown_path, papers.pdf_path, bm25(paper_fts, {', '.join(map(str, self.COLUMN_WEIGHTS))}) AS score "
+            "FROM paper_fts JOIN papers ON papers.id = paper_fts.rowid "
+            "WHERE paper_fts MATCH ? ORDER BY score LIMIT ?",
+            (expression, limit)).fetchall()
+        papers = []
+        for data, markdown_path, pdf_path, score in rows:
+            paper = json.loads(data)
+            paper["local_score"] = round(-score, 6)
+            if markdown_path and os.path.exists(markdown_path):
+                paper["markdown_path"] = markdown_path
+            if pdf_path and os.path.exists(pdf_path):
+                paper["pdf_path"] = pdf_path
+            papers.append(paper)
+        return papers
+
+    def _insert_fts(self, paper_id: int, key: str, paper: Dict[str, Any], content: str):
+        authors = paper.get("authors") or []
+        if isinstance(authors, list):
+            authors = " ".join(str(author) for author in authors)
+        self.conn.execute(
+            "INSERT INTO paper_fts (rowid, key, title, authors, abstract, content) VALUES (?, ?, ?, ?, ?, ?)",
+            (paper_id, key, paper.get("title") or "", authors, paper.get("abstract") or "", content or ""))
+
+
 class MultiPlatformPaperSearcher:
     """多平台论文搜索器"""
-    
-    def __init__(self):
+
+    # 同时验证的PDF链接数量上限
+    MAX_VALIDATION_WORKERS = 8
+
+    def __init__(self, use_cache: bool = True):
         self.session = requests.Session()
         self.session.headers.update({
             "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
@@ -97,6 +522,38 @@ class MultiPlatformPaperSearcher:
         self.output_dir.mkdir(parents=True, exist_ok=True)
         self.results_dir.mkdir(parents=True, exist_ok=True)
         self.papers_dir.mkdir(parents=True, exist_ok=True)
+        cache_dir = self.output_dir / "cache"
+        self.query_cache = QueryResultCache(cache_dir / "query_cache.json") if use_cache else None
+        self.url_cache = UrlValidityCache(cache_dir / "url_validity.json")
+        self._local_index = None
+
+    @property
+    def local_index(self) -> LocalPaperIndex:
+        """本地全文索引（首次使用时打开）"""
+        if self._local_index is None:
+            self._local_index = LocalPaperIndex(self.output_dir / "paper_index.db")
+        return self._local_index
+
+    def search_local(self, query: str, max_results: int = 10) -> Dict[str, Any]:
+        """
+        只从本地全文索引搜索（不访问网络）
+
+        先增量索引 results/ 和 papers/ 中尚未索引的历史文件，再按BM25排序返回
+        """
+        self.local_index.sync_files(self.results_dir, self.papers_dir)
+        papers = self.local_index.search(query, max_results)
+        result = {
+            "success": True,
+            "query": query,
+            "max_results": max_results,
+            "total_papers_found": len(papers),
+            "source_results": {"local": len(papers)},
+            "papers": papers,
+            "timestamp": datetime.now().isoformat()
+        }
+        # 同样保存结果文件，LEARN 从最新的结果文件读取论文列表
+        self._save_results(result)
+        return result
     
     def search_papers(self, query: str, max_results: int = 10, sources: List[str] = None) -> Dict[str, Any]:
         """
@@ -110,36 +567,9 @@ class MultiPlatformPaperSearcher:
         Returns:
             搜索结果字典
         """
-        if sources is None:
-            sources = ['arxiv', 'google_scholar']
-        
-        all_papers = []
-        source_results = {}
-        
-        # 搜索各个平台
-        for source in sources:
-            try:
-                if source == 'arxiv':
-                    papers = self._search_arxiv(query, max_results)
-                elif source == 'google_scholar':
-                    # 对于Google Scholar使用双重阈值机制
-                    threshold = min(max_results, 10)  # 默认阈值10，但不超过max_results
-                    max_eval = 100  # 默认最大评估100篇论文
-                    papers = self._search_google_scholar(query, max_results, threshold, max_eval)
-                else:
-                    continue
-                
-                source_results[source] = len(papers)
-                all_papers.extend(papers)
-                
-                # 添加延迟以避免被封
-                time.sleep(1)
-                
-            except Exception as e:
-                source_results[source] = f"Error: {str(e)}"
-                print(f"Error searching {source}: {e}", file=sys.stderr)
-                continue
-        
+        # 对于Google Scholar使用双重阈值机制：默认阈值10，但不超过max_results；最多评估100篇论文
+        all_papers, source_results = self._search_sources(query, max_results, sources, min(max_results, 10), 100)
+
         # 去重和排序
         unique_papers = self._remove_duplicates(all_papers)
         final_papers = unique_papers[:max_results]
@@ -175,34 +605,8 @@ class MultiPlatformPaperSearcher:
         Returns:
             搜索结果字典
         """
-        if sources is None:
-            sources = ['arxiv', 'google_scholar']
-        
-        all_papers = []
-        source_results = {}
-        
-        # 搜索各个平台
-        for source in sources:
-            try:
-                if source == 'arxiv':
-                    papers = self._search_arxiv(query, max_results)
-                elif source == 'google_scholar':
-                    # 对于Google Scholar使用双重阈值机制
-                    papers = self._search_google_scholar(query, max_results, threshold, max_eval)
-                else:
-                    continue
-                
-                source_results[source] = len(papers)
-                all_papers.extend(papers)
-                
-                # 添加延迟以避免被封
-                time.sleep(1)
-                
-            except Exception as e:
-                source_results[source] = f"Error: {str(e)}"
-                print(f"Error searching {source}: {e}", file=sys.stderr)
-                continue
-        
+        all_papers, source_results = self._search_sources(query, max_results, sources, threshold, max_eval)
+
         # 去重和排序
         unique_papers = self._remove_duplicates(all_papers)
         final_papers = unique_papers[:max_results]
@@ -225,6 +629,53 @@ class MultiPlatformPaperSearcher:
         
         return result
     
+    def _search_sources(self, query: str, max_results: int, sources: Optional[List[str]],
+                        threshold: int, max_eval: int):
+        """
+        并行查询各个搜索源（不同站点之间不需要串行等待），命中查询缓存的源直接返回
+
+        Returns:
+            (按sources顺序合并的论文列表, {source: 数量或错误信息})
+        """
+        if sources is None:
+            sources = ['arxiv', 'google_scholar']
+
+        searches = {}
+        for source in sources:
+            if source == 'arxiv':
+                searches[source] = (lambda: self._search_arxiv(query, max_results), (max_results,))
+            elif source == 'google_scholar':
+                searches[source] = (lambda: self._search_google_scholar(query, max_results, threshold, max_eval),
+                                    (max_results, threshold, max_eval))
+
+        def run(source):
+            search, limits = searches[source]
+            key = QueryResultCache.make_key(query, source, *limits)
+            cached = self.query_cache.get(key) if self.query_cache else None
+            if cached is not None:
+                print(f"{source}: using cached results for '{query}'", file=sys.stderr)
+                return cached
+            papers = search()
+            if self.query_cache and papers:
+                self.query_cache.put(key, papers)
+            return papers
+
+        source_papers = {}
+        source_results = {}
+        with ThreadPoolExecutor(max_workers=max(1, len(searches))) as executor:
+            futures = {source: executor.submit(run, source) for source in searches}
+            for source, future in futures.items():
+                try:
+                    source_papers[source] = future.result()
+                    source_results[source] = len(source_papers[source])
+                except Exception as e:
+                    source_results[source] = f"Error: {str(e)}"
+                    print(f"Error searching {source}: {e}", file=sys.stderr)
+        self.url_cache.save()
+
+        all_papers = [paper for source in searches for paper in source_papers.get(source, [])]
+        return all_papers, source_results
+
     def _search_arxiv(self, query: str, max_results: int) -> List[Dict[str, Any]]:
         """搜索arXiv，改进搜索策略以提高相关性"""
         papers = []
@@ -359,38 +810,19 @@ class MultiPlatformPaperSearcher:
             
             print(f"Found {len(paper_entries)} paper entries from Google Scholar", file=sys.stderr)
             
-            for entry in paper_entries:
-                try:
-                    evaluated_count += 1
-                    print(f"Evaluating paper {evaluated_count}/{max_eval}...", file=sys.stderr)
-                    
-                    paper = self._parse_google_scholar_entry(entry)
-                    if paper:
-                        papers.append(paper)
-                        print(f"Valid PDF paper found: {len(papers)}/{threshold}", file=sys.stderr)
-                        
-                        # 阈值1：如果已经找到足够的有效PDF论文，停止处理
-                        if len(papers) >= threshold:
-                            print(f"Reached threshold of {threshold} valid PDF papers, stopping search", file=sys.stderr)
-                            break
-                    else:
-                        print(f"Paper {evaluated_count} skipped (no valid PDF)", file=sys.stderr)
-                    
-                    # 阈值2：如果已经评估了足够多的论文，停止处理
-                    if evaluated_count >= max_eval:
-                        print(f"Reached max evaluation limit of {max_eval} papers, stopping search", file=sys.stderr)
-                        break
-                        
-                except Exception as e:
-                    evaluated_count += 1
-                    print(f"Error parsing entry {evaluated_count}: {e}", file=sys.stderr)
-                    
-                    # 即使出错也要检查max_eval阈值
-                    if evaluated_count >= max_eval:
-                        print(f"Reached max evaluation limit of {max_eval} papers, stopping search", file=sys.stderr)
-                        break
-                    continue
-            
+            # 阈值2：最多评估max_eval篇论文
+            candidates = []
+            for entry in paper_entries[:max_eval]:
+                evaluated_count += 1
+                paper = self._parse_google_scholar_entry(entry, validate=False)
+                if paper:
+                    candidates.append(paper)
+                else:
+                    print(f"Paper {evaluated_count} skipped (no PDF link)", file=sys.stderr)
+
+            # 阈值1：按原顺序保留前threshold篇PDF链接有效的论文（链接并发验证）
+            papers = self._filter_valid_pdf_papers(candidates, threshold)
+
             print(f"Google Scholar search completed: {len(papers)} valid papers found after evaluating {evaluated_count} papers", file=sys.stderr)
                     
         except Exception as e:
@@ -443,8 +875,8 @@ class MultiPlatformPaperSearcher:
             print(f"Error parsing arXiv entry: {e}", file=sys.stderr)
             return None
     
-    def _parse_google_scholar_entry(self, entry) -> Optional[Dict[str, Any]]:
-        """解析Google Scholar条目，只返回有PDF下载链接的论文"""
+    def _parse_google_scholar_entry(self, entry, validate: bool = True) -> Optional[Dict[str, Any]]:
+        """解析Google Scholar条目，只返回有PDF下载链接的论文（validate=False时由调用方批量验证链接）"""
         try:
             # 提取标题和URL
             title_elem = entry.find('h3', class_='gs_rt')
@@ -504,7 +936,7 @@ class MultiPlatformPaperSearcher:
                 return None
             
             # 验证PDF链接是否可访问（简单检查，避免过多请求）
-            if not self._validate_pdf_url(pdf_url):
+            if validate and not self._validate_pdf_url(pdf_url):
                 print(f"Skipping paper with invalid PDF URL: {title[:50]}...", file=sys.stderr)
                 return None
             
@@ -570,7 +1002,40 @@ class MultiPlatformPaperSearcher:
             print(f"Error parsing Google Scholar entry: {e}", file=sys.stderr)
             return None
     
+    def _filter_valid_pdf_papers(self, candidates: List[Dict[str, Any]], threshold: int) -> List[Dict[str, Any]]:
+        """
+        并发验证候选论文的PDF链接，按原顺序返回前threshold篇有效论文
+
+        分批验证（每批为还缺少的数量），找够threshold篇后不再验证剩余链接
+        """
+        papers = []
+        index = 0
+        with ThreadPoolExecutor(max_workers=self.MAX_VALIDATION_WORKERS) as executor:
+            while index < len(candidates) and len(papers) < threshold:
+                batch = candidates[index:index + max(threshold - len(papers), self.MAX_VALIDATION_WORKERS)]
+                index += len(batch)
+                for paper, valid in zip(batch, executor.map(lambda p: self._validate_pdf_url(p["pdf_url"]), batch)):
+                    if not valid:
+                        print(f"Skipping paper with invalid PDF URL: {paper['title'][:50]}...", file=sys.stderr)
+                    elif len(papers) < threshold:
+                        papers.append(paper)
+        if len(papers) >= threshold:
+            print(f"Reached threshold of {threshold} valid PDF papers", file=sys.stderr)
+        return papers
+
     def _validate_pdf_url(self, pdf_url: str) -> bool:
+        """验证PDF URL是否可访问（结果按域名缓存，同一域名的请求限制并发）"""
+        cached = self.url_cache.get(pdf_url) if pdf_url else None
+        if cached is not None:
+            return cached
+        if pdf_url and pdf_url.startswith('http'):
+            with self.url_cache.semaphore(pdf_url):
+                valid = self._check_pdf_url(pdf_url)
+            self.url_cache.put(pdf_url, valid)
+            return valid
+        return False
+
+    def _check_pdf_url(self, pdf_url: str) -> bool:
         """验证PDF URL是否可访问（简单检查）"""
         try:
             # 基本URL格式检查
@@ -610,19 +1075,8 @@ class MultiPlatformPaperSearcher:
             return False
     
     def _remove_duplicates(self, papers: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        """去重"""
-        unique_papers = []
-        seen_titles = set()
-        
-        for paper in papers:
-            title = paper.get('title', '').lower().strip()
-            title_hash = hashlib.md5(title.encode()).hexdigest()
-            
-            if title_hash not in seen_titles:
-                seen_titles.add(title_hash)
-                unique_papers.append(paper)
-        
-        return unique_papers
+        """去重（arXiv ID/DOI 与标题MinHash近似匹配），并合并各来源的元数据"""
+        return PaperDeduplicator().deduplicate(papers)
     
     def _save_results(self, result: Dict[str, Any]):
         """保存搜索结果到JSON文件"""
@@ -632,13 +1086,23 @@ class MultiPlatformPaperSearcher:
             json.dump(result, f, ensure_ascii=False, indent=2)
         print(f"Results saved to {result_file}", file=sys.stderr)
 
-        # 保存每篇论文到单独的文件
-        for paper in result.get("papers", []):
+        # 保存每篇论文到单独的文件（不含本地搜索附加的临时字段）
+        saved_files = [result_file]
+        papers = [LocalPaperIndex.strip_transient(paper) for paper in result.get("papers", [])]
+        for paper in papers:
             paper_title = paper.get("title", "untitled").replace("/", "-")
             paper_file = self.papers_dir / f"{paper_title}.json"
             with open(paper_file, 'w', encoding='utf-8') as f:
                 json.dump(paper, f, ensure_ascii=False, indent=2)
             print(f"Paper saved to {paper_file}", file=sys.stderr)
+            saved_files.append(paper_file)
+
+        # 增量更新本地全文索引
+        try:
+            self.local_index.add_papers(papers)
+            self.local_index.mark_files(saved_files)
+        except sqlite3.Error as e:
+            print(f"Warning: failed to update local paper index: {e}", file=sys.stderr)
 
 def format_output(result: Dict[str, Any], command_identifier=None):
     """格式化输出"""
@@ -690,6 +1154,8 @@ Arguments:
 Options:
   --max-results N      Maximum number of results (default: 10)
   --sources LIST       Comma-separated list of sources: arxiv,google_scholar
+  --no-cache           Ignore cached results (repeat searches are cached for 6 hours)
+  --local              Search only the local full-text index of saved papers (no network)
   --help, -h           Show this help message
 
 Examples:
@@ -697,6 +1163,7 @@ Examples:
   SEARCH_PAPER "machine learning"                 # Search all sources
   SEARCH_PAPER "deep learning" --max-results 20  # Limit results
   SEARCH_PAPER "NLP" --sources arxiv,google_scholar  # Specific sources
+  SEARCH_PAPER "gaussian splatting" --local       # Search previously saved papers
   SEARCH_PAPER --help                             # Show help"""
     
     print(help_text)
@@ -721,7 +1188,9 @@ def main():
     parser.add_argument("--sources", type=str, help="Comma-separated list of sources: arxiv,google_scholar")
     parser.add_argument("--threshold", type=int, default=10, help="Threshold for valid PDF papers (Google Scholar only)")
     parser.add_argument("--max-eval", type=int, default=100, help="Maximum number of papers to evaluate (Google Scholar only)")
-    
+    parser.add_argument("--no-cache", action="store_true", help="Ignore cached results for repeated queries")
+    parser.add_argument("--local", action="store_true", help="Search only the local full-text index of saved papers")
+
     args = parser.parse_args()
     
     query = args.query
@@ -747,10 +1216,12 @@ def main():
                 return 0
             return 1
             
-    searcher = MultiPlatformPaperSearcher()
-    
+    searcher = MultiPlatformPaperSearcher(use_cache=not args.no_cache)
+
     # 传递新的阈值参数
-    if 'google_scholar' in (sources or ['arxiv', 'google_scholar']):
+    if args.local:
+        result = searcher.search_local(query, args.max_results)
+    elif 'google_scholar' in (sources or ['arxiv', 'google_scholar']):
         # 如果包含Google Scholar，需要修改搜索方法以支持新参数
         result = searcher.search_papers_with_thresholds(query, args.max_results, sources, args.threshold, args.max_eval)
     else:
@@ -303,6 +303,35 @@ class TestExtractImg(unittest.TestCase):
                      "Help should describe --prompt functionality")
         print(f"--prompt option documented in help")
 
+    def test_unimernet_results_use_shared_analysis_cache(self):
+        """Test formula results are stored under the analysis key scheme and image lookups defer to IMG2TEXT"""
+        import shutil
+        import tempfile
+        sys.path.insert(0, str(Path(__file__).parent.parent))
+        import EXTRACT_IMG
+        if not EXTRACT_IMG.CACHE_AVAILABLE:
+            self.skipTest("Cache system not available")
+        
+        cache_dir = Path(tempfile.mkdtemp())
+        try:
+            image_path = cache_dir / "formula.png"
+            image_path.write_bytes(b"formula image bytes")
+            processor = EXTRACT_IMG.UnifiedImageProcessor()
+            processor.cache_system = EXTRACT_IMG.ImageCacheSystem(cache_dir)
+            result = {"success": True, "result": "x^2", "content_type": "formula", "processor": "unimernet"}
+            processor.store_result_in_cache(str(image_path), result)
+            processor.store_result_in_cache(str(image_path), {"success": True, "result": "a cat", "content_type": "image"})
+            
+            key = processor.get_cache_key(str(image_path), "formula")
+            self.assertEqual(key, processor.cache_system.get_analysis_key(
+                b"formula image bytes", *EXTRACT_IMG.UNIMERNET_CACHE_PARAMS))
+            self.assertEqual(list(EXTRACT_IMG.ImageCacheSystem(cache_dir).cache), [key])
+            cached = processor.get_cached_result(str(image_path), "table")
+            self.assertEqual((cached["result"], cached["from_cache"]), ("x^2", True))
+            self.assertIsNone(processor.get_cached_result(str(image_path), "image"))
+        finally:
+            shutil.rmtree(cache_dir)
+
     def test_cache_hit_functionality(self):
         """Test that cache system works correctly with cache hits"""
         if not self.test_img.exists():
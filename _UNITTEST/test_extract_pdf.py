@@ -312,6 +312,64 @@ class TestExtractPDF(unittest.TestCase):
             # Each file should process independently
             self.assertIn(result.returncode, [0, 1], f"Processing {test_pdf.name} should handle gracefully")
 
+    def test_parallel_page_pipeline_streams_parts_in_order(self):
+        """Page chunks are written to part files and merged in page order without holding image bytes"""
+        if PDFExtractor is None:
+            self.skipTest("PDFExtractor class not available")
+        import EXTRACT_PDF
+
+        data_dir = self.temp_dir / "data"
+        chunks_seen = []
+
+        def fake_chunk(pdf_path, page_numbers, part_file, images_dir):
+            chunks_seen.append(page_numbers)
+            Path(part_file).write_text('\n'.join(f"# Page {n + 1}\n\n![](images/p{n}.png)\n\n" for n in page_numbers))
+            (Path(images_dir) / f"p{page_numbers[0]}.png").write_bytes(b"png")
+            return [{"hash": f"p{n}", "filename": f"p{n}.png", "bbox": [], "page": n + 1} for n in page_numbers]
+
+        pdf_path = self.temp_dir / "book.pdf"
+        pdf_path.write_bytes(b"%PDF")
+        work_dir = self.temp_dir / "work"
+        work_dir.mkdir()
+        with patch.object(EXTRACT_PDF, "get_pdf_extractor_data_dir", return_value=data_dir), \
+             patch.object(EXTRACT_PDF, "extract_page_chunk", side_effect=fake_chunk):
+            pages = list(range(20))
+            part_files, images_data = PDFExtractor()._extract_pages(pdf_path, pages, work_dir, workers=1)
+            self.assertEqual(chunks_seen, [pages[i:i + EXTRACT_PDF.PAGE_CHUNK_SIZE] for i in range(0, 20, EXTRACT_PDF.PAGE_CHUNK_SIZE)])
+            self.assertEqual([img["page"] for img in images_data], list(range(1, 21)))
+            self.assertTrue(all("bytes" not in img for img in images_data))
+
+            data_md, output_md = EXTRACT_PDF.save_to_unified_data_directory(
+                None, pdf_path, None, images_data, self.temp_dir, content_files=part_files
+            )
+
+        expected = '\n'.join('\n'.join(f"# Page {n + 1}\n\n![](images/p{n}.png)\n\n" for n in chunk) for chunk in chunks_seen)
+        self.assertEqual(Path(data_md).read_text(), expected)
+        output = Path(output_md).read_text()
+        self.assertEqual(re.findall(r"# Page (\d+)", output), [str(n) for n in range(1, 21)])
+        self.assertIn(f"]({data_dir / 'images' / 'p19.png'})", output)
+        self.assertTrue((self.temp_dir / "images" / "p0.png").exists())
+
+        # With PyMuPDF available, the multi-process pipeline produces the same markdown as a single process
+        try:
+            import fitz  # noqa: F401
+        except ImportError:
+            return
+        if not self.test_pdf_simple.exists():
+            return
+        outputs = []
+        for workers in (1, 2):
+            out_dir = self.temp_dir / f"out_{workers}"
+            out_dir.mkdir()
+            with patch.object(EXTRACT_PDF, "get_pdf_extractor_data_dir", return_value=data_dir), \
+                 patch.object(EXTRACT_PDF, "PARALLEL_MIN_PAGES", 0), \
+                 patch.object(EXTRACT_PDF, "PAGE_CHUNK_SIZE", 1), \
+                 patch.object(EXTRACT_PDF, "PAGE_WORKERS", workers):
+                success, _ = PDFExtractor().extract_pdf_basic(self.test_pdf_simple, output_dir=out_dir)
+            self.assertTrue(success)
+            outputs.append((out_dir / f"{self.test_pdf_simple.stem}.md").read_text())
+        self.assertEqual(outputs[0], outputs[1])
+
 
 def run_tests():
     """Run all tests with detailed output"""
@@ -4,6 +4,8 @@ import subprocess
 import sys
 import os
 import tempfile
+import threading
+import time
 import json
 import argparse
 import re
@@ -939,6 +941,967 @@ class GoogleDriveUploadImprovementsTest(unittest.TestCase):
         print(f"File content integrity verified")
 
 
+GDS_MODULES_DIR = Path(__file__).parent.parent / 'GOOGLE_DRIVE_PROJ' / 'modules'
+
+def load_gds_module(name):
+    """Load a self-contained GDS module without importing the whole modules package"""
+    import importlib.util
+    spec = importlib.util.spec_from_file_location(f"gds_{name}", GDS_MODULES_DIR / f"{name}.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+class FakeDriveFiles:
+    """Minimal in-memory stand-in for service.files() used by GDS module unit tests"""
+    
+    def __init__(self, files=None):
+        # id -> {"id", "name", "parents", "mimeType", "content", ...}
+        self.files = {f["id"]: f for f in (files or [])}
+        self.list_queries = []
+        self.media_requests = []
+        self.range_requests = []
+    
+    def _request(self, value):
+        request = MagicMock()
+        request.execute.return_value = value
+        return request
+    
+    def list(self, q="", **kwargs):
+        self.list_queries.append(q)
+        parents = re.findall(r"'([^']+)' in parents", q)
+        names = re.findall(r"name='((?:[^'\\]|\\.)*)'", q)
+        matched = []
+        for f in self.files.values():
+            if parents and not set(parents) & set(f.get("parents", [])):
+                continue
+            if names and f["name"] not in names:
+                continue
+            if "mimeType='application/vnd.google-apps.folder'" in q and f.get("mimeType") != 'application/vnd.google-apps.folder':
+                continue
+            matched.append({k: v for k, v in f.items() if k != "content"})
+        return self._request({"files": matched})
+    
+    def get_media(self, fileId, **kwargs):
+        self.media_requests.append(fileId)
+        content = self.files[fileId].get("content", b"")
+        drive = self
+        
+        class MediaRequest:
+            # 支持 headers["Range"] = "bytes=a-b"，与HttpRequest一致
+            def __init__(self):
+                self.headers = {}
+            
+            def execute(self):
+                byte_range = self.headers.get("Range")
+                if not byte_range:
+                    return content
+                drive.range_requests.append(byte_range)
+                start, end = (int(x) for x in byte_range[len("bytes="):].split("-"))
+                return content[start:end + 1]
+        
+        return MediaRequest()
+    
+    def get(self, fileId, **kwargs):
+        return self._request({k: v for k, v in self.files[fileId].items() if k != "content"})
+
+
+class FakeResumableDrive:
+    """Local HTTP server speaking the Drive resumable upload protocol"""
+
+    def __init__(self):
+        import hashlib
+        import http.server
+        import threading
+        drive = self
+        self.sessions = {}
+        self.chunk_requests = []
+        self.fail_chunks = set()  # indexes (in chunk_requests order) answered with 503
+        self.corrupt_md5 = False
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _reply(self, status, body=None, headers=None):
+                payload = json.dumps(body).encode() if body is not None else b""
+                self.send_response(status)
+                for key, value in (headers or {}).items():
+                    self.send_header(key, value)
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def do_POST(self):
+                metadata = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                session_id = str(len(drive.sessions) + 1)
+                drive.sessions[session_id] = {"name": metadata["name"], "parents": metadata["parents"],
+                                              "size": int(self.headers["X-Upload-Content-Length"]),
+                                              "data": bytearray()}
+                host, port = self.server.server_address
+                self._reply(200, headers={"Location": f"http://{host}:{port}/session/{session_id}"})
+
+            def _status(self, session_id, session):
+                if len(session["data"]) == session["size"]:
+                    md5 = hashlib.md5(bytes(session["data"])).hexdigest()
+                    if drive.corrupt_md5:
+                        md5 = "0" * 32
+                    return self._reply(200, {"id": f"file{session_id}", "name": session["name"],
+                                             "size": str(session["size"]), "md5Checksum": md5})
+                headers = {"Range": f"bytes=0-{len(session['data']) - 1}"} if session["data"] else {}
+                self._reply(308, headers=headers)
+
+            def do_PUT(self):
+                session_id = self.path.rsplit("/", 1)[-1]
+                session = drive.sessions[session_id]
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                content_range = self.headers["Content-Range"]
+                if content_range.startswith("bytes */"):
+                    return self._status(session_id, session)
+                start = int(content_range.split(" ")[1].split("-")[0])
+                index = len(drive.chunk_requests)
+                drive.chunk_requests.append((session_id, start, len(body)))
+                if index in drive.fail_chunks:
+                    return self._reply(503)
+                if start == len(session["data"]):
+                    session["data"].extend(body)
+                self._status(session_id, session)
+
+        self.server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.endpoint = "http://127.0.0.1:%d" % self.server.server_address[1]
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *args):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class GDSModuleUnitTest(unittest.TestCase):
+    """Offline unit tests for self-contained GDS modules"""
+    
+    def _fake_service(self, files):
+        fake_files = FakeDriveFiles(files)
+        service = MagicMock()
+        service.files.return_value = fake_files
+        drive_service = MagicMock()
+        drive_service.service = service
+        return drive_service, fake_files
+    
+    def test_result_retriever_single_query_per_poll(self):
+        """Result files are looked up by exact name and read by ID without ls"""
+        module = load_gds_module('result_retriever')
+        folder = 'application/vnd.google-apps.folder'
+        drive_service, fake_files = self._fake_service([
+            {"id": "tmp", "name": "tmp", "parents": ["root"], "mimeType": folder},
+            {"id": "r1", "name": "cmd_1.json", "parents": ["tmp"], "size": "20", "content": b'{"exit_code": 0}'},
+            {"id": "r2", "name": "cmd_2.json", "parents": ["tmp"], "size": "20", "content": b'{"exit_code": 1}'},
+        ])
+        main_instance = MagicMock(REMOTE_ROOT_FOLDER_ID="root")
+        retriever = module.ResultRetriever(drive_service, main_instance, initial_delay=0.01)
+        
+        self.assertEqual(retriever.wait_for_result("cmd_1.json", max_wait_time=1), '{"exit_code": 0}')
+        # One lookup for ~/tmp, one name query, one media download
+        self.assertEqual(retriever.api_calls, 3)
+        
+        results = dict(retriever.watch(["cmd_1.json", "cmd_2.json"], max_wait_time=1))
+        self.assertEqual(set(results), {"cmd_1.json", "cmd_2.json"})
+        self.assertIn("name='cmd_1.json' or name='cmd_2.json'", fake_files.list_queries[-1])
+        
+        self.assertIsNone(retriever.wait_for_result("missing.json", max_wait_time=0.05))
+
+    def test_lazy_loading_defers_service_and_managers(self):
+        """Drive service and managers are only built on first access"""
+        module = load_gds_module('lazy_loading')
+        built = []
+        service = module.LazyDriveService(lambda: built.append(1) or MagicMock(service="api"))
+        self.assertFalse(service.is_loaded)
+        self.assertEqual(service.service, "api")
+        self.assertTrue(service)
+        self.assertEqual(built, [1])
+
+        unavailable = module.LazyDriveService(lambda: None)
+        self.assertFalse(unavailable)
+        self.assertIsNone(getattr(unavailable, "service", None))
+
+        class Host(module.LazyManagerMixin):
+            _LAZY_MANAGERS = {"retriever": ("result_retriever", "ResultRetriever")}
+            _LAZY_PACKAGE = "gds_lazy_test_pkg"
+            drive_service = "drive"
+
+        package = type(sys)("gds_lazy_test_pkg")
+        package.__path__ = [str(GDS_MODULES_DIR)]
+        with patch.dict(sys.modules, {"gds_lazy_test_pkg": package}):
+            host = Host()
+            self.assertEqual(host.loaded_managers(), [])
+            retriever = host.retriever
+            self.assertIs(host.retriever, retriever)
+            self.assertIs(retriever.main_instance, host)
+            self.assertEqual(host.loaded_managers(), ["retriever"])
+            with self.assertRaises(AttributeError):
+                host.missing_manager
+
+    def test_daemon_forwards_shell_commands(self):
+        """The daemon client streams output and exit codes over the Unix socket"""
+        import importlib.util
+        import io
+        import threading
+        spec = importlib.util.spec_from_file_location(
+            "gds_daemon", GDS_MODULES_DIR.parent / "gds_daemon.py")
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+
+        self.assertEqual(module.build_shell_command(["echo hi > out.txt"]), "__QUOTED_COMMAND__echo hi > out.txt")
+        self.assertEqual(module.build_shell_command(["ls", "my dir"]), 'ls "my dir"')
+
+        class FakeShell:
+            commands = []
+            def execute_shell_command(self, command, command_identifier=None):
+                self.commands.append((command, command_identifier, os.environ.get("RUN_IDENTIFIER_cmd_1")))
+                print(f"ran {command}")
+                return 0 if command == "pwd" else 2
+
+        created = []
+        with tempfile.TemporaryDirectory(dir="/tmp") as tmp:
+            socket_path = os.path.join(tmp, "gds.sock")
+            daemon = module.GDSDaemon(socket_path, idle_timeout=0,
+                                      shell_factory=lambda: created.append(1) or FakeShell())
+            ready = threading.Event()
+            server = threading.Thread(target=daemon.serve_forever, args=(ready,), daemon=True)
+            server.start()
+            self.assertTrue(ready.wait(5))
+
+            # Not a --shell command: the caller keeps its normal path
+            self.assertIsNone(module.try_forward_shell_command(["--help"], socket_path))
+            out = io.StringIO()
+            code = module.request({"op": "run", "argv": ["cmd_1", "--shell", "pwd"], "cwd": tmp,
+                                   "env": {"RUN_IDENTIFIER_cmd_1": "True"}}, socket_path, stdout=out)
+            self.assertEqual(code, 0)
+            # Forwarded RUN variables only apply while the command runs
+            self.assertNotIn("RUN_IDENTIFIER_cmd_1", os.environ)
+            self.assertEqual(out.getvalue(), "ran pwd\n")
+            self.assertEqual(module.request({"op": "run", "argv": ["--shell", "ls"]}, socket_path,
+                                            stdout=io.StringIO()), 2)
+            # The shell is built once and reused across commands
+            self.assertEqual(created, [1])
+            self.assertEqual(FakeShell.commands[0], ("pwd", "cmd_1", "True"))
+            self.assertEqual(module.daemon_status(socket_path)["commands_served"], 2)
+
+            self.assertEqual(module.request({"op": "stop"}, socket_path), 0)
+            server.join(5)
+            self.assertFalse(os.path.exists(socket_path))
+            self.assertIsNone(module.daemon_status(socket_path))
+
+    def test_daemon_runs_real_shell_commands_on_main_thread(self):
+        """Commands served by the daemon run the real GoogleDriveShell on the main thread (signal handlers work)"""
+        import importlib.util
+        import io
+        import threading
+        spec = importlib.util.spec_from_file_location(
+            "gds_daemon", GDS_MODULES_DIR.parent / "gds_daemon.py")
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+
+        # Same import path the daemon uses in _create_shell
+        sys.path.insert(0, str(GDS_MODULES_DIR.parent))
+        sys.path.insert(0, str(GDS_MODULES_DIR))
+        try:
+            from google_drive_shell import GoogleDriveShell
+            import shell_commands
+            import progress_manager
+        except ImportError as e:
+            self.skipTest(f"GoogleDriveShell not importable: {e}")
+
+        with tempfile.TemporaryDirectory(dir="/tmp") as tmp:
+            def load_offline_config(shell):
+                shell.cache_config = {"local_equivalent": tmp}
+                shell.cache_config_loaded = True
+
+            real_pwd = shell_commands.shell_pwd
+            on_main_thread = []
+
+            def pwd_with_progress(command_identifier=None):
+                # interruptible_progress_loop registers a SIGINT handler like remote commands do
+                on_main_thread.append(threading.current_thread() is threading.main_thread())
+                progress_manager.interruptible_progress_loop("waiting", lambda: True, check_interval=0, max_attempts=1)
+                return real_pwd(command_identifier)
+
+            socket_path = os.path.join(tmp, "gds.sock")
+            daemon = module.GDSDaemon(socket_path, idle_timeout=0)
+            ready = threading.Event()
+            outputs = {}
+
+            def client():
+                if not ready.wait(5):
+                    return
+                for command in ("help", "pwd"):
+                    out = io.StringIO()
+                    code = module.request({"op": "run", "argv": ["--shell", command]}, socket_path, stdout=out)
+                    outputs[command] = (code, out.getvalue())
+                module.request({"op": "stop"}, socket_path)
+
+            client_thread = threading.Thread(target=client, daemon=True)
+            client_thread.start()
+            with patch.object(GoogleDriveShell, "_load_cache_config_direct", load_offline_config), \
+                 patch.object(shell_commands, "shell_pwd", pwd_with_progress):
+                daemon.serve_forever(ready)
+            client_thread.join(5)
+
+        self.assertIsInstance(daemon._shell, GoogleDriveShell)
+        self.assertEqual(outputs["help"][0], 0)
+        self.assertIn("pwd", outputs["help"][1])
+        self.assertEqual(on_main_thread, [True])
+        self.assertNotIn("signal only works in main thread", outputs["pwd"][1])
+        self.assertNotIn("Execute shell command failed", outputs["pwd"][1])
+        self.assertEqual(daemon.commands_served, 2)
+
+    def test_resumable_upload_resumes_and_verifies_md5(self):
+        """Direct uploads resume from the persisted session and check md5Checksum"""
+        module = load_gds_module('resumable_upload')
+        chunk = module.CHUNK_GRANULARITY
+        with tempfile.TemporaryDirectory() as tmp, FakeResumableDrive() as drive:
+            source = os.path.join(tmp, "model.bin")
+            with open(source, "wb") as f:
+                f.write(os.urandom(chunk * 2 + 1000))
+            store = module.UploadSessionStore(os.path.join(tmp, "sessions.json"))
+            
+            def uploader(**kwargs):
+                return module.ResumableUploader(lambda: "token", endpoint=drive.endpoint, chunk_size=chunk,
+                                                session_store=store, retry_delay=0, **kwargs)
+            
+            # The second chunk fails and retries are disabled: the session URI stays on disk
+            drive.fail_chunks = {1}
+            first = uploader(max_retries=0).upload_file(source, "folder1")
+            self.assertFalse(first["success"])
+            self.assertEqual(len(store._load()), 1)
+            
+            # A new process resumes after the first chunk instead of starting over
+            second = uploader().upload_file(source, "folder1")
+            self.assertTrue(second["success"], second)
+            self.assertEqual(second["resumed_from"], chunk)
+            self.assertTrue(second["md5_verified"])
+            self.assertEqual(len(drive.sessions), 1)
+            with open(source, "rb") as f:
+                self.assertEqual(bytes(drive.sessions["1"]["data"]), f.read())
+            self.assertEqual(store._load(), {})
+            
+            # Several files upload in parallel, each into its own session
+            others = []
+            for i in range(3):
+                path = os.path.join(tmp, f"part{i}.txt")
+                with open(path, "w") as f:
+                    f.write(f"content {i}")
+                others.append({"path": path, "target_folder_id": "folder2"})
+            results = uploader(max_workers=3).upload_files(others)
+            self.assertEqual([r["name"] for r in results], ["part0.txt", "part1.txt", "part2.txt"])
+            self.assertTrue(all(r["success"] for r in results))
+            
+            drive.corrupt_md5 = True
+            mismatch = uploader().upload_file(others[0]["path"], "folder2", name="copy.txt")
+            self.assertFalse(mismatch["success"])
+            self.assertIn("md5 mismatch", mismatch["error"])
+
+    def test_sync_manifest_delta_against_remote_md5(self):
+        """Only files whose md5 differs from Drive are selected for upload"""
+        import hashlib
+        module = load_gds_module('sync_manifest')
+        folder = 'application/vnd.google-apps.folder'
+        md5 = lambda data: hashlib.md5(data).hexdigest()
+        drive_service, fake_files = self._fake_service([
+            {"id": "src", "name": "src", "parents": ["proj"], "mimeType": folder},
+            {"id": "f1", "name": "main.py", "parents": ["proj"], "md5Checksum": md5(b"print(1)\n")},
+            {"id": "f2", "name": "util.py", "parents": ["src"], "md5Checksum": md5(b"old\n")},
+            {"id": "f3", "name": "stale.txt", "parents": ["src"], "md5Checksum": md5(b"x")},
+        ])
+        remote = module.list_remote_tree(drive_service.service, "proj")
+        self.assertEqual(set(remote), {"main.py", "src/util.py", "src/stale.txt"})
+        # One query per directory level
+        self.assertEqual(len(fake_files.list_queries), 2)
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            project = Path(tmp) / "project"
+            (project / "src").mkdir(parents=True)
+            (project / "main.py").write_bytes(b"print(1)\n")
+            (project / "src" / "util.py").write_bytes(b"new\n")
+            (project / "src" / "added.py").write_bytes(b"added\n")
+            
+            manifest = module.SyncManifest("proj", manifest_dir=tmp)
+            entries = manifest.scan_folder(project)
+            delta = module.compute_delta(entries, remote)
+            self.assertEqual(delta["changed"], ["src/added.py", "src/util.py"])
+            self.assertEqual(delta["unchanged"], ["main.py"])
+            self.assertEqual(delta["remote_only"], ["src/stale.txt"])
+            
+            # Recorded md5s are reused while size and mtime are unchanged
+            manifest.entries = entries
+            manifest.save()
+            reloaded = module.SyncManifest("proj", manifest_dir=tmp)
+            with patch.object(module, "file_md5", side_effect=AssertionError("re-hashed")):
+                self.assertEqual(reloaded.scan_folder(project), entries)
+            # Without API access the manifest is the reference
+            offline = module.compute_delta(entries, manifest_entries=reloaded.entries)
+            self.assertEqual(offline["changed"], [])
+
+    def test_folder_packer_parallel_ignore_and_stored_formats(self):
+        """Packing honours ignore rules, stores compressed formats and yields a valid zip"""
+        import zipfile
+        module = load_gds_module('folder_packer')
+        with tempfile.TemporaryDirectory() as tmp:
+            project = Path(tmp) / "project"
+            for sub in ("src", "build", "src/__pycache__", "data", "empty"):
+                (project / sub).mkdir(parents=True, exist_ok=True)
+            (project / ".gitignore").write_text("# comment\n*.log\nbuild/\n/data/raw.bin\n")
+            (project / "run.log").write_text("ignored")
+            (project / "build" / "out.o").write_text("ignored")
+            (project / "src" / "__pycache__" / "m.cpython-311.pyc").write_bytes(b"ignored")
+            (project / "data" / "raw.bin").write_bytes(b"ignored")
+            (project / "data" / "photo.jpg").write_bytes(os.urandom(4096))
+            for i in range(20):
+                (project / "src" / f"m{i}.py").write_text(f"value = {i}\n" * 200)
+            
+            result = module.pack_folder(project, workers=4, output_dir=tmp)
+            self.assertTrue(result["success"], result)
+            self.assertEqual(result["files_added"], 22)
+            with zipfile.ZipFile(result["zip_path"]) as zf:
+                self.assertIsNone(zf.testzip())
+                names = set(zf.namelist())
+                self.assertIn("project/src/m7.py", names)
+                self.assertIn("project/empty/", names)
+                self.assertIn("project/.gitignore", names)
+                for ignored in ("project/run.log", "project/build/out.o", "project/data/raw.bin",
+                                "project/src/__pycache__/m.cpython-311.pyc"):
+                    self.assertNotIn(ignored, names)
+                self.assertEqual(zf.getinfo("project/data/photo.jpg").compress_type, zipfile.ZIP_STORED)
+                self.assertEqual(zf.getinfo("project/src/m3.py").compress_type, zipfile.ZIP_DEFLATED)
+                self.assertEqual(zf.read("project/src/m3.py"), (project / "src" / "m3.py").read_bytes())
+            
+            # Concurrent packs of the same folder never share a file name
+            second = module.pack_folder(project, include=["src/m1.py"], output_dir=tmp)
+            self.assertNotEqual(second["zip_path"], result["zip_path"])
+            with zipfile.ZipFile(second["zip_path"]) as zf:
+                self.assertEqual(zf.namelist(), ["project/src/m1.py"])
+
+    def test_folder_packer_caps_inflight_bytes_and_falls_back(self):
+        """In-flight compression is bounded by bytes; without zipfile internals packing stays serial"""
+        import zipfile
+        module = load_gds_module('folder_packer')
+        with tempfile.TemporaryDirectory() as tmp:
+            project = Path(tmp) / "project"
+            project.mkdir()
+            for i in range(20):
+                (project / f"m{i}.py").write_text(f"value = {i:02d}\n" * 200)
+            file_size = (project / "m0.py").stat().st_size
+            
+            counts = {"started": 0, "written": 0, "peak": 0}
+            original_compress = module._compress
+            original_write = module._write_precompressed
+            
+            def tracking_compress(path):
+                counts["started"] += os.path.getsize(path)
+                counts["peak"] = max(counts["peak"], counts["started"] - counts["written"])
+                return original_compress(path)
+            
+            def tracking_write(zipf, zinfo, payload, crc, size):
+                counts["written"] += size
+                return original_write(zipf, zinfo, payload, crc, size)
+            
+            with patch.object(module, "MAX_INFLIGHT_BYTES", file_size * 2), \
+                    patch.object(module, "_compress", tracking_compress), \
+                    patch.object(module, "_write_precompressed", tracking_write):
+                result = module.pack_folder(project, workers=8, output_dir=tmp)
+            self.assertTrue(result["success"], result)
+            self.assertEqual(counts["written"], file_size * 20)
+            self.assertLessEqual(counts["peak"], file_size * 2)
+            with zipfile.ZipFile(result["zip_path"]) as zf:
+                self.assertIsNone(zf.testzip())
+            
+            with patch.object(module, "supports_precompressed", lambda zipf: False), \
+                    patch.object(module, "_compress", side_effect=AssertionError("parallel path used")):
+                fallback = module.pack_folder(project, workers=8, output_dir=tmp)
+            self.assertTrue(fallback["success"], fallback)
+            with zipfile.ZipFile(fallback["zip_path"]) as zf:
+                self.assertIsNone(zf.testzip())
+                self.assertEqual(zf.getinfo("project/m5.py").compress_type, zipfile.ZIP_DEFLATED)
+                self.assertEqual(zf.read("project/m5.py"), (project / "m5.py").read_bytes())
+
+    def test_command_coalescer_batches_concurrent_window_requests(self):
+        """Concurrent window requests share one combined window and each gets its result"""
+        module = load_gds_module('command_coalescer')
+        lock = threading.Lock()
+        shown = []
+
+        def acquire(request_id, timeout_seconds=30):
+            return lock.acquire(timeout=timeout_seconds)
+
+        def show(request):
+            shown.append(request)
+            time.sleep(0.2)
+            return {"action": "success"}
+
+        with tempfile.TemporaryDirectory() as tmp:
+            coalescer = module.CommandCoalescer(tmp, coalesce_window=0.3, max_batch=10)
+            barrier = threading.Barrier(4)
+            results = {}
+
+            def submit(i):
+                barrier.wait()
+                request = {"request_id": f"req_{i}", "title": f"cmd {i}",
+                           "command_text": f"echo {i} > tmp/result_{i}.json", "timeout_seconds": 60}
+                results[i] = coalescer.submit(request, acquire, lock.release, show)
+
+            threads = [threading.Thread(target=submit, args=(i,)) for i in range(4)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join(timeout=30)
+
+            self.assertEqual(len(shown), 1)
+            self.assertEqual(shown[0]["title"], "GDS Remote Commands (4)")
+            for i in range(4):
+                self.assertIn(f"echo {i} > tmp/result_{i}.json", shown[0]["command_text"])
+                self.assertEqual(results[i]["action"], "success")
+                self.assertEqual(results[i]["batch_size"], 4)
+            self.assertEqual(sorted(r["batch_index"] for r in results.values()), [0, 1, 2, 3])
+            self.assertEqual(os.listdir(tmp), [])
+
+            # A lone request is shown unchanged, so direct feedback keeps working
+            single = coalescer.submit({"request_id": "req_single", "title": "ls", "command_text": "ls"},
+                                      acquire, lock.release, lambda request: {"action": "direct_feedback", "request": request})
+            self.assertEqual(single["action"], "direct_feedback")
+            self.assertEqual(single["request"]["command_text"], "ls")
+
+    def test_edit_patch_applies_with_hash_precondition(self):
+        """edit --patch sends only changed lines and refuses to touch a file that changed remotely"""
+        import hashlib
+        module = load_gds_module('edit_patch')
+        original = [f"line {i}\n" for i in range(2000)]
+        modified = list(original)
+        modified[10] = "changed 10\n"
+        modified[1500:1502] = ["merged\n"]
+        modified.append("tail\n")
+
+        ops = module.compute_line_patch(original, modified)
+        self.assertEqual(len(ops), 3)
+        self.assertLess(module.patch_size(ops), 100)
+        self.assertEqual(module.apply_line_patch(original, ops), modified)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            target = Path(tmp) / "big file.py"
+            target.write_text("".join(original))
+            base_md5 = hashlib.md5(target.read_bytes()).hexdigest()
+            command = module.build_remote_patch_command(
+                str(target), ops, base_md5, module.content_md5(modified), backup_path=str(target) + ".bak")
+            self.assertNotIn("'", command)
+
+            # Remote file changed since it was cached: precondition fails, file untouched
+            target.write_text("".join(original) + "remote change\n")
+            run = subprocess.run(["bash", "-c", command], capture_output=True, text=True)
+            self.assertEqual(run.returncode, module.PATCH_PRECONDITION_FAILED)
+            self.assertTrue(target.read_text().endswith("remote change\n"))
+
+            target.write_text("".join(original))
+            run = subprocess.run(["bash", "-c", command], capture_output=True, text=True)
+            self.assertEqual(run.returncode, module.PATCH_OK, run.stdout + run.stderr)
+            self.assertEqual(target.read_text(), "".join(modified))
+            self.assertEqual((Path(tmp) / "big file.py.bak").read_text(), "".join(original))
+
+    def test_remote_grep_command_returns_only_matched_lines(self):
+        """The batched remote grep searches recursively and reports matches and missing files"""
+        module = load_gds_module('remote_grep')
+        with tempfile.TemporaryDirectory() as tmp:
+            src = Path(tmp) / "src"
+            (src / "pkg").mkdir(parents=True)
+            (src / "train.py").write_text("import os\ndef train(model):\n    pass\n")
+            (src / "pkg" / "it's.py").write_text("x = 1\ndef train_step():\n    return 'x' * 5000\n")
+            (src / "notes.txt").write_text("def train in notes\n")
+            (src / "log:12:x.py").write_text("# def train_log(\n")
+
+            command = module.build_remote_grep_command(
+                "def train\\w*\\(", [str(src), str(Path(tmp) / "missing.py")],
+                recursive=True, include=["*.py"])
+            self.assertNotIn("'", command)
+            run = subprocess.run(["bash", "-c", command], capture_output=True, text=True)
+            self.assertEqual(run.returncode, 2)  # missing.py does not exist
+
+            parsed = module.parse_grep_output(run.stdout, run.stderr)
+            self.assertEqual(parsed["matches"], {
+                str(src / "train.py"): {2: "def train(model):"},
+                str(src / "pkg" / "it's.py"): {2: "def train_step():"},
+                str(src / "log:12:x.py"): {1: "# def train_log("},
+            })
+            self.assertIn(str(Path(tmp) / "missing.py"), parsed["errors"])
+            self.assertFalse(parsed["truncated"])
+            # Missing files are reported per path; the matches are still valid
+            self.assertIsNone(module.grep_failure(run.returncode, parsed, run.stderr))
+
+            # An invalid pattern is a failure, not "no matches"
+            command = module.build_remote_grep_command("def (train", [str(src)], recursive=True)
+            run = subprocess.run(["bash", "-c", command], capture_output=True, text=True)
+            self.assertEqual(run.returncode, module.GREP_ERROR)
+            parsed = module.parse_grep_output(run.stdout, run.stderr)
+            self.assertEqual(parsed["matches"], {})
+            failure = module.grep_failure(run.returncode, parsed, run.stderr)
+            self.assertIsNotNone(failure)
+            self.assertIn(run.stderr.strip().splitlines()[0], failure)
+            self.assertIsNotNone(module.grep_failure(127, module.parse_grep_output("", ""), ""))
+
+            # Output capped by head: grep is killed by SIGPIPE but the search is truncated, not failed
+            (src / "big.txt").write_text("needle\n" * 200000)
+            command = module.build_remote_grep_command("needle", [str(src / "big.txt")], max_lines=10)
+            run = subprocess.run(["bash", "-c", command], capture_output=True, text=True)
+            self.assertEqual(run.returncode, module.GREP_MATCH)
+            parsed = module.parse_grep_output(run.stdout, run.stderr, max_lines=10)
+            self.assertEqual(len(parsed["matches"][str(src / "big.txt")]), 10)
+            self.assertTrue(parsed["truncated"])
+            self.assertIsNone(module.grep_failure(run.returncode, parsed, run.stderr))
+
+            command = module.build_remote_grep_command("x", [str(src / "pkg" / "it's.py")], max_line_chars=50)
+            run = subprocess.run(["bash", "-c", command], capture_output=True, text=True)
+            self.assertEqual(run.returncode, module.GREP_MATCH)
+            lines = module.parse_grep_output(run.stdout)["matches"][str(src / "pkg" / "it's.py")]
+            self.assertEqual(sorted(lines), [1, 3])
+            self.assertLessEqual(len(str(src / "pkg" / "it's.py")) + len(lines[3]), 50)
+
+    def test_drive_reader_single_query_lookup_and_range_reads(self):
+        """read/cat locate a file with one query and only fetch the bytes they need"""
+        module = load_gds_module('drive_reader')
+        content = b"".join(b"line %d\n" % i for i in range(5000))
+        files = FakeDriveFiles([
+            {"id": "d1", "name": "data.txt", "parents": ["p"], "mimeType": "application/vnd.google-apps.folder"},
+            {"id": "f1", "name": "data.txt", "parents": ["p"], "mimeType": "text/plain",
+             "size": str(len(content)), "content": content},
+            {"id": "f2", "name": "other.txt", "parents": ["p"], "mimeType": "text/plain"},
+        ])
+        service = MagicMock()
+        service.files.return_value = files
+
+        info = module.find_child(service, "p", "data.txt")
+        self.assertEqual(info["id"], "f1")  # file preferred over same-named folder
+        self.assertEqual(len(files.list_queries), 1)
+        self.assertIn("name='data.txt'", files.list_queries[0])
+        self.assertIsNone(module.find_child(service, "p", "missing.txt"))
+
+        prefix, complete = module.fetch_line_prefix(service, "f1", len(content), 10, chunk_size=64)
+        self.assertFalse(complete)
+        self.assertTrue(prefix.startswith(b"line 0\nline 1\n"))
+        self.assertGreaterEqual(prefix.count(b"\n"), 10)
+        self.assertLess(len(prefix), 200)
+
+        # Partial reads end at a line boundary, never inside a multi-byte character
+        text = "hello 世界 abc\n".encode("utf-8") * 200
+        files.files["f3"] = {"id": "f3", "name": "cjk.txt", "parents": ["p"], "mimeType": "text/plain",
+                             "size": str(len(text)), "content": text}
+        for chunk_size in range(1, 40):
+            prefix, complete = module.fetch_line_prefix(service, "f3", len(text), 3, chunk_size=chunk_size)
+            self.assertFalse(complete)
+            self.assertTrue(prefix.endswith(b"\n"))
+            self.assertEqual(set(prefix.decode("utf-8").splitlines()), {"hello 世界 abc"})
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "data.txt"
+            files.range_requests.clear()
+            written = module.download_to_file(service, "f1", path, size=len(content), chunk_size=10000)
+            self.assertEqual(written, len(content))
+            self.assertEqual(path.read_bytes(), content)
+            self.assertEqual(len(files.range_requests), -(-len(content) // 10000))
+
+    def test_text_operations_reuses_one_file_cache_manager(self):
+        """read/cat share one GDSCacheManager and only reload its config after another writer changes it"""
+        module = load_gds_module('text_operations')
+        sys.path.insert(0, str(GDS_MODULES_DIR.parent))
+        import cache_manager
+        real_manager = cache_manager.GDSCacheManager
+        with tempfile.TemporaryDirectory() as tmp:
+            created = []
+
+            def factory():
+                created.append(real_manager(cache_root=tmp))
+                return created[-1]
+
+            with patch.object(cache_manager, "GDSCacheManager", side_effect=factory):
+                manager = module.TextOperations(None, None)._get_file_cache_manager()
+                self.assertIs(module.TextOperations(None, None)._get_file_cache_manager(), manager)
+                self.assertEqual(len(created), 1)
+
+                other = real_manager(cache_root=tmp)
+                other.cache_config["files"]["/remote/a.txt"] = {"cache_file": "x"}
+                other._save_cache_config()
+                stat = other.cache_config_file.stat()
+                os.utime(other.cache_config_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+                self.assertIs(module.TextOperations(None, None)._get_file_cache_manager(), manager)
+                self.assertIn("/remote/a.txt", manager.cache_config["files"])
+                self.assertEqual(len(created), 1)
+
+    def test_folder_tree_batched_path_resolution(self):
+        """Cold path segments are resolved in one batch round trip and then served from the persistent tree"""
+        module = load_gds_module('folder_tree')
+        folder = 'application/vnd.google-apps.folder'
+        files = FakeDriveFiles([
+            {"id": "a", "name": "a", "parents": ["root"], "mimeType": folder},
+            {"id": "b", "name": "b", "parents": ["a"], "mimeType": folder},
+            {"id": "b2", "name": "b", "parents": ["elsewhere"], "mimeType": folder},
+            {"id": "c", "name": "c", "parents": ["b"], "mimeType": folder},
+            {"id": "d", "name": "d", "parents": ["c"], "mimeType": folder},
+            {"id": "e", "name": "e", "parents": ["root"], "mimeType": folder},
+        ])
+        batches = []
+
+        class FakeBatch:
+            def __init__(self, callback):
+                self.callback = callback
+                self.requests = []
+
+            def add(self, request, request_id=None):
+                self.requests.append((request_id, request))
+
+            def execute(self):
+                batches.append(len(self.requests))
+                for request_id, request in self.requests:
+                    self.callback(request_id, request.execute(), None)
+
+        service = MagicMock()
+        service.files.return_value = files
+        service.new_batch_http_request.side_effect = lambda callback: FakeBatch(callback)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            tree_file = Path(tmp) / "folder_tree.json"
+            tree = module.FolderTree(tree_file)
+            self.assertEqual(module.resolve_folder_chain(service, tree, "root", ["a", "b", "c", "d"]), ["a", "b", "c", "d"])
+            self.assertEqual(batches, [4])
+            self.assertIn("'root' in parents", files.list_queries[0])
+
+            # Warm segments cost nothing, also after reloading the tree from disk
+            files.list_queries.clear()
+            tree = module.FolderTree(tree_file)
+            self.assertEqual(module.resolve_folder_chain(service, tree, "root", ["a", "b", "c"]), ["a", "b", "c"])
+            self.assertEqual(tree.parent("d"), "c")
+            self.assertEqual(files.list_queries, [])
+
+            # A single cold segment is one name-filtered query; missing folders resolve to None
+            self.assertEqual(module.resolve_folder_chain(service, tree, "root", ["e"]), ["e"])
+            self.assertIsNone(module.resolve_folder_chain(service, tree, "a", ["missing"]))
+            self.assertEqual(len(files.list_queries), 2)
+            self.assertEqual(batches, [4])
+
+            # A complete listing (as done by ls) drops folders that no longer exist
+            tree.record_listing("root", [{"id": "a", "name": "a", "mimeType": folder}], complete=True)
+            self.assertIsNone(tree.child("root", "e"))
+            self.assertEqual(tree.child("root", "a"), "a")
+
+            # Expired entries are queried again
+            tree.ttl = -1
+            self.assertIsNone(tree.child("root", "a"))
+            self.assertIsNone(tree.parent("b"))
+
+    def test_folder_tree_invalidation_and_narrow_batches(self):
+        """rm/mv drop tree entries, other processes' changes are reloaded, batches skip locally known segments"""
+        module = load_gds_module('folder_tree')
+        folder = 'application/vnd.google-apps.folder'
+        files = FakeDriveFiles([
+            {"id": "a", "name": "a", "parents": ["root"], "mimeType": folder},
+            {"id": "b", "name": "b", "parents": ["a"], "mimeType": folder},
+            {"id": "c", "name": "c", "parents": ["b"], "mimeType": folder},
+            {"id": "d", "name": "d", "parents": ["c"], "mimeType": folder},
+            {"id": "e", "name": "e", "parents": ["d"], "mimeType": folder},
+        ])
+        batches = []
+        truncated = set()
+
+        class FakeBatch:
+            def __init__(self, callback):
+                self.callback = callback
+                self.requests = []
+
+            def add(self, request, request_id=None):
+                self.requests.append((request_id, request))
+
+            def execute(self):
+                batches.append(len(self.requests))
+                for request_id, request in self.requests:
+                    response = request.execute()
+                    if any(f["name"] in truncated for f in response["files"]):
+                        response = {"files": [], "nextPageToken": "more"}
+                    self.callback(request_id, response, None)
+
+        service = MagicMock()
+        service.files.return_value = files
+        service.new_batch_http_request.side_effect = lambda callback: FakeBatch(callback)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            tree_file = Path(tmp) / "folder_tree.json"
+            tree = module.FolderTree(tree_file)
+            # b/c is known locally (from an earlier ls of b) but a is not
+            tree.record("b", "b", "a")
+            tree.record("c", "c", "b")
+            self.assertEqual(module.resolve_folder_chain(service, tree, "root", ["a", "b", "c", "d"]),
+                             ["a", "b", "c", "d"])
+            # c is not queried by name: the tree links it once b is known
+            self.assertEqual(batches, [3])
+            self.assertFalse(any("name='c'" in q for q in files.list_queries))
+
+            # A truncated name-only page costs one targeted query for that segment only
+            tree.clear()
+            files.list_queries.clear()
+            truncated.add("c")
+            self.assertEqual(module.resolve_folder_chain(service, tree, "root", ["a", "b", "c", "d", "e"]),
+                             ["a", "b", "c", "d", "e"])
+            self.assertEqual(batches, [3, 5])
+            self.assertEqual(len(files.list_queries), 6)
+            self.assertIn("'b' in parents", files.list_queries[-1])
+
+            # rm of a path drops the folder and everything below it, but not its parents
+            self.assertTrue(module.invalidate_for_command(tree, 'rm -rf "/R/a/b"', "/R", "root"))
+            self.assertEqual(tree.child("root", "a"), "a")
+            self.assertIsNone(tree.child("a", "b"))
+            self.assertIsNone(tree.parent("e"))
+            # Relative mv operands are resolved from the shell's current folder
+            tree.record("b", "b", "a")
+            module.invalidate_for_command(tree, "mv b renamed", "/R", "root", cwd_folder_id="a")
+            self.assertIsNone(tree.child("a", "b"))
+            # Commands that do not delete or move anything keep the tree
+            self.assertFalse(module.invalidate_for_command(tree, "ls -la ~/a", "/R", "root"))
+            self.assertEqual(tree.child("root", "a"), "a")
+            # Paths that cannot be located (wildcards, cd, other roots) clear everything
+            module.invalidate_for_command(tree, "rm -rf ~/a/*", "/R", "root")
+            self.assertEqual(tree.folders, {})
+
+            # Listings are saved in batches; another process sees forgets after they are flushed
+            tree.record_listing("root", [{"id": "a", "name": "a", "mimeType": folder}])
+            self.assertNotIn('"a"', tree_file.read_text())
+            tree.flush(force=True)
+            other = module.FolderTree(tree_file)
+            self.assertEqual(other.child("root", "a"), "a")
+            module.invalidate_for_command(tree, "rm -r ~/a", "/R", "root")
+            other.reload_if_changed()
+            self.assertIsNone(other.child("root", "a"))
+
+    def test_venv_package_index_incremental_updates_and_full_scan(self):
+        """The package index updates from pip output and reconciles with one untruncated remote scan"""
+        module = load_gds_module('venv_package_index')
+        with tempfile.TemporaryDirectory() as tmp:
+            env_path = Path(tmp) / "env with space"
+            for i in range(60):
+                dist_info = env_path / f"pkg_{i}-1.{i}.dist-info"
+                dist_info.mkdir(parents=True)
+                (dist_info / "METADATA").write_text(f"Metadata-Version: 2.1\nName: Pkg_{i}\nVersion: 1.{i}\n")
+
+            run = subprocess.run(["bash", "-c", module.build_remote_scan_command(str(env_path))],
+                                 capture_output=True, text=True)
+            self.assertEqual(run.returncode, 0, run.stderr)
+            scanned = module.parse_scan_output("noise\n" + run.stdout)
+            self.assertEqual(len(scanned), 60)  # no longer truncated at 50
+            self.assertEqual(scanned["pkg-59"], "1.59")
+
+            index = module.VenvPackageIndex(path=Path(tmp) / "index.json", ttl=3600)
+            self.assertTrue(index.is_stale("env"))
+            index.seed("env", {"Old_Pkg": "0.1"})
+            self.assertTrue(index.is_stale("env"))  # seeded from venv_states.json, not scanned
+            index.replace("env", scanned)
+            self.assertFalse(index.is_stale("env"))
+
+            index.apply_install_output("env", "Collecting x\nSuccessfully installed Typing_Extensions-4.9.0 pkg-0-2.0\n")
+            index.apply_uninstall_output("env", "  Successfully uninstalled pkg-1-1.1\n")
+            reloaded = module.VenvPackageIndex(path=Path(tmp) / "index.json", ttl=3600)
+            packages = reloaded.get("env")
+            self.assertEqual(packages["typing-extensions"], "4.9.0")
+            self.assertEqual(packages["pkg-0"], "2.0")
+            self.assertNotIn("pkg-1", packages)
+            self.assertTrue(reloaded.has_package("env", "typing_extensions>=4"))
+            self.assertEqual(reloaded.generation("env"), 4)
+            self.assertFalse(reloaded.is_stale("env"))
+
+    def test_wheel_cache_builds_once_then_installs_offline(self):
+        """Built wheels are stored content-addressed and later installs use --no-index from the cache"""
+        import base64
+        import hashlib
+        import zipfile
+        module = load_gds_module('wheel_cache')
+        plan = module.build_install_plan(["Demo_Pkg>=1.0"], {0: ["Demo_Pkg"], 1: ["dep-a", "demo-pkg", "six"], 2: ["dep_a", "dep-b"]},
+                                         installed_packages={"six": "1.16"})
+        self.assertEqual(plan, {"0": ["Demo_Pkg>=1.0"], "1": ["dep-a"], "2": ["dep-b"]})
+
+        with tempfile.TemporaryDirectory() as tmp:
+            wheel_path = Path(tmp) / "demo_pkg-1.0-py3-none-any.whl"
+            files = {
+                "demo_pkg/__init__.py": "X = 1\n",
+                "demo_pkg-1.0.dist-info/METADATA": "Metadata-Version: 2.1\nName: demo-pkg\nVersion: 1.0\n",
+                "demo_pkg-1.0.dist-info/WHEEL": "Wheel-Version: 1.0\nGenerator: test\nRoot-Is-Purelib: true\nTag: py3-none-any\n",
+            }
+            record = ""
+            with zipfile.ZipFile(wheel_path, "w") as archive:
+                for name, text in files.items():
+                    archive.writestr(name, text)
+                    digest = base64.urlsafe_b64encode(hashlib.sha256(text.encode()).digest()).rstrip(b"=").decode()
+                    record += f"{name},sha256={digest},{len(text)}\n"
+                archive.writestr("demo_pkg-1.0.dist-info/RECORD", record + "demo_pkg-1.0.dist-info/RECORD,,\n")
+            wheelhouse = Path(tmp) / "REMOTE_ENV" / "wheelhouse"
+
+            command = module.build_remote_install_command(
+                [str(wheel_path)], {"0": [str(wheel_path)]}, str(wheelhouse), target=str(Path(tmp) / "env1"), jobs=2)
+            run = subprocess.run(["bash", "-c", command], capture_output=True, text=True)
+            self.assertEqual(run.returncode, 0, run.stdout + run.stderr)
+            self.assertIn("Stored 1 new wheels in cache", run.stdout)
+            sha256 = hashlib.sha256(wheel_path.read_bytes()).hexdigest()
+            self.assertTrue((wheelhouse / "objects" / sha256 / wheel_path.name).exists())
+            self.assertIn(f"#sha256={sha256}", (wheelhouse / "index.html").read_text())
+
+            venv_states = Path(tmp) / "venv_states.json"
+            venv_states.write_text(json.dumps({"environments": {"env2": {"packages": {"six": "1.16.0"}}}}))
+            command = module.build_remote_install_command(
+                ["demo-pkg"], {"0": ["demo-pkg"]}, str(wheelhouse), target=str(Path(tmp) / "env2"),
+                venv_states=str(venv_states), env_name="env2")
+            self.assertNotIn("'", command)
+            run = subprocess.run(["bash", "-c", command], capture_output=True, text=True)
+            self.assertEqual(run.returncode, 0, run.stdout + run.stderr)
+            self.assertIn("Installed from wheel cache", run.stdout)
+            self.assertIn("Successfully installed demo-pkg-1.0", run.stdout)
+            self.assertTrue((Path(tmp) / "env2" / "demo_pkg" / "__init__.py").exists())
+            # The remote state file that seeds package indexes on other machines is updated too
+            self.assertEqual(json.loads(venv_states.read_text())["environments"]["env2"]["packages"],
+                             {"six": "1.16.0", "demo-pkg": "1.0"})
+
+    def test_venv_snapshot_activation_unpacks_once_per_runtime(self):
+        """Snapshot activation unpacks the venv to local disk once and imports from there"""
+        module = load_gds_module('venv_snapshot')
+        with tempfile.TemporaryDirectory() as tmp:
+            venv_base = Path(tmp) / "REMOTE_ENV" / "venv"
+            env_path = venv_base / "myenv"
+            (env_path / "fastpkg").mkdir(parents=True)
+            (env_path / "fastpkg" / "__init__.py").write_text("VALUE = 1\n")
+            snapshot_path = module.get_snapshot_path(str(venv_base), "myenv")
+            local_root = str(Path(tmp) / "local")
+            activation_file = venv_base / "venv_pythonpath.sh"
+
+            run = subprocess.run(["bash", "-c", module.build_refresh_command(str(env_path), snapshot_path)],
+                                 capture_output=True, text=True)
+            self.assertEqual(run.stdout, "")  # no snapshot yet, nothing to refresh
+            run = subprocess.run(["bash", "-c", module.build_snapshot_command(str(env_path), snapshot_path)],
+                                 capture_output=True, text=True)
+            self.assertEqual(run.returncode, 0, run.stderr)
+            script = module.build_activation_script("myenv", str(env_path), snapshot_path, local_root=local_root)
+            subprocess.run(["bash", "-c", module.build_write_file_command(script, str(activation_file))], check=True)
+
+            use_env = f'source "{activation_file}" && python3 -c "import fastpkg; print(fastpkg.__file__, fastpkg.VALUE)"'
+            run = subprocess.run(["bash", "-c", use_env], capture_output=True, text=True)
+            self.assertEqual(run.returncode, 0, run.stderr)
+            self.assertTrue(run.stdout.startswith(str(Path(local_root) / "myenv")))
+            stamp = Path(local_root) / "myenv" / module.STAMP_FILENAME
+            first_mtime = stamp.stat().st_mtime_ns
+            run = subprocess.run(["bash", "-c", use_env], capture_output=True, text=True)
+            self.assertEqual(stamp.stat().st_mtime_ns, first_mtime)  # marker matched, not unpacked again
+
+            # pip changes the environment -> snapshot refreshed -> unpacked again on next use
+            (env_path / "fastpkg" / "__init__.py").write_text("VALUE = 2\n")
+            time.sleep(1.1)
+            subprocess.run(["bash", "-c", module.build_refresh_command(str(env_path), snapshot_path)], check=True,
+                           capture_output=True)
+            run = subprocess.run(["bash", "-c", use_env], capture_output=True, text=True)
+            self.assertTrue(run.stdout.strip().endswith(" 2"), run.stdout + run.stderr)
+
+
 def run_upload_improvements_tests():
     """Run only the upload improvements tests"""
     print(f"Running Google Drive Upload Improvements tests...")
@@ -265,5 +265,177 @@ class TestImg2Text(unittest.TestCase):
             except json.JSONDecodeError:
                 self.fail(f"Output is not valid JSON: {result.stdout}")
 
+    def test_analysis_cache_hit_miss_and_stale(self):
+        """Test shared analysis cache keyed by image content, mode, prompt and model"""
+        sys.path.insert(0, str(Path(__file__).parent.parent))
+        from EXTRACT_IMG_PROJ.cache_system import ImageCacheSystem
+        
+        cache_dir = Path(tempfile.mkdtemp())
+        try:
+            cache = ImageCacheSystem(cache_dir)
+            image_data = b"fake image bytes"
+            
+            self.assertIsNone(cache.get_cached_analysis(image_data, "academic", "prompt", "model-a"))
+            cache.store_analysis(image_data, "academic", "prompt", "model-a", "description")
+            
+            # Fresh hit from a new instance sharing the same store
+            cache = ImageCacheSystem(cache_dir)
+            self.assertEqual(cache.get_cached_analysis(image_data, "academic", "prompt", "model-a"),
+                             ("description", False))
+            # Any parameter change is a different entry
+            self.assertIsNone(cache.get_cached_analysis(image_data, "academic", "prompt", "model-b"))
+            self.assertIsNone(cache.get_cached_analysis(image_data, "general", "prompt", "model-a"))
+            # Entries older than max_age are still served, but flagged stale
+            self.assertEqual(cache.get_cached_analysis(image_data, "academic", "prompt", "model-a", max_age=-1),
+                             ("description", True))
+            
+            stats = cache.get_cache_stats()
+            self.assertEqual((stats['hits'], stats['stale_hits'], stats['misses']), (1, 1, 3))
+        finally:
+            shutil.rmtree(cache_dir)
+
+    def test_cache_writes_merge_with_newer_entries(self):
+        """Test a writer holding a stale copy keeps entries stored by others since it loaded"""
+        sys.path.insert(0, str(Path(__file__).parent.parent))
+        from EXTRACT_IMG_PROJ.cache_system import ImageCacheSystem
+        
+        cache_dir = Path(tempfile.mkdtemp())
+        try:
+            stale = ImageCacheSystem(cache_dir)
+            stale.store_analysis(b"image a", "academic", "prompt", "model", "old a")
+            
+            # Another process refreshes "a" and stores "b"
+            other = ImageCacheSystem(cache_dir)
+            other.store_analysis(b"image a", "academic", "prompt", "model", "new a")
+            other.store_analysis(b"image b", "academic", "prompt", "model", "b")
+            
+            # The stale instance writes through both store paths
+            stale.store_image_and_description(b"image c", "c")
+            stale.store_analysis(b"image d", "academic", "prompt", "model", "d")
+            
+            fresh = ImageCacheSystem(cache_dir)
+            self.assertEqual(fresh.get_cached_analysis(b"image a", "academic", "prompt", "model")[0], "new a")
+            self.assertEqual(fresh.get_cached_analysis(b"image b", "academic", "prompt", "model")[0], "b")
+            self.assertEqual(fresh.get_cached_analysis(b"image d", "academic", "prompt", "model")[0], "d")
+            self.assertEqual(fresh.get_cached_description(b"image c"), "c")
+            # A stale in-memory entry is replaced by the refreshed one on disk
+            self.assertEqual(stale.get_cached_analysis(b"image a", "academic", "prompt", "model", max_age=3600),
+                             ("new a", False))
+        finally:
+            shutil.rmtree(cache_dir)
+
+    def test_lookup_stats_concurrent_processes(self):
+        """Test lookup stats from concurrent processes are not lost"""
+        cache_dir = Path(tempfile.mkdtemp())
+        script = (
+            "import sys; sys.path.insert(0, sys.argv[1])\n"
+            "from pathlib import Path\n"
+            "from EXTRACT_IMG_PROJ.cache_system import ImageCacheSystem\n"
+            "cache = ImageCacheSystem(Path(sys.argv[2]))\n"
+            "for _ in range(50): cache.record_lookup('hit')\n"
+        )
+        try:
+            processes = [
+                subprocess.Popen([sys.executable, "-c", script, str(Path(__file__).parent.parent), str(cache_dir)])
+                for _ in range(4)
+            ]
+            for process in processes:
+                self.assertEqual(process.wait(timeout=60), 0)
+            sys.path.insert(0, str(Path(__file__).parent.parent))
+            from EXTRACT_IMG_PROJ.cache_system import ImageCacheSystem
+            self.assertEqual(ImageCacheSystem(cache_dir).get_lookup_stats()['hit'], 200)
+        finally:
+            shutil.rmtree(cache_dir)
+
+    def test_key_pool_token_bucket_and_cooldown(self):
+        """Test batch key pool spreads requests and skips keys in cooldown"""
+        sys.path.insert(0, str(Path(__file__).parent.parent))
+        try:
+            import IMG2TEXT
+        except ImportError as e:
+            self.skipTest(f"IMG2TEXT dependencies not available: {e}")
+        
+        pool = IMG2TEXT.KeyPool({"FREE": "k1", "PAID": "k2", "EMPTY": ""},
+                                requests_per_minute=1, cooldown_seconds=60)
+        self.assertEqual(len(pool), 2)
+        first, _ = pool.acquire()
+        second, _ = pool.acquire()
+        self.assertEqual({first, second}, {"FREE", "PAID"})
+        # Both buckets are empty now
+        self.assertEqual(pool.acquire(timeout=0.05), (None, None))
+        
+        pool = IMG2TEXT.KeyPool({"FREE": "k1", "PAID": "k2"}, requests_per_minute=60, cooldown_seconds=60)
+        pool.cooldown("FREE")
+        for _ in range(3):
+            self.assertEqual(pool.acquire(timeout=0.05)[0], "PAID")
+        self.assertEqual(pool.acquire(exclude={"PAID"}, timeout=0.05), (None, None))
+
+    def test_batch_lookup_serves_stale_entries_and_revalidates(self):
+        """Test batch mode applies the cache freshness window and refreshes stale entries in the background"""
+        sys.path.insert(0, str(Path(__file__).parent.parent))
+        try:
+            import IMG2TEXT
+        except ImportError as e:
+            self.skipTest(f"IMG2TEXT dependencies not available: {e}")
+        from EXTRACT_IMG_PROJ.cache_system import ImageCacheSystem
+        
+        cache_dir = Path(tempfile.mkdtemp())
+        try:
+            cache = ImageCacheSystem(cache_dir)
+            image_data = self.test_academic_image.read_bytes()
+            prompt = IMG2TEXT.get_prompt_instruction("general")
+            key = cache.store_analysis(image_data, "general", prompt, IMG2TEXT.DEFAULT_MODEL, "old description")
+            cache.cache[key]['timestamp'] = "2000-01-01T00:00:00"
+            with open(cache.cache_file, 'w', encoding='utf-8') as f:
+                json.dump(cache.cache, f)
+            
+            pool = MagicMock()
+            with patch.object(IMG2TEXT, "get_cache_system", return_value=ImageCacheSystem(cache_dir)), \
+                 patch.object(IMG2TEXT, "start_background_revalidation") as revalidate:
+                output = IMG2TEXT.analyze_image_with_pool(str(self.test_academic_image), pool, "general", key="k")
+            self.assertEqual((output["result"], output["cached"], output["stale"]), ("old description", True, True))
+            revalidate.assert_called_once_with(str(self.test_academic_image), "general", None, "k", IMG2TEXT.DEFAULT_MODEL)
+            pool.acquire.assert_not_called()
+        finally:
+            shutil.rmtree(cache_dir)
+
+    def test_batch_mode_strips_run_identifier(self):
+        """Test batch mode treats the RUN command_identifier as an identifier, not an image"""
+        sys.path.insert(0, str(Path(__file__).parent.parent))
+        try:
+            import IMG2TEXT
+        except ImportError as e:
+            self.skipTest(f"IMG2TEXT dependencies not available: {e}")
+        import io
+
+        seen = []
+        def fake_batch(image_paths, *args, **kwargs):
+            seen.extend(image_paths)
+            for image_path in image_paths:
+                yield IMG2TEXT.create_json_output(True, "Success", "text", image_path, "google")
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            data_file = os.path.join(temp_dir, "run.json")
+            env = {"RUN_IDENTIFIER_test_batch": "True", "RUN_DATA_FILE": data_file}
+            with patch.dict(os.environ, env), \
+                 patch.object(IMG2TEXT, "analyze_images_batch", side_effect=fake_batch), \
+                 patch.object(sys, "argv", ["IMG2TEXT", "--batch", "test_batch", "a.png", "b.png"]), \
+                 patch("sys.stdout", new_callable=io.StringIO):
+                IMG2TEXT.main()
+            with open(data_file, encoding="utf-8") as f:
+                output = json.load(f)
+        self.assertEqual(seen, ["a.png", "b.png"])
+        self.assertTrue(output["success"])
+        self.assertEqual([item["image_path"] for item in output["results"]], ["a.png", "b.png"])
+
+    def test_batch_help_output(self):
+        """Test that help output includes batch mode options"""
+        result = subprocess.run([
+            sys.executable, IMG2TEXT_PY, '--help'
+        ], capture_output=True, text=True, timeout=10)
+        self.assertEqual(result.returncode, 0)
+        self.assertIn('--batch', result.stdout)
+        self.assertIn('--workers', result.stdout)
+
 if __name__ == '__main__':
     unittest.main() 
\ No newline at end of file
@@ -73,6 +73,138 @@ class TestLearn(BaseTest):
         # Help output goes to stdout, not stderr
         self.assertIn('LEARN', result.stdout)
 
+    def test_generation_checkpoints_and_concurrent_section_questions(self):
+        """Steps resume from checkpoints, tutorials get a condensed paper context, section questions run in parallel"""
+        from unittest.mock import patch
+        import LEARN
+
+        calls = []
+        active = []
+        peak = []
+
+        def fake_call(prompt, model, max_tokens, step_name, max_retries=3, params=None):
+            calls.append(step_name)
+            active.append(step_name)
+            peak.append(len(active))
+            time.sleep(0.2)
+            active.remove(step_name)
+            if step_name == "tutorial.md生成":
+                sections = "\n\n".join(f"## Part {i}\n\n" + "Details of part %d. " % i * 20 for i in range(3))
+                return f"# Tutorial\n\n{sections}", {"model": model}, model
+            if step_name.startswith("question.md生成 ("):
+                return "### Question 1: Why?\n<details>\n<summary>Click to view answer</summary>\n\nBecause.\n\n</details>", {}, model
+            return f"{step_name} response", {}, model
+
+        paper = "\n\n".join(f"# Section {i}\n\n" + "Sentence about section %d. " % i * 200 for i in range(8))
+        params = {"type": "paper", "mode": "beginner", "style": "concise", "paper_path": "paper.pdf",
+                  "selected_model": "test/model", "max_tokens": 1000}
+
+        with tempfile.TemporaryDirectory() as temp_dir, \
+             patch.object(LEARN, "CHECKPOINT_DIR", Path(temp_dir)), \
+             patch.object(LEARN, "call_openrouter_with_retry", side_effect=fake_call), \
+             patch.object(LEARN, "generate_content_structure_prompt",
+                          side_effect=lambda p: p.update(paper_content=paper) or "brainstorm prompt"):
+            result = LEARN.generate_learning_content(dict(params))
+            self.assertEqual(calls[:2], ["头脑风暴", "tutorial.md生成"])
+            self.assertEqual(len(calls), 5)
+            self.assertGreater(max(peak), 1)
+
+            tutorial_prompt = result["prompts_and_responses"][1][0]
+            self.assertLess(len(tutorial_prompt), len(paper))
+            for i in range(8):
+                self.assertIn(f"# Section {i}", tutorial_prompt)
+
+            questions = result["question_response"]
+            self.assertEqual(re.findall(r"### Question (\d+):", questions), ["1", "2", "3"])
+            self.assertIn("## Part 2", questions)
+
+            # A rerun with the same inputs resumes entirely from checkpoints
+            calls.clear()
+            rerun = LEARN.generate_learning_content(dict(params))
+            self.assertEqual(calls, [])
+            self.assertEqual(rerun["question_response"], questions)
+
+            calls.clear()
+            LEARN.generate_learning_content(dict(params, no_resume=True))
+            self.assertEqual(len(calls), 5)
+
+            # Changing the model, max_tokens or temperature does not replay old responses
+            for changed in ({"selected_model": "other/model"}, {"max_tokens": 2000}, {"temperature": 0.2}):
+                calls.clear()
+                LEARN.generate_learning_content(dict(params, **changed))
+                self.assertEqual(len(calls), 5, changed)
+
+    def test_concurrent_failures_switch_model_once(self):
+        """Concurrent sub-generations share one (interactive) model switch per failed model"""
+        from unittest.mock import patch
+        import LEARN
+
+        prompts = []
+
+        def fake_selection(failed_model, free_models, paid_models, step_name):
+            prompts.append(step_name)
+            time.sleep(0.1)
+            return paid_models[0]
+
+        params = {"not_default": True}
+        with patch.object(LEARN, "get_openrouter_models",
+                          return_value=(["a/model", "b/model", "c/model"], {})), \
+             patch.object(LEARN, "interactive_model_selection", side_effect=fake_selection):
+            threads = [threading.Thread(target=lambda i=i: results.append(
+                LEARN.handle_model_switching("a/model", params, f"step {i}"))) for i in range(4)]
+            results = []
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        self.assertEqual(len(prompts), 1)
+        self.assertEqual(len(set(results)), 1)
+        self.assertIn(results[0], ("b/model", "c/model"))
+
+    def test_long_paper_chunked_map_reduce_summary(self):
+        """Papers over the token budget are chunked, summarized concurrently and cached per chunk"""
+        from unittest.mock import patch
+        import LEARN
+
+        paper = "\n\n".join(f"Paragraph {i}: " + "gaussian splatting rendering " * 40 for i in range(60))
+        calls = []
+        active = []
+        peak = []
+
+        def fake_call(prompt, model, max_tokens, step_name, max_retries=3, params=None):
+            calls.append(step_name)
+            active.append(step_name)
+            peak.append(len(active))
+            time.sleep(0.1)
+            active.remove(step_name)
+            return f"summary of {step_name}", {}, model
+
+        with tempfile.TemporaryDirectory() as temp_dir, \
+             patch.object(LEARN, "CHECKPOINT_DIR", Path(temp_dir)), \
+             patch.object(LEARN, "call_openrouter_with_retry", side_effect=fake_call):
+            budget = LEARN.count_tokens(paper) // 3
+            chunks = LEARN.chunk_paper_content(paper, budget // 2)
+            self.assertTrue(all(LEARN.count_tokens(chunk) <= budget // 2 for chunk in chunks))
+            self.assertEqual("".join(chunks).count("Paragraph"), 60)
+
+            summary = LEARN.summarize_paper_map_reduce(paper, {"selected_model": "test/model"}, budget)
+            self.assertEqual(len(calls), len(chunks))
+            self.assertGreater(max(peak), 1)
+            self.assertLessEqual(LEARN.count_tokens(summary), budget)
+            self.assertIn(f"## Part {len(chunks)}", summary)
+
+            # Unchanged chunks are served from the cache
+            calls.clear()
+            self.assertEqual(LEARN.summarize_paper_map_reduce(paper, {"selected_model": "test/model"}, budget), summary)
+            self.assertEqual(calls, [])
+
+        # Offline estimate without a tokenizer: CJK characters count individually
+        with patch.object(LEARN, "get_token_encoder", return_value=None):
+            self.assertEqual(LEARN.count_tokens("深度学习"), 4)
+            self.assertGreater(LEARN.count_tokens("word " * 100), len("word " * 100) // 8)
+            self.assertLessEqual(LEARN.count_tokens(LEARN.truncate_to_tokens("word " * 1000, 100)), 100)
+
 
 class TestLearnContentQuality(LongRunningTest):
     """Content quality tests for LEARN tool with different input types"""
@@ -163,6 +163,98 @@ class TestOpenRouter(BaseTest):
         ])
         self.assertIn('OPENROUTER - OpenRouter API 调用工具', result.stdout)
 
+    def test_response_cache_for_deterministic_calls(self):
+        """temperature=0 calls are served from the size-bounded response cache and report the saved cost"""
+        import tempfile
+        import OPENROUTER
+
+        response = MagicMock()
+        response.json.return_value = {
+            "choices": [{"message": {"content": "cached answer"}}],
+            "usage": {"prompt_tokens": 1000, "completion_tokens": 500, "total_tokens": 1500},
+        }
+        model_info = {"useable": True, "context_length": 8000, "input_cost_per_1m": 1.0, "output_cost_per_1m": 2.0}
+
+        with tempfile.TemporaryDirectory() as temp_dir, \
+             patch.object(OPENROUTER, "RESPONSE_CACHE_DIR", Path(temp_dir)), \
+             patch.object(OPENROUTER, "get_model_info", return_value=model_info), \
+             patch.object(OPENROUTER.requests, "post", return_value=response) as mock_post, \
+             patch.dict(os.environ, {"OPENROUTER_CACHE": "1"}):
+            first = OPENROUTER.call_openrouter_api("q", model="m", api_key="k", max_tokens=100, temperature=0)
+            second = OPENROUTER.call_openrouter_api("q", model="m", api_key="k", max_tokens=100, temperature=0)
+            self.assertEqual(mock_post.call_count, 1)
+            self.assertFalse(first["usage"]["cache_hit"])
+            self.assertEqual(second["content"], "cached answer")
+            self.assertTrue(second["usage"]["cache_hit"])
+            self.assertAlmostEqual(second["usage"]["saved_cost"], first["cost"])
+            self.assertEqual(second["cost"], 0)
+
+            # Different parameters, non-zero temperature and explicit opt-out all miss the cache
+            OPENROUTER.call_openrouter_api("q", model="m", api_key="k", max_tokens=200, temperature=0)
+            OPENROUTER.call_openrouter_api("q", model="m", api_key="k", max_tokens=100, temperature=0.7)
+            OPENROUTER.call_openrouter_api("q", model="m", api_key="k", max_tokens=100, temperature=0, cache=False)
+            self.assertEqual(mock_post.call_count, 4)
+            # Deterministic helper prompts opt in at any temperature
+            OPENROUTER.call_openrouter_api("h", model="m", api_key="k", max_tokens=100, temperature=0.7, cache=True)
+            OPENROUTER.call_openrouter_api("h", model="m", api_key="k", max_tokens=100, temperature=0.7, cache=True)
+            self.assertEqual(mock_post.call_count, 5)
+
+            # Least recently used entries are evicted once the cache exceeds its size bound
+            cache = OPENROUTER.ResponseCache(Path(temp_dir), max_bytes=0)
+            cache.evict()
+            self.assertEqual(list(Path(temp_dir).glob("*.json")), [])
+
+    def test_concurrent_model_probe_ranks_fastest_healthy_model(self):
+        """All configured models are probed in parallel and ranked by recorded latency and error rate"""
+        import tempfile
+        import threading
+        import time
+        import OPENROUTER
+
+        delays = {"slow/model": 0.3, "fast/model": 0.1, "broken/model": 0.1, "unprobed/model": None}
+        active = []
+        peak = []
+        lock = threading.Lock()
+
+        def fake_post(url, headers=None, json=None, timeout=None):
+            model_id = json["model"]
+            self.assertEqual(json["max_tokens"], 1)
+            with lock:
+                active.append(model_id)
+                peak.append(len(active))
+            time.sleep(delays[model_id])
+            with lock:
+                active.remove(model_id)
+            response = MagicMock()
+            response.status_code = 500 if model_id == "broken/model" else 200
+            response.json.return_value = {"choices": [{"message": {"content": "O"}}], "usage": {"total_tokens": 10}}
+            return response
+
+        models = {model_id: {"useable": True, "context_length": 8000} for model_id in delays}
+        with tempfile.TemporaryDirectory() as temp_dir, \
+             patch.object(OPENROUTER, "MODELS_CONFIG_FILE", Path(temp_dir) / "openrouter_models.json"), \
+             patch.object(OPENROUTER.requests, "post", side_effect=fake_post):
+            OPENROUTER.save_models(models)
+            result = OPENROUTER.probe_models(["broken/model", "slow/model", "fast/model"], api_key="k")
+            self.assertTrue(result["success"])
+            self.assertEqual(max(peak), 3)
+
+            saved = OPENROUTER.load_models()
+            fast = saved["fast/model"]["health"]
+            self.assertTrue(fast["healthy"])
+            self.assertLess(fast["latency"], saved["slow/model"]["health"]["latency"])
+            # A 1-token probe measures latency, not generation throughput
+            self.assertNotIn("tokens_per_second", fast)
+            measured = OPENROUTER.update_model_health(
+                {"health": {"probes": 1, "latency": 1.0, "tokens_per_second": 50.0}}, {"success": True, "latency": 0.5})
+            self.assertEqual(measured["health"]["tokens_per_second"], 50.0)
+            self.assertEqual(saved["broken/model"]["health"]["error_rate"], 1.0)
+            self.assertEqual(saved["broken/model"]["health"]["last_error"], "HTTP 500")
+            self.assertNotIn("health", saved["unprobed/model"])
+
+            self.assertEqual(OPENROUTER.get_ranked_models(),
+                             ["fast/model", "slow/model", "unprobed/model", "broken/model"])
+
     def test_no_api_key_error(self):
         """Test error when no API key is provided"""
         # Remove API key from environment
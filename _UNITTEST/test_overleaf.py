@@ -163,6 +163,110 @@ This is the conclusion section.
             self.assertIn('File not found', output_data['error'], "Should indicate file not found")
         except json.JSONDecodeError:
             self.fail(f"Invalid JSON output: {result.stdout}")
+    def test_incremental_build_dir_watch_and_format_cache(self):
+        """Builds reuse a persistent per-project build dir, pick up cached preamble formats and rebuild on change"""
+        import threading
+        import time
+        from unittest.mock import patch
+        import OVERLEAF
+
+        commands = []
+
+        def fake_run(cmd, cwd=None, env=None, stdout=None, **kwargs):
+            commands.append((cmd, env))
+            if cmd[0] == 'latexmk':
+                build_dir = Path(next(arg for arg in cmd if arg.startswith('-outdir=')).split('=', 1)[1])
+                (build_dir / "main.pdf").write_bytes(b"%PDF-1.4")
+                (build_dir / "main.fdb_latexmk").write_text("state")
+            else:
+                jobname = next(arg for arg in cmd if arg.startswith('-jobname=')).split('=', 1)[1]
+                outdir = Path(next(arg for arg in cmd if arg.startswith('-output-directory=')).split('=', 1)[1])
+                (outdir / f"{jobname}.fmt").write_bytes(b"fmt")
+            return subprocess.CompletedProcess(cmd, 0, stdout="")
+
+        project = self.test_dir / "paper"
+        output_file = self.test_dir / "result.json"
+        env = {"RUN_IDENTIFIER_t": "True", "RUN_DATA_FILE_t": str(output_file)}
+        with patch.object(OVERLEAF, "BUILD_CACHE_DIR", self.test_dir / "build_cache"), \
+             patch.object(OVERLEAF, "FORMAT_CACHE_DIR", self.test_dir / "format_cache"), \
+             patch.object(OVERLEAF.subprocess, "run", side_effect=fake_run), \
+             patch.dict(os.environ, env):
+            self.assertEqual(OVERLEAF.copy_template("ICPRS", project, "t"), 0)
+            tex_file = project / "main.tex"
+
+            # Projects copied from a template share the template's preamble format
+            template_tex = OVERLEAF.get_templates_dir() / "ICPRS" / "main.tex"
+            self.assertEqual(OVERLEAF.get_format_name(tex_file), OVERLEAF.get_format_name(template_tex))
+            self.assertTrue(OVERLEAF.build_preamble_format(template_tex)["success"])
+            self.assertTrue(OVERLEAF.build_preamble_format(tex_file)["cached"])
+
+            self.assertEqual(OVERLEAF.compile_latex(tex_file, "t"), 0)
+            first = json.loads(output_file.read_text())
+            self.assertFalse(first["incremental"])
+            self.assertEqual(first["format"], OVERLEAF.get_format_name(tex_file))
+            cmd, cmd_env = commands[-1]
+            self.assertIn(f"-fmt={first['format']}", cmd[3])
+            self.assertTrue(cmd_env["TEXFORMATS"].startswith(str(self.test_dir / "format_cache")))
+
+            # The build dir keeps its state and is not cleaned, so the next build is incremental
+            self.assertEqual(OVERLEAF.compile_latex(tex_file, "t"), 0)
+            second = json.loads(output_file.read_text())
+            self.assertTrue(second["incremental"])
+            self.assertEqual(second["build_dir"], first["build_dir"])
+            self.assertTrue(Path(second["output"]).exists())
+            self.assertFalse((project / "main.fdb_latexmk").exists())
+
+            # Editing the preamble invalidates the cached format
+            tex_file.write_text(tex_file.read_text().replace("\\usepackage{times}", "\\usepackage{amsmath}"))
+            self.assertIsNone(OVERLEAF.find_cached_format(tex_file))
+
+            # --clean-build starts over
+            self.assertEqual(OVERLEAF.compile_latex(tex_file, "t", clean_build=True), 0)
+            self.assertFalse(json.loads(output_file.read_text())["incremental"])
+
+            # Watch mode recompiles once a source file changes
+            commands.clear()
+            timer = threading.Timer(0.3, lambda: (project / "references.bib").write_text("@misc{x}"))
+            timer.start()
+            self.assertEqual(OVERLEAF.watch_latex(tex_file, "t", interval=0.05, max_builds=2), 0)
+            timer.join()
+            self.assertEqual(len(commands), 2)
+
+    def test_included_subdirectory_files_get_build_subdirs(self):
+        """\\include{chapters/intro} writes chapters/intro.aux under -outdir, so the build dir mirrors source subdirectories"""
+        from unittest.mock import patch
+        import OVERLEAF
+
+        project = self.test_dir / "thesis"
+        (project / "chapters").mkdir(parents=True)
+        (project / "figures").mkdir()
+        (project / "chapters" / "intro.tex").write_text("Introduction text.")
+        tex_file = project / "main.tex"
+        tex_file.write_text("\\documentclass{article}\n\\begin{document}\n\\include{chapters/intro}\n\\end{document}\n")
+
+        def fake_run(cmd, cwd=None, env=None, stdout=None, **kwargs):
+            # 与pdflatex一样：不会创建\include文件所在的aux子目录
+            build_dir = Path(next(arg for arg in cmd if arg.startswith('-outdir=')).split('=', 1)[1])
+            with open(build_dir / "chapters" / "intro.aux", 'w') as f:
+                f.write("\\relax")
+            (build_dir / "main.pdf").write_bytes(b"%PDF-1.4")
+            return subprocess.CompletedProcess(cmd, 0, stdout="")
+
+        output_file = self.test_dir / "result.json"
+        env = {"RUN_IDENTIFIER_t": "True", "RUN_DATA_FILE_t": str(output_file)}
+        with patch.object(OVERLEAF, "BUILD_CACHE_DIR", self.test_dir / "build_cache"), \
+             patch.object(OVERLEAF, "FORMAT_CACHE_DIR", self.test_dir / "format_cache"), \
+             patch.object(OVERLEAF.subprocess, "run", side_effect=fake_run), \
+             patch.dict(os.environ, env):
+            self.assertEqual(OVERLEAF.compile_latex(tex_file, "t"), 0)
+
+        result = json.loads(output_file.read_text())
+        self.assertTrue(result["success"])
+        build_dir = Path(result["build_dir"])
+        self.assertTrue((build_dir / "chapters" / "intro.aux").exists())
+        # 不含.tex文件的目录不需要镜像
+        self.assertFalse((build_dir / "figures").exists())
+
 
 class TestOverleafIntegration(unittest.TestCase):
     """Integration tests for OVERLEAF with test data"""
@@ -8,6 +8,8 @@ import os
 import sys
 import json
 import subprocess
+import tempfile
+import time
 from pathlib import Path
 from unittest.mock import patch, MagicMock
 
@@ -16,6 +18,7 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 
 try:
     from SEARCH_PAPER import MultiPlatformPaperSearcher, is_run_environment, write_to_json_output, main as search_paper_main
+    from SEARCH_PAPER import QueryResultCache, UrlValidityCache, LocalPaperIndex
 except ImportError as e:
     MultiPlatformPaperSearcher = None
     is_run_environment = None
@@ -130,6 +133,168 @@ class TestSearchPaper(unittest.TestCase):
         
         self.assertEqual(results, [])
 
+    def test_sources_searched_concurrently_and_cached(self):
+        """Sources run in parallel and a repeated (normalized) query is served from the TTL cache"""
+        calls = []
+
+        def slow_source(name):
+            def search(*args, **kwargs):
+                calls.append(name)
+                time.sleep(0.3)
+                return [{"title": f"{name} paper", "pdf_url": f"https://{name}.org/p.pdf"}]
+            return search
+
+        with tempfile.TemporaryDirectory() as tmp:
+            self.searcher.query_cache = QueryResultCache(Path(tmp) / "query_cache.json", ttl=60)
+            self.searcher.url_cache = UrlValidityCache(Path(tmp) / "url_validity.json")
+            with patch.object(self.searcher, '_search_arxiv', side_effect=slow_source("arxiv")), \
+                 patch.object(self.searcher, '_search_google_scholar', side_effect=slow_source("scholar")), \
+                 patch.object(self.searcher, '_save_results'):
+                start = time.time()
+                result = self.searcher.search_papers_with_thresholds("Deep  Learning", max_results=5)
+                self.assertLess(time.time() - start, 0.55)
+                self.assertEqual([p["title"] for p in result["papers"]], ["arxiv paper", "scholar paper"])
+
+                start = time.time()
+                result = self.searcher.search_papers_with_thresholds("deep learning ", max_results=5)
+                self.assertLess(time.time() - start, 0.1)
+                self.assertEqual(result["source_results"], {"arxiv": 1, "google_scholar": 1})
+                self.assertEqual(sorted(calls), ["arxiv", "scholar"])
+
+                # Different limits are a different cache key
+                self.searcher.search_papers_with_thresholds("deep learning", max_results=6, sources=["arxiv"])
+                self.assertEqual(calls.count("arxiv"), 2)
+
+    def test_pdf_url_validation_uses_domain_cache(self):
+        """PDF links are validated concurrently, in order, and cached per domain"""
+        checked = []
+
+        def check(url):
+            checked.append(url)
+            return "bad" not in url
+
+        with tempfile.TemporaryDirectory() as tmp:
+            self.searcher.url_cache = UrlValidityCache(Path(tmp) / "url_validity.json")
+            with patch.object(self.searcher, '_check_pdf_url', side_effect=check):
+                candidates = [{"title": f"p{i}", "pdf_url": f"https://site{i % 2}.edu/{'bad' if i == 1 else i}.pdf"}
+                              for i in range(6)]
+                papers = self.searcher._filter_valid_pdf_papers(candidates, threshold=3)
+                self.assertEqual([p["title"] for p in papers], ["p0", "p2", "p3"])
+
+                checked.clear()
+                self.assertTrue(self.searcher._validate_pdf_url("https://site0.edu/0.pdf"))
+                self.assertFalse(self.searcher._validate_pdf_url("https://site1.edu/bad.pdf"))
+                self.assertEqual(checked, [])  # cached per URL
+
+                for i in range(3):
+                    self.searcher._validate_pdf_url(f"https://trusted.edu/{i}.pdf")
+                checked.clear()
+                self.assertTrue(self.searcher._validate_pdf_url("https://trusted.edu/new.pdf"))
+                self.assertEqual(checked, [])  # domain trusted after consecutive valid results
+
+                # Trust expires; the next URL is checked again and a failure resets the streak
+                self.searcher.url_cache.domains["trusted.edu"]["last_valid"] -= UrlValidityCache.TRUSTED_TTL + 1
+                self.assertTrue(self.searcher._validate_pdf_url("https://trusted.edu/again.pdf"))
+                self.assertEqual(checked, ["https://trusted.edu/again.pdf"])
+                self.assertTrue(self.searcher._validate_pdf_url("https://trusted.edu/next.pdf"))
+                self.assertEqual(len(checked), 1)
+                self.searcher.url_cache.domains["trusted.edu"]["last_valid"] -= UrlValidityCache.TRUSTED_TTL + 1
+                self.assertFalse(self.searcher._validate_pdf_url("https://trusted.edu/bad.pdf"))
+                self.assertEqual(len(checked), 2)
+                self.assertIsNone(self.searcher.url_cache.get("https://trusted.edu/other.pdf"))
+
+            self.searcher.url_cache.save()
+            reloaded = UrlValidityCache(Path(tmp) / "url_validity.json")
+            self.assertFalse(reloaded.get("https://site1.edu/bad.pdf"))
+
+    def test_remove_duplicates_merges_near_duplicates_across_sources(self):
+        """Same paper from different sources is merged by arXiv ID, DOI or similar title"""
+        papers = [
+            {"title": "3D Gaussian Splatting for Real-Time Radiance Field Rendering", "source": "arxiv",
+             "url": "http://arxiv.org/abs/2308.04079v1", "authors": ["Bernhard Kerbl"], "abstract": "Short.",
+             "citation_count": None},
+            {"title": "3D gaussian splatting for real-time radiance field rendering.", "source": "google_scholar",
+             "url": "https://dl.acm.org/doi/10.1145/3592433", "authors": ["B Kerbl", "G Kopanas"],
+             "abstract": "A longer abstract from Scholar.", "citation_count": 5000, "venue": "ACM TOG"},
+            {"title": "Rendering radiance fields in real time", "source": "google_scholar",
+             "pdf_url": "https://arxiv.org/pdf/2308.04079v2.pdf"},
+            {"title": "NeRF: Representing Scenes as Neural Radiance Fields for View Synthesis", "source": "arxiv"},
+            {"title": "NeRF: representing scenes as neural radiance fields for view synthesis (ECCV)",
+             "source": "google_scholar"},
+            {"title": "Language Models are Few-Shot Learners: GPT-3", "source": "arxiv"},
+            {"title": "Language Models are Few-Shot Learners: GPT-4", "source": "arxiv"},
+            {"title": "Segment Anything in High Quality", "source": "arxiv", "url": "http://arxiv.org/abs/2306.01567"},
+            {"title": "Segment Anything in High Quality", "source": "arxiv", "url": "http://arxiv.org/abs/2306.99999"},
+        ]
+        unique = self.searcher._remove_duplicates(papers)
+        self.assertEqual([p["title"] for p in unique], [
+            "3D Gaussian Splatting for Real-Time Radiance Field Rendering",
+            "NeRF: Representing Scenes as Neural Radiance Fields for View Synthesis",
+            "Language Models are Few-Shot Learners: GPT-3",
+            "Language Models are Few-Shot Learners: GPT-4",
+            "Segment Anything in High Quality",
+            "Segment Anything in High Quality",
+        ])
+        gaussian = unique[0]
+        self.assertEqual(gaussian["arxiv_id"], "2308.04079")
+        self.assertEqual(gaussian["doi"], "10.1145/3592433")
+        self.assertEqual(gaussian["sources"], ["arxiv", "google_scholar"])
+        self.assertEqual(gaussian["citation_count"], 5000)
+        self.assertEqual(gaussian["venue"], "ACM TOG")
+        self.assertEqual(gaussian["abstract"], "A longer abstract from Scholar.")
+        self.assertEqual(len(gaussian["authors"]), 2)
+
+    def test_local_index_updated_on_save_and_searched_offline(self):
+        """Saved results are indexed incrementally and --local answers from the index without network"""
+        with tempfile.TemporaryDirectory() as tmp:
+            self.searcher.output_dir = Path(tmp)
+            self.searcher.results_dir = Path(tmp) / "results"
+            self.searcher.papers_dir = Path(tmp) / "papers"
+            self.searcher.results_dir.mkdir()
+            self.searcher.papers_dir.mkdir()
+
+            # A result file saved before the index existed is picked up by sync_files
+            with open(self.searcher.results_dir / "search_results_old.json", 'w', encoding='utf-8') as f:
+                json.dump({"papers": [{"title": "Neural Radiance Fields", "authors": ["Ben Mildenhall"],
+                                       "abstract": "View synthesis with an MLP."}]}, f)
+
+            self.searcher._save_results({"papers": [
+                {"title": "3D Gaussian Splatting for Real-Time Rendering", "authors": ["Bernhard Kerbl"],
+                 "abstract": "Radiance field rendering with anisotropic gaussians."},
+                {"title": "Attention Is All You Need", "authors": ["Ashish Vaswani"],
+                 "abstract": "The transformer architecture."},
+            ]})
+            markdown = Path(tmp) / "nerf.md"
+            markdown.write_text("We use positional encoding and volume rendering.", encoding='utf-8')
+            pdf = Path(tmp) / "nerf_paper.pdf"
+            pdf.write_bytes(b"%PDF-1.4")
+            self.searcher.local_index.add_markdown("Neural Radiance Fields", str(markdown), str(pdf))
+
+            with patch.object(self.searcher.session, 'get', side_effect=AssertionError("network used")), \
+                 patch.object(self.searcher.session, 'head', side_effect=AssertionError("network used")):
+                result = self.searcher.search_local("gaussian splatting (kerbl)", max_results=5)
+                self.assertEqual(result["source_results"], {"local": 1})
+                self.assertEqual(result["papers"][0]["title"], "3D Gaussian Splatting for Real-Time Rendering")
+
+                # Markdown content is searchable; the old result file was indexed once
+                papers = self.searcher.search_local("positional encoding", max_results=5)["papers"]
+                self.assertEqual([p["title"] for p in papers], ["Neural Radiance Fields"])
+                self.assertEqual(papers[0]["markdown_path"], str(markdown))
+                self.assertEqual(papers[0]["pdf_path"], str(pdf))
+                self.assertEqual(self.searcher.local_index.sync_files(self.searcher.results_dir, self.searcher.papers_dir), 0)
+
+                # Per-paper files written by the local search don't keep the query-specific fields
+                with open(self.searcher.papers_dir / "Neural Radiance Fields.json", 'r', encoding='utf-8') as f:
+                    saved = json.load(f)
+                for field in LocalPaperIndex.TRANSIENT_FIELDS:
+                    self.assertNotIn(field, saved)
+
+            # Re-saving metadata keeps the indexed markdown content
+            self.searcher._save_results({"papers": [{"title": "Neural Radiance Fields", "abstract": "NeRF."}]})
+            reopened = LocalPaperIndex(Path(tmp) / "paper_index.db")
+            self.assertEqual(reopened.search("volume rendering")[0]["title"], "Neural Radiance Fields")
+            self.assertEqual(reopened.search("!!!"), [])
+
     def test_help_output(self):
         """Test help output"""
         with patch('sys.argv', ['SEARCH_PAPER.py', '--help']):